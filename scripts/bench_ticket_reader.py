@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Benchmark the fast ticket reader against the previous TicketLoader parse path.
+
+Writes a synthetic `.tickets` directory (tk-style frontmatter, title and a
+markdown body) to a temporary directory, then times:
+
+    legacy  - read_text + FRONTMATTER_PATTERN + yaml.safe_load + title regex
+              (what TicketLoader._parse_ticket did before tf.ticket_reader)
+    fast    - TicketLoader.load_all() without the metadata cache
+    parallel - the same with --workers/--pool (only with --workers > 1)
+
+and the same for loading every ticket body. Results are checked to match.
+
+Usage:
+    python scripts/bench_ticket_reader.py [--tickets 10000] [--body-bytes 2000] [--repeat 3]
+        [--workers 8] [--pool thread|process]
+"""
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import yaml  # noqa: E402
+
+from tf.ticket_loader import FRONTMATTER_PATTERN, LOAD_POOLS, Ticket, TicketLoader  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark ticket frontmatter parsing")
+    parser.add_argument("--tickets", type=int, default=10000, help="Number of ticket files (default: 10000)")
+    parser.add_argument("--body-bytes", type=int, default=2000, help="Approximate body size (default: 2000)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement, best is reported (default: 3)")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed (default: 1)")
+    parser.add_argument("--workers", type=int, default=1, help="Also time a parallel load with this many workers")
+    parser.add_argument("--pool", choices=LOAD_POOLS, default="thread", help="Pool for --workers (default: thread)")
+    return parser.parse_args()
+
+
+def write_tickets(tickets_dir: Path, count: int, body_bytes: int, seed: int) -> None:
+    rng = random.Random(seed)
+    paragraph = "Implement the change described in the plan and cover it with tests. "
+    for index in range(count):
+        ticket_id = f"pt-{index:05d}"
+        deps = [f"pt-{rng.randrange(count):05d}" for _ in range(rng.randint(0, 3))]
+        tags = rng.sample(["tf", "backlog", "component:cli", "component:api", "component:ralph", "bug"], 3)
+        body = "\n".join(
+            f"## Section {n}\n\n{paragraph * 3}\n" for n in range(max(1, body_bytes // 250))
+        )
+        (tickets_dir / f"{ticket_id}.md").write_text(
+            "---\n"
+            f"id: {ticket_id}\n"
+            f"status: {rng.choice(['open', 'in_progress', 'closed'])}\n"
+            f"deps: [{', '.join(deps)}]\n"
+            "links: []\n"
+            "created: 2026-02-09T00:28:00Z\n"
+            "type: task\n"
+            f"priority: {rng.randint(0, 4)}\n"
+            "assignee: legout\n"
+            f"external-ref: plan-bench-{index % 50}\n"
+            f"tags: [{', '.join(tags)}]\n"
+            "---\n"
+            f"# Ticket {index}: synthetic benchmark ticket\n\n"
+            f"{body}",
+            encoding="utf-8",
+        )
+
+
+def legacy_load(loader: TicketLoader, tickets_dir: Path) -> List[tuple]:
+    results = []
+    for path in sorted(tickets_dir.glob("*.md")):
+        content = path.read_text(encoding="utf-8")
+        match = FRONTMATTER_PATTERN.match(content)
+        frontmatter = yaml.safe_load(match.group(1)) or {}
+        results.append((frontmatter, loader._extract_title(content)))
+    return results
+
+
+def fast_load(loader: TicketLoader) -> List[tuple]:
+    return [(ticket.id, ticket.status, ticket.title) for ticket in loader.load_all()]
+
+
+def best_of(repeat: int, func: Callable[[], object]) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> int:
+    args = parse_args()
+    with tempfile.TemporaryDirectory(prefix="tf-bench-tickets-") as tmp:
+        tickets_dir = Path(tmp) / ".tickets"
+        tickets_dir.mkdir()
+        write_tickets(tickets_dir, args.tickets, args.body_bytes, args.seed)
+        loader = TicketLoader(tickets_dir, use_cache=False, workers=1)
+
+        # Same metadata either way
+        legacy = legacy_load(loader, tickets_dir)
+        fast = loader.load_all()
+        assert [fm["id"] for fm, _ in legacy] == [t.id for t in fast]
+        assert [(fm["status"], fm["deps"], fm["created"]) for fm, _ in legacy] == [
+            (t.status, t.deps, t.created) for t in fast
+        ]
+        assert [title for _, title in legacy] == [t.title for t in fast]
+
+        # Tickets without a body offset take the old full read + regex path
+        legacy_tickets = [
+            Ticket(id=ticket.id, status=ticket.status, title=ticket.title, file_path=ticket.file_path)
+            for ticket in fast
+        ]
+        assert [t.body for t in legacy_tickets] == [t.body for t in fast]
+
+        def load_bodies(tickets: List[Ticket]) -> None:
+            for ticket in tickets:
+                ticket._body_loaded = False
+                ticket.body
+
+        results = {
+            "tickets": args.tickets,
+            "legacy_metadata_secs": best_of(args.repeat, lambda: legacy_load(loader, tickets_dir)),
+            "fast_metadata_secs": best_of(args.repeat, lambda: fast_load(loader)),
+            "legacy_body_secs": best_of(args.repeat, lambda: load_bodies(legacy_tickets)),
+            "fast_body_secs": best_of(args.repeat, lambda: load_bodies(fast)),
+        }
+        if args.workers > 1:
+            parallel = TicketLoader(tickets_dir, use_cache=False, workers=args.workers, pool=args.pool)
+            assert fast_load(parallel) == fast_load(loader)
+            results["parallel_metadata_secs"] = best_of(args.repeat, lambda: fast_load(parallel))
+    results["metadata_speedup"] = results["legacy_metadata_secs"] / results["fast_metadata_secs"]
+    print(json.dumps({k: round(v, 3) if isinstance(v, float) else v for k, v in results.items()}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
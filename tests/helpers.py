@@ -0,0 +1,39 @@
+"""Shared helpers for the Ralph tests."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Iterable, Optional
+
+from tf.ticket_loader import Ticket
+
+
+class FakeClock:
+    """Injectable monotonic clock; advance it by changing `now`."""
+
+    def __init__(self, now: float = 0.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_ticket(
+    ticket_id: str,
+    status: str = "open",
+    *,
+    title: Optional[str] = None,
+    deps: Iterable[str] = (),
+    tags: Iterable[str] = (),
+    priority: int = 2,
+) -> Ticket:
+    """Build an in-memory ticket (titled with its ID unless given)."""
+    return Ticket(
+        id=ticket_id,
+        status=status,
+        title=ticket_id if title is None else title,
+        file_path=Path(f"{ticket_id}.md"),
+        deps=list(deps),
+        tags=list(tags),
+        priority=priority,
+    )
@@ -478,6 +478,25 @@ status: closed
             assert board.total == 1
             assert board.get_by_id("abc-123").column == BoardColumn.CLOSED
 
+    def test_refresh_reclassifies_dependents(self):
+        """refresh() picks up a closed dependency and reuses the view when unchanged."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tickets_dir = Path(tmpdir)
+            dep = tickets_dir / "t-1.md"
+            dep.write_text("---\nid: t-1\nstatus: open\n---\n# Dep\n")
+            (tickets_dir / "t-2.md").write_text("---\nid: t-2\nstatus: open\ndeps: [t-1]\n---\n# Child\n")
+            
+            classifier = BoardClassifier(tickets_dir=tickets_dir)
+            board = classifier.refresh()
+            assert board.get_by_id("t-2").column == BoardColumn.BLOCKED
+            assert classifier.refresh() is board
+            
+            dep.write_text("---\nid: t-1\nstatus: closed\n---\n# Dep (done)\n")
+            board = classifier.refresh()
+            
+            assert board.get_by_id("t-1").column == BoardColumn.CLOSED
+            assert board.get_by_id("t-2").column == BoardColumn.READY
+
 
 class TestCaseInsensitiveStatus:
     """Test case-insensitive status handling."""
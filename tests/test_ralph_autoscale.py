@@ -0,0 +1,165 @@
+"""Tests for adaptive parallel worker counts (tf.ralph.autoscale).
+
+Tests cover:
+- Scaling up only with demand and headroom, at most once per interval
+- Scaling down on memory pressure, load, slowdown and error/timeout rates
+- Reading load and MemAvailable
+- ralph_start growing the pool from autoscaleMinWorkers
+"""
+
+from __future__ import annotations
+
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+from tf import ralph as ralph_module
+from tf.ralph.autoscale import Autoscaler, Outcome, SystemSample, sample_system
+from tf.ralph.scheduler import WorkerSlot
+
+from tests.helpers import FakeClock
+
+
+def scaler(sample: SystemSample, **kwargs) -> tuple[Autoscaler, FakeClock]:
+    clock = FakeClock()
+    options = dict(max_load=1.0, min_free_mem_mb=1000, worker_mem_mb=500, interval_secs=10)
+    options.update(kwargs)
+    return Autoscaler(1, 4, sampler=lambda: sample, clock=clock, **options), clock
+
+
+def test_scales_up_with_demand_once_per_interval() -> None:
+    autoscaler, clock = scaler(SystemSample(load_per_cpu=0.2, mem_available_mb=8000))
+
+    assert autoscaler.decide(saturated=False) is None
+    clock.now += 10
+    decision = autoscaler.decide(saturated=True)
+    assert decision is not None
+    assert (decision.previous, decision.workers, decision.reason) == (1, 2, "headroom")
+    assert decision.signals["mem_available_mb"] == 8000
+    # Rate limited
+    assert autoscaler.decide(saturated=True) is None
+    clock.now += 10
+    assert autoscaler.decide(saturated=True).workers == 3
+
+
+def test_scale_up_needs_load_and_memory_headroom() -> None:
+    busy, _ = scaler(SystemSample(load_per_cpu=0.8, mem_available_mb=8000))
+    tight, _ = scaler(SystemSample(load_per_cpu=0.1, mem_available_mb=1200))
+    unknown, _ = scaler(SystemSample())
+
+    assert busy.decide(saturated=True) is None
+    assert tight.decide(saturated=True) is None
+    assert unknown.decide(saturated=True).workers == 2
+
+
+def test_scales_down_on_memory_and_load() -> None:
+    sample = SystemSample(load_per_cpu=0.1, mem_available_mb=500)
+    autoscaler, clock = scaler(sample)
+    autoscaler.workers = 3
+
+    assert autoscaler.decide(saturated=True).reason == "memory"
+    sample.mem_available_mb = 8000
+    sample.load_per_cpu = 2.5
+    clock.now += 10
+    decision = autoscaler.decide(saturated=True)
+    assert (decision.workers, decision.reason) == (1, "load")
+    # Never below the minimum
+    clock.now += 10
+    assert autoscaler.decide(saturated=True) is None
+
+
+def test_error_rate_halves_workers() -> None:
+    autoscaler, clock = scaler(SystemSample(load_per_cpu=0.1, mem_available_mb=8000))
+    autoscaler.workers = 4
+    autoscaler.record(Outcome(4, 100))
+    autoscaler.record(Outcome(4, 100, ok=False, timed_out=True))
+
+    # A running worker already hitting provider errors counts too
+    decision = autoscaler.decide(saturated=True, running=[3, 0])
+    assert (decision.workers, decision.reason) == (2, "error_rate")
+    assert decision.signals["error_rate"] == 0.5
+
+
+def test_slowdown_scales_down_and_blocks_scale_up() -> None:
+    autoscaler, clock = scaler(SystemSample(load_per_cpu=0.1, mem_available_mb=8000))
+    for _ in range(3):
+        autoscaler.record(Outcome(1, 100))
+        autoscaler.record(Outcome(2, 200))
+    autoscaler.workers = 2
+
+    assert autoscaler.slowdown() == 2.0
+    assert autoscaler.decide(saturated=True).reason == "slowdown"
+    # Back at one worker, the slow samples at two keep it from growing again
+    clock.now += 10
+    assert autoscaler.decide(saturated=True) is None
+
+
+def test_sample_system_reads_meminfo(tmp_path: Path) -> None:
+    meminfo = tmp_path / "meminfo"
+    meminfo.write_text("MemTotal:  16384000 kB\nMemAvailable:  2048000 kB\n")
+
+    sample = sample_system(meminfo)
+
+    assert sample.mem_available_mb == 2000
+    assert sample_system(tmp_path / "missing").mem_available_mb is None
+
+
+def test_ralph_start_grows_pool(tmp_path: Path) -> None:
+    ralph_dir = tmp_path / ".tf" / "ralph"
+    ralph_dir.mkdir(parents=True)
+    tickets = [f"T-{index}" for index in range(6)]
+    done: list[str] = []
+    procs: list[subprocess.Popen] = []
+    concurrency: list[int] = []
+    decisions: list[tuple[int, int, str]] = []
+
+    def fake_ready(_query: str) -> list[str]:
+        return [t for t in tickets if t not in done]
+
+    def fake_start(ticket: str, iteration: int, **kwargs) -> WorkerSlot:
+        proc = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(0.3)"])
+        procs.append(proc)
+        concurrency.append(sum(1 for p in procs if p.poll() is None))
+        return WorkerSlot(
+            ticket=ticket, proc=proc, worktree_path=tmp_path / ticket, iteration=iteration,
+            components=kwargs["components"],
+        )
+
+    def fake_update_state(_ralph_dir, _root, ticket, status, *args, **kwargs) -> None:
+        done.append(ticket)
+
+    def healthy(config: dict, max_workers: int) -> Autoscaler:
+        return Autoscaler(1, max_workers, interval_secs=0, sampler=SystemSample)
+
+    config = dict(ralph_module.DEFAULTS)
+    config.update({"parallelWorkers": 3, "autoscale": True, "logLevel": "quiet", "sleepBetweenRetries": 50})
+
+    with patch.object(ralph_module, "find_project_root", return_value=tmp_path), \
+            patch.object(ralph_module, "load_config", return_value=config), \
+            patch.object(ralph_module, "git_repo_root", return_value=tmp_path), \
+            patch.object(ralph_module, "ensure_pi", return_value=True), \
+            patch.object(ralph_module, "prompt_exists", return_value=True), \
+            patch.object(ralph_module, "lock_acquire", return_value=True), \
+            patch.object(ralph_module, "lock_release"), \
+            patch.object(ralph_module, "set_state"), \
+            patch.object(ralph_module, "backlog_empty", side_effect=lambda _c: not fake_ready("")), \
+            patch.object(ralph_module, "list_ready_tickets", side_effect=fake_ready), \
+            patch.object(ralph_module, "extract_components", side_effect=lambda t, p, u: {f"component:{t}"}), \
+            patch.object(ralph_module, "_start_parallel_ticket", side_effect=fake_start), \
+            patch.object(ralph_module, "_remove_worktree", return_value=subprocess.CompletedProcess([], 0)), \
+            patch.object(ralph_module, "update_state", side_effect=fake_update_state), \
+            patch.object(ralph_module, "resolve_attempt_timeout_ms", return_value=0), \
+            patch.object(ralph_module, "create_autoscaler", side_effect=healthy), \
+            patch.object(
+                ralph_module.RalphLogger,
+                "log_scale_decision",
+                side_effect=lambda workers, previous, reason, **kw: decisions.append((previous, workers, reason)),
+            ):
+        rc = ralph_module.ralph_start(["--quiet"])
+
+    assert rc == 0
+    assert sorted(done) == tickets
+    assert concurrency[0] == 1
+    assert max(concurrency) == 3
+    assert decisions[:2] == [(1, 2, "headroom"), (2, 3, "headroom")]
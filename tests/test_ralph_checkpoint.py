@@ -0,0 +1,215 @@
+"""Tests for crash-safe checkpoint and resume (tf.ralph.checkpoint).
+
+Tests cover:
+- Writing, reading and clearing .tf/ralph/checkpoint.json
+- Picking the phase to resume from by artifact timestamps
+- `tf ralph start --resume` in serial and parallel mode
+- Keeping the checkpoint when the loop is interrupted
+- Replacing a lock written before the last reboot
+"""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from tf import ralph as ralph_module
+from tf.ralph.checkpoint import DONE, Checkpoint, resume_flags, resume_phase
+from tf.ralph.scheduler import WorkerSlot
+
+
+def write_artifacts(artifact_dir: Path, *names: str, age: float = 0.0) -> None:
+    artifact_dir.mkdir(parents=True, exist_ok=True)
+    for name in names:
+        path = artifact_dir / name
+        path.write_text(f"# {name}\n")
+        if age:
+            stamp = time.time() - age
+            os.utime(path, (stamp, stamp))
+
+
+def test_checkpoint_round_trip(tmp_path: Path) -> None:
+    checkpoint = Checkpoint(tmp_path, mode="parallel")
+    checkpoint.start("pt-a", iteration=3, worktree=tmp_path / "pool-1", started_at=100.0)
+    checkpoint.start("pt-b", iteration=4)
+    # A restart keeps the first attempt's start time
+    checkpoint.start("pt-a", iteration=3, attempt=1, worktree=tmp_path / "pool-2")
+    checkpoint.finish("pt-b")
+
+    loaded = Checkpoint.load(tmp_path)
+    assert loaded is not None
+    assert (loaded.mode, loaded.iteration, list(loaded.tickets)) == ("parallel", 5, ["pt-a"])
+    inflight = loaded.tickets["pt-a"]
+    assert (inflight.attempt, inflight.started_at) == (1, 100.0)
+    assert inflight.worktree == str(tmp_path / "pool-2")
+    assert not list(tmp_path.glob(".checkpoint.json.*"))
+
+    checkpoint.clear()
+    assert Checkpoint.load(tmp_path) is None
+    (tmp_path / "checkpoint.json").write_text("{not json")
+    assert Checkpoint.load(tmp_path) is None
+
+    Checkpoint(tmp_path / "dry", enabled=False).start("pt-a", iteration=0)
+    assert not (tmp_path / "dry").exists()
+
+
+def test_resume_phase_uses_fresh_artifacts(tmp_path: Path) -> None:
+    started = time.time() - 60
+    # research.md from an earlier attempt does not count
+    write_artifacts(tmp_path, "research.md", age=3600)
+    assert resume_phase(tmp_path, started) is None
+
+    write_artifacts(tmp_path, "implementation.md")
+    assert resume_phase(tmp_path, started) == "review"
+    assert resume_flags("--auto", "review") == "--auto --resume-from review"
+
+    write_artifacts(tmp_path, "review.md", "fixes.md", "close-summary.md")
+    assert resume_phase(tmp_path, started) == DONE
+    assert resume_flags("--auto", DONE) == "--auto"
+    assert resume_flags("--auto", None) == "--auto"
+
+
+def _base_config(**overrides) -> dict:
+    config = dict(ralph_module.DEFAULTS)
+    config.update({"logLevel": "quiet", "sleepBetweenTickets": 0, "sleepBetweenRetries": 50, "maxIterations": 10})
+    config.update(overrides)
+    return config
+
+
+def test_serial_resume_skips_finished_phases(tmp_path: Path) -> None:
+    ralph_dir = tmp_path / ".tf" / "ralph"
+    tickets_dir = tmp_path / ".tf" / "knowledge" / "tickets"
+    started = time.time() - 60
+    checkpoint = Checkpoint(ralph_dir)
+    checkpoint.start("DONE-1", iteration=0, started_at=started)
+    checkpoint.start("HALF-1", iteration=1, started_at=started)
+    write_artifacts(tickets_dir / "DONE-1", "implementation.md", "review.md", "close-summary.md")
+    write_artifacts(tickets_dir / "HALF-1", "research.md", "implementation.md")
+    states: dict[str, str] = {}
+    runs: list[tuple[str, str]] = []
+
+    def fake_ready(_query: str) -> list[str]:
+        return [t for t in ("HALF-1", "NEW-1") if t not in states]
+
+    def fake_run(ticket: str, workflow: str, flags: str, *args, **kwargs) -> int:
+        runs.append((ticket, flags))
+        return 0
+
+    def fake_update_state(_ralph_dir, _root, ticket, status, *args, **kwargs) -> None:
+        states[ticket] = status
+
+    with patch.object(ralph_module, "find_project_root", return_value=tmp_path), \
+            patch.object(ralph_module, "load_config", return_value=_base_config()), \
+            patch.object(ralph_module, "lock_acquire", return_value=True), \
+            patch.object(ralph_module, "lock_release"), \
+            patch.object(ralph_module, "set_state"), \
+            patch.object(ralph_module, "backlog_empty", side_effect=lambda _c: not fake_ready("")), \
+            patch.object(ralph_module, "list_ready_tickets", side_effect=fake_ready), \
+            patch.object(ralph_module, "select_ticket", side_effect=lambda _q: (fake_ready("") or [None])[0]), \
+            patch.object(ralph_module, "run_ticket", side_effect=fake_run), \
+            patch.object(ralph_module, "update_state", side_effect=fake_update_state):
+        rc = ralph_module.ralph_start(["--quiet", "--resume"])
+
+    assert rc == 0
+    # The closed ticket is only recorded; the interrupted one goes first and skips to review
+    assert states == {"DONE-1": "COMPLETE", "HALF-1": "COMPLETE", "NEW-1": "COMPLETE"}
+    assert runs == [("HALF-1", "--auto --quiet --resume-from review"), ("NEW-1", "--auto --quiet")]
+    # Normal exit removes the checkpoint
+    assert not (ralph_dir / "checkpoint.json").exists()
+
+
+def test_interrupted_run_keeps_checkpoint(tmp_path: Path) -> None:
+    ralph_dir = tmp_path / ".tf" / "ralph"
+    ralph_dir.mkdir(parents=True)
+
+    def interrupt(ticket: str, *args, **kwargs) -> int:
+        raise KeyboardInterrupt
+
+    with patch.object(ralph_module, "find_project_root", return_value=tmp_path), \
+            patch.object(ralph_module, "load_config", return_value=_base_config()), \
+            patch.object(ralph_module, "lock_acquire", return_value=True), \
+            patch.object(ralph_module, "lock_release"), \
+            patch.object(ralph_module, "set_state"), \
+            patch.object(ralph_module, "backlog_empty", return_value=False), \
+            patch.object(ralph_module, "list_ready_tickets", return_value=["pt-a"]), \
+            patch.object(ralph_module, "select_ticket", return_value="pt-a"), \
+            patch.object(ralph_module, "run_ticket", side_effect=interrupt):
+        with pytest.raises(KeyboardInterrupt):
+            ralph_module.ralph_start(["--quiet"])
+
+    checkpoint = Checkpoint.load(ralph_dir)
+    assert checkpoint is not None
+    assert list(checkpoint.tickets) == ["pt-a"]
+    assert checkpoint.tickets["pt-a"].iteration == 0
+
+
+def test_parallel_resume_reattaches_worktrees(tmp_path: Path) -> None:
+    ralph_dir = tmp_path / ".tf" / "ralph"
+    started = time.time() - 60
+    checkpoint = Checkpoint(ralph_dir, mode="parallel")
+    for index, ticket in enumerate(("HALF-1", "DONE-1", "GONE-1")):
+        checkpoint.start(ticket, iteration=index, worktree=tmp_path / "worktrees" / ticket, started_at=started)
+    artifacts = Path(".tf") / "knowledge" / "tickets"
+    write_artifacts(tmp_path / "worktrees" / "HALF-1" / artifacts / "HALF-1", "implementation.md", "review.md")
+    write_artifacts(tmp_path / "worktrees" / "DONE-1" / artifacts / "DONE-1", "close-summary.md")
+    states: dict[str, str] = {}
+    launches: list[tuple[str, str, object]] = []
+
+    def fake_ready(_query: str) -> list[str]:
+        return [t for t in ("HALF-1", "GONE-1") if t not in states]
+
+    def fake_start(ticket: str, iteration: int, **kwargs) -> WorkerSlot:
+        launches.append((ticket, kwargs["workflow_flags"], kwargs.get("worktree")))
+        return WorkerSlot(
+            ticket=ticket,
+            proc=subprocess.Popen([sys.executable, "-c", "pass"]),
+            worktree_path=kwargs.get("worktree") or tmp_path / ticket,
+            iteration=iteration,
+            components=kwargs["components"],
+        )
+
+    def fake_update_state(_ralph_dir, _root, ticket, status, *args, **kwargs) -> None:
+        states[ticket] = status
+
+    config = _base_config(parallelWorkers=2, parallelWorktreePool=False, parallelAutoMerge=False)
+    with patch.object(ralph_module, "find_project_root", return_value=tmp_path), \
+            patch.object(ralph_module, "load_config", return_value=config), \
+            patch.object(ralph_module, "git_repo_root", return_value=tmp_path), \
+            patch.object(ralph_module, "ensure_pi", return_value=True), \
+            patch.object(ralph_module, "prompt_exists", return_value=True), \
+            patch.object(ralph_module, "lock_acquire", return_value=True), \
+            patch.object(ralph_module, "lock_release"), \
+            patch.object(ralph_module, "set_state"), \
+            patch.object(ralph_module, "backlog_empty", side_effect=lambda _c: not fake_ready("")), \
+            patch.object(ralph_module, "list_ready_tickets", side_effect=fake_ready), \
+            patch.object(ralph_module, "extract_components", side_effect=lambda t, p, u: {f"component:{t}"}), \
+            patch.object(ralph_module, "_start_parallel_ticket", side_effect=fake_start), \
+            patch.object(ralph_module, "_remove_worktree", return_value=subprocess.CompletedProcess([], 0)), \
+            patch.object(ralph_module, "update_state", side_effect=fake_update_state), \
+            patch.object(ralph_module, "resolve_attempt_timeout_ms", return_value=0):
+        rc = ralph_module.ralph_start(["--quiet", "--resume"])
+
+    assert rc == 0
+    assert states == {"HALF-1": "COMPLETE", "DONE-1": "COMPLETE", "GONE-1": "COMPLETE"}
+    assert launches == [
+        ("HALF-1", "--auto --quiet --resume-from fix", tmp_path / "worktrees" / "HALF-1"),
+        # Its worktree is gone: selected again and started over
+        ("GONE-1", "--auto --quiet", None),
+    ]
+    assert not (ralph_dir / "checkpoint.json").exists()
+
+
+def test_lock_from_before_reboot_is_stale(tmp_path: Path) -> None:
+    lock = tmp_path / "lock"
+    # A live PID (ours) that the old loop happened to have
+    lock.write_text(f"{os.getpid()} 2026-01-01T00:00:00Z\n")
+
+    assert ralph_module.lock_acquire(tmp_path) is False
+    with patch.object(ralph_module, "_boot_time", return_value=time.time() + 60):
+        assert ralph_module.lock_acquire(tmp_path) is True
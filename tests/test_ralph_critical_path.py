@@ -0,0 +1,122 @@
+"""Tests for critical-path ticket scoring (tf.ralph.critical_path).
+
+Tests cover:
+- Downstream depth and fan-out over the deps graph
+- Ranking order and tie-breaking by priority
+- schedulingMode resolution and score reporting in log_batch_selected
+"""
+
+from __future__ import annotations
+
+import io
+from pathlib import Path
+
+import pytest
+
+from tf import ralph as ralph_module
+from tf.logger import LogLevel, RalphLogger
+from tf.ralph.critical_path import TicketScore, rank_tickets, score_tickets
+
+from tests.helpers import make_ticket
+
+
+class TestScoreTickets:
+    """Tests for score_tickets."""
+
+    def test_depth_and_fanout(self) -> None:
+        # a -> b -> c -> d (chain), e -> {f, g} (fan-out), h isolated
+        tickets = [
+            make_ticket("a"),
+            make_ticket("b", deps=["a"]),
+            make_ticket("c", deps=["b"]),
+            make_ticket("d", deps=["c"]),
+            make_ticket("e"),
+            make_ticket("f", deps=["e"]),
+            make_ticket("g", deps=["e"]),
+            make_ticket("h"),
+        ]
+
+        scores = score_tickets(tickets)
+
+        assert (scores["a"].depth, scores["a"].fanout) == (3, 1)
+        assert (scores["e"].depth, scores["e"].fanout) == (1, 2)
+        assert (scores["h"].depth, scores["h"].fanout) == (0, 0)
+        assert scores["d"].depth == 0
+
+    def test_closed_tickets_are_ignored(self) -> None:
+        tickets = [
+            make_ticket("a"),
+            make_ticket("b", status="closed", deps=["a"]),
+            make_ticket("c", deps=["a"]),
+        ]
+
+        scores = score_tickets(tickets)
+
+        assert "b" not in scores
+        assert (scores["a"].depth, scores["a"].fanout) == (1, 1)
+
+    def test_cycles_terminate(self) -> None:
+        tickets = [make_ticket("a", deps=["b"]), make_ticket("b", deps=["a"])]
+
+        scores = score_tickets(tickets)
+
+        assert set(scores) == {"a", "b"}
+
+    def test_long_chain_does_not_recurse(self) -> None:
+        tickets = [make_ticket("t0")] + [make_ticket(f"t{i}", deps=[f"t{i - 1}"]) for i in range(1, 3000)]
+
+        assert score_tickets(tickets)["t0"].depth == 2999
+
+
+class TestRankTickets:
+    """Tests for rank_tickets."""
+
+    def test_depth_then_fanout_then_priority(self) -> None:
+        scores = {
+            "shallow": TicketScore("shallow", depth=0, fanout=0, priority=0),
+            "deep": TicketScore("deep", depth=3, fanout=1, priority=4),
+            "wide": TicketScore("wide", depth=1, fanout=3, priority=2),
+            "narrow": TicketScore("narrow", depth=1, fanout=1, priority=2),
+            "urgent": TicketScore("urgent", depth=1, fanout=1, priority=0),
+        }
+
+        ranked = rank_tickets(["shallow", "narrow", "urgent", "wide", "deep", "unknown"], scores)
+
+        assert ranked == ["deep", "wide", "urgent", "narrow", "shallow", "unknown"]
+
+
+class TestRalphSchedulingMode:
+    """Tests for schedulingMode wiring in tf.ralph."""
+
+    def test_resolve_scheduling_mode(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.delenv("RALPH_SCHEDULING_MODE", raising=False)
+        assert ralph_module.resolve_scheduling_mode({}) == "queue"
+        assert ralph_module.resolve_scheduling_mode({"schedulingMode": "critical-path"}) == "critical-path"
+        assert ralph_module.resolve_scheduling_mode({"schedulingMode": "bogus"}) == "queue"
+        monkeypatch.setenv("RALPH_SCHEDULING_MODE", "critical-path")
+        assert ralph_module.resolve_scheduling_mode({}) == "critical-path"
+
+    def test_rank_ready_tickets_reads_ticket_files(self, tmp_path: Path) -> None:
+        tickets_dir = tmp_path / ".tickets"
+        tickets_dir.mkdir()
+        for ticket_id, deps in (("leaf", []), ("root", []), ("mid", ["root"]), ("tail", ["mid"])):
+            (tickets_dir / f"{ticket_id}.md").write_text(
+                f"---\nid: {ticket_id}\nstatus: open\ndeps: [{', '.join(deps)}]\n---\n# {ticket_id}\n"
+            )
+
+        ranked, scores = ralph_module.rank_ready_tickets(["leaf", "root"], tmp_path)
+
+        assert ranked == ["root", "leaf"]
+        assert scores["root"].depth == 2
+
+    def test_log_batch_selected_reports_scores(self) -> None:
+        output = io.StringIO()
+        logger = RalphLogger(level=LogLevel.INFO, output=output)
+        scores = {"root": TicketScore("root", depth=2, fanout=1, priority=2).to_dict()}
+
+        logger.log_batch_selected(["root"], {"root": ["component:api"]}, reason="critical_path", scores=scores)
+
+        content = output.getvalue()
+        assert "reason=critical_path" in content
+        assert "root_score=" in content
+        assert "[scores: root=depth:2/fanout:1/priority:2]" in content
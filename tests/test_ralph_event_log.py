@@ -0,0 +1,122 @@
+"""Tests for the append-only Ralph event log (tf.ralph.event_log).
+
+Tests cover:
+- Appending ticket results and state changes updates the counters snapshot
+- Rendering progress.md in the original layout (newest entries first)
+- Importing an existing progress.md and rebuilding lost counters
+- Compaction and concurrent appends
+"""
+
+from __future__ import annotations
+
+import json
+import stat
+import threading
+from pathlib import Path
+from unittest.mock import patch
+
+from tf.ralph.event_log import HISTORY_MARKER, EventLog
+
+
+def test_record_ticket_updates_counters(tmp_path: Path) -> None:
+    log = EventLog(tmp_path)
+
+    log.record_ticket("T-1", "COMPLETE", summary="First")
+    log.record_ticket("T-2", "FAILED", error="pi -p failed (exit 1)")
+    counters = log.record_ticket("T-3", "BLOCKED")
+
+    assert counters["completed"] == 2
+    assert counters["failed"] == 1
+    assert counters["total"] == 3
+    assert json.loads(log.counters_path.read_text())["total"] == 3
+    assert len(log.events_path.read_text().splitlines()) == 3
+
+
+def test_render_matches_progress_layout(tmp_path: Path) -> None:
+    log = EventLog(tmp_path)
+    log.record_state("RUNNING")
+    log.record_ticket("T-1", "COMPLETE", summary="First", issues=(0, 1, 2), attempt=1, commit="abc123")
+    log.record_ticket("T-2", "FAILED", summary="Second", error="boom")
+    log.record_state("COMPLETE")
+
+    text = log.render().read_text()
+
+    assert "- Status: COMPLETE" in text
+    assert "- Tickets completed: 1" in text
+    assert "- Tickets failed: 1" in text
+    assert "- Total iterations: 2" in text
+    history = text.split(HISTORY_MARKER, 1)[1]
+    assert history.index("- T-2: FAILED") < history.index("- T-1: COMPLETE")
+    assert "  - Issues: Critical(0)/Major(1)/Minor(2)" in history
+    assert "  - Commit: abc123" in history
+    assert "  - Error: boom" in history
+
+
+def test_render_respects_umask(tmp_path: Path) -> None:
+    log = EventLog(tmp_path)
+    log.record_ticket("T-1", "COMPLETE")
+    with patch("tf.utils._FILE_MODE", 0o644):
+        path = log.render()
+
+    assert stat.S_IMODE(path.stat().st_mode) == 0o644
+
+
+def test_imports_existing_progress(tmp_path: Path) -> None:
+    (tmp_path / "progress.md").write_text(
+        "# Ralph Loop Progress\n\n## Current State\n\n- Status: COMPLETE\n"
+        "- Started: 2026-01-01T00:00:00Z\n\n## Statistics\n\n"
+        "- Tickets completed: 4\n- Tickets failed: 1\n- Total iterations: 5\n\n"
+        f"## History\n\n{HISTORY_MARKER}\n- OLD-1: COMPLETE (2026-01-01T00:00:00Z)\n"
+    )
+    log = EventLog(tmp_path)
+
+    counters = log.record_ticket("T-1", "COMPLETE")
+    text = log.render().read_text()
+
+    assert counters["completed"] == 5
+    assert counters["total"] == 6
+    assert counters["started"] == "2026-01-01T00:00:00Z"
+    assert text.index("- T-1: COMPLETE") < text.index("- OLD-1: COMPLETE")
+
+
+def test_rebuilds_counters_from_events(tmp_path: Path) -> None:
+    log = EventLog(tmp_path)
+    log.record_ticket("T-1", "COMPLETE")
+    log.record_ticket("T-2", "FAILED")
+    log.counters_path.unlink()
+
+    counters = log.counters()
+
+    assert (counters["completed"], counters["failed"], counters["total"]) == (1, 1, 2)
+
+
+def test_compact_drops_state_events_and_keeps_counters(tmp_path: Path) -> None:
+    log = EventLog(tmp_path)
+    log.record_state("RUNNING")
+    for index in range(5):
+        log.record_ticket(f"T-{index}", "COMPLETE")
+    log.record_state("COMPLETE")
+
+    before, after = log.compact(keep=2)
+
+    assert (before, after) == (7, 2)
+    assert [e["ticket"] for e in log.events()] == ["T-3", "T-4"]
+    assert log.counters()["completed"] == 5
+    assert log.counters()["status"] == "COMPLETE"
+
+
+def test_concurrent_appends_are_not_lost(tmp_path: Path) -> None:
+    log = EventLog(tmp_path)
+
+    def worker(prefix: str) -> None:
+        for index in range(20):
+            EventLog(tmp_path).record_ticket(f"{prefix}-{index}", "COMPLETE")
+
+    threads = [threading.Thread(target=worker, args=(f"W{n}",)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert log.counters()["total"] == 80
+    assert len(list(log.events())) == 80
@@ -0,0 +1,171 @@
+"""Tests for file-footprint conflict prediction (tf.ralph.footprint).
+
+Tests cover:
+- Reading files_changed.txt history (foreign absolute paths, comments, KB artefacts)
+- Predicting footprints from similar past tickets and file names in titles
+- Packing the largest conflict-free batch
+- select_parallel_tickets with a predictor, including running tickets
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict, Optional
+from unittest.mock import patch
+
+import pytest
+
+from tf import ralph as ralph_module
+from tf.ralph.footprint import FootprintPredictor, normalize_path, pack_batch
+from tf.ticket_loader import Ticket
+
+from tests.helpers import make_ticket
+
+
+def record(knowledge: Path, ticket_id: str, *files: str) -> None:
+    ticket_dir = knowledge / "tickets" / ticket_id
+    ticket_dir.mkdir(parents=True, exist_ok=True)
+    (ticket_dir / "files_changed.txt").write_text("\n".join(files) + "\n")
+
+
+@pytest.fixture
+def project(tmp_path: Path) -> Path:
+    (tmp_path / "tf" / "ralph").mkdir(parents=True)
+    (tmp_path / "tf" / "ralph" / "scheduler.py").write_text("")
+    knowledge = tmp_path / ".tf" / "knowledge"
+    record(knowledge, "old-1", "tf/ralph/scheduler.py", "tests/test_ralph_scheduler.py")
+    record(knowledge, "old-2", "tf/ralph/scheduler.py", "docs/ralph.md")
+    record(knowledge, "old-3", "tf/web_ui.py", "tf/templates/board.html")
+    record(knowledge, "old-4", "tf/kb_cli.py", "# note", ".tf/knowledge/tickets/old-4/research.md")
+    return tmp_path
+
+
+def predictor_for(project: Path, tickets: Dict[str, Ticket]) -> FootprintPredictor:
+    return FootprintPredictor(project, project / ".tf" / "knowledge" / "tickets", lambda: tickets)
+
+
+HISTORY = {
+    "old-1": make_ticket("old-1", "closed", title="Worker pool scheduler timeouts", tags=["component:ralph"]),
+    "old-2": make_ticket("old-2", "closed", title="Scheduler continuous refill", tags=["component:ralph"]),
+    "old-3": make_ticket("old-3", "closed", title="Kanban board in web UI", tags=["component:ui"]),
+    "old-4": make_ticket("old-4", "closed", title="Knowledge base listing", tags=["component:kb"]),
+}
+
+
+def test_normalize_path(tmp_path: Path) -> None:
+    (tmp_path / "tf").mkdir()
+    (tmp_path / "tf" / "cli.py").write_text("")
+
+    assert normalize_path("/home/someone/checkout/tf/cli.py", tmp_path) == "tf/cli.py"
+    assert normalize_path(f"{tmp_path}/README.md", tmp_path) == "README.md"
+    assert normalize_path("./docs//ralph.md", tmp_path) == "docs/ralph.md"
+    assert normalize_path("# No files changed", tmp_path) is None
+    assert normalize_path("../outside.py", tmp_path) is None
+
+
+def test_history_skips_comments_and_knowledge_artefacts(project: Path) -> None:
+    predictor = predictor_for(project, HISTORY)
+    predictor.refresh()
+
+    assert predictor.history["old-4"] == frozenset({"tf/kb_cli.py"})
+
+
+def test_predicts_from_similar_tickets(project: Path) -> None:
+    tickets = dict(HISTORY, new=make_ticket("new", title="Scheduler backoff for worker restarts", tags=["component:ralph"]))
+    predictor = predictor_for(project, tickets)
+
+    footprint = predictor.predict("new")
+
+    assert "tf/ralph/scheduler.py" in footprint.files
+    assert "tf/web_ui.py" not in footprint.files
+    assert footprint.neighbours[:2] in (("old-1", "old-2"), ("old-2", "old-1"))
+
+
+def test_file_named_in_title_and_unknown_ticket(project: Path) -> None:
+    tickets = dict(
+        HISTORY,
+        named=make_ticket("named", title="Refactor tf/web_ui.py routes"),
+        unrelated=make_ticket("unrelated", title="Quantum flux capacitor"),
+    )
+    predictor = predictor_for(project, tickets)
+
+    assert "tf/web_ui.py" in predictor.predict("named").files
+    assert predictor.predict("named").confidence == 1.0
+    assert not predictor.predict("unrelated").known
+
+
+def test_refresh_picks_up_new_history(project: Path) -> None:
+    tickets = dict(HISTORY, new=make_ticket("new", title="Knowledge base search", tags=["component:kb"]))
+    predictor = predictor_for(project, tickets)
+    assert predictor.predict("new").files == frozenset({"tf/kb_cli.py"})
+
+    record(project / ".tf" / "knowledge", "old-5", "tf/kb_cli.py", "tf/kb_index.py")
+    tickets["old-5"] = make_ticket("old-5", "closed", title="Knowledge base index", tags=["component:kb"])
+
+    assert predictor.refresh() is True
+    assert "tf/kb_index.py" in predictor.predict("new").files
+
+
+def test_pack_batch_beats_greedy() -> None:
+    footprints = {"A": {"x", "y"}, "B": {"x"}, "C": {"y"}, "D": {"z"}}
+
+    result = pack_batch(["A", "B", "C", "D"], 3, lambda a, b: sorted(footprints[a] & footprints[b]))
+
+    # Greedy in queue order would take A then D only
+    assert result.selected == ["B", "C", "D"]
+    assert result.skipped["A"] == ("B", ["x"])
+
+
+def test_pack_batch_respects_running_and_slots() -> None:
+    result = pack_batch(["A", "B", "C"], 1, lambda a, b: [], blocked_by={"A": ("R", ["f.py"])})
+
+    assert result.selected == ["B"]
+    assert result.skipped == {"A": ("R", ["f.py"])}
+
+
+def test_select_parallel_tickets_with_predictor(project: Path) -> None:
+    tickets = dict(
+        HISTORY,
+        sched=make_ticket("sched", title="Scheduler fairness", tags=["component:ralph"]),
+        board=make_ticket("board", title="Board filters in web UI"),
+        kb=make_ticket("kb", title="Knowledge base export", tags=["component:kb"]),
+        mystery=make_ticket("mystery", title="Quantum flux capacitor"),
+    )
+    predictor = predictor_for(project, tickets)
+    components = {
+        "sched": {"component:ralph"},
+        "board": None,
+        "kb": {"component:kb"},
+        "mystery": None,
+    }
+    overlaps: Dict[str, dict] = {}
+    inspected: Dict[str, Optional[set]] = {}
+
+    with patch.object(ralph_module, "extract_components", side_effect=lambda t, p, u: components[t]):
+        selected = ralph_module.select_parallel_tickets(
+            ["sched", "board", "kb", "mystery"],
+            3,
+            False,
+            "component:",
+            components_out=inspected,
+            predictor=predictor,
+            running={"running-1": {"component:kb"}},
+            overlaps_out=overlaps,
+        )
+
+    # Untagged "board" is predicted and eligible; "mystery" has neither tags nor history;
+    # "kb" shares the component tag with a running ticket that has no prediction.
+    assert selected == ["sched", "board"]
+    assert inspected["board"] == {ralph_module.UNTAGGED_COMPONENT}
+    assert overlaps["sched"]["predicted_files"] >= 1
+    assert overlaps["kb"] == {"conflicts_with": "running-1", "shared": ["component:kb"], "overlap": 1}
+
+
+def test_resolve_conflict_prediction(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.delenv("RALPH_CONFLICT_PREDICTION", raising=False)
+    assert ralph_module.resolve_conflict_prediction({}) == "off"
+    assert ralph_module.create_footprint_predictor(tmp_path, {}) is None
+    assert ralph_module.resolve_conflict_prediction({"conflictPrediction": "files"}) == "files"
+
+    monkeypatch.setenv("RALPH_CONFLICT_PREDICTION", "off")
+    assert ralph_module.resolve_conflict_prediction({"conflictPrediction": "files"}) == "off"
@@ -0,0 +1,290 @@
+"""Tests for lease-based ticket claiming across Ralph loops (tf.ralph.leases).
+
+Tests cover:
+- Exclusive claims, including between separate processes
+- Stealing expired leases (and not stealing live ones)
+- Heartbeat renewal and detecting a lease that was taken over
+- Renewal racing a steal, and the loop dropping a ticket whose lease was lost
+- The shared completion ledger
+- The single-loop lock used with coordination=lock
+"""
+
+from __future__ import annotations
+
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from tf import ralph as ralph_module
+from tf.ralph.leases import LeaseManager
+from tf.ralph.scheduler import WorkerSlot
+from tf.utils import atomic_write_text
+
+TICKETS = [f"T-{n}" for n in range(20)]
+
+
+def claim_all(leases_dir: str, holder: str, queue) -> None:
+    leases = LeaseManager(Path(leases_dir), holder=holder, ttl_secs=60)
+    claimed = []
+    for ticket in TICKETS:
+        if leases.claim(ticket):
+            claimed.append(ticket)
+    queue.put((holder, claimed))
+
+
+def test_claim_is_exclusive(tmp_path: Path) -> None:
+    first = LeaseManager(tmp_path, holder="a")
+    second = LeaseManager(tmp_path, holder="b")
+
+    assert first.claim("T-1") is True
+    assert second.claim("T-1") is False
+    assert second.available("T-1") is False
+    assert first.read("T-1")["holder"] == "a"
+
+
+def test_processes_never_share_a_ticket(tmp_path: Path) -> None:
+    ctx = multiprocessing.get_context("spawn" if os.name == "nt" else "fork")
+    queue = ctx.Queue()
+    workers = [ctx.Process(target=claim_all, args=(str(tmp_path), f"loop-{n}", queue)) for n in range(4)]
+    for worker in workers:
+        worker.start()
+    results = [queue.get(timeout=30) for _ in workers]
+    for worker in workers:
+        worker.join(timeout=30)
+
+    claimed = [ticket for _, tickets in results for ticket in tickets]
+    assert sorted(claimed) == sorted(TICKETS)
+
+
+def test_expired_lease_is_stolen(tmp_path: Path) -> None:
+    crashed = LeaseManager(tmp_path, holder="crashed", ttl_secs=1)
+    assert crashed.claim("T-1")
+    lease_path = crashed.lease_path("T-1")
+    lease = json.loads(lease_path.read_text())
+    lease["expires"] = time.time() - 1
+    lease_path.write_text(json.dumps(lease))
+
+    survivor = LeaseManager(tmp_path, holder="survivor")
+
+    assert survivor.claim("T-1") is True
+    assert survivor.read("T-1")["holder"] == "survivor"
+    assert not list(tmp_path.glob(".*.stale"))
+    # The crashed loop notices on its next heartbeat
+    assert crashed.heartbeat() == ["T-1"]
+    assert "T-1" in crashed.lost
+
+
+def test_renew_does_not_overwrite_a_steal(tmp_path: Path) -> None:
+    owner = LeaseManager(tmp_path, holder="owner", ttl_secs=1)
+    owner.claim("T-1")
+    lease_path = owner.lease_path("T-1")
+    lease_path.write_text(json.dumps(dict(owner.read("T-1"), expires=time.time() - 1)))
+    thief = LeaseManager(tmp_path, holder="thief")
+    assert thief.claim("T-1") is True
+
+    assert owner.renew("T-1") is False
+
+    assert owner.read("T-1")["holder"] == "thief"
+    assert owner.lost_tickets() == {"T-1"}
+    assert "T-1" not in owner.held
+    assert owner.confirm("T-1") is False
+    assert thief.confirm("T-1") is True
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["T-1.lease", "T-1.lock"]
+
+
+def test_lease_never_disappears_during_renewal(tmp_path: Path) -> None:
+    owner = LeaseManager(tmp_path, holder="owner", ttl_secs=60)
+    other = LeaseManager(tmp_path, holder="other", ttl_secs=60)
+    owner.claim("T-1")
+    lease_path = owner.lease_path("T-1")
+    seen = []
+
+    def write(path: Path, text: str, **kwargs) -> Path:
+        # Another loop claiming while the renewal is being written finds the live lease
+        seen.append((lease_path.exists(), other.claim("T-1")))
+        return atomic_write_text(path, text, **kwargs)
+
+    with patch("tf.ralph.leases.atomic_write_text", side_effect=write):
+        assert owner.renew("T-1") is True
+
+    assert seen == [(True, False)]
+    assert owner.read("T-1")["holder"] == "owner"
+
+
+def test_serial_loop_drops_ticket_whose_lease_was_lost(tmp_path: Path) -> None:
+    config = dict(ralph_module.DEFAULTS)
+    config.update({"logLevel": "quiet", "sleepBetweenTickets": 0, "maxIterations": 1, "coordination": "lease"})
+    leases_dir = tmp_path / ".tf" / "ralph" / "leases"
+    leases_dir.parent.mkdir(parents=True)
+    states: dict[str, str] = {}
+
+    def taken_over(ticket: str, *args, **kwargs) -> int:
+        # Another loop took the lease over while the ticket was running
+        path = leases_dir / f"{ticket}.lease"
+        lease = json.loads(path.read_text())
+        path.write_text(json.dumps(dict(lease, holder="other", expires=time.time() + 60)))
+        return 0
+
+    def fake_update_state(_ralph_dir, _root, ticket, status, *args, **kwargs) -> None:
+        states[ticket] = status
+
+    with patch.object(ralph_module, "find_project_root", return_value=tmp_path), \
+            patch.object(ralph_module, "load_config", return_value=config), \
+            patch.object(ralph_module, "set_state"), \
+            patch.object(ralph_module, "backlog_empty", return_value=False), \
+            patch.object(ralph_module, "list_ready_tickets", return_value=["T-1"]), \
+            patch.object(ralph_module, "run_ticket", side_effect=taken_over), \
+            patch.object(ralph_module, "update_state", side_effect=fake_update_state):
+        rc = ralph_module.ralph_start(["--quiet"])
+
+    assert rc == 0
+    assert states == {}
+    # The other loop's lease is left alone and nothing was recorded for T-1
+    assert json.loads((leases_dir / "T-1.lease").read_text())["holder"] == "other"
+    assert not (leases_dir / "ledger.jsonl").exists()
+
+
+def test_parallel_loop_stops_worker_whose_lease_was_lost(tmp_path: Path) -> None:
+    config = dict(ralph_module.DEFAULTS)
+    config.update({
+        "logLevel": "quiet",
+        "sleepBetweenTickets": 0,
+        "maxIterations": 1,
+        "coordination": "lease",
+        "leaseTtlMs": 1000,
+        "parallelWorkers": 2,
+        "parallelWorktreePool": False,
+        "parallelAutoMerge": False,
+    })
+    leases_dir = tmp_path / ".tf" / "ralph" / "leases"
+    leases_dir.parent.mkdir(parents=True)
+    states: dict[str, str] = {}
+    slots: list[WorkerSlot] = []
+
+    def fake_start(ticket: str, iteration: int, **kwargs) -> WorkerSlot:
+        # Another loop takes the lease over once the worker is running
+        path = leases_dir / f"{ticket}.lease"
+        path.write_text(json.dumps(dict(json.loads(path.read_text()), holder="other", expires=time.time() + 60)))
+        slots.append(
+            WorkerSlot(
+                ticket=ticket,
+                proc=subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"]),
+                worktree_path=tmp_path / ticket,
+                iteration=iteration,
+                components=kwargs["components"],
+            )
+        )
+        return slots[-1]
+
+    def fake_update_state(_ralph_dir, _root, ticket, status, *args, **kwargs) -> None:
+        states[ticket] = status
+
+    started = time.monotonic()
+    with patch.object(ralph_module, "find_project_root", return_value=tmp_path), \
+            patch.object(ralph_module, "load_config", return_value=config), \
+            patch.object(ralph_module, "git_repo_root", return_value=tmp_path), \
+            patch.object(ralph_module, "ensure_pi", return_value=True), \
+            patch.object(ralph_module, "prompt_exists", return_value=True), \
+            patch.object(ralph_module, "set_state"), \
+            patch.object(ralph_module, "backlog_empty", return_value=False), \
+            patch.object(ralph_module, "list_ready_tickets", return_value=["T-1"]), \
+            patch.object(ralph_module, "extract_components", return_value={"component:a"}), \
+            patch.object(ralph_module, "_start_parallel_ticket", side_effect=fake_start), \
+            patch.object(ralph_module, "_remove_worktree", return_value=subprocess.CompletedProcess([], 0)), \
+            patch.object(ralph_module, "update_state", side_effect=fake_update_state), \
+            patch.object(ralph_module, "resolve_attempt_timeout_ms", return_value=0):
+        rc = ralph_module.ralph_start(["--quiet"])
+
+    assert rc == 0
+    assert states == {}
+    # Stopped by the heartbeat noticing the takeover, not by the worker finishing
+    assert time.monotonic() - started < 15
+    assert slots[0].proc.returncode not in (None, 0)
+    assert json.loads((leases_dir / "T-1.lease").read_text())["holder"] == "other"
+    assert not (leases_dir / "ledger.jsonl").exists()
+
+
+def test_heartbeat_extends_lease(tmp_path: Path) -> None:
+    leases = LeaseManager(tmp_path, holder="a", ttl_secs=5)
+    leases.claim("T-1")
+    before = leases.read("T-1")["expires"]
+    time.sleep(0.01)
+
+    assert leases.heartbeat() == []
+    assert leases.read("T-1")["expires"] > before
+
+
+def test_complete_records_ledger_and_releases(tmp_path: Path) -> None:
+    tickets_dir = tmp_path / ".tickets"
+    tickets_dir.mkdir()
+    ticket_file = tickets_dir / "T-1.md"
+    ticket_file.write_text("---\nstatus: open\n---\n")
+    old = time.time() - 60
+    os.utime(ticket_file, (old, old))
+    first = LeaseManager(tmp_path / "leases", holder="a", tickets_dir=tickets_dir)
+    second = LeaseManager(tmp_path / "leases", holder="b", tickets_dir=tickets_dir)
+    first.claim("T-1")
+
+    first.complete("T-1", "COMPLETE")
+
+    assert first.read("T-1") is None
+    assert second.ledger()["T-1"]["holder"] == "a"
+    # Finished elsewhere: not picked up again until the ticket file changes (reopened)
+    assert second.claim("T-1") is False
+    ticket_file.write_text("---\nstatus: open\n---\n")
+    os.utime(ticket_file, (time.time() + 1, time.time() + 1))
+    assert second.claim("T-1") is True
+
+
+def test_close_releases_held_leases(tmp_path: Path) -> None:
+    leases = LeaseManager(tmp_path, holder="a", ttl_secs=3)
+    leases.start_heartbeat(interval=0.05)
+    leases.claim("T-1")
+    time.sleep(0.1)
+
+    leases.close()
+
+    assert leases.read("T-1") is None
+
+
+def test_lock_acquire_replaces_stale_lock(tmp_path: Path) -> None:
+    (tmp_path / "lock").write_text("999999999 2026-01-01T00:00:00Z\n")
+
+    assert ralph_module.lock_acquire(tmp_path) is True
+    assert (tmp_path / "lock").read_text().split()[0] == str(os.getpid())
+    assert ralph_module.lock_acquire(tmp_path) is False
+
+
+def test_lock_acquire_leaves_fresh_or_foreign_lock_alone(tmp_path: Path) -> None:
+    lock_path = tmp_path / "lock"
+    lock_path.write_text("")
+    assert ralph_module.lock_acquire(tmp_path) is False
+    assert lock_path.read_text() == ""
+
+    old = time.time() - 60
+    os.utime(lock_path, (old, old))
+    assert ralph_module.lock_acquire(tmp_path) is True
+    assert lock_path.read_text().split()[0] == str(os.getpid())
+
+    # Holder owned by another user: alive, not stale
+    lock_path.write_text("1 2026-01-01T00:00:00Z\n")
+    with patch.object(ralph_module.os, "kill", side_effect=PermissionError):
+        assert ralph_module.lock_acquire(tmp_path) is False
+    assert lock_path.read_text().split()[0] == "1"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["lock"]
+
+
+def test_resolve_coordination(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("RALPH_COORDINATION", raising=False)
+    assert ralph_module.resolve_coordination({}) == "lock"
+    assert ralph_module.resolve_coordination({"coordination": "lease"}) == "lease"
+
+    monkeypatch.setenv("RALPH_COORDINATION", "lock")
+    assert ralph_module.resolve_coordination({"coordination": "lease"}) == "lock"
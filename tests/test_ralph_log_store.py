@@ -0,0 +1,101 @@
+"""Tests for per-attempt compressed Ralph logs (tf.ralph.log_store).
+
+Tests cover:
+- Per-attempt file naming and stream compression
+- Sealing plain subprocess logs and reading partially written streams
+- Size- and age-based retention
+- `tf ralph logs` output
+"""
+
+from __future__ import annotations
+
+import gzip
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from tf import ralph as ralph_module
+from tf.ralph.log_store import JSONL, OUTPUT, LogStore, parse_log_name
+
+
+def test_attempts_are_numbered_per_ticket(tmp_path: Path) -> None:
+    store = LogStore(tmp_path)
+    (tmp_path / "T-1.jsonl").write_text("legacy\n")
+
+    assert store.next_attempt("T-1") == 1
+    sink = store.open_stream("T-1", 1, JSONL)
+    sink.write(b'{"type": "agent_start"}\n')
+    sink.close()
+
+    assert store.next_attempt("T-1") == 2
+    assert store.next_attempt("T-2") == 1
+    assert [(e.attempt, e.compression) for e in store.files("T-1")] == [(0, "none"), (1, "gzip")]
+    assert gzip.decompress((tmp_path / "T-1.1.jsonl.gz").read_bytes()) == b'{"type": "agent_start"}\n'
+
+
+def test_parse_log_name() -> None:
+    entry = parse_log_name(Path("pt-abc1.3.log.gz"))
+
+    assert (entry.ticket, entry.attempt, entry.kind) == ("pt-abc1", 3, OUTPUT)
+    assert parse_log_name(Path("notes.txt")) is None
+
+
+def test_seal_compresses_plain_log(tmp_path: Path) -> None:
+    store = LogStore(tmp_path)
+    plain = store.path("T-1", 1, OUTPUT, compressed=False)
+    plain.write_text("pi says hi\n")
+
+    sealed = store.seal(plain)
+
+    assert sealed.name == "T-1.1.log.gz"
+    assert not plain.exists()
+    assert b"".join(store.read_chunks(store.find("T-1", kind=OUTPUT))) == b"pi says hi\n"
+
+
+def test_read_chunks_tolerates_unfinished_stream(tmp_path: Path) -> None:
+    store = LogStore(tmp_path)
+    data = gzip.compress(b"line\n" * 1000)
+    (tmp_path / "T-1.1.jsonl.gz").write_bytes(data[: len(data) - 8])
+
+    assert b"".join(store.read_chunks(store.find("T-1"))) == b"line\n" * 1000
+
+
+def test_retention_by_age_then_size(tmp_path: Path) -> None:
+    store = LogStore(tmp_path, compression="none", max_bytes=250, max_age_days=7)
+    now = time.time()
+    for index, age_days in enumerate([30, 3, 2, 1]):
+        path = tmp_path / f"T-{index}.1.jsonl"
+        path.write_bytes(b"x" * 100)
+        os.utime(path, (now - age_days * 86400, now - age_days * 86400))
+    (tmp_path / "keep.txt").write_bytes(b"x" * 1000)
+
+    removed, freed = store.enforce_retention(now=now)
+
+    assert (removed, freed) == (2, 200)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["T-2.1.jsonl", "T-3.1.jsonl", "keep.txt"]
+
+
+def test_from_config_ignores_unknown_compression(tmp_path: Path) -> None:
+    store = LogStore.from_config(tmp_path, {"logCompression": "brotli", "logMaxMb": 1, "logMaxAgeDays": "x"})
+
+    assert store.compression == "gzip"
+    assert store.max_bytes == 1024 * 1024
+    assert store.max_age_days == 0
+
+
+def test_ralph_logs_prints_attempt(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsysbinary) -> None:
+    logs_dir = tmp_path / ".tf" / "ralph" / "logs"
+    store = LogStore(logs_dir)
+    for attempt in (1, 2):
+        sink = store.open_stream("T-1", attempt, JSONL)
+        sink.write(f"attempt {attempt}\n".encode())
+        sink.close()
+    monkeypatch.setattr(ralph_module, "find_project_root", lambda: tmp_path)
+
+    assert ralph_module.main(["logs", "T-1"]) == 0
+    assert capsysbinary.readouterr().out == b"attempt 2\n"
+    assert ralph_module.main(["logs", "T-1", "--attempt", "1"]) == 0
+    assert capsysbinary.readouterr().out == b"attempt 1\n"
+    assert ralph_module.main(["logs", "T-1", "--attempt", "5"]) == 1
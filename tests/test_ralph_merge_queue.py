@@ -0,0 +1,237 @@
+"""Tests for the parallel-mode merge queue (tf.ralph.merge_queue).
+
+Tests cover:
+- Fast-forwarding the base branch when it has not moved
+- Rebasing onto a newer base before fast-forwarding
+- Detecting conflicts without touching the base or the ticket branch
+- Blocking (not failing) the merge while the main checkout has local changes
+- Keeping a blocked ticket queued in the parallel loop until its merge lands
+- Branches without new commits and detached HEAD handling
+"""
+
+from __future__ import annotations
+
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from tf import ralph as ralph_module
+from tf.ralph.merge_queue import BLOCKED, CONFLICT, EMPTY, MERGED, MergeError, MergeQueue, MergeResult
+from tf.ralph.scheduler import WorkerSlot
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git not available")
+
+
+def git(repo: Path, *args: str) -> str:
+    result = subprocess.run(["git", "-C", str(repo), *args], capture_output=True, text=True, check=True)
+    return result.stdout.strip()
+
+
+def commit_file(repo: Path, name: str, content: str) -> str:
+    (repo / name).write_text(content)
+    git(repo, "add", name)
+    git(repo, "commit", "-q", "-m", f"update {name}")
+    return git(repo, "rev-parse", "HEAD")
+
+
+@pytest.fixture
+def repo(tmp_path: Path) -> Path:
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    git(repo, "init", "-q", "-b", "main")
+    git(repo, "config", "user.email", "test@example.com")
+    git(repo, "config", "user.name", "Test")
+    commit_file(repo, "README.md", "one\n")
+    return repo
+
+
+def add_worktree(repo: Path, ticket: str) -> Path:
+    path = repo.parent / "worktrees" / ticket
+    git(repo, "worktree", "add", "-q", "-B", f"ralph/{ticket}", str(path), "HEAD")
+    return path
+
+
+def test_fast_forward_when_base_unchanged(repo: Path) -> None:
+    wt = add_worktree(repo, "T-1")
+    head = commit_file(wt, "a.txt", "a\n")
+
+    result = MergeQueue(repo).merge("T-1", wt)
+
+    assert result.status == MERGED
+    assert result.rebased is False
+    assert result.commit == head
+    assert git(repo, "rev-parse", "main") == head
+    # The main checkout's working tree follows the branch
+    assert (repo / "a.txt").read_text() == "a\n"
+
+
+def test_rebases_onto_newer_base_in_completion_order(repo: Path) -> None:
+    first = add_worktree(repo, "T-1")
+    second = add_worktree(repo, "T-2")
+    commit_file(first, "a.txt", "a\n")
+    commit_file(second, "b.txt", "b\n")
+    queue = MergeQueue(repo)
+
+    assert queue.merge("T-1", first).status == MERGED
+    result = queue.merge("T-2", second)
+
+    assert result.status == MERGED
+    assert result.rebased is True
+    assert git(repo, "rev-parse", "main") == git(second, "rev-parse", "HEAD")
+    assert (repo / "a.txt").exists() and (repo / "b.txt").exists()
+    assert queue.merged == 2
+
+
+def test_conflict_leaves_base_and_branch_untouched(repo: Path) -> None:
+    first = add_worktree(repo, "T-1")
+    second = add_worktree(repo, "T-2")
+    commit_file(first, "README.md", "first\n")
+    original = commit_file(second, "README.md", "second\n")
+    queue = MergeQueue(repo)
+    assert queue.merge("T-1", first).status == MERGED
+    base = git(repo, "rev-parse", "main")
+
+    result = queue.merge("T-2", second)
+
+    assert result.status == CONFLICT
+    assert result.ok is False
+    assert "README.md" in (result.detail or "")
+    assert git(repo, "rev-parse", "main") == base
+    assert git(second, "rev-parse", "HEAD") == original
+    assert git(second, "status", "--porcelain") == ""
+    assert queue.conflicts == 1
+
+
+def test_dirty_main_checkout_blocks_merge_until_clean(repo: Path) -> None:
+    wt = add_worktree(repo, "T-1")
+    head = commit_file(wt, "README.md", "one\ntwo\n")
+    (repo / "README.md").write_text("local edit\n")
+    before = git(repo, "rev-parse", "main")
+    queue = MergeQueue(repo)
+
+    result = queue.merge("T-1", wt)
+
+    assert result.status == BLOCKED
+    assert result.ok is False
+    assert result.detail == "main checkout dirty: README.md"
+    assert git(repo, "rev-parse", "main") == before
+    assert git(repo, "rev-parse", "ralph/T-1") == head
+    assert (repo / "README.md").read_text() == "local edit\n"
+
+    git(repo, "checkout", "--", "README.md")
+    assert queue.merge("T-1", wt).status == MERGED
+    assert git(repo, "rev-parse", "main") == head
+
+
+def test_unrelated_local_changes_do_not_block(repo: Path) -> None:
+    commit_file(repo, "notes.txt", "notes\n")
+    wt = add_worktree(repo, "T-1")
+    head = commit_file(wt, "a.txt", "a\n")
+    (repo / "notes.txt").write_text("edited\n")
+
+    result = MergeQueue(repo).merge("T-1", wt)
+
+    assert result.status == MERGED
+    assert git(repo, "rev-parse", "main") == head
+    assert (repo / "notes.txt").read_text() == "edited\n"
+
+
+def test_branch_without_commits_is_empty(repo: Path) -> None:
+    wt = add_worktree(repo, "T-1")
+    before = git(repo, "rev-parse", "main")
+
+    result = MergeQueue(repo).merge("T-1", wt)
+
+    assert result.status == EMPTY
+    assert result.ok is True
+    assert git(repo, "rev-parse", "main") == before
+
+
+def test_updates_base_ref_when_not_checked_out(repo: Path) -> None:
+    git(repo, "branch", "release")
+    wt = add_worktree(repo, "T-1")
+    head = commit_file(wt, "a.txt", "a\n")
+
+    result = MergeQueue(repo, base_branch="release").merge("T-1", wt)
+
+    assert result.status == MERGED
+    assert git(repo, "rev-parse", "release") == head
+    assert not (repo / "a.txt").exists()
+
+
+def test_detached_head_requires_explicit_base(repo: Path) -> None:
+    git(repo, "checkout", "-q", "--detach")
+
+    with pytest.raises(MergeError):
+        MergeQueue(repo)
+
+
+def test_loop_keeps_blocked_ticket_queued(tmp_path: Path) -> None:
+    (tmp_path / ".tf" / "ralph").mkdir(parents=True)
+    states: dict[str, str] = {}
+    launches: list[str] = []
+    outcomes = [BLOCKED, BLOCKED, MERGED]
+
+    class FakeQueue:
+        base_branch = "main"
+
+        def __init__(self, repo_root: Path) -> None:
+            pass
+
+        def merge(self, ticket: str, worktree_path: Path) -> MergeResult:
+            status = outcomes.pop(0)
+            detail = "main checkout dirty: README.md" if status == BLOCKED else None
+            return MergeResult(ticket, status, f"ralph/{ticket}", "main", detail=detail)
+
+    def fake_ready(_query: str) -> list[str]:
+        return [] if "T-1" in states else ["T-1"]
+
+    def fake_start(ticket: str, iteration: int, **kwargs) -> WorkerSlot:
+        launches.append(ticket)
+        return WorkerSlot(
+            ticket=ticket,
+            proc=subprocess.Popen([sys.executable, "-c", "pass"]),
+            worktree_path=tmp_path / ticket,
+            iteration=iteration,
+            components=kwargs["components"],
+        )
+
+    def fake_update_state(_ralph_dir, _root, ticket, status, *args, **kwargs) -> None:
+        states[ticket] = status
+
+    config = dict(ralph_module.DEFAULTS)
+    config.update(
+        logLevel="quiet",
+        sleepBetweenTickets=0,
+        sleepBetweenRetries=10,
+        maxIterations=5,
+        parallelWorkers=2,
+        parallelWorktreePool=False,
+    )
+    with patch.object(ralph_module, "find_project_root", return_value=tmp_path), \
+            patch.object(ralph_module, "load_config", return_value=config), \
+            patch.object(ralph_module, "git_repo_root", return_value=tmp_path), \
+            patch.object(ralph_module, "ensure_pi", return_value=True), \
+            patch.object(ralph_module, "prompt_exists", return_value=True), \
+            patch.object(ralph_module, "lock_acquire", return_value=True), \
+            patch.object(ralph_module, "lock_release"), \
+            patch.object(ralph_module, "set_state"), \
+            patch.object(ralph_module, "backlog_empty", side_effect=lambda _c: not fake_ready("")), \
+            patch.object(ralph_module, "list_ready_tickets", side_effect=fake_ready), \
+            patch.object(ralph_module, "extract_components", side_effect=lambda t, p, u: {f"component:{t}"}), \
+            patch.object(ralph_module, "_start_parallel_ticket", side_effect=fake_start), \
+            patch.object(ralph_module, "_remove_worktree", return_value=subprocess.CompletedProcess([], 0)), \
+            patch.object(ralph_module, "update_state", side_effect=fake_update_state), \
+            patch.object(ralph_module, "MergeQueue", FakeQueue), \
+            patch.object(ralph_module, "resolve_attempt_timeout_ms", return_value=0):
+        rc = ralph_module.ralph_start(["--quiet"])
+
+    assert rc == 0
+    # Not re-run while blocked, and recorded once the merge landed
+    assert launches == ["T-1"]
+    assert outcomes == []
+    assert states == {"T-1": "COMPLETE"}
@@ -0,0 +1,112 @@
+"""Tests for Ralph throughput metrics (tf.ralph.metrics).
+
+Tests cover:
+- Building per-ticket metrics and storing them with ticket events
+- Aggregating throughput, percentiles, failure rate and utilisation
+- Prometheus textfile rendering and `tf ralph stats` output
+"""
+
+from __future__ import annotations
+
+import json
+import stat
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from tf import ralph as ralph_module
+from tf.ralph.event_log import EventLog
+from tf.ralph.metrics import compute_stats, percentile, prometheus_text, ticket_metrics, write_textfile
+
+
+def ticket_event(ticket: str, status: str, ts: str, **metrics: object) -> dict:
+    defaults = dict(duration_secs=60.0, attempts=1, exit_code=0, mode="parallel", workers=2, run_id="run-1")
+    defaults.update(metrics)
+    return {"type": "ticket", "ticket": ticket, "status": status, "ts": ts, "metrics": ticket_metrics(**defaults)}
+
+
+def test_ticket_metrics_derives_restarts() -> None:
+    metrics = ticket_metrics(
+        duration_secs=12.3456, attempts=3, exit_code=0, mode="serial", workers=1, run_id="r", timeouts=2
+    )
+
+    assert metrics["restarts"] == 2
+    assert metrics["timeouts"] == 2
+    assert metrics["duration_secs"] == 12.346
+
+
+def test_percentile_nearest_rank() -> None:
+    values = [float(v) for v in range(1, 101)]
+
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 95) == 95.0
+    assert percentile([], 50) == 0.0
+
+
+def test_compute_stats_throughput_and_utilisation() -> None:
+    # Two workers, one hour span: T-1 and T-2 run concurrently for the first 30 minutes,
+    # T-3 alone for the last 30 minutes.
+    events = [
+        ticket_event("T-1", "COMPLETE", "2026-01-01T00:30:00Z", duration_secs=1800.0),
+        ticket_event("T-2", "FAILED", "2026-01-01T00:30:00Z", duration_secs=1800.0, exit_code=1),
+        ticket_event("T-3", "COMPLETE", "2026-01-01T01:00:00Z", duration_secs=1800.0, attempts=2, timeouts=1),
+        {"type": "state", "ts": "2026-01-01T01:00:00Z", "state": "COMPLETE"},
+        {"type": "ticket", "ticket": "OLD", "status": "COMPLETE", "ts": "2025-01-01T00:00:00Z"},
+    ]
+
+    stats = compute_stats(events)
+
+    assert stats.tickets == 3
+    assert stats.failed == 1
+    assert stats.failure_rate == pytest.approx(1 / 3)
+    assert stats.throughput_per_hour == pytest.approx(3.0)
+    assert stats.utilisation == pytest.approx(0.75)
+    assert (stats.timeouts, stats.restarts) == (1, 1)
+    assert stats.p50_duration_secs == 1800.0
+
+
+def test_prometheus_text_format() -> None:
+    stats = compute_stats([ticket_event("T-1", "COMPLETE", "2026-01-01T00:01:00Z")])
+
+    text = prometheus_text(stats)
+
+    assert "# TYPE ralph_tickets_total counter" in text
+    assert 'ralph_tickets_total{status="complete"} 1' in text
+    assert 'ralph_ticket_duration_seconds{quantile="0.95"} 60.0' in text
+    assert "ralph_ticket_duration_seconds_count 1" in text
+    assert text.endswith("\n")
+
+
+def test_write_textfile_is_world_readable(tmp_path: Path) -> None:
+    with patch("tf.utils._FILE_MODE", 0o644):
+        path = write_textfile(tmp_path / "ralph.prom", "ralph_up 1\n")
+
+    assert stat.S_IMODE(path.stat().st_mode) == 0o644
+    assert path.read_text() == "ralph_up 1\n"
+    assert [p.name for p in tmp_path.iterdir()] == ["ralph.prom"]
+
+
+def test_update_state_records_metrics(tmp_path: Path) -> None:
+    ralph_dir = tmp_path / ".tf" / "ralph"
+    metrics = ticket_metrics(duration_secs=5, attempts=1, exit_code=0, mode="serial", workers=1, run_id="r")
+
+    ralph_module.update_state(
+        ralph_dir, tmp_path, "T-1", "COMPLETE", "", artifact_root=tmp_path / "kb", metrics=metrics
+    )
+
+    (event,) = list(EventLog(ralph_dir).events())
+    assert event["metrics"]["duration_secs"] == 5
+
+
+def test_ralph_stats_json(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]) -> None:
+    ralph_dir = tmp_path / ".tf" / "ralph"
+    ralph_dir.mkdir(parents=True)
+    (ralph_dir / "events.jsonl").write_text(json.dumps(ticket_event("T-1", "COMPLETE", "2026-01-01T00:01:00Z")) + "\n")
+    monkeypatch.setattr(ralph_module, "find_project_root", lambda: tmp_path)
+
+    assert ralph_module.main(["stats", "--json"]) == 0
+
+    data = json.loads(capsys.readouterr().out)
+    assert data["tickets"] == 1
+    assert data["failure_rate"] == 0.0
@@ -0,0 +1,141 @@
+"""Tests for the live `pi --mode json` reader (tf.ralph.pi_stream).
+
+Tests cover:
+- Tool executions and phase transitions reported through the logger
+- Phase detection from artifact writes, subagents and `tk close`
+- Provider errors (error stop reasons, auto-retries) counted for autoscaling
+- Bounded handling of oversized lines and non-JSON output
+- Streaming a pipe to a log file while parsing it
+- The stream owning its log (not closed under a reader that is still running)
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import os
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from tf import ralph as ralph_module
+from tf.ralph import pi_stream
+from tf.ralph.pi_stream import START_PHASE, PiEventParser, PiStream, detect_phase
+from tf.ralph.scheduler import WorkerSlot
+
+
+def event(kind: str, **fields: object) -> bytes:
+    return json.dumps({"type": kind, **fields}).encode("utf-8")
+
+
+def test_parser_logs_tools_and_phases() -> None:
+    logger = MagicMock()
+    parser = PiEventParser("T-1", logger, mode="parallel")
+
+    parser.feed(event("tool_execution_start", toolName="write", toolCallId="1",
+                      args={"path": ".tf/knowledge/tickets/T-1/implementation.md"}))
+    parser.feed(event("tool_execution_end", toolCallId="1", isError=False))
+    parser.feed(event("tool_execution_start", toolName="bash", toolCallId="2", args={"command": "pytest"}))
+    parser.feed(event("tool_execution_end", toolCallId="2", isError=True))
+
+    assert parser.phase == "implement"
+    assert (parser.tool_calls, parser.tool_errors) == (2, 1)
+    logger.log_phase_transition.assert_called_once_with("T-1", START_PHASE, "implement", mode="parallel")
+    logger.log_tool_execution.assert_any_call("T-1", "write", success=True, mode="parallel")
+    logger.log_tool_execution.assert_any_call("T-1", "bash", success=False, mode="parallel")
+
+
+def test_parser_counts_provider_errors() -> None:
+    parser = PiEventParser("T-1")
+
+    parser.feed(event("message_end", message={"role": "assistant", "stopReason": "stop"}))
+    parser.feed(event("message_end", message={"role": "assistant", "stopReason": "error", "errorMessage": "429"}))
+    parser.feed(event("auto_retry_start", attempt=1, errorMessage="overloaded"))
+
+    assert parser.provider_errors == 2
+
+
+def test_detect_phase() -> None:
+    assert detect_phase("write", {"path": "tickets/T-1/research.md"}) == "research"
+    assert detect_phase("edit", {"path": "tickets/T-1/fixes.md"}) == "fix"
+    assert detect_phase("subagent", {}) == "review"
+    assert detect_phase("bash", {"command": "tk close T-1"}) == "close"
+    assert detect_phase("read", {"path": "tickets/T-1/research.md"}) is None
+
+
+def test_parser_skips_non_json() -> None:
+    parser = PiEventParser("T-1")
+
+    parser.feed(b"Loading extensions...")
+    parser.feed(b"")
+
+    assert parser.skipped_lines == 1
+    assert parser.events == 0
+
+
+def test_stream_copies_pipe_and_bounds_lines(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setattr(pi_stream, "MAX_LINE_BYTES", 128)
+    monkeypatch.setattr(pi_stream, "READ_CHUNK", 16)
+    read_fd, write_fd = os.pipe()
+    log_path = tmp_path / "T-1.jsonl"
+    parser = PiEventParser("T-1")
+    data = b"\n".join([
+        event("tool_execution_start", toolName="subagent", toolCallId="1", args={}),
+        b"x" * 300,
+        event("tool_execution_end", toolName="subagent", toolCallId="1"),
+    ]) + b"\n"
+
+    stream = PiStream(os.fdopen(read_fd, "rb"), open(log_path, "wb"), parser).start()
+    os.write(write_fd, data)
+    os.close(write_fd)
+
+    assert stream.join(timeout=5)
+    assert log_path.read_bytes() == data
+    assert parser.phase == "review"
+    assert parser.tool_calls == 1
+    assert parser.skipped_lines == 1
+
+
+def test_close_log_leaves_a_running_reader_its_log(tmp_path: Path) -> None:
+    read_fd, write_fd = os.pipe()
+    log_path = tmp_path / "T-1.jsonl.gz"
+    sink = gzip.open(log_path, "wb")
+    stream = PiStream(os.fdopen(read_fd, "rb"), sink, PiEventParser("T-1")).start()
+    slot = WorkerSlot(ticket="T-1", proc=None, worktree_path=tmp_path, iteration=0, log_file=sink, stream=stream)
+    os.write(write_fd, event("agent_start") + b"\n")
+
+    # A grandchild still holds the pipe open when the worker is reaped
+    with patch("tf.ralph.scheduler.TERMINATE_GRACE_SECS", 0.05), patch("tf.ralph.scheduler.logger") as logger:
+        slot.close_log()
+
+    assert logger.warning.called
+    assert slot.log_file is None
+    assert not sink.closed
+    os.write(write_fd, event("agent_end") + b"\n")
+    os.close(write_fd)
+    assert stream.join(timeout=5)
+    assert sink.closed
+    assert gzip.decompress(log_path.read_bytes()) == event("agent_start") + b"\n" + event("agent_end") + b"\n"
+
+
+def test_stream_keeps_draining_when_log_write_fails(tmp_path: Path) -> None:
+    read_fd, write_fd = os.pipe()
+    sink = MagicMock()
+    sink.write.side_effect = OSError("disk full")
+    parser = PiEventParser("T-1")
+    stream = PiStream(os.fdopen(read_fd, "rb"), sink, parser).start()
+
+    os.write(write_fd, event("tool_execution_start", toolName="subagent", toolCallId="1", args={}) + b"\n")
+    os.close(write_fd)
+
+    assert stream.join(timeout=5)
+    assert parser.phase == "review"
+    sink.close.assert_called_once()
+
+
+def test_resolve_phase_timeout_ms(monkeypatch) -> None:
+    monkeypatch.delenv("RALPH_PHASE_TIMEOUT_MS", raising=False)
+    assert ralph_module.resolve_phase_timeout_ms({}) == 0
+    assert ralph_module.resolve_phase_timeout_ms({"phaseTimeoutMs": 90000}) == 90000
+
+    monkeypatch.setenv("RALPH_PHASE_TIMEOUT_MS", "1000")
+    assert ralph_module.resolve_phase_timeout_ms({"phaseTimeoutMs": 90000}) == 1000
@@ -0,0 +1,183 @@
+"""Tests for the projected Ralph schedule (tf.ralph.plan, `tf ralph plan`).
+
+Tests cover:
+- List scheduling in serial and parallel mode (component conflicts, untagged fallback)
+- The duration-weighted critical path
+- Duration estimates from completed-ticket metrics
+- Unschedulable tickets and the maxIterations cut-off
+- The CLI on a project with history
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Optional
+
+import pytest
+
+from tf import ralph as ralph_module
+from tf.ralph.event_log import EventLog
+from tf.ralph.plan import DurationEstimator, PlanTask, build_plan, critical_path, list_schedule
+
+from tests.helpers import make_ticket
+
+
+def task(ticket: str, duration: float, deps=(), components: Optional[set] = None) -> PlanTask:
+    return PlanTask(ticket, duration, tuple(deps), frozenset(components) if components is not None else None)
+
+
+def completed(ticket: str, duration: float) -> dict:
+    return {"type": "ticket", "ticket": ticket, "status": "COMPLETE", "metrics": {"duration_secs": duration}}
+
+
+def test_serial_schedule_follows_queue_order() -> None:
+    tasks = {"a": task("a", 10), "b": task("b", 20, deps=["a"]), "c": task("c", 5)}
+
+    schedule = list_schedule(tasks, ["a", "b", "c"], workers=1)
+
+    assert [(run.ticket, run.start, run.end) for run in schedule.runs] == [
+        ("a", 0, 10), ("b", 10, 30), ("c", 30, 35)
+    ]
+    assert schedule.makespan == 35
+    assert schedule.utilisation == 1.0
+
+
+def test_parallel_schedule_respects_component_conflicts() -> None:
+    tasks = {
+        "a": task("a", 10, components={"component:x"}),
+        "b": task("b", 10, components={"component:x"}),
+        "c": task("c", 30, components={"component:y"}),
+    }
+
+    schedule = list_schedule(tasks, ["a", "b", "c"], workers=3)
+
+    starts = {run.ticket: (run.worker, run.start) for run in schedule.runs}
+    assert starts == {"a": (1, 0), "c": (2, 0), "b": (1, 10)}
+    assert schedule.makespan == 30
+    assert schedule.timeline()[3] == []
+
+
+def test_untagged_ticket_runs_alone_as_fallback() -> None:
+    tasks = {"a": task("a", 10, components={"component:x"}), "u": task("u", 5)}
+
+    schedule = list_schedule(tasks, ["u", "a"], workers=2)
+
+    assert [(run.ticket, run.start) for run in schedule.runs] == [("a", 0), ("u", 10)]
+
+
+def test_fatal_ticket_stops_launches_and_max_launches() -> None:
+    tasks = {"a": task("a", 10), "b": task("b", 10)}
+    tasks["a"].fatal = True
+
+    assert [run.ticket for run in list_schedule(tasks, ["a", "b"], workers=1).runs] == ["a"]
+    limited = list_schedule({"a": task("a", 1), "b": task("b", 1)}, ["a", "b"], workers=1, max_launches=1)
+    assert limited.not_started == ["b"]
+
+
+def test_critical_path_uses_durations() -> None:
+    tasks = {
+        "a": task("a", 10),
+        "b": task("b", 100),
+        "c": task("c", 5, deps=["a", "b"]),
+        "d": task("d", 50, deps=["a"]),
+    }
+
+    assert critical_path(tasks) == (["b", "c"], 105)
+
+
+def test_duration_estimator_sources() -> None:
+    tickets = {
+        "old-1": make_ticket("old-1", "closed", tags=["component:cli"]),
+        "old-2": make_ticket("old-2", "closed", tags=["component:cli"]),
+        "old-3": make_ticket("old-3", "closed", tags=["component:cli"]),
+        "old-4": make_ticket("old-4", "closed", tags=["component:kb"]),
+        "new-cli": make_ticket("new-cli", tags=["component:cli"]),
+        "new-ui": make_ticket("new-ui", tags=["component:ui"]),
+    }
+    events = [completed("old-1", 100), completed("old-2", 200), completed("old-3", 300), completed("old-4", 1000)]
+    events.append({"type": "ticket", "ticket": "old-4", "status": "FAILED", "metrics": {"duration_secs": 9}})
+
+    estimator = DurationEstimator(events, tickets)
+
+    assert estimator.estimate("new-cli") == (200, "component")
+    assert estimator.estimate("new-ui") == (200, "history")
+    assert DurationEstimator([], tickets, default_secs=60).estimate("new-ui") == (60, "default")
+
+
+def test_build_plan_reports_unschedulable_and_iteration_limit() -> None:
+    tickets = {
+        "done": make_ticket("done", "closed"),
+        "a": make_ticket("a", deps=["done"]),
+        "b": make_ticket("b", deps=["a"], priority=1),
+        "c": make_ticket("c"),
+        "missing": make_ticket("missing", deps=["ghost"]),
+        "after-missing": make_ticket("after-missing", deps=["missing"]),
+        "x": make_ticket("x", deps=["y"]),
+        "y": make_ticket("y", deps=["x"]),
+    }
+    estimator = DurationEstimator([], tickets, default_secs=60)
+
+    plan = build_plan(tickets, estimator, workers=1, max_iterations=2, started_at=1000.0)
+
+    assert [run.ticket for run in plan.schedule.runs] == ["a", "b", "c"]
+    assert plan.unschedulable == {
+        "after-missing": "depends on unschedulable missing",
+        "missing": "depends on ghost (unknown ticket)",
+        "x": "dependency cycle",
+        "y": "dependency cycle",
+    }
+    assert plan.finish_at == 1180.0
+    assert plan.critical_path == ["a", "b"]
+    assert plan.limited is not None and plan.limited.not_started == ["c"]
+    assert plan.to_dict()["stops_after_secs"] == 120.0
+
+
+@pytest.fixture
+def project(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    tickets_dir = tmp_path / ".tickets"
+    tickets_dir.mkdir()
+    specs = {
+        "pt-a": ("closed", [], "component:cli"),
+        "pt-b": ("open", [], "component:cli"),
+        "pt-c": ("open", ["pt-b"], "component:kb"),
+        "pt-d": ("open", [], "component:kb"),
+    }
+    for ticket_id, (status, deps, tag) in specs.items():
+        (tickets_dir / f"{ticket_id}.md").write_text(
+            f"---\nid: {ticket_id}\nstatus: {status}\ndeps: [{', '.join(deps)}]\ntags: [{tag}]\n---\n# {ticket_id}\n"
+        )
+    ralph_dir = tmp_path / ".tf" / "ralph"
+    ralph_dir.mkdir(parents=True)
+    (ralph_dir / "config.json").write_text(json.dumps({"parallelWorkers": 2}))
+    EventLog(ralph_dir).record_ticket("pt-a", "COMPLETE", metrics={"duration_secs": 600})
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(ralph_module, "_native_queue", None)
+    monkeypatch.setattr(ralph_module, "_scoring_queue", None)
+    return tmp_path
+
+
+def test_ralph_plan_json(project: Path, capsys: pytest.CaptureFixture) -> None:
+    assert ralph_module.main(["plan", "--json"]) == 0
+
+    plan = json.loads(capsys.readouterr().out)
+    assert plan["workers"] == 2
+    assert [(run["ticket"], run["start"]) for run in plan["order"]] == [
+        ("pt-b", 0), ("pt-d", 0), ("pt-c", 600)
+    ]
+    assert {run["source"] for run in plan["order"]} == {"history"}
+    assert plan["makespan_secs"] == 1200
+    assert plan["critical_path"] == ["pt-b", "pt-c"]
+
+
+def test_ralph_plan_text_and_sweep(project: Path, capsys: pytest.CaptureFixture) -> None:
+    assert ralph_module.main(["plan"]) == 0
+    text = capsys.readouterr().out
+    assert "Estimated makespan:   20m" in text
+    assert "Worker timeline:" in text
+    assert "pt-b -> pt-c" in text
+
+    assert ralph_module.main(["plan", "--workers", "1,2"]) == 0
+    sweep = capsys.readouterr().out.splitlines()
+    assert sweep[1].split()[:3] == ["1", "30m", "100%"]
+    assert sweep[2].split()[:3] == ["2", "20m", "75%"]
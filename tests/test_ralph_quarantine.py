@@ -0,0 +1,293 @@
+"""Tests for Ralph failure isolation (tf.ralph.quarantine, tf.ralph.breaker).
+
+Tests cover:
+- Consecutive-failure counts, quarantine, release on success/edit/forgive
+- The sliding-window circuit breaker (open, cooldown, half-open probe, backoff)
+- failurePolicy=isolate vs stop in the serial and parallel loops
+- The `tf ralph quarantine` CLI
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from tf import ralph as ralph_module
+from tf.ralph.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from tf.ralph.quarantine import Quarantine
+from tf.ralph.scheduler import WorkerSlot
+
+from tests.helpers import FakeClock
+
+
+def test_quarantine_after_consecutive_failures(tmp_path: Path) -> None:
+    quarantine = Quarantine(tmp_path, threshold=2)
+
+    assert quarantine.record_failure("pt-a", "exit 1") is False
+    assert quarantine.filter(["pt-a", "pt-b"]) == ["pt-a", "pt-b"]
+    assert quarantine.record_failure("pt-a", "exit 2") is True
+    assert quarantine.record_failure("pt-a", "exit 2") is False
+
+    assert quarantine.quarantined() == ["pt-a"]
+    assert quarantine.filter(["pt-a", "pt-b"]) == ["pt-b"]
+    assert quarantine.entries()["pt-a"]["last_error"] == "exit 2"
+
+    # Shared through the file: another loop sees the same state
+    assert Quarantine(tmp_path, threshold=2).is_quarantined("pt-a")
+
+    quarantine.record_success("pt-a")
+    assert quarantine.entries() == {}
+
+
+def test_quarantine_release_paths(tmp_path: Path) -> None:
+    tickets_dir = tmp_path / ".tickets"
+    tickets_dir.mkdir()
+    ticket_file = tickets_dir / "pt-a.md"
+    ticket_file.write_text("---\nid: pt-a\n---\n")
+    old = time.time() - 60
+    os.utime(ticket_file, (old, old))
+    quarantine = Quarantine(tmp_path / "ralph", threshold=1, tickets_dir=tickets_dir)
+
+    quarantine.record_failure("pt-a")
+    quarantine.record_failure("pt-b")
+    assert quarantine.quarantined() == ["pt-a", "pt-b"]
+
+    # Editing the ticket gives it another chance
+    ticket_file.write_text("---\nid: pt-a\n---\nclarified\n")
+    assert not quarantine.is_quarantined("pt-a")
+
+    assert quarantine.forgive(["pt-b", "pt-x"]) == ["pt-b"]
+    assert "pt-b" not in quarantine.entries()
+    assert quarantine.release("pt-a") is True
+    assert quarantine.release("pt-a") is False
+
+    quarantine.record_failure("pt-c")
+    assert quarantine.clear() == 1
+    assert Quarantine(tmp_path / "ralph", threshold=0).record_failure("pt-d") is False
+
+
+def test_circuit_breaker_opens_and_probes() -> None:
+    clock = FakeClock(100.0)
+    breaker = CircuitBreaker(window=5, threshold=0.6, cooldown_secs=60, clock=clock)
+
+    assert breaker.record("a", ok=True) == []
+    assert breaker.record("b", ok=False) == []
+    assert breaker.record("c", ok=False) == []
+    assert breaker.state == CLOSED
+    assert breaker.record("d", ok=False) == ["b", "c", "d"]
+    assert breaker.state == OPEN and breaker.trips == 1
+    assert not breaker.allow()
+    assert breaker.remaining() == 60
+
+    # After the cooldown exactly one probe may launch
+    clock.now += 60
+    assert breaker.allow() and breaker.state == HALF_OPEN
+    breaker.launched("e")
+    assert not breaker.allow()
+
+    # A failed probe re-opens with twice the cooldown
+    assert breaker.record("e", ok=False) == []
+    assert breaker.state == OPEN and breaker.remaining() == 120
+    clock.now += 120
+    assert breaker.allow()
+    breaker.launched("f")
+    breaker.record("f", ok=True)
+    assert breaker.state == CLOSED and breaker.failure_rate == 0.0
+    assert CircuitBreaker(window=0).allow()
+
+
+def _worker(exit_code: int, seconds: float) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-c", f"import sys, time; time.sleep({seconds}); sys.exit({exit_code})"]
+    )
+
+
+def _run_parallel(tmp_path: Path, config_overrides: dict) -> tuple[int, list[str], dict[str, str]]:
+    ralph_dir = tmp_path / ".tf" / "ralph"
+    ralph_dir.mkdir(parents=True, exist_ok=True)
+    states: dict[str, str] = {}
+    launches: list[str] = []
+    tickets = ("BAD", "A", "B", "C")
+
+    def fake_ready(_query: str) -> list[str]:
+        return [t for t in tickets if states.get(t) != "COMPLETE"]
+
+    def fake_start(ticket: str, iteration: int, **kwargs) -> WorkerSlot:
+        launches.append(ticket)
+        return WorkerSlot(
+            ticket=ticket,
+            # BAD fails at once, so it always finishes before the ticket launched with it
+            proc=_worker(1, 0) if ticket == "BAD" else _worker(0, 0.2),
+            worktree_path=tmp_path / ticket,
+            iteration=iteration,
+            components=kwargs["components"],
+        )
+
+    def fake_update_state(_ralph_dir, _root, ticket, status, *args, **kwargs) -> None:
+        states[ticket] = status
+
+    config = dict(ralph_module.DEFAULTS)
+    config.update({"parallelWorkers": 2, "logLevel": "quiet", "sleepBetweenRetries": 50, "maxIterations": 10})
+    config.update(config_overrides)
+
+    with patch.object(ralph_module, "find_project_root", return_value=tmp_path), \
+            patch.object(ralph_module, "load_config", return_value=config), \
+            patch.object(ralph_module, "git_repo_root", return_value=tmp_path), \
+            patch.object(ralph_module, "ensure_pi", return_value=True), \
+            patch.object(ralph_module, "prompt_exists", return_value=True), \
+            patch.object(ralph_module, "lock_acquire", return_value=True), \
+            patch.object(ralph_module, "lock_release"), \
+            patch.object(ralph_module, "set_state"), \
+            patch.object(ralph_module, "backlog_empty", side_effect=lambda _c: not fake_ready("")), \
+            patch.object(ralph_module, "list_ready_tickets", side_effect=fake_ready), \
+            patch.object(ralph_module, "select_ticket", side_effect=lambda _q: (fake_ready("") or [None])[0]), \
+            patch.object(ralph_module, "extract_components", side_effect=lambda t, p, u: {f"component:{t}"}), \
+            patch.object(ralph_module, "_start_parallel_ticket", side_effect=fake_start), \
+            patch.object(ralph_module, "_remove_worktree", return_value=subprocess.CompletedProcess([], 0)), \
+            patch.object(ralph_module, "update_state", side_effect=fake_update_state), \
+            patch.object(ralph_module, "resolve_attempt_timeout_ms", return_value=0):
+        rc = ralph_module.ralph_start(["--quiet"])
+    return rc, launches, states
+
+
+def test_parallel_isolate_keeps_going_and_quarantines(tmp_path: Path) -> None:
+    rc, launches, states = _run_parallel(tmp_path, {})
+
+    assert rc == 1
+    assert states == {"BAD": "FAILED", "A": "COMPLETE", "B": "COMPLETE", "C": "COMPLETE"}
+    # Retried once (after the other tickets), then skipped
+    assert launches.count("BAD") == 2
+    assert Quarantine(tmp_path / ".tf" / "ralph").quarantined() == ["BAD"]
+
+
+def test_parallel_stop_policy_ends_loop(tmp_path: Path) -> None:
+    rc, launches, states = _run_parallel(tmp_path, {"failurePolicy": "stop"})
+
+    assert rc == 1
+    # The running ticket finishes; nothing new launches after the failure
+    assert launches == ["BAD", "A"]
+    assert states == {"BAD": "FAILED", "A": "COMPLETE"}
+
+
+def test_circuit_breaker_pauses_parallel_loop(tmp_path: Path) -> None:
+    breakers: list[CircuitBreaker] = []
+
+    def capture(config: dict) -> CircuitBreaker:
+        breakers.append(CircuitBreaker(window=2, threshold=0.5, cooldown_secs=0.05))
+        return breakers[0]
+
+    with patch.object(ralph_module, "create_circuit_breaker", side_effect=capture):
+        rc, launches, states = _run_parallel(tmp_path, {"maxIterations": 6})
+
+    assert rc == 1
+    assert breakers[0].trips >= 1
+    assert {states[t] for t in ("A", "B", "C")} == {"COMPLETE"}
+    # Failures that tripped the breaker are not held against BAD
+    assert launches.count("BAD") > 2
+
+
+def test_requeued_restart_waits_for_open_breaker(tmp_path: Path) -> None:
+    (tmp_path / ".tf" / "ralph").mkdir(parents=True)
+    breaker = CircuitBreaker(window=2, threshold=0.5, cooldown_secs=0.3)
+    states: dict[str, str] = {}
+    launches: list[int] = []
+
+    def fake_start(ticket: str, iteration: int, **kwargs) -> WorkerSlot:
+        launches.append(kwargs.get("attempt", 0))
+        if len(launches) == 1:
+            # Times out, and other failures open the breaker before the restart can launch
+            breaker._open(0.3)
+            return WorkerSlot(ticket=ticket, proc=_worker(0, 30), worktree_path=tmp_path / ticket,
+                              iteration=iteration, timeout_secs=0.1)
+        return WorkerSlot(ticket=ticket, proc=_worker(0, 0), worktree_path=tmp_path / ticket, iteration=iteration)
+
+    def fake_update_state(_ralph_dir, _root, ticket, status, *args, **kwargs) -> None:
+        states[ticket] = status
+
+    config = dict(ralph_module.DEFAULTS)
+    config.update({"parallelWorkers": 2, "logLevel": "quiet", "maxIterations": 1, "maxRestarts": 1})
+    with patch.object(ralph_module, "find_project_root", return_value=tmp_path), \
+            patch.object(ralph_module, "load_config", return_value=config), \
+            patch.object(ralph_module, "create_circuit_breaker", return_value=breaker), \
+            patch.object(ralph_module, "git_repo_root", return_value=tmp_path), \
+            patch.object(ralph_module, "ensure_pi", return_value=True), \
+            patch.object(ralph_module, "prompt_exists", return_value=True), \
+            patch.object(ralph_module, "lock_acquire", return_value=True), \
+            patch.object(ralph_module, "lock_release"), \
+            patch.object(ralph_module, "set_state"), \
+            patch.object(ralph_module, "backlog_empty", return_value=False), \
+            patch.object(ralph_module, "list_ready_tickets", return_value=["SLOW"]), \
+            patch.object(ralph_module, "extract_components", return_value={"component:a"}), \
+            patch.object(ralph_module, "_start_parallel_ticket", side_effect=fake_start), \
+            patch.object(ralph_module, "_remove_worktree", return_value=subprocess.CompletedProcess([], 0)), \
+            patch.object(ralph_module, "update_state", side_effect=fake_update_state), \
+            patch.object(ralph_module, "resolve_attempt_timeout_ms", return_value=0):
+        rc = ralph_module.ralph_start(["--quiet"])
+
+    assert rc == 0
+    # The restart launched once the cooldown ended instead of being left unrecorded
+    assert launches == [0, 1]
+    assert states == {"SLOW": "COMPLETE"}
+
+
+def test_serial_isolate_continues_past_failure(tmp_path: Path) -> None:
+    ralph_dir = tmp_path / ".tf" / "ralph"
+    ralph_dir.mkdir(parents=True)
+    states: dict[str, str] = {}
+    runs: list[str] = []
+
+    def fake_ready(_query: str) -> list[str]:
+        return [t for t in ("BAD", "OK") if states.get(t) != "COMPLETE"]
+
+    def fake_run(ticket: str, *args, **kwargs) -> int:
+        runs.append(ticket)
+        return 1 if ticket == "BAD" else 0
+
+    def fake_update_state(_ralph_dir, _root, ticket, status, *args, **kwargs) -> None:
+        states[ticket] = status
+
+    config = dict(ralph_module.DEFAULTS)
+    config.update({"logLevel": "quiet", "sleepBetweenTickets": 0, "sleepBetweenRetries": 0, "maxIterations": 10})
+
+    with patch.object(ralph_module, "find_project_root", return_value=tmp_path), \
+            patch.object(ralph_module, "load_config", return_value=config), \
+            patch.object(ralph_module, "lock_acquire", return_value=True), \
+            patch.object(ralph_module, "lock_release"), \
+            patch.object(ralph_module, "set_state"), \
+            patch.object(ralph_module, "backlog_empty", side_effect=lambda _c: not fake_ready("")), \
+            patch.object(ralph_module, "list_ready_tickets", side_effect=fake_ready), \
+            patch.object(ralph_module, "select_ticket", side_effect=lambda _q: (fake_ready("") or [None])[0]), \
+            patch.object(ralph_module, "run_ticket", side_effect=fake_run), \
+            patch.object(ralph_module, "update_state", side_effect=fake_update_state):
+        rc = ralph_module.ralph_start(["--quiet"])
+
+    assert rc == 1
+    assert runs == ["BAD", "OK", "BAD"]
+    assert states == {"BAD": "FAILED", "OK": "COMPLETE"}
+
+
+def test_ralph_quarantine_cli(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture) -> None:
+    ralph_dir = tmp_path / ".tf" / "ralph"
+    ralph_dir.mkdir(parents=True)
+    monkeypatch.chdir(tmp_path)
+    quarantine = Quarantine(ralph_dir, threshold=1)
+    quarantine.record_failure("pt-a", "exit 3")
+
+    assert ralph_module.main(["quarantine"]) == 0
+    assert "pt-a" in capsys.readouterr().out
+
+    assert ralph_module.main(["quarantine", "--json"]) == 0
+    data = json.loads(capsys.readouterr().out)
+    assert data["pt-a"]["quarantined"] is True
+    assert data["pt-a"]["failures"] == 1
+
+    assert ralph_module.main(["quarantine", "--release", "pt-a"]) == 0
+    assert ralph_module.main(["quarantine", "--release", "pt-a"]) == 1
+    assert quarantine.entries() == {}
@@ -0,0 +1,186 @@
+"""Tests for per-provider/model launch limits (tf.ralph.rate_limit).
+
+Tests cover:
+- Parsing rateLimits and matching models/providers to limit keys
+- Concurrency quotas and token buckets
+- Resolving the models a /tf run uses (flags, reviewers, retry escalation)
+- ralph_start holding back tickets on a saturated provider while others launch
+"""
+
+from __future__ import annotations
+
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from tf import ralph as ralph_module
+from tf.ralph.rate_limit import RateLimiter, WorkflowModels, parse_limits, workflow_models
+from tf.ralph.scheduler import WorkerSlot
+from tf.retry_state import RetryState
+
+from tests.helpers import FakeClock
+
+
+SETTINGS = {
+    "metaModels": {
+        "worker": {"model": "kimi-coding/k2p5"},
+        "research": {"model": "minimax/MiniMax-M2.1"},
+        "review": {"model": "openai-codex/gpt-5.2"},
+        "fast": {"model": "zai/glm-4.7"},
+    },
+    "agents": {
+        "researcher": "research",
+        "researcher-fetch": "research",
+        "reviewer-general": "review",
+        "reviewer-second-opinion": "review",
+        "review-merge": "fast",
+        "fixer": "worker",
+        "closer": "fast",
+    },
+    "prompts": {"tf": "worker"},
+    "workflow": {
+        "enableResearcher": True,
+        "enableReviewers": ["reviewer-general", "reviewer-second-opinion"],
+        "escalation": {"enabled": True, "models": {"fixer": "openai-codex/gpt-5.3", "worker": "zai/glm-5"}},
+    },
+}
+
+
+def test_parse_limits_rejects_malformed_entries() -> None:
+    limits = parse_limits({"openai-codex": {"maxConcurrent": 2, "perMinute": 6}, "zai/glm-4.7": {}})
+
+    assert limits["openai-codex"].max_concurrent == 2
+    assert limits["openai-codex"].burst == 1.0
+    assert limits["zai/glm-4.7"].per_minute is None
+    assert parse_limits(None) == {}
+    for raw in ([1], {"a": 1}, {"a": {"perMinute": "fast"}}, {"a": {"maxConcurrent": 0}}):
+        with pytest.raises(ValueError):
+            parse_limits(raw)
+
+
+def test_concurrency_quota_and_keys() -> None:
+    limiter = RateLimiter(parse_limits({"openai-codex": {"maxConcurrent": 1}, "zai/glm-4.7": {"maxConcurrent": 2}}))
+    keys = limiter.keys(["openai-codex/gpt-5.2", "openai-codex/gpt-5.3", "zai/glm-4.7", "kimi-coding/k2p5"])
+
+    assert keys == ["openai-codex", "zai/glm-4.7"]
+    assert limiter.acquire("a", keys)
+    assert limiter.blocked(keys) == ("openai-codex", None)
+    assert not limiter.acquire("b", keys)
+    # Other providers are unaffected
+    assert limiter.acquire("c", limiter.keys(["zai/glm-4.7"]))
+    assert limiter.usage() == {"openai-codex": 1, "zai/glm-4.7": 2}
+
+    limiter.release("a")
+    assert limiter.acquire("b", keys)
+    assert limiter.usage() == {"openai-codex": 1, "zai/glm-4.7": 2}
+
+
+def test_token_bucket_refills_per_minute() -> None:
+    clock = FakeClock()
+    limiter = RateLimiter(parse_limits({"zai": {"perMinute": 6, "burst": 2}}), clock=clock)
+    keys = limiter.keys(["zai/glm-4.7"])
+
+    assert limiter.acquire("a", keys) and limiter.acquire("b", keys)
+    key, wait = limiter.blocked(keys)
+    assert key == "zai" and wait == pytest.approx(10.0)
+    # Tokens are spent even after the tickets finish
+    limiter.release("a")
+    assert not limiter.acquire("c", keys)
+    clock.now += 10
+    assert limiter.acquire("c", keys)
+
+
+def test_workflow_models_follow_settings_and_flags() -> None:
+    models = workflow_models(SETTINGS, "/tf", "--auto")
+
+    assert list(models) == [
+        "tf", "researcher", "researcher-fetch", "reviewer-general", "reviewer-second-opinion",
+        "review-merge", "fixer", "closer",
+    ]
+    assert models["tf"] == "kimi-coding/k2p5"
+    assert "researcher" not in workflow_models(SETTINGS, "/tf", "--auto --no-research")
+    assert set(WorkflowModels(SETTINGS).for_ticket(Path("missing"))) == {
+        "kimi-coding/k2p5", "minimax/MiniMax-M2.1", "openai-codex/gpt-5.2", "zai/glm-4.7",
+    }
+
+
+def test_workflow_models_apply_retry_escalation(tmp_path: Path) -> None:
+    state = RetryState(tmp_path, ticket_id="pt-a")
+    for _ in range(2):
+        state.start_attempt()
+        state.complete_attempt("blocked")
+
+    models = WorkflowModels(SETTINGS).for_ticket(tmp_path)
+
+    # Third attempt: escalated fixer and worker replace the base models
+    assert "openai-codex/gpt-5.3" in models
+    assert "zai/glm-5" in models
+    assert "kimi-coding/k2p5" not in models
+
+
+class TicketModels:
+    """WorkflowModels stand-in: ticket IDs starting with S use the slow provider."""
+
+    def for_ticket(self, artifact_dir: Path) -> list[str]:
+        return ["slow/model"] if artifact_dir.name.startswith("S") else ["fast/model"]
+
+
+def test_ralph_start_holds_back_saturated_provider(tmp_path: Path) -> None:
+    ralph_dir = tmp_path / ".tf" / "ralph"
+    ralph_dir.mkdir(parents=True)
+    tickets = ["S1", "S2", "S3", "F1", "F2"]
+    done: list[str] = []
+    launches: list[str] = []
+    running: dict[str, subprocess.Popen] = {}
+    slow_overlap: list[int] = []
+
+    def fake_ready(_query: str) -> list[str]:
+        return [t for t in tickets if t not in done]
+
+    def fake_start(ticket: str, iteration: int, **kwargs) -> WorkerSlot:
+        launches.append(ticket)
+        proc = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(0.2)"])
+        running[ticket] = proc
+        slow_overlap.append(sum(1 for t, p in running.items() if t.startswith("S") and p.poll() is None))
+        return WorkerSlot(
+            ticket=ticket, proc=proc, worktree_path=tmp_path / ticket, iteration=iteration,
+            components=kwargs["components"],
+        )
+
+    def fake_update_state(_ralph_dir, _root, ticket, status, *args, **kwargs) -> None:
+        done.append(ticket)
+
+    config = dict(ralph_module.DEFAULTS)
+    config.update({
+        "parallelWorkers": 3,
+        "logLevel": "quiet",
+        "sleepBetweenRetries": 50,
+        "rateLimits": {"slow": {"maxConcurrent": 1}},
+    })
+
+    with patch.object(ralph_module, "find_project_root", return_value=tmp_path), \
+            patch.object(ralph_module, "load_config", return_value=config), \
+            patch.object(ralph_module, "git_repo_root", return_value=tmp_path), \
+            patch.object(ralph_module, "ensure_pi", return_value=True), \
+            patch.object(ralph_module, "prompt_exists", return_value=True), \
+            patch.object(ralph_module, "lock_acquire", return_value=True), \
+            patch.object(ralph_module, "lock_release"), \
+            patch.object(ralph_module, "set_state"), \
+            patch.object(ralph_module, "backlog_empty", side_effect=lambda _c: not fake_ready("")), \
+            patch.object(ralph_module, "list_ready_tickets", side_effect=fake_ready), \
+            patch.object(ralph_module, "extract_components", side_effect=lambda t, p, u: {f"component:{t}"}), \
+            patch.object(ralph_module, "_start_parallel_ticket", side_effect=fake_start), \
+            patch.object(ralph_module, "_remove_worktree", return_value=subprocess.CompletedProcess([], 0)), \
+            patch.object(ralph_module, "update_state", side_effect=fake_update_state), \
+            patch.object(ralph_module, "resolve_attempt_timeout_ms", return_value=0), \
+            patch.object(ralph_module, "load_workflow_models", return_value=TicketModels()):
+        rc = ralph_module.ralph_start(["--quiet"])
+
+    assert rc == 0
+    assert sorted(done) == sorted(tickets)
+    assert max(slow_overlap) == 1
+    # The first batch fills the other slots with tickets on the free provider
+    assert launches[:3] == ["S1", "F1", "F2"]
@@ -0,0 +1,278 @@
+"""Tests for the continuous parallel scheduler (tf.ralph.scheduler).
+
+Tests cover:
+- WorkerPool slot accounting, reaping and wait_any semantics
+- select_parallel_tickets honouring components held by running tickets
+- ralph_start refilling a slot as soon as any worker exits
+- Per-slot deadlines, SIGTERM/SIGKILL termination and parallel restarts
+"""
+
+from __future__ import annotations
+
+import subprocess
+import sys
+from pathlib import Path
+from typing import Optional
+from unittest.mock import patch
+
+import pytest
+
+from tf import ralph as ralph_module
+from tf.ralph.scheduler import TIMEOUT_RC, WorkerPool, WorkerSlot, terminate_process
+
+
+def _sleeper(seconds: float, exit_code: int = 0) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-c", f"import sys, time; time.sleep({seconds}); sys.exit({exit_code})"]
+    )
+
+
+def _slot(ticket: str, seconds: float, exit_code: int = 0, components: Optional[set] = None) -> WorkerSlot:
+    return WorkerSlot(
+        ticket=ticket,
+        proc=_sleeper(seconds, exit_code),
+        worktree_path=Path("/tmp") / ticket,
+        iteration=0,
+        components=components or set(),
+    )
+
+
+class TestWorkerPool:
+    """Tests for WorkerPool."""
+
+    def test_free_slots_and_busy_components(self) -> None:
+        pool = WorkerPool(max_workers=3, poll_interval=0.01)
+        pool.add(_slot("T-1", 0, components={"component:api"}))
+        pool.add(_slot("T-2", 0, components={"component:ui"}))
+
+        assert pool.free_slots == 1
+        assert "T-1" in pool
+        assert pool.running_tickets == {"T-1", "T-2"}
+        assert pool.busy_components == {"component:api", "component:ui"}
+        pool.wait_any()
+        pool.wait_any()
+
+    def test_add_rejects_duplicate_and_overflow(self) -> None:
+        pool = WorkerPool(max_workers=1, poll_interval=0.01)
+        pool.add(_slot("T-1", 0))
+        with pytest.raises(ValueError, match="already running"):
+            pool.add(_slot("T-1", 0))
+        with pytest.raises(ValueError, match="No free worker slots"):
+            pool.add(_slot("T-2", 0))
+        pool.wait_any()
+
+    def test_wait_any_returns_first_finisher(self) -> None:
+        pool = WorkerPool(max_workers=2, poll_interval=0.01)
+        pool.add(_slot("slow", 5))
+        pool.add(_slot("fast", 0, exit_code=3))
+
+        finished = pool.wait_any()
+
+        assert [(slot.ticket, rc) for slot, rc in finished] == [("fast", 3)]
+        assert pool.running_tickets == {"slow"}
+        pool.slots[0].proc.kill()
+        pool.wait_any()
+
+    def test_wait_any_timeout_returns_empty(self) -> None:
+        pool = WorkerPool(max_workers=1, poll_interval=0.01)
+        pool.add(_slot("slow", 5))
+
+        assert pool.wait_any(timeout=0.05) == []
+        assert len(pool) == 1
+        pool.slots[0].proc.kill()
+        pool.wait_any()
+
+    def test_wait_any_on_empty_pool(self) -> None:
+        assert WorkerPool(max_workers=2).wait_any() == []
+
+
+class TestWorkerDeadlines:
+    """Tests for per-slot timeouts."""
+
+    def test_expired_slot_is_terminated(self) -> None:
+        pool = WorkerPool(max_workers=1, poll_interval=0.01)
+        slot = _slot("hang", 30)
+        slot.timeout_secs = 0.1
+        pool.add(slot)
+
+        finished = pool.wait_any(timeout=10)
+
+        assert [(s.ticket, rc) for s, rc in finished] == [("hang", TIMEOUT_RC)]
+        assert slot.timed_out is True
+        assert slot.proc.poll() is not None
+
+    def test_terminate_escalates_to_sigkill(self) -> None:
+        proc = subprocess.Popen(
+            [
+                sys.executable,
+                "-c",
+                "import signal, sys, time; signal.signal(signal.SIGTERM, signal.SIG_IGN); "
+                "print('ready', flush=True); time.sleep(30)",
+            ],
+            stdout=subprocess.PIPE,
+            start_new_session=True,
+        )
+        assert proc.stdout is not None
+        proc.stdout.readline()
+
+        rc = terminate_process(proc, grace_secs=0.2)
+        proc.stdout.close()
+
+        assert rc == -9
+
+    def test_terminate_all(self) -> None:
+        pool = WorkerPool(max_workers=2, poll_interval=0.01)
+        pool.add(_slot("a", 30))
+        pool.add(_slot("b", 30))
+
+        slots = pool.terminate_all()
+
+        assert len(pool) == 0
+        assert all(slot.proc.poll() is not None for slot in slots)
+
+    def test_terminate_one(self) -> None:
+        pool = WorkerPool(max_workers=2, poll_interval=0.01)
+        pool.add(_slot("a", 30))
+        pool.add(_slot("b", 30))
+
+        slot = pool.terminate("a")
+
+        assert slot is not None and slot.proc.poll() is not None
+        assert pool.running_tickets == {"b"}
+        assert pool.terminate("a") is None
+        pool.terminate_all()
+
+
+class TestSelectParallelTicketsBusyComponents:
+    """select_parallel_tickets should avoid components claimed by running tickets."""
+
+    def test_skips_components_already_running(self) -> None:
+        comps = {"A": {"component:api"}, "B": {"component:ui"}, "C": {"component:db"}}
+        inspected: dict[str, Optional[set]] = {}
+        with patch.object(ralph_module, "extract_components", side_effect=lambda t, p, u: comps[t]):
+            selected = ralph_module.select_parallel_tickets(
+                ["A", "B", "C"], 2, False, "component:",
+                busy_components={"component:api"},
+                components_out=inspected,
+            )
+
+        assert selected == ["B", "C"]
+        assert inspected["A"] == {"component:api"}
+
+    def test_zero_slots_selects_nothing(self) -> None:
+        with patch.object(ralph_module, "extract_components") as mock_extract:
+            assert ralph_module.select_parallel_tickets(["A"], 0, False, "component:") == []
+        mock_extract.assert_not_called()
+
+
+class TestContinuousParallelLoop:
+    """ralph_start --parallel should refill free slots without waiting for the batch."""
+
+    def test_slot_refilled_while_slow_ticket_runs(self, tmp_path: Path) -> None:
+        ralph_dir = tmp_path / ".tf" / "ralph"
+        ralph_dir.mkdir(parents=True)
+        durations = {"SLOW": 1.5, "FAST": 0.0, "NEXT": 0.0}
+        done: list[str] = []
+        events: list[str] = []
+
+        def fake_ready(_query: str) -> list[str]:
+            return [t for t in ("SLOW", "FAST", "NEXT") if t not in done]
+
+        def fake_start(ticket: str, iteration: int, **kwargs) -> WorkerSlot:
+            events.append(f"start:{ticket}")
+            return WorkerSlot(
+                ticket=ticket,
+                proc=_sleeper(durations[ticket]),
+                worktree_path=tmp_path / ticket,
+                iteration=iteration,
+                components=kwargs["components"],
+            )
+
+        def fake_update_state(_ralph_dir, _root, ticket, status, *args, **kwargs) -> None:
+            done.append(ticket)
+            events.append(f"done:{ticket}")
+
+        config = dict(ralph_module.DEFAULTS)
+        config.update({"parallelWorkers": 2, "logLevel": "quiet", "sleepBetweenRetries": 50, "maxIterations": 3})
+        components = {"SLOW": {"component:a"}, "FAST": {"component:b"}, "NEXT": {"component:c"}}
+
+        with patch.object(ralph_module, "find_project_root", return_value=tmp_path), \
+                patch.object(ralph_module, "load_config", return_value=config), \
+                patch.object(ralph_module, "git_repo_root", return_value=tmp_path), \
+                patch.object(ralph_module, "ensure_pi", return_value=True), \
+                patch.object(ralph_module, "prompt_exists", return_value=True), \
+                patch.object(ralph_module, "lock_acquire", return_value=True), \
+                patch.object(ralph_module, "lock_release"), \
+                patch.object(ralph_module, "set_state"), \
+                patch.object(ralph_module, "backlog_empty", side_effect=lambda _c: len(done) == 3), \
+                patch.object(ralph_module, "list_ready_tickets", side_effect=fake_ready), \
+                patch.object(ralph_module, "extract_components", side_effect=lambda t, p, u: components[t]), \
+                patch.object(ralph_module, "_start_parallel_ticket", side_effect=fake_start), \
+                patch.object(ralph_module, "_remove_worktree", return_value=subprocess.CompletedProcess([], 0)), \
+                patch.object(ralph_module, "update_state", side_effect=fake_update_state), \
+                patch.object(ralph_module, "resolve_attempt_timeout_ms", return_value=0):
+            rc = ralph_module.ralph_start(["--quiet"])
+
+        assert rc == 0
+        assert sorted(done) == ["FAST", "NEXT", "SLOW"]
+        # NEXT is launched (and finishes) while SLOW is still running.
+        assert events.index("start:NEXT") < events.index("done:SLOW")
+        assert events.index("done:NEXT") < events.index("done:SLOW")
+
+
+class TestParallelTimeoutRestart:
+    """ralph_start --parallel should time out and re-queue stuck tickets."""
+
+    def test_timed_out_ticket_is_restarted_then_failed(self, tmp_path: Path) -> None:
+        ralph_dir = tmp_path / ".tf" / "ralph"
+        ralph_dir.mkdir(parents=True)
+        durations = {"HANG": 30.0, "OK": 0.0}
+        states: dict[str, tuple[str, str]] = {}
+        attempts: list[tuple[str, int]] = []
+
+        def fake_ready(_query: str) -> list[str]:
+            return [t for t in ("HANG", "OK") if t not in states]
+
+        def fake_start(ticket: str, iteration: int, **kwargs) -> WorkerSlot:
+            attempts.append((ticket, kwargs.get("attempt", 0)))
+            return WorkerSlot(
+                ticket=ticket,
+                proc=_sleeper(durations[ticket]),
+                worktree_path=tmp_path / ticket,
+                iteration=iteration,
+                components=kwargs["components"],
+                timeout_secs=kwargs["timeout_ms"] / 1000,
+                attempt=kwargs.get("attempt", 0),
+            )
+
+        def fake_update_state(_ralph_dir, _root, ticket, status, error, *args, **kwargs) -> None:
+            states[ticket] = (status, error)
+
+        config = dict(ralph_module.DEFAULTS)
+        config.update({"parallelWorkers": 2, "logLevel": "quiet", "sleepBetweenRetries": 50, "maxIterations": 2})
+        components = {"HANG": {"component:a"}, "OK": {"component:b"}}
+
+        with patch.object(ralph_module, "find_project_root", return_value=tmp_path), \
+                patch.object(ralph_module, "load_config", return_value=config), \
+                patch.object(ralph_module, "git_repo_root", return_value=tmp_path), \
+                patch.object(ralph_module, "ensure_pi", return_value=True), \
+                patch.object(ralph_module, "prompt_exists", return_value=True), \
+                patch.object(ralph_module, "lock_acquire", return_value=True), \
+                patch.object(ralph_module, "lock_release"), \
+                patch.object(ralph_module, "set_state"), \
+                patch.object(ralph_module, "backlog_empty", side_effect=lambda _c: len(states) == 2), \
+                patch.object(ralph_module, "list_ready_tickets", side_effect=fake_ready), \
+                patch.object(ralph_module, "extract_components", side_effect=lambda t, p, u: components[t]), \
+                patch.object(ralph_module, "_start_parallel_ticket", side_effect=fake_start), \
+                patch.object(ralph_module, "_remove_worktree", return_value=subprocess.CompletedProcess([], 0)), \
+                patch.object(ralph_module, "update_state", side_effect=fake_update_state), \
+                patch.object(ralph_module, "resolve_attempt_timeout_ms", return_value=200), \
+                patch.object(ralph_module, "resolve_max_restarts", return_value=1):
+            rc = ralph_module.ralph_start(["--quiet"])
+
+        assert rc == TIMEOUT_RC
+        assert attempts.count(("HANG", 0)) == 1
+        assert attempts.count(("HANG", 1)) == 1
+        assert states["OK"][0] == "COMPLETE"
+        assert states["HANG"][0] == "FAILED"
+        assert "timed out after 2 attempt(s)" in states["HANG"][1]
@@ -0,0 +1,107 @@
+"""Tests for the Ralph simulator (tf.ralph.simulate).
+
+Tests cover:
+- Deterministic synthetic ticket graphs for each dependency shape
+- The zero-overhead list schedule used as the makespan baseline
+- End-to-end runs of the real loop against fake pi/tk (serial, parallel, failures)
+- The `tf ralph simulate` CLI writing JSON
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from tf import ralph as ralph_module
+from tf.ralph.simulate import SHAPES, Scenario, SimTicket, generate_tickets, ideal_makespan, run_scenario
+
+FAST = dict(mean_duration=100.0, distribution="fixed", time_scale=0.001)
+
+
+@pytest.mark.parametrize("shape", SHAPES)
+def test_generate_tickets_is_deterministic(shape: str) -> None:
+    scenario = Scenario(tickets=9, shape=shape, seed=7, failure_rate=0.3)
+
+    first = generate_tickets(scenario)
+    second = generate_tickets(scenario)
+
+    assert first == second
+    ids = [ticket.id for ticket in first]
+    for index, ticket in enumerate(first):
+        # Dependencies only point backwards, so every shape is acyclic
+        assert all(ids.index(dep) < index for dep in ticket.deps)
+        assert len(ticket.failures) == scenario.max_restarts + 1
+
+
+def test_generate_tickets_shapes() -> None:
+    chain = generate_tickets(Scenario(tickets=4, shape="chain"))
+    fanin = generate_tickets(Scenario(tickets=4, shape="fanin"))
+
+    assert [t.deps for t in chain] == [[], ["sim-0000"], ["sim-0001"], ["sim-0002"]]
+    assert fanin[-1].deps == ["sim-0000", "sim-0001", "sim-0002"]
+    assert not generate_tickets(Scenario(tickets=3, components=0))[0].components
+
+
+def test_ideal_makespan() -> None:
+    scenario = Scenario(workers=2, time_scale=1.0)
+    tickets = [
+        SimTicket("a", [], 3.0, ["component:x"], failures=[False]),
+        SimTicket("b", [], 2.0, ["component:y"], failures=[True, False]),
+        SimTicket("c", ["a"], 1.0, ["component:x"], failures=[False]),
+    ]
+
+    # b fails once (timeout 5) and is retried: 5 + 2; a then c run alongside
+    assert ideal_makespan(scenario, tickets, timeout_secs=5.0) == 7.0
+    # A ticket that never succeeds stops the run once running work drains
+    tickets[1].failures = [True, True]
+    assert ideal_makespan(scenario, tickets, timeout_secs=5.0) == 10.0
+
+
+def test_run_scenario_serial(tmp_path: Path) -> None:
+    scenario = Scenario(tickets=4, shape="chain", workers=1, **FAST)
+
+    result = run_scenario(scenario, workdir=tmp_path / "sim")
+
+    assert result["rc"] == 0
+    assert result["completed"] == 4
+    assert result["pi_calls"] == 4
+    # Native ticket source: no tk subprocesses at all
+    assert result["tk_calls"] == 0
+    assert result["makespan_secs"] >= 0.4
+    assert 0 < result["utilisation"] <= 1
+    assert (tmp_path / "sim" / ".tickets" / "sim-0003.md").read_text().count("status: closed") == 1
+
+
+def test_run_scenario_parallel_with_failures(tmp_path: Path) -> None:
+    scenario = Scenario(tickets=6, shape="independent", workers=3, components=0, failure_rate=0.3, seed=3, **FAST)
+    tickets = generate_tickets(scenario)
+    assert all(ticket.succeeds for ticket in tickets)
+    assert any(ticket.failed_attempts for ticket in tickets)
+
+    result = run_scenario(scenario, workdir=tmp_path / "sim")
+
+    # Failed attempts hang until the attempt timeout and are restarted
+    assert result["rc"] == 0
+    assert result["completed"] == 6
+    assert result["pi_calls"] == sum(ticket.failed_attempts + 1 for ticket in tickets)
+
+
+def test_simulate_cli_writes_json(tmp_path: Path) -> None:
+    output = tmp_path / "result.json"
+
+    rc = ralph_module.main(
+        ["simulate", "--tickets", "2", "--mean-duration", "50", "--distribution", "fixed", "--output", str(output)]
+    )
+
+    assert rc == 0
+    result = json.loads(output.read_text())
+    assert result["completed"] == 2
+    assert result["scenario"]["tickets"] == 2
+    assert {"makespan_secs", "utilisation", "overhead_ms_per_iteration", "tk_calls"} <= set(result)
+
+
+def test_simulate_cli_rejects_bad_shape(capsys: pytest.CaptureFixture) -> None:
+    assert ralph_module.main(["simulate", "--shape", "spiral"]) == 1
+    assert "Unknown shape" in capsys.readouterr().err
@@ -527,7 +527,10 @@ This content should not be captured.
 
 
 class TestUpdateStateProgress:
-    """Tests for update_state() progress.md update functionality."""
+    """Tests for update_state() progress.md update functionality.
+
+    update_state appends to the event log; progress.md is the rendered view.
+    """
 
     def test_progress_updated_with_ticket_entry(self, tmp_path: Path) -> None:
         """Test: progress.md is updated with ticket completion entry."""
@@ -577,6 +580,7 @@ Test progress update.
             error_msg="",
             artifact_root=knowledge_dir,
         )
+        ralph_module.render_progress(ralph_dir)
         
         # Verify progress.md was updated
         content = progress_path.read_text()
@@ -632,6 +636,7 @@ Test failure case.
             error_msg="Test error message",
             artifact_root=knowledge_dir,
         )
+        ralph_module.render_progress(ralph_dir)
         
         # Verify progress.md shows failure
         content = progress_path.read_text()
@@ -708,6 +713,7 @@ Test with issues.
             error_msg="",
             artifact_root=knowledge_dir,
         )
+        ralph_module.render_progress(ralph_dir)
         
         # Verify issue counts in progress
         content = progress_path.read_text()
@@ -0,0 +1,173 @@
+"""Tests for the native in-process ticket queue (tf.ralph.ticket_queue).
+
+Tests cover:
+- Ready/blocked classification matching `tk ready` / `tk blocked`
+- Priority ordering and incremental refresh on file changes
+- Component and title lookups
+- Ralph helpers routing through the native queue when it is active
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Iterator, Optional
+from unittest.mock import patch
+
+import pytest
+
+from tf import ralph as ralph_module
+from tf.ralph.ticket_queue import TicketQueue
+
+
+def write_ticket(
+    tickets_dir: Path,
+    ticket_id: str,
+    status: str = "open",
+    deps: Optional[list[str]] = None,
+    tags: Optional[list[str]] = None,
+    priority: int = 2,
+    title: Optional[str] = None,
+) -> Path:
+    """Write a ticket markdown file in tk format."""
+    path = tickets_dir / f"{ticket_id}.md"
+    path.write_text(
+        "---\n"
+        f"id: {ticket_id}\n"
+        f"status: {status}\n"
+        f"deps: [{', '.join(deps or [])}]\n"
+        f"tags: [{', '.join(tags or [])}]\n"
+        f"priority: {priority}\n"
+        "---\n"
+        f"# {title or f'Ticket {ticket_id}'}\n\nBody.\n"
+    )
+    return path
+
+
+def bump_mtime(path: Path) -> None:
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+@pytest.fixture
+def tickets_dir(tmp_path: Path) -> Path:
+    path = tmp_path / ".tickets"
+    path.mkdir()
+    return path
+
+
+class TestTicketQueue:
+    """Tests for TicketQueue."""
+
+    def test_ready_and_blocked(self, tickets_dir: Path) -> None:
+        write_ticket(tickets_dir, "t-1", status="closed")
+        write_ticket(tickets_dir, "t-2", deps=["t-1"])
+        write_ticket(tickets_dir, "t-3", deps=["t-2"])
+        write_ticket(tickets_dir, "t-4", status="in_progress")
+        write_ticket(tickets_dir, "t-5", deps=["missing"])
+
+        queue = TicketQueue(tickets_dir)
+
+        assert queue.ready() == ["t-2", "t-4"]
+        assert queue.blocked() == ["t-3", "t-5"]
+
+    def test_ready_ordered_by_priority_then_id(self, tickets_dir: Path) -> None:
+        write_ticket(tickets_dir, "t-b", priority=2)
+        write_ticket(tickets_dir, "t-a", priority=2)
+        write_ticket(tickets_dir, "t-c", priority=0)
+
+        assert TicketQueue(tickets_dir).ready() == ["t-c", "t-a", "t-b"]
+
+    def test_refresh_picks_up_changes(self, tickets_dir: Path) -> None:
+        write_ticket(tickets_dir, "t-1")
+        blocked = write_ticket(tickets_dir, "t-2", deps=["t-1"])
+        queue = TicketQueue(tickets_dir)
+        assert queue.ready() == ["t-1"]
+        assert queue.refresh() is False
+
+        closed = write_ticket(tickets_dir, "t-1", status="closed")
+        bump_mtime(closed)
+        write_ticket(tickets_dir, "t-3")
+        assert queue.refresh() is True
+        assert queue.ready() == ["t-2", "t-3"]
+
+        blocked.unlink()
+        assert queue.ready() == ["t-2", "t-3"]  # unchanged until the next refresh
+        queue.refresh()
+        assert queue.ready() == ["t-3"]
+
+    def test_refresh_only_reparses_changed_files(self, tickets_dir: Path) -> None:
+        write_ticket(tickets_dir, "t-1")
+        changed = write_ticket(tickets_dir, "t-2")
+        queue = TicketQueue(tickets_dir)
+        queue.refresh()
+
+        write_ticket(tickets_dir, "t-2", status="closed")
+        bump_mtime(changed)
+        with patch.object(queue._loader, "_parse_ticket", wraps=queue._loader._parse_ticket) as parse:
+            queue.refresh()
+
+        assert [call.args[0].name for call in parse.call_args_list] == ["t-2.md"]
+
+    def test_accessors_do_not_rescan(self, tickets_dir: Path) -> None:
+        for n in range(5):
+            write_ticket(tickets_dir, f"t-{n}", tags=["component:cli"])
+        queue = TicketQueue(tickets_dir)
+
+        with patch.object(queue._loader, "_scan", wraps=queue._loader._scan) as scan:
+            for ticket in queue.ready():
+                queue.components(ticket, "component:", allow_untagged=False)
+                queue.title(ticket)
+            queue.blocked()
+            queue.tickets()
+
+        assert scan.call_count == 1  # the first use loads the view
+
+    def test_components_and_title(self, tickets_dir: Path) -> None:
+        write_ticket(tickets_dir, "t-1", tags=["component:api", "urgent"], title="Add API")
+        write_ticket(tickets_dir, "t-2", tags=["urgent"])
+        queue = TicketQueue(tickets_dir)
+
+        assert queue.components("t-1", "component:", allow_untagged=False) == {"component:api"}
+        assert queue.components("t-2", "component:", allow_untagged=False) is None
+        assert queue.components("t-2", "component:", allow_untagged=True) == {"__untagged__"}
+        assert queue.title("t-1") == "Add API"
+        assert queue.title("missing") is None
+
+
+class TestRalphNativeSource:
+    """Ralph queue helpers should use the native queue when it is active."""
+
+    @pytest.fixture
+    def active_queue(self, tickets_dir: Path) -> Iterator[TicketQueue]:
+        write_ticket(tickets_dir, "t-1", tags=["component:cli"], title="CLI work")
+        write_ticket(tickets_dir, "t-2", deps=["t-1"])
+        queue = ralph_module.activate_ticket_source(tickets_dir.parent, dict(ralph_module.DEFAULTS))
+        ralph_module.clear_ticket_title_cache()
+        yield queue
+        ralph_module._native_queue = None
+        ralph_module.clear_ticket_title_cache()
+
+    def test_helpers_do_not_spawn_tk(self, active_queue: TicketQueue) -> None:
+        assert active_queue is not None
+        with patch.object(ralph_module, "run_shell", side_effect=AssertionError("tk spawned")), \
+                patch.object(ralph_module.subprocess, "run", side_effect=AssertionError("tk spawned")):
+            assert ralph_module.select_ticket("tk ready | head -1") == "t-1"
+            assert ralph_module.list_ready_tickets("tk ready") == ["t-1"]
+            assert ralph_module.list_blocked_tickets() == ["t-2"]
+            assert ralph_module.backlog_empty("tk ready | grep -q .") is False
+            assert ralph_module.extract_components("t-1", "component:", False) == {"component:cli"}
+            assert ralph_module.extract_ticket_title("t-1") == "CLI work"
+
+    def test_customized_query_keeps_shell_source(self, tickets_dir: Path) -> None:
+        config = dict(ralph_module.DEFAULTS, ticketQuery="my-picker")
+        assert ralph_module.resolve_ticket_source(config) == "query"
+        assert ralph_module.activate_ticket_source(tickets_dir.parent, config) is None
+
+    def test_env_overrides_config(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setenv("RALPH_TICKET_SOURCE", "query")
+        assert ralph_module.resolve_ticket_source(dict(ralph_module.DEFAULTS)) == "query"
+
+    def test_missing_tickets_dir_falls_back(self, tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+        assert ralph_module.activate_ticket_source(tmp_path, dict(ralph_module.DEFAULTS)) is None
+        assert "Tickets directory not found" in capsys.readouterr().err
@@ -0,0 +1,89 @@
+"""Tests for event-driven loop wakeups (tf.ralph.ticket_watch).
+
+Tests cover:
+- Both backends time out when nothing changes and wake on a change
+- Changes made before wait() (e.g. while a ticket ran) wake immediately
+- Sub-directories created after the watcher started are watched
+- ticketWatch config resolution
+"""
+
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from tf import ralph as ralph_module
+from tf.ralph.ticket_watch import TicketWatcher
+
+BACKENDS = ["poll"] + (["inotify"] if sys.platform.startswith("linux") else [])
+
+
+def touch_later(path: Path, delay: float = 0.1) -> threading.Thread:
+    thread = threading.Thread(target=lambda: (time.sleep(delay), path.write_text("changed\n")))
+    thread.start()
+    return thread
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_wait_times_out_without_changes(tmp_path: Path, backend: str) -> None:
+    with TicketWatcher([tmp_path], backend=backend) as watcher:
+        started = time.monotonic()
+
+        assert watcher.wait(0.2) is False
+        assert time.monotonic() - started >= 0.2
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_wait_wakes_on_change(tmp_path: Path, backend: str) -> None:
+    with TicketWatcher([tmp_path], backend=backend) as watcher:
+        assert watcher.backend == backend
+        started = time.monotonic()
+        thread = touch_later(tmp_path / "pt-1.md")
+
+        assert watcher.wait(10.0) is True
+        assert time.monotonic() - started < 5.0
+        thread.join()
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_change_before_wait_is_pending(tmp_path: Path, backend: str) -> None:
+    with TicketWatcher([tmp_path], backend=backend) as watcher:
+        (tmp_path / "pt-1.md").write_text("status: closed\n")
+
+        assert watcher.changed() is True
+        assert watcher.changed() is False
+
+
+def test_new_subdirectories_are_watched(tmp_path: Path) -> None:
+    with TicketWatcher([tmp_path]) as watcher:
+        ticket_dir = tmp_path / "pt-1"
+        ticket_dir.mkdir()
+        assert watcher.wait(1.0) is True
+
+        thread = touch_later(ticket_dir / "close-summary.md")
+        assert watcher.wait(10.0) is True
+        thread.join()
+
+
+def test_missing_root_is_picked_up(tmp_path: Path) -> None:
+    root = tmp_path / ".tickets"
+    with TicketWatcher([root]) as watcher:
+        assert watcher.wait(0.1) is False
+        root.mkdir()
+
+        assert watcher.wait(5.0) is True
+
+
+def test_resolve_ticket_watch(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("RALPH_TICKET_WATCH", raising=False)
+    assert ralph_module.resolve_ticket_watch({}) == "auto"
+    assert ralph_module.resolve_ticket_watch({"ticketWatch": "bogus"}) == "auto"
+    assert ralph_module.resolve_ticket_watch({"ticketWatch": "poll"}) == "poll"
+
+    monkeypatch.setenv("RALPH_TICKET_WATCH", "off")
+    assert ralph_module.resolve_ticket_watch({"ticketWatch": "poll"}) == "off"
+    assert ralph_module.create_ticket_watcher(Path("."), {}) is None
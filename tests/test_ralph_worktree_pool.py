@@ -0,0 +1,158 @@
+"""Tests for the reusable worktree pool (tf.ralph.worktree_pool).
+
+Tests cover:
+- Creating a worktree on a miss and reusing it (hit) after release
+- Resetting reused worktrees to the current base and cleaning stray files
+- Background preparation of a spare worktree
+- Waiting for a release instead of growing past the pool size
+- Retiring a failed worktree for inspection and adopting pooled worktrees
+"""
+
+from __future__ import annotations
+
+import shutil
+import subprocess
+import threading
+from pathlib import Path
+
+import pytest
+
+from tf.ralph.worktree_pool import POOL_PREFIX, WorktreeError, WorktreePool
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git not available")
+
+
+def git(repo: Path, *args: str) -> str:
+    result = subprocess.run(["git", "-C", str(repo), *args], capture_output=True, text=True, check=True)
+    return result.stdout.strip()
+
+
+def commit_file(repo: Path, name: str, content: str) -> str:
+    (repo / name).write_text(content)
+    git(repo, "add", name)
+    git(repo, "commit", "-q", "-m", f"update {name}")
+    return git(repo, "rev-parse", "HEAD")
+
+
+@pytest.fixture
+def repo(tmp_path: Path) -> Path:
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    git(repo, "init", "-q")
+    git(repo, "config", "user.email", "test@example.com")
+    git(repo, "config", "user.name", "Test")
+    commit_file(repo, "README.md", "one\n")
+    return repo
+
+
+def test_miss_then_hit_after_release(repo: Path) -> None:
+    pool = WorktreePool(repo, repo / ".tf/ralph/worktrees", size=2)
+
+    path, hit = pool.acquire("T-1")
+    assert hit is False
+    assert path.name == f"{POOL_PREFIX}1"
+    assert git(path, "rev-parse", "--abbrev-ref", "HEAD") == "ralph/T-1"
+
+    pool.release(path)
+    pool.close()
+    reused, hit = pool.acquire("T-2")
+
+    assert hit is True
+    assert reused == path
+    assert git(reused, "rev-parse", "--abbrev-ref", "HEAD") == "ralph/T-2"
+    assert pool.stats.hits == 1
+    assert pool.stats.misses == 1
+    assert pool.stats.to_dict()["pool_hit_rate"] == 0.5
+
+
+def test_reused_worktree_is_reset_to_new_base(repo: Path) -> None:
+    pool = WorktreePool(repo, repo / ".tf/ralph/worktrees", size=1)
+    path, _ = pool.acquire("T-1")
+    (path / "stray.txt").write_text("leftover")
+    (path / "README.md").write_text("dirty\n")
+    pool.release(path)
+    pool.close()
+
+    head = commit_file(repo, "README.md", "two\n")
+    path, hit = pool.acquire("T-2")
+
+    assert hit is True
+    assert git(path, "rev-parse", "HEAD") == head
+    assert (path / "README.md").read_text() == "two\n"
+    assert not (path / "stray.txt").exists()
+
+
+def test_release_frees_ticket_branch_for_restart(repo: Path) -> None:
+    pool = WorktreePool(repo, repo / ".tf/ralph/worktrees", size=2)
+    path, _ = pool.acquire("T-1")
+    pool.release(path)
+    pool.close()
+
+    other = pool.acquire("T-2")[0]
+    again, _ = pool.acquire("T-1")
+
+    assert again != other
+    assert git(again, "rev-parse", "--abbrev-ref", "HEAD") == "ralph/T-1"
+
+
+def test_prepare_creates_spare_in_background(repo: Path) -> None:
+    pool = WorktreePool(repo, repo / ".tf/ralph/worktrees", size=2)
+
+    assert pool.prepare() is True
+    pool.close()
+
+    assert pool.idle_count == 1
+    assert pool.stats.prepared == 1
+    _, hit = pool.acquire("T-1")
+    assert hit is True
+    assert pool.prepare() is True
+    assert pool.prepare() is False  # already preparing / pool full
+    pool.close()
+
+
+def test_acquire_waits_for_release_when_pool_is_full(repo: Path) -> None:
+    pool = WorktreePool(repo, repo / ".tf/ralph/worktrees", size=1)
+    path, _ = pool.acquire("T-1")
+    acquired: list = []
+    waiter = threading.Thread(target=lambda: acquired.append(pool.acquire("T-2")))
+
+    waiter.start()
+    waiter.join(timeout=0.3)
+    assert waiter.is_alive()
+    with pytest.raises(WorktreeError, match="busy"):
+        pool.acquire("T-3", timeout=0.1)
+
+    pool.release(path)
+    waiter.join(timeout=30)
+    pool.close()
+
+    assert acquired == [(path, True)]
+    assert [p.name for p in (repo / ".tf/ralph/worktrees").iterdir()] == [f"{POOL_PREFIX}1"]
+
+
+def test_retire_moves_worktree_out_of_pool(repo: Path) -> None:
+    worktrees = repo / ".tf/ralph/worktrees"
+    pool = WorktreePool(repo, worktrees, size=1)
+    path, _ = pool.acquire("T-1")
+    (path / "debug.log").write_text("keep me")
+
+    retired = pool.retire(path, "T-1")
+
+    assert retired == worktrees / "T-1"
+    assert (retired / "debug.log").read_text() == "keep me"
+    assert pool.idle_count == 0
+    # Branch is free again, so the ticket can be retried in a pooled worktree.
+    assert pool.acquire("T-1")[1] is False
+
+
+def test_adopts_pooled_worktrees_from_previous_run(repo: Path) -> None:
+    worktrees = repo / ".tf/ralph/worktrees"
+    first = WorktreePool(repo, worktrees, size=1)
+    path, _ = first.acquire("T-1")
+    first.release(path)
+    first.close()
+
+    second = WorktreePool(repo, worktrees, size=1)
+
+    assert second.idle_count == 1
+    assert second.acquire("T-2") == (path, True)
@@ -5,11 +5,13 @@ This module tests:
 - Blocked status detection from close-summary.md and review.md
 - Escalation model resolution based on attempt number
 - Retry counter behavior and reset policies
+- Locked read-modify-write updates from concurrent workers
 """
 
 from __future__ import annotations
 
 import json
+import multiprocessing
 import os
 import tempfile
 from datetime import datetime, timezone
@@ -751,6 +753,50 @@ class TestEdgeCases:
         datetime.fromisoformat(ts.replace("Z", "+00:00"))
 
 
+def _record_blocked_attempts(artifact_dir: str, count: int) -> None:
+    state = RetryState(artifact_dir, ticket_id="pt-123")
+    for _ in range(count):
+        state.start_attempt(trigger="ralph_retry")
+        state.complete_attempt(status="blocked")
+
+
+class TestConcurrentUpdates:
+    """Tests for locked read-modify-write updates."""
+
+    def test_stale_instance_sees_saved_attempts(self, tmp_path: Path) -> None:
+        """An instance created earlier continues from the latest saved state."""
+        first = RetryState(tmp_path, ticket_id="pt-123")
+        second = RetryState(tmp_path, ticket_id="pt-123")
+
+        first.start_attempt()
+        first.complete_attempt(status="blocked")
+
+        assert second.start_attempt(trigger="quality_gate") == 2
+        assert RetryState.load(tmp_path).get_attempt_number() == 2
+
+    def test_processes_do_not_lose_updates(self, tmp_path: Path) -> None:
+        """Concurrent workers' completions are all counted."""
+        ctx = multiprocessing.get_context("spawn" if os.name == "nt" else "fork")
+        workers = [ctx.Process(target=_record_blocked_attempts, args=(str(tmp_path), 10)) for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(timeout=30)
+
+        loaded = RetryState.load(tmp_path)
+        assert loaded is not None
+        assert loaded.get_retry_count() == 40
+        assert not list(tmp_path.glob("*.tmp"))
+
+    def test_failed_update_is_not_saved(self, tmp_path: Path) -> None:
+        """Nothing is written when an update raises."""
+        state = RetryState(tmp_path, ticket_id="pt-123")
+        with pytest.raises(ValueError):
+            state.complete_attempt(status="closed")
+
+        assert not (tmp_path / "retry-state.json").exists()
+
+
 class TestIntegration:
     """Integration tests for full retry flow."""
 
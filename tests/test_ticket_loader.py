@@ -1,10 +1,21 @@
 """Tests for the ticket loader in tf/ticket_loader.py."""
 
+import gc
+import json
+import os
+import sys
+import time
+import types
+
 import pytest
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from unittest.mock import patch
 
 from tf.ticket_loader import (
+    CompactTicket,
     Ticket,
+    TicketChanges,
     TicketLoader,
     TicketLoadError,
     format_ticket_list,
@@ -625,3 +636,317 @@ class TestTicketBodyLoading:
         assert "## Section 1" in body
         assert "## Section 2" in body
         assert "Content 1" in body
+
+
+class TestTicketLoaderRefresh:
+    """Tests for incremental TicketLoader.refresh()."""
+
+    @staticmethod
+    def write(tickets_dir, ticket_id, status="open", title=None):
+        path = tickets_dir / f"{ticket_id}.md"
+        previous = path.stat().st_mtime_ns if path.exists() else 0
+        path.write_text(f"---\nid: {ticket_id}\nstatus: {status}\n---\n# {title or ticket_id}\n")
+        # Make sure the change is visible on filesystems with coarse timestamps
+        stat = path.stat()
+        if stat.st_mtime_ns <= previous:
+            os.utime(path, ns=(stat.st_atime_ns, previous + 1_000_000))
+        return path
+
+    @pytest.fixture
+    def tickets_dir(self, tmp_path):
+        tickets_dir = tmp_path / ".tickets"
+        tickets_dir.mkdir()
+        self.write(tickets_dir, "pt-a")
+        self.write(tickets_dir, "pt-b")
+        return tickets_dir
+
+    def test_first_refresh_loads_everything(self, tickets_dir):
+        loader = TicketLoader(tickets_dir)
+
+        changes = loader.refresh()
+
+        assert [t.id for t in changes.added] == ["pt-a", "pt-b"]
+        assert changes.modified == changes.removed == []
+        assert loader.get_by_id("pt-a").title == "pt-a"
+        assert not loader.refresh()
+
+    def test_reports_changes_and_updates_in_place(self, tickets_dir):
+        loader = TicketLoader(tickets_dir)
+        loader.load_all()
+        tickets, by_id = loader._tickets, loader._by_id
+        removed = loader.get_by_id("pt-b")
+
+        self.write(tickets_dir, "pt-a", status="closed")
+        (tickets_dir / "pt-b.md").unlink()
+        self.write(tickets_dir, "pt-0", title="Zero")
+        with patch.object(loader, "_parse_ticket", wraps=loader._parse_ticket) as parse:
+            changes = loader.refresh()
+
+        assert sorted(call.args[0].name for call in parse.call_args_list) == ["pt-0.md", "pt-a.md"]
+        assert [t.id for t in changes.added] == ["pt-0"]
+        assert [(t.id, t.status) for t in changes.modified] == [("pt-a", "closed")]
+        assert changes.removed == [removed]
+        assert changes.ids == {"pt-0", "pt-a", "pt-b"}
+        # Same containers, still in file name order
+        assert loader._tickets is tickets and loader._by_id is by_id
+        assert [t.id for t in loader.all_tickets] == ["pt-0", "pt-a"]
+        assert loader.get_by_id("pt-b") is None
+        assert loader.count_by_status == {"open": 1, "closed": 1}
+
+    def test_by_id_is_a_read_only_view(self, tickets_dir):
+        loader = TicketLoader(tickets_dir)
+        with pytest.raises(TicketLoadError):
+            loader.by_id
+        loader.refresh()
+        by_id = loader.by_id
+
+        self.write(tickets_dir, "pt-c")
+        loader.refresh()
+
+        assert sorted(by_id) == ["pt-a", "pt-b", "pt-c"]
+        with pytest.raises(TypeError):
+            by_id["pt-d"] = by_id["pt-a"]
+
+    def test_malformed_file_is_skipped(self, tickets_dir):
+        loader = TicketLoader(tickets_dir)
+        loader.load_all()
+        (tickets_dir / "pt-a.md").write_text("# No frontmatter\n")
+
+        changes = loader.refresh()
+
+        assert changes == TicketChanges(removed=changes.removed)
+        assert [t.id for t in changes.removed] == ["pt-a"]
+        assert loader.refresh() == TicketChanges()
+
+    def test_missing_directory(self, tmp_path):
+        with pytest.raises(TicketLoadError):
+            TicketLoader(tmp_path / "missing").refresh()
+
+
+class TestTicketMetadataCache:
+    """Tests for the persistent metadata cache (.tf/cache/tickets.json)."""
+
+    @pytest.fixture
+    def project(self, tmp_path):
+        """A tf project with two tickets last edited an hour ago."""
+        (tmp_path / ".tf").mkdir()
+        tickets_dir = tmp_path / ".tickets"
+        tickets_dir.mkdir()
+        self.write(tickets_dir, "pt-a", "---\nid: pt-a\nstatus: open\ndeps: [pt-b]\ncreated: 2026-02-08T17:59:15Z\n---\n# Ticket A\n")
+        self.write(tickets_dir, "pt-b", "---\nid: pt-b\nstatus: closed\n---\n# Ticket B\n")
+        return tmp_path
+
+    @staticmethod
+    def write(tickets_dir, ticket_id, content, age=3600):
+        path = tickets_dir / f"{ticket_id}.md"
+        path.write_text(content)
+        stamp = time.time() - age
+        os.utime(path, (stamp, stamp))
+
+    def test_warm_load_skips_parsing(self, project):
+        cold = TicketLoader(project / ".tickets").load_all()
+        cache_file = project / ".tf" / "cache" / "tickets.json"
+        assert sorted(json.loads(cache_file.read_text())["files"]) == ["pt-a.md", "pt-b.md"]
+        assert (project / ".tf" / "cache" / ".gitignore").read_text() == "*\n"
+
+        with patch.object(TicketLoader, "_read_metadata", side_effect=AssertionError("parsed")):
+            warm = TicketLoader(project / ".tickets").load_all()
+
+        assert [(t.id, t.status, t.title, t.deps, t.created) for t in warm] == [
+            (t.id, t.status, t.title, t.deps, t.created) for t in cold
+        ]
+        # Timestamps keep their YAML type
+        assert type(warm[0].created) is type(cold[0].created)
+        # Tickets do not share lists with the cache
+        warm[0].deps.append("pt-x")
+        assert TicketLoader(project / ".tickets").load_all()[0].deps == ["pt-b"]
+
+    def test_reparses_changed_and_drops_deleted(self, project):
+        tickets_dir = project / ".tickets"
+        TicketLoader(tickets_dir).load_all()
+        self.write(tickets_dir, "pt-a", "---\nid: pt-a\nstatus: closed\n---\n# Ticket A (done)\n", age=1800)
+        (tickets_dir / "pt-b.md").unlink()
+
+        loader = TicketLoader(tickets_dir)
+        with patch.object(TicketLoader, "_read_metadata", wraps=loader._read_metadata) as read:
+            tickets = loader.load_all()
+
+        assert [(t.id, t.status, t.title) for t in tickets] == [("pt-a", "closed", "Ticket A (done)")]
+        assert read.call_count == 1
+        cache = json.loads((project / ".tf" / "cache" / "tickets.json").read_text())
+        assert list(cache["files"]) == ["pt-a.md"]
+
+    def test_recent_edits_and_bad_cache_are_not_trusted(self, project):
+        tickets_dir = project / ".tickets"
+        cache_file = project / ".tf" / "cache" / "tickets.json"
+        cache_file.parent.mkdir()
+        cache_file.write_text("{not json")
+        # Just written: mtime/size could repeat within the timestamp granularity
+        self.write(tickets_dir, "pt-c", "---\nid: pt-c\nstatus: open\n---\n# Ticket C\n", age=0)
+
+        assert len(TicketLoader(tickets_dir).load_all()) == 3
+        assert sorted(json.loads(cache_file.read_text())["files"]) == ["pt-a.md", "pt-b.md"]
+
+    def test_no_cache_outside_tf_project(self, tmp_path):
+        tickets_dir = tmp_path / ".tickets"
+        tickets_dir.mkdir()
+        self.write(tickets_dir, "pt-a", "---\nid: pt-a\nstatus: open\n---\n# A\n")
+
+        assert len(TicketLoader(tickets_dir).load_all()) == 1
+        (tmp_path / ".tf").mkdir()
+        assert len(TicketLoader(tickets_dir, use_cache=False).load_all()) == 1
+        assert not (tmp_path / ".tf" / "cache").exists()
+
+
+class TestParallelLoading:
+    """Thread and process pools for large ticket directories."""
+
+    @pytest.fixture
+    def tickets_dir(self, tmp_path):
+        tickets_dir = tmp_path / ".tickets"
+        tickets_dir.mkdir()
+        for index in range(12):
+            (tickets_dir / f"pt-{index:02d}.md").write_text(
+                f"---\nid: pt-{index:02d}\nstatus: open\ndeps: [pt-{(index + 1) % 12:02d}]\n---\n# Ticket {index}\n"
+            )
+        (tickets_dir / "pt-05.md").write_bytes(b"---\nid: pt-05\n---\n# \xff\n")
+        return tickets_dir
+
+    @staticmethod
+    def summary(tickets):
+        return [(t.id, t.status, t.title, t.deps, t.body) for t in tickets]
+
+    @pytest.mark.parametrize("pool", ["thread", "process"])
+    def test_matches_sequential_load(self, tickets_dir, pool, caplog):
+        expected = self.summary(TicketLoader(tickets_dir, use_cache=False, workers=1).load_all())
+
+        caplog.clear()
+        loader = TicketLoader(tickets_dir, use_cache=False, workers=4, pool=pool, parallel_threshold=1)
+        with caplog.at_level("WARNING"):
+            tickets = loader.load_all()
+
+        assert self.summary(tickets) == expected
+        assert len(tickets) == 11
+        assert "Skipping malformed ticket pt-05.md" in caplog.text
+
+    def test_refresh_reads_changed_files_in_parallel(self, tickets_dir):
+        loader = TicketLoader(tickets_dir, use_cache=False, workers=4, parallel_threshold=2)
+        loader.load_all()
+        for name in ("pt-00.md", "pt-01.md"):
+            path = tickets_dir / name
+            path.write_text(path.read_text().replace("status: open", "status: closed"))
+            stat = path.stat()
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        with patch("tf.ticket_loader.ThreadPoolExecutor", wraps=ThreadPoolExecutor) as executor:
+            changes = loader.refresh()
+
+        assert [t.id for t in changes.modified] == ["pt-00", "pt-01"]
+        assert [t.status for t in loader._tickets[:2]] == ["closed", "closed"]
+        # Scan (12 files) and read (2 changed files) both reach the threshold
+        assert executor.call_count == 2
+
+    def test_small_loads_stay_sequential(self, tickets_dir, monkeypatch):
+        monkeypatch.setenv("TF_TICKET_WORKERS", "4")
+        loader = TicketLoader(tickets_dir, use_cache=False)
+        assert loader.workers == 4
+
+        with patch("tf.ticket_loader.ThreadPoolExecutor") as executor:
+            assert len(loader.load_all()) == 11
+        executor.assert_not_called()
+
+    def test_environment_overrides(self, tickets_dir, monkeypatch):
+        monkeypatch.setenv("TF_TICKET_POOL", "process")
+        monkeypatch.setenv("TF_TICKET_WORKERS", "1")
+        loader = TicketLoader(tickets_dir, parallel_threshold=1)
+
+        assert (loader.pool, loader.workers) == ("process", 1)
+        with patch("tf.ticket_loader.ProcessPoolExecutor") as executor:
+            assert len(loader.load_all()) == 11
+        executor.assert_not_called()
+
+
+def deep_size(root) -> int:
+    """Bytes of all objects reachable from root, counting shared objects once."""
+    seen, stack, total = set(), [root], 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, (type, types.ModuleType, types.FunctionType)):
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        stack.extend(gc.get_referents(obj))
+    return total
+
+
+class TestCompactTicket:
+    """Slotted CompactTicket records from TicketLoader(compact=True)."""
+
+    @pytest.fixture
+    def tickets_dir(self, tmp_path):
+        tickets_dir = tmp_path / ".tickets"
+        tickets_dir.mkdir()
+        for index in range(200):
+            (tickets_dir / f"pt-{index:03d}.md").write_text(
+                "---\n"
+                f"id: pt-{index:03d}\n"
+                f"status: {'closed' if index % 3 else 'open'}\n"
+                f"deps: [pt-{(index + 1) % 200:03d}]\n"
+                "links: []\n"
+                "created: 2026-02-09T00:28:00Z\n"
+                "type: task\n"
+                "priority: 2\n"
+                "assignee: legout\n"
+                "tags: [tf, component:api]\n"
+                "---\n"
+                f"# Ticket {index}\n\n" + "Body text.\n" * 100
+            )
+        return tickets_dir
+
+    def test_same_data_as_ticket(self, tickets_dir):
+        tickets = TicketLoader(tickets_dir, use_cache=False).load_all()
+        compact = TicketLoader(tickets_dir, use_cache=False, compact=True).load_all()
+
+        assert all(isinstance(t, CompactTicket) for t in compact)
+        for ticket, record in zip(tickets, compact):
+            assert (record.id, record.status, record.title, record.file_path) == (
+                ticket.id, ticket.status, ticket.title, ticket.file_path
+            )
+            assert (record.assignee, record.priority, record.ticket_type, record.created) == (
+                ticket.assignee, ticket.priority, ticket.ticket_type, ticket.created
+            )
+            assert (record.deps, record.tags, record.links) == (
+                tuple(ticket.deps), tuple(ticket.tags), tuple(ticket.links)
+            )
+            assert record.body == ticket.body
+            assert record.get_summary() == ticket.get_summary()
+        assert compact == TicketLoader(tickets_dir, use_cache=False, compact=True).load_all()
+
+    def test_shares_strings_and_keeps_no_body(self, tickets_dir):
+        first, second = TicketLoader(tickets_dir, use_cache=False, compact=True).load_all()[:2]
+
+        assert first.tags[1] is second.tags[1]
+        assert first.assignee is second.assignee
+        assert first._dir is second._dir
+        # The dependency and the ticket it names share one string
+        assert first.deps[0] is second.id
+        with pytest.raises(AttributeError):
+            first.notes = "no __dict__"
+
+        path = first.file_path
+        path.write_text(path.read_text().replace("Body text.", "Edited."))
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        assert first.body.startswith("Edited.")
+
+    def test_memory_benchmark(self, tickets_dir):
+        tickets = TicketLoader(tickets_dir, use_cache=False).load_all()
+        compact = TicketLoader(tickets_dir, use_cache=False, compact=True).load_all()
+        ticket_bytes, compact_bytes = deep_size(tickets), deep_size(compact)
+
+        assert compact_bytes < 0.6 * ticket_bytes
+        # Tickets keep bodies once read; compact records do not grow
+        for ticket, record in zip(tickets, compact):
+            assert ticket.body == record.body
+        assert deep_size(compact) == compact_bytes
+        assert deep_size(compact) < 0.35 * deep_size(tickets)
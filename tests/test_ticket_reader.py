@@ -0,0 +1,135 @@
+"""Tests for the fast ticket file reader in tf/ticket_reader.py."""
+
+import os
+from datetime import date, datetime, timezone
+
+import pytest
+import yaml
+
+from tf.ticket_loader import FRONTMATTER_PATTERN, Ticket, TicketLoader
+from tf.ticket_reader import parse_tk_frontmatter, read_ticket_head
+
+
+TK_FRONTMATTER = (
+    "id: pt-abc1\n"
+    "status: in_progress\n"
+    "deps: [pt-def2, pt-ghi3]\n"
+    "links: []\n"
+    "created: 2026-02-09T00:28:00Z\n"
+    "type: task\n"
+    "priority: 0\n"
+    "assignee: Jane Doe\n"
+    "external-ref: plan-ui-v2\n"
+    "tags: [tf, component:api, v1.2]\n"
+    "due: 2026-03-01\n"
+    "parent:"
+)
+
+
+class TestParseTkFrontmatter:
+    """The hand-written parser must agree with yaml.safe_load."""
+
+    def test_tk_fields_match_yaml(self):
+        fields = parse_tk_frontmatter(TK_FRONTMATTER)
+
+        assert fields == yaml.safe_load(TK_FRONTMATTER)
+        assert fields["created"] == datetime(2026, 2, 9, 0, 28, tzinfo=timezone.utc)
+        assert fields["due"] == date(2026, 3, 1)
+        assert fields["parent"] is None
+
+    def test_crlf_and_comments(self):
+        text = "# generated by tk\r\nid: pt-a\r\n\r\ntags: [a]\r\n"
+
+        assert parse_tk_frontmatter(text) == {"id": "pt-a", "tags": ["a"]}
+
+    @pytest.mark.parametrize(
+        "line",
+        [
+            "title: \"Quoted\"",
+            "assignee: 'me'",
+            "flag: yes",
+            "status: Off",
+            "owner: null",
+            "priority: 1.5",
+            "priority: 012",
+            "time: 12:30",
+            "note: text # comment",
+            "tags: [a, [b]]",
+            "tags: [yes, no]",
+            "tags: [a b]",
+            "tags: [a, ]",
+            "meta: {a: 1}",
+            "deps:\n  - pt-a",
+            "created: 2026-02-30",
+            "on: x",
+        ],
+    )
+    def test_exotic_values_fall_back(self, line):
+        assert parse_tk_frontmatter(f"id: pt-a\n{line}") is None
+
+
+class TestReadTicketHead:
+    """read_ticket_head() must match the whole-file regexes."""
+
+    @pytest.mark.parametrize(
+        "content",
+        [
+            "---\nid: pt-a\n---\n# Title\n\nBody text\n",
+            "---\r\nid: pt-a\r\n---\r\n# Title\r\nBody\r\n",
+            "---\nid: pt-a\n---  \n\n\n# Spaced\n\nBody",
+            "---\nid: pt-a\n---\nNo heading\n",
+            "---\nid: pt-ä\n---\n# Tïtle ✓\nbödy\n",
+            "# No frontmatter\nBody\n",
+            "---\nid: pt-a\n---",
+        ],
+    )
+    def test_matches_full_read(self, tmp_path, content):
+        path = tmp_path / "pt-a.md"
+        path.write_bytes(content.encode("utf-8"))
+        full = path.read_text(encoding="utf-8")
+        match = FRONTMATTER_PATTERN.match(full)
+        loader = TicketLoader(tmp_path, use_cache=False)
+
+        # Tiny chunks exercise reads that stop mid-delimiter and mid-character
+        for chunk_size in (1, 3, 4096):
+            head = read_ticket_head(path, chunk_size=chunk_size)
+            frontmatter = head.frontmatter.replace("\r\n", "\n") if head.frontmatter is not None else None
+            assert frontmatter == (match.group(1) if match else None)
+            assert head.title == loader._extract_title(full)
+
+        ticket = Ticket(
+            id="pt-a", status="open", title="", file_path=path,
+            _body_offset=head.body_offset, _file_key=(head.mtime_ns, head.size),
+        )
+        assert ticket.body == Ticket(id="pt-a", status="open", title="", file_path=path).body
+
+    def test_reads_only_the_head(self, tmp_path):
+        path = tmp_path / "pt-a.md"
+        path.write_text("---\nid: pt-a\n---\n# Title\n" + "x" * 100_000)
+
+        head = read_ticket_head(path, chunk_size=64)
+
+        assert head.title == "Title"
+        assert head.body_offset == len("---\nid: pt-a\n---\n")
+
+
+class TestLoaderFastPath:
+    """TicketLoader integration of the fast reader."""
+
+    def test_yaml_fallback_for_exotic_frontmatter(self, tmp_path):
+        (tmp_path / "pt-a.md").write_text("---\nid: pt-a\nstatus: \"open\"\ndeps:\n  - pt-b\n---\n# A\n")
+
+        ticket = TicketLoader(tmp_path, use_cache=False).load_all()[0]
+
+        assert (ticket.status, ticket.deps) == ("open", ["pt-b"])
+
+    def test_stale_body_offset_rereads_file(self, tmp_path):
+        path = tmp_path / "pt-a.md"
+        path.write_text("---\nid: pt-a\n---\n# A\n\nOld body\n")
+        ticket = TicketLoader(tmp_path, use_cache=False).load_all()[0]
+
+        path.write_text("---\nid: pt-a\nstatus: closed\n---\n# A\n\nNew body\n")
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        assert ticket.body == "New body\n"
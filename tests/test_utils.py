@@ -3,11 +3,16 @@
 from __future__ import annotations
 
 import json
+import os
+import stat
+import threading
 from pathlib import Path
+from unittest.mock import patch
 
 import pytest
 
-from tf.utils import find_project_root, merge, read_json
+from tf import utils
+from tf.utils import atomic_write_text, find_project_root, locked_file, merge, read_json
 
 
 class TestReadJson:
@@ -210,3 +215,72 @@ class TestMerge:
             "agents": {"reviewer": "worker"}
         }
         assert result == expected
+
+
+class TestAtomicWriteText:
+    """Tests for atomic_write_text function."""
+
+    def test_writes_and_replaces(self, tmp_path: Path) -> None:
+        """Test that the file is created (with its parent) and then replaced."""
+        target = tmp_path / "sub" / "state.json"
+        assert atomic_write_text(target, "one\n") == target
+        atomic_write_text(target, "two\n", fsync=True)
+        assert target.read_text(encoding="utf-8") == "two\n"
+        assert [p.name for p in target.parent.iterdir()] == ["state.json"]
+
+    @pytest.mark.skipif(not hasattr(os, "fchmod"), reason="POSIX permissions")
+    def test_respects_umask(self, tmp_path: Path) -> None:
+        """Test that the file gets open()'s permissions, not mkstemp's 0600."""
+        target = tmp_path / "progress.md"
+        umask = os.umask(0o022)
+        os.umask(umask)
+        assert utils._FILE_MODE == 0o666 & ~umask
+        with patch.object(utils, "_FILE_MODE", 0o640):
+            atomic_write_text(target, "x")
+        assert stat.S_IMODE(target.stat().st_mode) == 0o640
+
+    def test_failed_write_keeps_old_content(self, tmp_path: Path) -> None:
+        """Test that a failed write leaves the old file and no temp file."""
+        target = tmp_path / "state.json"
+        target.write_text("old", encoding="utf-8")
+        with patch("tf.utils.os.replace", side_effect=OSError("disk full")):
+            with pytest.raises(OSError):
+                atomic_write_text(target, "new")
+        assert target.read_text(encoding="utf-8") == "old"
+        assert [p.name for p in tmp_path.iterdir()] == ["state.json"]
+
+
+class TestLockedFile:
+    """Tests for locked_file context manager."""
+
+    def test_serialises_writers(self, tmp_path: Path) -> None:
+        """Test that read-modify-write cycles under the lock do not interleave."""
+        counter = tmp_path / "counter"
+        counter.write_text("0", encoding="utf-8")
+
+        def bump() -> None:
+            for _ in range(50):
+                with locked_file(tmp_path / "counter.lock"):
+                    value = int(counter.read_text(encoding="utf-8"))
+                    counter.write_text(str(value + 1), encoding="utf-8")
+
+        threads = [threading.Thread(target=bump) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert counter.read_text(encoding="utf-8") == "200"
+
+    def test_locks_directory_without_lock_file(self, tmp_path: Path) -> None:
+        """Test that a directory is locked itself."""
+        with locked_file(tmp_path) as fd:
+            assert fd is not None
+        assert list(tmp_path.iterdir()) == []
+
+    def test_optional_lock_tolerates_missing_path(self, tmp_path: Path) -> None:
+        """Test that required=False runs the block without a lock."""
+        with locked_file(tmp_path / "missing" / "x.lock", required=False) as fd:
+            assert fd is None
+        with pytest.raises(OSError):
+            with locked_file(tmp_path / "missing" / "x.lock"):
+                pass
@@ -112,6 +112,7 @@ class BoardClassifier:
             col: [] for col in BoardColumn
         }
         self._by_id: dict[str, ClassifiedTicket] = {}
+        self._view: Optional[BoardView] = None
     
     def classify_all(self) -> "BoardView":
         """Classify all tickets and return a BoardView.
@@ -125,6 +126,25 @@ class BoardClassifier:
         tickets = self.loader.load_all()
         return self._classify_tickets(tickets)
     
+    def refresh(self) -> "BoardView":
+        """Reclassify after an incremental reload of changed ticket files.
+        
+        Only files that changed since the last load are re-parsed
+        (TicketLoader.refresh). A status change can move dependents between
+        columns, so any change reclassifies the whole board in memory; the
+        previous BoardView is returned when nothing changed.
+        
+        Returns:
+            BoardView of the current tickets.
+            
+        Raises:
+            Exception: If ticket loading fails (propagated from TicketLoader).
+        """
+        changes = self.loader.refresh()
+        if not changes and self._view is not None:
+            return self._view
+        return self._classify_tickets(self.loader.all_tickets)
+    
     def _classify_tickets(self, tickets: list[Ticket]) -> "BoardView":
         """Classify a list of tickets.
         
@@ -153,7 +173,8 @@ class BoardClassifier:
                 key=lambda ct: (-(ct.ticket.priority or 0), ct.id)
             )
 
-        return BoardView(self._classified, self._by_column, self._by_id)
+        self._view = BoardView(self._classified, self._by_column, self._by_id)
+        return self._view
     
     def _classify_single(self, ticket: Ticket, status_by_id: dict[str, str]) -> ClassifiedTicket:
         """Classify a single ticket.
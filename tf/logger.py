@@ -6,7 +6,10 @@ import re
 import sys
 from datetime import datetime, timezone
 from enum import Enum
-from typing import Any, Dict, List, Optional, TextIO
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, TextIO
+
+if TYPE_CHECKING:
+    from tf.ralph.queue_state import QueueStateSnapshot
 
 
 class LogLevel(Enum):
@@ -273,14 +276,24 @@ class RalphLogger:
         mode: str = "serial",
         iteration: Optional[int] = None,
         ticket_title: Optional[str] = None,
+        queue_state: Optional["QueueStateSnapshot"] = None,
     ) -> None:
-        """Log the start of ticket processing."""
+        """Log the start of ticket processing.
+
+        When queue_state is provided, the message is suffixed with the compact
+        R:<ready> B:<blocked> done:<done>/<total> form and the full snapshot is
+        attached as the queue_state context field.
+        """
         extra: Dict[str, Any] = {"ticket": ticket_id, "mode": mode}
         if iteration is not None:
             extra["iteration"] = iteration
         if ticket_title:
             extra["ticket_title"] = ticket_title
-        self.info(f"Starting ticket processing: {ticket_id}", **extra)
+        message = f"Starting ticket processing: {ticket_id}"
+        if queue_state is not None:
+            extra["queue_state"] = str(queue_state)
+            message = f"{message} [{queue_state.to_log_format()}]"
+        self.info(message, **extra)
 
     def log_ticket_complete(
         self,
@@ -289,15 +302,20 @@ class RalphLogger:
         mode: str = "serial",
         iteration: Optional[int] = None,
         ticket_title: Optional[str] = None,
+        queue_state: Optional["QueueStateSnapshot"] = None,
     ) -> None:
-        """Log the completion of ticket processing."""
+        """Log the completion of ticket processing (optionally with queue state)."""
         extra: Dict[str, Any] = {"ticket": ticket_id, "status": status, "mode": mode}
         if iteration is not None:
             extra["iteration"] = iteration
         if ticket_title:
             extra["ticket_title"] = ticket_title
+        message = f"Ticket processing {status.lower()}: {ticket_id}"
+        if queue_state is not None:
+            extra["queue_state"] = str(queue_state)
+            message = f"{message} [{queue_state.to_log_format()}]"
         level = LogLevel.INFO if status == "COMPLETE" else LogLevel.ERROR
-        self._log(level, f"Ticket processing {status.lower()}: {ticket_id}", extra)
+        self._log(level, message, extra)
 
     def log_phase_transition(
         self,
@@ -475,6 +493,8 @@ class RalphLogger:
         reason: str = "component_diversity",
         mode: str = "parallel",
         iteration: Optional[int] = None,
+        scores: Optional[Dict[str, Dict[str, Any]]] = None,
+        skipped: Optional[Dict[str, Dict[str, Any]]] = None,
     ) -> None:
         """Log batch selection with ticket IDs and their component tags.
 
@@ -484,6 +504,10 @@ class RalphLogger:
             reason: Selection rationale (component_diversity, fallback, etc.)
             mode: Execution mode
             iteration: Optional iteration number
+            scores: Optional dict mapping ticket_id -> scheduling score fields
+                (e.g. critical-path depth/fanout/priority, predicted footprint)
+            skipped: Optional dict mapping ticket_id -> why a ready ticket was
+                left out (e.g. predicted overlap with a selected or running ticket)
         """
         extra: Dict[str, Any] = {
             "event": "batch_selected",
@@ -502,34 +526,52 @@ class RalphLogger:
             else:
                 extra[f"{ticket}_components"] = ["untagged"]
 
+        for ticket, score in (scores or {}).items():
+            extra[f"{ticket}_score"] = score
+
         tag_summary = ", ".join(
             f"{ticket}({','.join(tags) if tags else 'untagged'})"
             for ticket, tags in component_tags.items()
         )
+        if scores:
+            score_summary = ", ".join(
+                f"{ticket}=" + "/".join(f"{key}:{value}" for key, value in score.items())
+                for ticket, score in scores.items()
+            )
+            tag_summary = f"{tag_summary} [scores: {score_summary}]"
+        if skipped:
+            extra["skipped"] = skipped
+            skipped_summary = ", ".join(
+                f"{ticket}~{info.get('conflicts_with', '?')}({info.get('overlap', 0)})"
+                for ticket, info in skipped.items()
+            )
+            tag_summary = f"{tag_summary} [skipped overlaps: {skipped_summary}]"
         self.info(f"Selected batch: {tag_summary}", **extra)
 
     def log_worktree_operation(
         self,
         ticket_id: str,
-        operation: str,  # "add" or "remove"
+        operation: str,  # "add", "remove", "acquire", "release" or "retire"
         worktree_path: str,
         success: bool,
         error: Optional[str] = None,
         mode: str = "parallel",
         iteration: Optional[int] = None,
         ticket_title: Optional[str] = None,
+        stats: Optional[Dict[str, Any]] = None,
     ) -> None:
         """Log worktree add/remove operations with success/failure status.
 
         Args:
             ticket_id: The ticket being processed
-            operation: "add" or "remove"
+            operation: "add" or "remove" ("acquire", "release" or "retire" for pooled worktrees)
             worktree_path: Path to the worktree
             success: Whether the operation succeeded
             error: Optional error message on failure
             mode: Execution mode
             iteration: Optional iteration number
             ticket_title: Optional ticket title for verbose logging
+            stats: Optional worktree pool statistics (hits, reset time, ...)
         """
         extra: Dict[str, Any] = {
             "event": "worktree_operation",
@@ -545,6 +587,8 @@ class RalphLogger:
             extra["error"] = error
         if ticket_title:
             extra["ticket_title"] = ticket_title
+        if stats:
+            extra.update(stats)
 
         status = "success" if success else "failed"
         msg = f"Worktree {operation} {status}: {worktree_path}"
@@ -554,6 +598,85 @@ class RalphLogger:
         level = LogLevel.INFO if success else LogLevel.ERROR
         self._log(level, msg, extra)
 
+    def log_merge_result(
+        self,
+        ticket_id: str,
+        status: str,  # "merged", "empty", "conflict" or "error"
+        detail: Optional[str] = None,
+        mode: str = "parallel",
+        iteration: Optional[int] = None,
+        ticket_title: Optional[str] = None,
+        result: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Log the outcome of merging a ticket branch onto the base branch.
+
+        Args:
+            ticket_id: The ticket whose branch was merged
+            status: Merge outcome ("merged", "empty", "conflict" or "error")
+            detail: Optional conflict or error details
+            mode: Execution mode
+            iteration: Optional iteration number
+            ticket_title: Optional ticket title for verbose logging
+            result: Optional merge details (branch, base branch, commit, rebased)
+        """
+        extra: Dict[str, Any] = {
+            "event": "merge",
+            "ticket": ticket_id,
+            "merge_status": status,
+            "mode": mode,
+        }
+        if iteration is not None:
+            extra["iteration"] = iteration
+        if detail:
+            extra["error"] = detail
+        if ticket_title:
+            extra["ticket_title"] = ticket_title
+        if result:
+            extra.update(result)
+
+        msg = f"Merge {status}: {ticket_id}"
+        if result and result.get("base_branch"):
+            msg = f"{msg} -> {result['base_branch']}"
+        if detail:
+            msg = f"{msg} - {detail}"
+
+        if status == "error":
+            level = LogLevel.ERROR
+        elif status == "conflict":
+            level = LogLevel.WARN
+        else:
+            level = LogLevel.INFO
+        self._log(level, msg, extra)
+
+    def log_scale_decision(
+        self,
+        workers: int,
+        previous: int,
+        reason: str,
+        mode: str = "parallel",
+        signals: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Log an autoscaling change of the active worker count.
+
+        Args:
+            workers: New worker target
+            previous: Worker target before the decision
+            reason: Why it changed ("headroom", "load", "memory", "slowdown" or "error_rate")
+            mode: Execution mode
+            signals: Optional inputs behind the decision (load, memory, error rate, slowdown)
+        """
+        extra: Dict[str, Any] = {
+            "event": "autoscale",
+            "workers": workers,
+            "previous_workers": previous,
+            "reason": reason,
+            "mode": mode,
+        }
+        if signals:
+            extra.update({key: value for key, value in signals.items() if value is not None})
+        direction = "up" if workers > previous else "down"
+        self._log(LogLevel.INFO, f"Scaling {direction}: {previous} -> {workers} workers ({reason})", extra)
+
 
 def create_logger(
     level: Optional[LogLevel] = None,
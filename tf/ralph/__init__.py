@@ -1,7 +1,4200 @@
-"""Ralph subpackage for queue state and scheduler utilities."""
-
 from __future__ import annotations
 
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from enum import Enum
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, TextIO, Tuple, Union
+
+# Import new logger
+from tf.logger import LogLevel, RalphLogger, RedactionHelper, create_logger
+
+# Import shared utilities
+from tf.utils import find_project_root
+
+# Import queue state for progress display
 from tf.ralph.queue_state import QueueStateSnapshot, get_queue_state
+from tf.ralph.scheduler import TERMINATE_GRACE_SECS, TIMEOUT_RC, WorkerPool, WorkerSlot, terminate_process
+from tf.ralph.critical_path import TicketScore, rank_tickets, score_summary, score_tickets
+from tf.ralph.ticket_queue import UNTAGGED_COMPONENT, TicketQueue
+from tf.ticket_loader import Ticket
+from tf.ralph.worktree_pool import WorktreeError, WorktreePool
+from tf.ralph.merge_queue import BLOCKED, CONFLICT, MergeError, MergeQueue, MergeResult
+from tf.ralph.event_log import EventLog
+from tf.ralph.pi_stream import PiEventParser, PiStream
+from tf.ralph.log_store import JSONL, OUTPUT, LogStore
+from tf.ralph.ticket_watch import TicketWatcher
+from tf.ralph.leases import LeaseManager
+from tf.ralph.quarantine import Quarantine
+from tf.ralph.breaker import HALF_OPEN, CircuitBreaker
+from tf.ralph.autoscale import Autoscaler, Outcome
+from tf.ralph.rate_limit import RateLimiter, WorkflowModels, parse_limits
+from tf.ralph.checkpoint import DONE, Checkpoint, InFlight, resume_flags, resume_phase
+from tf.ralph.footprint import FootprintPredictor, pack_batch
+from tf.ralph.plan import DEFAULT_DURATION_SECS, DurationEstimator, build_plan, format_plan, format_sweep
+from tf.ralph.metrics import compute_stats, format_stats, prometheus_text, ticket_metrics, write_textfile
+
+
+class ProgressDisplay:
+    """Conservative per-ticket progress display for tf ralph (serial mode only).
+
+    Uses stdlib only. Updates at ticket boundaries (start/complete/fail).
+    In TTY mode: uses carriage return + clear line for stable progress line.
+    In non-TTY mode: plain text output with no control characters.
+    """
+
+    def __init__(self, output: TextIO = sys.stderr, is_tty: Optional[bool] = None):
+        self.output = output
+        self.is_tty = is_tty if is_tty is not None else output.isatty()
+        self.current_ticket: Optional[str] = None
+        self.completed = 0
+        self.failed = 0
+        self.total: Union[int, str] = 0
+        self._last_line_len = 0
+
+    def start_ticket(
+        self,
+        ticket_id: str,
+        iteration: int,
+        total_tickets: Union[int, str],
+        queue_state: Optional["QueueStateSnapshot"] = None,
+    ) -> None:
+        """Called when a ticket starts processing.
+
+        Args:
+            ticket_id: The ID of the ticket being processed
+            iteration: Current loop iteration (0-indexed)
+            total_tickets: Total number of tickets to process (for UI display),
+                          can be '?' if ticket listing failed
+            queue_state: Optional queue state snapshot with ready/blocked counts
+        """
+        self.current_ticket = ticket_id
+        self.total = total_tickets
+        state_str = f" {queue_state}" if queue_state else ""
+        self._draw(f"[{iteration + 1}/{total_tickets}]{state_str} Processing {ticket_id}...")
+
+    def complete_ticket(
+        self,
+        ticket_id: str,
+        status: str,
+        iteration: int,
+        queue_state: Optional["QueueStateSnapshot"] = None,
+    ) -> None:
+        """Called when a ticket completes (success or failure)."""
+        if status == "COMPLETE":
+            self.completed += 1
+            msg = f"✓ {ticket_id} complete"
+        elif status == "FAILED":
+            self.failed += 1
+            msg = f"✗ {ticket_id} failed"
+        else:
+            msg = f"? {ticket_id} {status.lower()}"
+
+        self.current_ticket = None
+        state_str = f" {queue_state}" if queue_state else ""
+        self._draw(f"[{iteration + 1}/{self.total}]{state_str} {msg}", final=True)
+
+    def _draw(self, text: str, final: bool = False) -> None:
+        """Draw progress line. In TTY mode, uses carriage return for in-place updates.
+        In non-TTY mode, always writes new lines (no control characters).
+        """
+        # Prefix with timestamp in HH:MM:SS format (per pt-yx8a spec)
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        full_text = f"{timestamp} {text}"
+
+        if self.is_tty:
+            # Clear line and carriage return for stable progress line
+            # \x1b[2K clears the entire line
+            # \r returns to start of line
+            clear_seq = "\x1b[2K\r"
+            self.output.write(f"{clear_seq}{full_text}")
+            if final:
+                self.output.write("\n")
+            self.output.flush()
+        else:
+            # Non-TTY: plain text, no control characters
+            if final:
+                self.output.write(f"{full_text}\n")
+                self.output.flush()
+            # In non-TTY mode, we don't show intermediate progress to avoid spam
+
+# Module-level cache for ticket titles to avoid repeated tk show calls
+_ticket_title_cache: dict[str, Optional[str]] = {}
+
+# In-process ticket queue used instead of tk subprocesses (see activate_ticket_source)
+_native_queue: Optional[TicketQueue] = None
+
+# Ticket reader used for critical-path scoring and footprint prediction when the native queue is not active
+_scoring_queue: Optional[TicketQueue] = None
+
+
+DEFAULTS: Dict[str, Any] = {
+    "maxIterations": 50,
+    "maxIterationsPerTicket": 5,
+    "ticketQuery": "tk ready | head -1 | awk '{print $1}'",
+    "completionCheck": "tk ready | grep -q .",
+    "sleepBetweenTickets": 5000,
+    "sleepBetweenRetries": 10000,
+    "workflow": "/tf",
+    "workflowFlags": "--auto",
+    "includeKnowledgeBase": True,
+    "includePlanningDocs": True,
+    "promiseOnComplete": True,
+    "lessonsMaxCount": 50,
+    "sessionDir": "~/.pi/agent/sessions",
+    "parallelWorkers": 1,
+    "parallelWorktreesDir": ".tf/ralph/worktrees",
+    "parallelAllowUntagged": False,
+    "componentTagPrefix": "component:",
+    "parallelKeepWorktrees": False,
+    "parallelWorktreePool": True,  # Reuse persistent worktrees instead of re-creating one per ticket
+    "parallelAutoMerge": True,  # Land finished ticket branches on the base branch in completion order
+    "parallelMergeRetries": 2,  # Re-runs on the updated base after a merge conflict before failing
+    "logLevel": "normal",  # quiet, normal, verbose, debug
+    "captureJson": False,  # Capture Pi JSON mode output for debugging
+    "attemptTimeoutMs": 600000,  # 10 minutes default (0 = no timeout)
+    "maxRestarts": 0,  # 0 = no restarts, N = up to N restarts per ticket (on timeout)
+    "ticketSource": "auto",  # auto, native (in-process .tickets reader), query (ticketQuery shell command)
+    "schedulingMode": "queue",  # queue (ready-list order), critical-path (unblock long dependency chains first)
+    "conflictPrediction": "off",  # off (component tags only), files (predict file overlap from past tickets)
+    "coordination": "lock",  # lock (one loop per project), lease (several loops/hosts claim tickets)
+    "leaseTtlMs": 120000,  # Ticket lease lifetime without heartbeat (coordination=lease)
+    "leasesDir": ".tf/ralph/leases",  # Shared lease/ledger directory (coordination=lease)
+    "ticketWatch": "auto",  # auto (inotify on Linux, else polling), poll, off (plain fixed sleeps)
+    "logCompression": "gzip",  # Compression for .tf/ralph/logs (gzip, zstd, none)
+    "logMaxMb": 1024,  # Size limit for .tf/ralph/logs in MiB (0 = unlimited)
+    "logMaxAgeDays": 30,  # Delete logs older than this (0 = keep forever)
+    "phaseTimeoutMs": 0,  # Max time in one workflow phase when JSON output is streamed (0 = no limit)
+    "metricsTextfile": "",  # Prometheus textfile written when the loop exits ("" = disabled)
+    "failurePolicy": "isolate",  # isolate (record failed tickets and keep going), stop (end the loop)
+    "quarantineAfter": 2,  # Consecutive failed runs before a ticket is skipped (0 = never)
+    "breakerWindow": 10,  # Recent ticket runs watched by the circuit breaker (0 = disabled)
+    "breakerThreshold": 0.6,  # Failed share of the window that pauses the loop
+    "breakerCooldownMs": 300000,  # Pause before a probe ticket runs after the breaker opens
+    "autoscale": False,  # Vary active parallel workers between autoscaleMinWorkers and parallelWorkers
+    "autoscaleMinWorkers": 1,
+    "autoscaleIntervalMs": 30000,  # Minimum time between scale decisions
+    "autoscaleMaxLoad": 1.0,  # 1-minute load average per CPU that sheds a worker
+    "autoscaleMinFreeMemMb": 2048,  # Available memory that sheds a worker
+    "autoscaleWorkerMemMb": 1024,  # Memory headroom needed to add a worker
+    "rateLimits": {},  # {"provider" or "provider/model": {"maxConcurrent", "perMinute", "burst"}}
+}
+
+TICKET_SOURCES = ("auto", "native", "query")
+SCHEDULING_MODES = ("queue", "critical-path")
+CONFLICT_PREDICTION_MODES = ("off", "files")
+TICKET_WATCH_MODES = ("auto", "poll", "off")
+COORDINATION_MODES = ("lock", "lease")
+FAILURE_POLICIES = ("isolate", "stop")
+
+# Legacy session directory for backward compatibility detection
+LEGACY_SESSION_DIR = ".tf/ralph/sessions"
+
+# Track if legacy warning has been emitted (warn once per run)
+_legacy_warning_emitted = False
+
+
+def usage() -> None:
+    # Usage goes to stdout as it's user-facing help text
+    print(
+        """Ralph (new Python CLI)
+
+Usage:
+  tf ralph run [ticket-id] [--dry-run] [--verbose|--debug|--quiet] [--capture-json] [--flags '...']
+                            [--progress] [--pi-output MODE] [--pi-output-file PATH]
+  tf ralph start [--max-iterations N] [--parallel N] [--no-parallel] [--dry-run] [--verbose|--debug|--quiet]
+                 [--capture-json] [--flags '...'] [--progress] [--pi-output MODE] [--pi-output-file PATH]
+                 [--resume]
+  tf ralph progress [--render] [--compact [--keep N]]
+  tf ralph stats [--json] [--prometheus PATH|-]
+  tf ralph logs <ticket> [--attempt N] [--output] [--list]
+  tf ralph plan [--workers N[,N...]] [--max-iterations N] [--json] [--no-timeline]
+  tf ralph quarantine [--release <ticket>] [--clear] [--json]
+  tf ralph simulate [--tickets N] [--shape SHAPE] [--workers N] [--seed N] [--bench] [--output PATH]
+
+Verbosity Options:
+  --verbose         Enable verbose output (INFO + DEBUG events)
+  --debug           Alias for --verbose (maximum detail)
+  --quiet           Minimal output (errors only)
+  (default)         Normal output (INFO events only)
+
+Progress Options:
+  --progress, --progressbar
+                    Enable progress indicator (serial mode only).
+                    Output includes a timestamp prefix (HH:MM:SS format):
+                      14:32:05 [1/5] Processing pt-abc123...
+                      14:32:15 [1/5] ✓ pt-abc123 complete
+                    When used in a TTY, pi output is redirected to a log file
+                    to prevent progress bar corruption.
+
+Pi Output Options:
+  --pi-output MODE  Control pi subprocess output: inherit (default), file, discard.
+                    'inherit' passes output through to terminal.
+                    'file' redirects output to .tf/ralph/logs/<ticket>.<attempt>.log.gz.
+                    'discard' suppresses pi output entirely.
+  --pi-output-file PATH
+                    Override the default log file path when --pi-output=file.
+                    (default: .tf/ralph/logs/<ticket>.<attempt>.log.gz)
+
+Resume Options:
+  --resume          Continue a run that was interrupted (crash, reboot, lost session) from
+                    .tf/ralph/checkpoint.json: keep its iteration count, record tickets that
+                    closed before the interruption, re-run the others with --resume-from <phase>
+                    to skip phases whose artifacts were written (parallel mode: in their old
+                    worktree), and remove the worktrees of tickets that start over.
+
+Progress Log Options:
+  (no options)      Print the counters from .tf/ralph/counters.json
+  --render          Regenerate .tf/ralph/progress.md from .tf/ralph/events.jsonl
+  --compact         Drop state-change events from events.jsonl (counters are kept)
+  --keep N          With --compact, also keep only the newest N ticket entries
+
+Stats Options:
+  (no options)      Throughput/hour, p50/p95 ticket duration, failure rate, timeouts,
+                    restarts, queue wait, worktree setup time and worker utilisation
+  --json            Print the stats as JSON
+  --prometheus PATH Write a Prometheus textfile (node-exporter textfile collector); '-' = stdout
+
+Logs Options:
+  (no options)      Print the ticket's latest JSONL trace, decompressed
+  --attempt N       Print attempt N instead (attempts are numbered from 1; 0 = pre-rotation log)
+  --output          Print the pi output log (--pi-output file) instead of the JSONL trace
+  --list            List the ticket's log files per attempt
+
+Plan Options:
+  (no options)      Project the open backlog with the configured parallelWorkers, conflict rules and
+                    schedulingMode: order, per-worker timeline, critical path and estimated finish time.
+                    Durations are medians of completed tickets in .tf/ralph/events.jsonl (similar
+                    tickets, then shared component tag, then all history).
+  --workers N[,N]   Plan with N workers; several counts print a makespan comparison
+  --max-iterations N
+                    Check the plan against N instead of maxIterations
+  --default-duration S
+                    Estimate in seconds for tickets without history (default: 900)
+  --json            Print the plan as JSON
+  --no-timeline     Omit the per-worker timeline
+
+Quarantine Options:
+  (no options)      List tickets with failed runs: failure count, last error and whether the loop
+                    skips them (quarantineAfter consecutive failures). Editing the ticket file or
+                    completing the ticket releases it.
+  --release ID      Forget the ticket's failures so the loop picks it again (repeatable)
+  --clear           Release every ticket
+  --json            Print the entries as JSON
+
+Simulate Options:
+  (no options)      Run the real loop on 20 synthetic tickets with fake pi/tk in a temp project
+                    and print makespan, utilisation, overhead per iteration and tk call count as JSON
+  --tickets N       Number of synthetic tickets (default: 20)
+  --shape SHAPE     Dependency graph: independent, chain, fanout, fanin, layered (default), random
+  --workers N       Parallel workers (default: 1 = serial loop)
+  --seed N          RNG seed for graph, durations and failures (default: 0)
+  --mean-duration S Mean ticket duration in simulated seconds (default: 600)
+  --distribution D  Duration distribution: fixed, uniform, lognormal (default)
+  --spread X        Duration spread (uniform: +/- fraction, lognormal: sigma; default: 0.5)
+  --failure-rate P  Probability an attempt fails (hangs until attemptTimeoutMs; default: 0)
+  --max-restarts N  maxRestarts for the run (default: 1)
+  --components N    Distinct component tags (default: 6; 0 = untagged)
+  --time-scale X    Real seconds per simulated second (default: 0.001)
+  --scheduling MODE schedulingMode for the run (default: queue)
+  --set KEY=VALUE   Extra .tf/ralph/config.json setting (VALUE parsed as JSON if possible)
+  --workdir PATH    Build the project in PATH and keep it (default: temp dir, removed)
+  --bench           Run the benchmark suite (shapes x worker counts) instead
+  --output PATH     Write the JSON result to PATH instead of stdout
+  --verbose         Show the loop's log output
+
+JSON Capture Options:
+  --capture-json    Stream Pi JSON mode output to .tf/ralph/logs/<ticket>.<attempt>.jsonl.gz (tool calls and
+                    phase changes are logged live)
+                    (experimental, for debugging tool execution)
+
+Environment Variables:
+  RALPH_LOG_LEVEL           Set log level: quiet, normal, verbose, debug
+  RALPH_VERBOSE             Set to 1 to enable verbose mode
+  RALPH_DEBUG               Set to 1 to enable debug mode
+  RALPH_QUIET               Set to 1 to enable quiet mode
+  RALPH_CAPTURE_JSON        Set to 1 to enable JSON mode capture (same as --capture-json)
+  RALPH_FORCE_LEGACY_SESSIONS  Set to 1 to force using legacy .tf/ralph/sessions directory
+
+Session Storage:
+  By default, Ralph stores session artifacts in Pi's standard session directory:
+    ~/.pi/agent/sessions/
+
+  Override via .tf/ralph/config.json:
+    {"sessionDir": "/custom/path"}
+
+  Legacy Behavior:
+    If .tf/ralph/sessions/ exists and you haven't explicitly configured sessionDir,
+    Ralph emits a warning but uses the new default location. To suppress the
+    warning or continue using the legacy location, either:
+    - Set RALPH_FORCE_LEGACY_SESSIONS=1, or
+    - Add {"sessionDir": ".tf/ralph/sessions"} to .tf/ralph/config.json
+
+Configuration (in .tf/ralph/config.json):
+  attemptTimeoutMs      Per-ticket attempt timeout in milliseconds (default: 600000 = 10 min)
+                        Set to 0 to disable timeout. Enforced per worker in parallel mode.
+  maxRestarts           Maximum restarts per ticket on timeout/failure (default: 0)
+                        Set to N to allow up to N restarts before marking as failed. Timed-out parallel
+                        tickets get a fresh worktree and are re-queued ahead of new tickets.
+  ticketSource          How ready/blocked tickets are listed (default: auto)
+                        native = read .tickets/ in-process, query = run ticketQuery/completionCheck,
+                        auto = native unless ticketQuery or completionCheck is customized.
+  schedulingMode        Ready-ticket ordering (default: queue)
+                        critical-path = prefer tickets with the longest downstream dependency
+                        chain, then most direct dependents, then priority.
+  conflictPrediction    How parallel mode decides two tickets conflict (default: off)
+                        off = shared component tag; files = predicted file overlap, estimated
+                        from tags/title and files_changed.txt of similar past tickets (tickets
+                        without a prediction fall back to component tags).
+  phaseTimeoutMs        Max time in one workflow phase (research/implement/review/fix/close) in
+                        milliseconds; needs --capture-json (default: 0 = no limit)
+  logCompression        Compression for .tf/ralph/logs: gzip (default), zstd (needs `zstandard`), none
+  logMaxMb              Size limit for .tf/ralph/logs in MiB; oldest logs are deleted first (default: 1024)
+  logMaxAgeDays         Delete logs older than this many days (default: 30; 0 = keep forever)
+  coordination          lock (default: one loop per project) or lease (several loops or hosts claim
+                        tickets via .tf/ralph/leases/<ticket>.lease, renewed by heartbeat)
+  leaseTtlMs            Lease lifetime without heartbeat; expired leases can be taken over (default: 120000)
+  leasesDir             Shared lease and completion-ledger directory (default: .tf/ralph/leases)
+  ticketWatch           Wake the loop when .tickets/ or .tf/knowledge/tickets/ change (default: auto)
+                        auto = inotify on Linux, polling elsewhere; poll; off = fixed sleeps.
+                        sleepBetweenTickets/sleepBetweenRetries are upper bounds unless off.
+  metricsTextfile       Prometheus textfile refreshed when the loop exits (default: disabled)
+                        Relative paths are resolved from the project root.
+  failurePolicy         What a failed ticket does to the loop (default: isolate)
+                        isolate = record it and keep running other tickets (exit code is the first
+                        failure's); stop = stop launching, let running workers finish, exit.
+  quarantineAfter       Consecutive failed runs before a ticket is skipped (default: 2; 0 = never)
+  breakerWindow         Recent ticket runs watched by the circuit breaker (default: 10; 0 = off)
+  breakerThreshold      Failed share of that window that pauses all launches (default: 0.6)
+  breakerCooldownMs     Pause before one probe ticket runs; a failed probe doubles it (default: 300000)
+  autoscale             Vary active parallel workers between autoscaleMinWorkers and parallelWorkers
+                        (default: false). Adds a worker when tickets wait for a slot and load/memory
+                        allow; sheds one on high load, low memory or slower tickets, and halves on
+                        failures, timeouts or provider errors in pi output (needs --capture-json).
+  autoscaleMinWorkers   Lower bound and starting worker count (default: 1)
+  autoscaleIntervalMs   Minimum time between scale decisions (default: 30000)
+  autoscaleMaxLoad      1-minute load average per CPU that sheds a worker (default: 1.0)
+  autoscaleMinFreeMemMb Available memory below which a worker is shed (default: 2048)
+  autoscaleWorkerMemMb  Extra available memory needed to add a worker (default: 1024)
+  rateLimits            Launch limits per provider or model used by the workflow, e.g.
+                        {"openai-codex": {"maxConcurrent": 2, "perMinute": 4, "burst": 2}}
+                        (default: {}). Throttled tickets wait; tickets on other providers
+                        keep launching.
+
+Configuration Environment Variables:
+  RALPH_ATTEMPT_TIMEOUT_MS  Override attemptTimeoutMs (in milliseconds)
+  RALPH_PHASE_TIMEOUT_MS    Override phaseTimeoutMs (in milliseconds)
+  RALPH_MAX_RESTARTS        Override maxRestarts (integer)
+  RALPH_TICKET_SOURCE       Override ticketSource (auto, native, query)
+  RALPH_SCHEDULING_MODE     Override schedulingMode (queue, critical-path)
+  RALPH_CONFLICT_PREDICTION Override conflictPrediction (off, files)
+  RALPH_TICKET_WATCH        Override ticketWatch (auto, poll, off)
+  RALPH_COORDINATION        Override coordination (lock, lease)
+  RALPH_FAILURE_POLICY      Override failurePolicy (isolate, stop)
+  RALPH_AUTOSCALE           Override autoscale (1/true/yes, 0/false/no)
+
+Notes:
+  - CLI flags take precedence over environment variables
+  - Config file settings take precedence over defaults
+  - Environment variables take precedence over config file for timeout/restart settings
+  - Parallel mode uses git worktrees + component tags (same as legacy).
+  - Parallel mode refills a worker slot as soon as any ticket finishes; tickets whose
+    component tags overlap a running ticket wait until that ticket completes.
+  - JSON capture is opt-in; JSONL may contain file paths or snippets.
+  - --progress is only supported in serial mode (--parallel 1 or default).
+"""
+    )
+
+
+def utc_now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def ensure_ralph_dir(project_root: Path, logger: Optional[RalphLogger] = None) -> Optional[Path]:
+    ralph_dir = project_root / ".tf/ralph"
+    if not ralph_dir.is_dir():
+        msg = "Ralph not initialized. Run: tf ralph init"
+        if logger:
+            logger.error(msg)
+        else:
+            print(msg, file=sys.stderr)
+        return None
+    return ralph_dir
+
+
+def load_config(ralph_dir: Path) -> Dict[str, Any]:
+    config_path = ralph_dir / "config.json"
+    data: Dict[str, Any] = {}
+    if config_path.exists():
+        try:
+            data = json_load(config_path)
+        except Exception:
+            data = {}
+    config = dict(DEFAULTS)
+    if isinstance(data, dict):
+        config.update(data)
+    return config
+
+
+def json_load(path: Path) -> Dict[str, Any]:
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def run_shell(cmd: str, cwd: Optional[Path] = None) -> subprocess.CompletedProcess:
+    return subprocess.run(cmd, shell=True, capture_output=True, text=True, cwd=cwd)
+
+
+def sanitize_ticket_query(query: str, logger: Optional[RalphLogger] = None) -> str:
+    if re.search(r"(^|\s)tf\s+next(\s|$)", query):
+        msg = "ticketQuery uses 'tf next' (recursive). Using default tk-ready query."
+        if logger:
+            logger.warn(msg)
+        else:
+            print(f"[warn] {msg}", file=sys.stderr)
+        return DEFAULTS["ticketQuery"]
+    return query
+
+
+def ticket_list_query(ticket_query: str) -> str:
+    if "tk ready" in ticket_query:
+        simplified = re.sub(r"\|\s*head -1", "", ticket_query)
+        simplified = re.sub(r"\|\s*awk .*", "", simplified)
+        return simplified.strip()
+    return "tk ready"
+
+
+def resolve_coordination(config: Dict[str, Any]) -> str:
+    """Resolve how concurrent Ralph loops are coordinated.
+
+    Priority:
+    1. RALPH_COORDINATION environment variable
+    2. Config file (coordination)
+    3. Default ("lock")
+
+    Returns:
+        "lock" (one loop per project) or "lease" (per-ticket leases)
+    """
+    mode = os.environ.get("RALPH_COORDINATION", "").strip().lower()
+    if mode not in COORDINATION_MODES:
+        mode = str(config.get("coordination", DEFAULTS["coordination"])).strip().lower()
+    if mode not in COORDINATION_MODES:
+        mode = DEFAULTS["coordination"]
+    return mode
+
+
+def resolve_conflict_prediction(config: Dict[str, Any]) -> str:
+    """Resolve how parallel mode predicts conflicts between tickets.
+
+    Priority:
+    1. RALPH_CONFLICT_PREDICTION environment variable
+    2. Config file (conflictPrediction)
+    3. Default ("off")
+
+    Returns:
+        "off" (component tags only) or "files" (predicted file overlap)
+    """
+    mode = os.environ.get("RALPH_CONFLICT_PREDICTION", "").strip().lower()
+    if mode not in CONFLICT_PREDICTION_MODES:
+        mode = str(config.get("conflictPrediction", DEFAULTS["conflictPrediction"])).strip().lower()
+    if mode not in CONFLICT_PREDICTION_MODES:
+        mode = DEFAULTS["conflictPrediction"]
+    return mode
+
+
+def create_footprint_predictor(project_root: Path, config: Dict[str, Any]) -> Optional[FootprintPredictor]:
+    """Build the file-footprint predictor for conflictPrediction=files (None when off)."""
+    if resolve_conflict_prediction(config) != "files":
+        return None
+    history_dir = resolve_knowledge_dir(project_root) / "tickets"
+    return FootprintPredictor(project_root, history_dir, lambda: all_tickets(project_root))
+
+
+def resolve_failure_policy(config: Dict[str, Any]) -> str:
+    """Resolve what the loop does when a ticket fails.
+
+    Priority:
+    1. RALPH_FAILURE_POLICY environment variable
+    2. Config file (failurePolicy)
+    3. Default ("isolate")
+
+    Returns:
+        "isolate" (record the failure, keep running other tickets) or
+        "stop" (stop launching, let running workers finish, exit)
+    """
+    policy = os.environ.get("RALPH_FAILURE_POLICY", "").strip().lower()
+    if policy not in FAILURE_POLICIES:
+        policy = str(config.get("failurePolicy", DEFAULTS["failurePolicy"])).strip().lower()
+    if policy not in FAILURE_POLICIES:
+        policy = DEFAULTS["failurePolicy"]
+    return policy
+
+
+def create_quarantine(project_root: Path, config: Dict[str, Any]) -> Quarantine:
+    """Build the ticket quarantine (quarantineAfter, .tf/ralph/quarantine.json)."""
+    try:
+        threshold = int(config.get("quarantineAfter", DEFAULTS["quarantineAfter"]))
+    except (TypeError, ValueError):
+        threshold = DEFAULTS["quarantineAfter"]
+    return Quarantine(project_root / ".tf/ralph", threshold=threshold, tickets_dir=project_root / ".tickets")
+
+
+def create_circuit_breaker(config: Dict[str, Any]) -> CircuitBreaker:
+    """Build the failure-rate circuit breaker (breakerWindow, breakerThreshold, breakerCooldownMs)."""
+    try:
+        window = int(config.get("breakerWindow", DEFAULTS["breakerWindow"]))
+        threshold = float(config.get("breakerThreshold", DEFAULTS["breakerThreshold"]))
+        cooldown_ms = int(config.get("breakerCooldownMs", DEFAULTS["breakerCooldownMs"]))
+    except (TypeError, ValueError):
+        window, threshold, cooldown_ms = (
+            DEFAULTS["breakerWindow"], DEFAULTS["breakerThreshold"], DEFAULTS["breakerCooldownMs"]
+        )
+    return CircuitBreaker(window=window, threshold=threshold, cooldown_secs=max(0, cooldown_ms) / 1000)
+
+
+def _skip_failing(ready: List[str], quarantine: Quarantine, failed: set) -> List[str]:
+    """Drop quarantined tickets; tickets that already failed in this run go last."""
+    ready = quarantine.filter(ready)
+    return [t for t in ready if t not in failed] + [t for t in ready if t in failed]
+
+
+def _record_outcome(
+    ticket: str,
+    rc: int,
+    *,
+    quarantine: Quarantine,
+    breaker: CircuitBreaker,
+    logger: RalphLogger,
+    mode: str,
+) -> None:
+    """Feed a finished ticket run to the quarantine and the circuit breaker."""
+    if rc == 0:
+        quarantine.record_success(ticket)
+    elif quarantine.record_failure(ticket, "timed out" if rc == TIMEOUT_RC else f"exit {rc}"):
+        logger.warn(
+            f"Ticket quarantined after {quarantine.threshold} consecutive failed runs "
+            f"(release with: tf ralph quarantine --release {ticket})",
+            ticket=ticket,
+            event="ticket_quarantined",
+            mode=mode,
+        )
+    tripped = breaker.record(ticket, ok=rc == 0)
+    if tripped:
+        # Failures that tripped the breaker are blamed on the outage, not the tickets
+        released = quarantine.forgive(tripped)
+        logger.error(
+            f"Circuit breaker open: {len(tripped)} failed ticket runs in the last {breaker.window}; "
+            f"pausing for {breaker.remaining():.0f}s",
+            event="circuit_open",
+            failed=tripped,
+            released=released,
+            mode=mode,
+        )
+
+
+def resolve_autoscale(config: Dict[str, Any]) -> bool:
+    """Resolve whether parallel mode autoscales its worker count.
+
+    Priority:
+    1. RALPH_AUTOSCALE environment variable (1/true/yes or 0/false/no)
+    2. Config file (autoscale)
+    3. Default (False)
+    """
+    env_value = os.environ.get("RALPH_AUTOSCALE", "").strip().lower()
+    if env_value in ("1", "true", "yes"):
+        return True
+    if env_value in ("0", "false", "no"):
+        return False
+    return parse_bool(config.get("autoscale", DEFAULTS["autoscale"]), DEFAULTS["autoscale"])
+
+
+def create_autoscaler(config: Dict[str, Any], max_workers: int) -> Autoscaler:
+    """Build the worker autoscaler; parallelWorkers (max_workers) is the ceiling."""
+    try:
+        return Autoscaler(
+            int(config.get("autoscaleMinWorkers", DEFAULTS["autoscaleMinWorkers"])),
+            max_workers,
+            max_load=float(config.get("autoscaleMaxLoad", DEFAULTS["autoscaleMaxLoad"])),
+            min_free_mem_mb=float(config.get("autoscaleMinFreeMemMb", DEFAULTS["autoscaleMinFreeMemMb"])),
+            worker_mem_mb=float(config.get("autoscaleWorkerMemMb", DEFAULTS["autoscaleWorkerMemMb"])),
+            interval_secs=int(config.get("autoscaleIntervalMs", DEFAULTS["autoscaleIntervalMs"])) / 1000,
+        )
+    except (TypeError, ValueError):
+        return Autoscaler(DEFAULTS["autoscaleMinWorkers"], max_workers)
+
+
+def create_rate_limiter(config: Dict[str, Any], logger: RalphLogger) -> RateLimiter:
+    """Build the per-provider/model launch limiter from rateLimits (disabled if invalid)."""
+    try:
+        return RateLimiter(parse_limits(config.get("rateLimits", DEFAULTS["rateLimits"])))
+    except ValueError as exc:
+        logger.warn(f"Ignoring rateLimits: {exc}")
+        return RateLimiter({})
+
+
+def load_workflow_models(project_root: Path, workflow: str, workflow_flags: str) -> WorkflowModels:
+    """Models the workflow uses per ticket, from .tf/config/settings.json."""
+    settings_path = project_root / ".tf/config/settings.json"
+    try:
+        settings = json_load(settings_path) if settings_path.exists() else {}
+    except Exception:
+        settings = {}
+    return WorkflowModels(settings if isinstance(settings, dict) else {}, workflow, workflow_flags)
+
+
+def _provider_errors(slot: WorkerSlot) -> int:
+    """Provider errors seen in a worker's pi JSON output (0 without --capture-json)."""
+    return slot.stream.parser.provider_errors if slot.stream is not None else 0
+
+
+def create_lease_manager(project_root: Path, config: Dict[str, Any]) -> LeaseManager:
+    """Build the LeaseManager for coordination=lease (leasesDir, leaseTtlMs)."""
+    leases_dir = Path(str(config.get("leasesDir", DEFAULTS["leasesDir"]))).expanduser()
+    if not leases_dir.is_absolute():
+        leases_dir = project_root / leases_dir
+    try:
+        ttl_ms = int(config.get("leaseTtlMs", DEFAULTS["leaseTtlMs"]))
+    except (TypeError, ValueError):
+        ttl_ms = DEFAULTS["leaseTtlMs"]
+    return LeaseManager(leases_dir, ttl_secs=max(1000, ttl_ms) / 1000, tickets_dir=project_root / ".tickets")
+
+
+def resolve_ticket_watch(config: Dict[str, Any]) -> str:
+    """Resolve how the loop waits between tickets.
+
+    Priority:
+    1. RALPH_TICKET_WATCH environment variable
+    2. Config file (ticketWatch)
+    3. Default ("auto")
+
+    Returns:
+        "auto", "poll" or "off"
+    """
+    mode = os.environ.get("RALPH_TICKET_WATCH", "").strip().lower()
+    if mode not in TICKET_WATCH_MODES:
+        mode = str(config.get("ticketWatch", DEFAULTS["ticketWatch"])).strip().lower()
+    if mode not in TICKET_WATCH_MODES:
+        mode = DEFAULTS["ticketWatch"]
+    return mode
+
+
+def create_ticket_watcher(
+    project_root: Path, config: Dict[str, Any], logger: Optional[RalphLogger] = None
+) -> Optional[TicketWatcher]:
+    """Watch `.tickets/` and the knowledge tickets directory (None when ticketWatch is off)."""
+    mode = resolve_ticket_watch(config)
+    if mode == "off":
+        return None
+    watcher = TicketWatcher(
+        [project_root / ".tickets", resolve_knowledge_dir(project_root) / "tickets"],
+        backend="poll" if mode == "poll" else "auto",
+    )
+    if logger:
+        logger.debug(f"Watching ticket changes ({watcher.backend})")
+    return watcher
+
+
+def _idle(watcher: Optional[TicketWatcher], seconds: float) -> None:
+    """Sleep up to seconds, returning early when ticket files change."""
+    if watcher is None:
+        time.sleep(seconds)
+    else:
+        watcher.wait(seconds)
+
+
+def resolve_ticket_source(config: Dict[str, Any]) -> str:
+    """Resolve how ready/blocked tickets are listed.
+
+    Priority:
+    1. RALPH_TICKET_SOURCE environment variable
+    2. Config file (ticketSource)
+    3. Default ("auto")
+
+    "auto" uses the native queue unless ticketQuery or completionCheck was
+    customized, in which case the configured shell commands are honoured.
+
+    Returns:
+        "native" or "query"
+    """
+    source = os.environ.get("RALPH_TICKET_SOURCE", "").strip().lower()
+    if source not in TICKET_SOURCES:
+        source = str(config.get("ticketSource", DEFAULTS["ticketSource"])).strip().lower()
+    if source not in TICKET_SOURCES:
+        source = DEFAULTS["ticketSource"]
+    if source == "auto":
+        customized = any(
+            str(config.get(key, DEFAULTS[key])) != DEFAULTS[key] for key in ("ticketQuery", "completionCheck")
+        )
+        source = "query" if customized else "native"
+    return source
+
+
+def activate_ticket_source(
+    project_root: Path,
+    config: Dict[str, Any],
+    logger: Optional[RalphLogger] = None,
+) -> Optional[TicketQueue]:
+    """Enable (or disable) the native ticket queue for this run.
+
+    When active, select_ticket, list_ready_tickets, list_blocked_tickets,
+    backlog_empty, extract_components and extract_ticket_title read
+    `.tickets/` in-process instead of spawning `tk`.
+
+    Returns:
+        The active TicketQueue, or None when shell queries are used.
+    """
+    global _native_queue
+    _native_queue = None
+    if resolve_ticket_source(config) != "native":
+        return None
+    tickets_dir = project_root / ".tickets"
+    if not tickets_dir.is_dir():
+        msg = f"Tickets directory not found: {tickets_dir}; using ticketQuery"
+        if logger:
+            logger.warn(msg)
+        else:
+            print(f"[warn] {msg}", file=sys.stderr)
+        return None
+    _native_queue = TicketQueue(tickets_dir)
+    return _native_queue
+
+
+def resolve_scheduling_mode(config: Dict[str, Any]) -> str:
+    """Resolve the ready-ticket ordering mode.
+
+    Priority:
+    1. RALPH_SCHEDULING_MODE environment variable
+    2. Config file (schedulingMode)
+    3. Default ("queue")
+
+    Returns:
+        "queue" or "critical-path"
+    """
+    mode = os.environ.get("RALPH_SCHEDULING_MODE", "").strip().lower()
+    if mode not in SCHEDULING_MODES:
+        mode = str(config.get("schedulingMode", DEFAULTS["schedulingMode"])).strip().lower()
+    if mode not in SCHEDULING_MODES:
+        mode = DEFAULTS["schedulingMode"]
+    return mode
+
+
+def all_tickets(project_root: Path) -> Dict[str, Ticket]:
+    """All tickets (any status) by ID.
+
+    Reads tickets through the native queue when active (as of its last
+    refresh_tickets()), otherwise through a cached TicketQueue over
+    `.tickets/` that is refreshed here (so repeated reads only re-parse
+    changed files).
+    """
+    global _scoring_queue
+    queue = _native_queue
+    if queue is None:
+        tickets_dir = project_root / ".tickets"
+        if _scoring_queue is None or _scoring_queue.tickets_dir != tickets_dir:
+            if not tickets_dir.is_dir():
+                return {}
+            _scoring_queue = TicketQueue(tickets_dir)
+        queue = _scoring_queue
+        queue.refresh()
+    return queue.tickets()
+
+
+def refresh_tickets() -> None:
+    """Re-scan `.tickets/` for the native queue (once per loop iteration).
+
+    The queue helpers below read the native queue's in-memory view, so a
+    selection costs one directory scan however many tickets it inspects.
+    """
+    if _native_queue is not None:
+        _native_queue.refresh()
+
+
+def critical_path_scores(project_root: Path) -> Dict[str, TicketScore]:
+    """Score all unclosed tickets by downstream depth, fan-out and priority."""
+    return score_tickets(all_tickets(project_root).values())
+
+
+def rank_ready_tickets(ready: List[str], project_root: Path) -> Tuple[List[str], Dict[str, TicketScore]]:
+    """Order ready tickets by critical-path score.
+
+    Returns:
+        Tuple of (ranked ticket IDs, scores by ticket ID).
+    """
+    scores = critical_path_scores(project_root)
+    return rank_tickets(ready, scores), scores
+
+
+def select_critical_path_ticket(
+    list_query: str,
+    project_root: Path,
+) -> Tuple[Optional[str], Dict[str, TicketScore]]:
+    """Pick the ready ticket with the highest critical-path score."""
+    ranked, scores = rank_ready_tickets(list_ready_tickets(list_query), project_root)
+    return (ranked[0] if ranked else None), scores
+
+
+def select_ticket(ticket_query: str) -> Optional[str]:
+    if _native_queue is not None:
+        ready = _native_queue.ready()
+        return ready[0] if ready else None
+    result = run_shell(ticket_query)
+    output = (result.stdout or "").strip()
+    if not output:
+        return None
+    return output.split()[0]
+
+
+def list_ready_tickets(list_query: str) -> List[str]:
+    if _native_queue is not None:
+        return _native_queue.ready()
+    result = run_shell(list_query)
+    lines = [line.strip() for line in (result.stdout or "").splitlines() if line.strip()]
+    return [line.split()[0] for line in lines]
+
+
+def list_blocked_tickets() -> List[str]:
+    """List tickets blocked by unresolved dependencies."""
+    if _native_queue is not None:
+        return _native_queue.blocked()
+    result = run_shell("tk blocked")
+    lines = [line.strip() for line in (result.stdout or "").splitlines() if line.strip()]
+    return [line.split()[0] for line in lines]
+
+
+_BLOCKED_DEP_SENTINEL = "__unmet_dependency__"
+
+
+def _refresh_pending_state(
+    list_query: str,
+    logger: Optional[RalphLogger] = None,
+) -> Tuple[set[str], set[str]]:
+    """Read ready/blocked ticket IDs once and return them as sets.
+
+    Uses a single refresh point per loop iteration to avoid duplicated full relisting.
+    """
+    refresh_tickets()
+    try:
+        ready_ids = set(list_ready_tickets(list_query))
+    except Exception as exc:
+        if logger:
+            logger.warn(f"Failed to list ready tickets: {exc}")
+        ready_ids = set()
+
+    try:
+        blocked_ids = set(list_blocked_tickets())
+    except Exception as exc:
+        if logger:
+            logger.warn(f"Failed to list blocked tickets: {exc}")
+        blocked_ids = set()
+
+    return ready_ids, blocked_ids
+
+
+def _compute_queue_state_snapshot(
+    pending_ids: set[str],
+    blocked_ids: set[str],
+    running_ids: set[str],
+    completed_ids: set[str],
+) -> QueueStateSnapshot:
+    """Build a queue-state snapshot from in-memory ticket ID sets.
+
+    blocked_ids are represented in dep_graph with a sentinel dependency marker so
+    get_queue_state() consistently counts them as blocked.
+    """
+    pending = set(pending_ids)
+    running = set(running_ids)
+    completed = set(completed_ids)
+
+    # Ensure disjoint state sets before computing queue state.
+    pending -= running
+    pending -= completed
+
+    blocked_in_pending = pending & set(blocked_ids)
+    dep_graph: dict[str, set[str]] = {
+        ticket: {_BLOCKED_DEP_SENTINEL} for ticket in blocked_in_pending
+    }
+
+    return get_queue_state(
+        pending=pending,
+        running=running,
+        completed=completed,
+        dep_graph=dep_graph,
+    )
+
+
+def backlog_empty(completion_check: str) -> bool:
+    if _native_queue is not None:
+        return not _native_queue.ready()
+    result = run_shell(completion_check)
+    return result.returncode != 0
+
+
+def ensure_pi() -> bool:
+    return shutil.which("pi") is not None
+
+
+def prompt_exists(project_root: Path, logger: Optional[RalphLogger] = None) -> bool:
+    local_prompt = project_root / ".pi/prompts/tf.md"
+    global_prompt = Path.home() / ".pi/agent/prompts/tf.md"
+    if local_prompt.is_file() or global_prompt.is_file():
+        return True
+    msg = "Missing /tf prompt. Run 'tf init' in the project to install prompts (or 'tf sync' to re-ensure)."
+    if logger:
+        logger.error(msg)
+    else:
+        print(msg, file=sys.stderr)
+    return False
+
+
+def build_cmd(workflow: str, ticket: str, flags: str) -> str:
+    cmd = f"{workflow} {ticket}".strip()
+    if flags:
+        cmd = f"{cmd} {flags}".strip()
+    return cmd
+
+
+def _wait_with_phase_limit(
+    proc: subprocess.Popen,
+    timeout_secs: Optional[float],
+    parser: PiEventParser,
+    phase_timeout_secs: float,
+) -> int:
+    """Wait for proc, raising TimeoutExpired when the attempt or current phase runs too long."""
+    started = time.monotonic()
+    while True:
+        deadline = parser.phase_started + phase_timeout_secs
+        if timeout_secs:
+            deadline = min(deadline, started + timeout_secs)
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise subprocess.TimeoutExpired(proc.args, phase_timeout_secs)
+        try:
+            return proc.wait(timeout=min(remaining, 0.5))
+        except subprocess.TimeoutExpired:
+            continue
+
+
+def _run_with_timeout(
+    args: List[str],
+    cwd: Optional[Path] = None,
+    timeout_secs: Optional[float] = None,
+    stdout=None,
+    stderr=None,
+    stream_to: Optional[Any] = None,
+    parser: Optional[PiEventParser] = None,
+    phase_timeout_secs: Optional[float] = None,
+) -> Tuple[int, bool]:
+    """Run a subprocess with timeout and safe termination.
+
+    Args:
+        args: Command and arguments to run
+        cwd: Working directory for the subprocess
+        timeout_secs: Timeout in seconds (None = no timeout)
+        stdout: File object for stdout redirection
+        stderr: File object for stderr redirection
+        stream_to: Binary file receiving stdout via a live PiStream (with parser)
+        parser: Parser fed each stdout line as it arrives (replaces stdout)
+        phase_timeout_secs: Also time out when the parser stays in one phase this long
+
+    Returns:
+        Tuple of (return_code, timed_out)
+        - return_code: Exit code of the process (or -1 if timed out)
+        - timed_out: True if the process was terminated due to timeout
+    """
+    # Start the process
+    proc = subprocess.Popen(
+        args,
+        cwd=cwd,
+        stdout=subprocess.PIPE if parser is not None else stdout,
+        stderr=stderr,
+    )
+    stream = PiStream(proc.stdout, stream_to, parser).start() if parser is not None else None
+
+    try:
+        # Wait for process to complete with timeout
+        if parser is not None and phase_timeout_secs:
+            return_code = _wait_with_phase_limit(proc, timeout_secs, parser, phase_timeout_secs)
+        else:
+            return_code = proc.wait(timeout=timeout_secs)
+        return return_code, False
+    except subprocess.TimeoutExpired:
+        # Timeout occurred - SIGTERM, grace period, SIGKILL, then reap to avoid
+        # zombies (shared with parallel mode via terminate_process)
+        terminate_process(proc)
+
+        # Return -1 to indicate timeout distinctly (for restart logic)
+        return TIMEOUT_RC, True
+    finally:
+        if stream is not None:
+            stream.join(timeout=TERMINATE_GRACE_SECS)
+
+
+def run_ticket(
+    ticket: str,
+    workflow: str,
+    flags: str,
+    dry_run: bool,
+    cwd: Optional[Path] = None,
+    logger: Optional[RalphLogger] = None,
+    mode: str = "serial",
+    capture_json: bool = False,
+    logs_dir: Optional[Path] = None,
+    ticket_title: Optional[str] = None,
+    pi_output: str = "inherit",
+    pi_output_file: Optional[str] = None,
+    timeout_ms: int = 0,
+    phase_timeout_ms: int = 0,
+    log_store: Optional[LogStore] = None,
+) -> int:
+    """Run `pi` for one ticket.
+
+    With capture_json, stdout is streamed live (see tf.ralph.pi_stream): tool
+    executions and phase transitions are logged as they happen and the raw
+    JSONL is written to `<logs_dir>/<ticket>.jsonl`. phase_timeout_ms then
+    also terminates an attempt that stays in one workflow phase too long.
+    With a log_store, logs in logs_dir are written per attempt and compressed
+    (`<ticket>.<attempt>.jsonl.gz`, see tf.ralph.log_store).
+
+    Returns:
+        The `pi` exit code, or -1 if the attempt timed out.
+    """
+    log = logger or create_logger(mode=mode, ticket_id=ticket, ticket_title=ticket_title)
+    if not ticket:
+        log.error("No ticket specified")
+        return 1
+    if not ensure_pi():
+        log.error("pi not found in PATH; cannot run workflow")
+        return 1
+    if cwd is None:
+        project_root = find_project_root()
+        if project_root and not prompt_exists(project_root, log):
+            return 1
+    else:
+        if not prompt_exists(cwd, log):
+            return 1
+
+    cmd = build_cmd(workflow, ticket, flags)
+
+    # Per-attempt log files when a log store is used
+    store = log_store if logs_dir else None
+    attempt = store.next_attempt(ticket) if store is not None else 0
+
+    # Determine JSON capture path if enabled
+    jsonl_path: Optional[Path] = None
+    if capture_json and logs_dir:
+        jsonl_path = store.path(ticket, attempt, JSONL) if store is not None else logs_dir / f"{ticket}.jsonl"
+
+    # Determine pi output log path for file mode
+    pi_log_path: Optional[Path] = None
+    seal_pi_log = False
+    if pi_output == "file":
+        if pi_output_file:
+            pi_log_path = Path(pi_output_file).expanduser()
+        elif store is not None:
+            # Written plain by the subprocess, compressed once the attempt ends
+            pi_log_path = store.path(ticket, attempt, OUTPUT, compressed=False)
+            seal_pi_log = True
+        elif logs_dir:
+            pi_log_path = logs_dir / f"{ticket}.log"
+        else:
+            # Fallback to default logs location
+            pi_log_path = Path(".tf/ralph/logs") / f"{ticket}.log"
+
+    if dry_run:
+        prefix = " (worktree)" if cwd else ""
+        json_flag = " --mode json" if capture_json else ""
+        output_note = ""
+        if pi_output == "file":
+            output_note = f" (output to {pi_log_path})"
+        elif pi_output == "discard":
+            output_note = " (output discarded)"
+        log.info(f"Dry run: pi -p{json_flag} \"{cmd}\"{prefix}{output_note}", ticket=ticket)
+        return 0
+
+    json_flag_str = " --mode json" if capture_json else ""
+    log.info(f"Running: pi -p{json_flag_str} \"{cmd}\"", ticket=ticket)
+    args = ["pi", "-p"]
+    if capture_json:
+        args.append("--mode")
+        args.append("json")
+    args.append(cmd)
+
+    # Calculate timeout in seconds (0 = no timeout)
+    timeout_secs: Optional[float] = timeout_ms / 1000.0 if timeout_ms > 0 else None
+    if timeout_secs:
+        log.info(f"Attempt timeout: {timeout_ms}ms ({timeout_secs}s)", ticket=ticket)
+
+    # Handle pi output routing
+    timed_out = False
+    return_code = 0
+    phase_timeout_secs = phase_timeout_ms / 1000.0 if phase_timeout_ms > 0 else None
+    parser = PiEventParser(ticket, log, mode=mode) if jsonl_path else None
+
+    if jsonl_path and pi_output == "file":
+        # Both JSON capture and pi output to file: JSON events (stdout) are streamed
+        # to jsonl_file, everything else pi prints (stderr) goes to pi_log_file
+        logs_dir.mkdir(parents=True, exist_ok=True) if logs_dir else None
+        pi_log_path.parent.mkdir(parents=True, exist_ok=True)
+        jsonl_file = store.open_stream(ticket, attempt, JSONL) if store is not None else open(jsonl_path, "wb")
+        with open(pi_log_path, "w", encoding="utf-8") as pi_log_file:
+            return_code, timed_out = _run_with_timeout(
+                args, cwd=cwd, stderr=pi_log_file, timeout_secs=timeout_secs,
+                stream_to=jsonl_file, parser=parser, phase_timeout_secs=phase_timeout_secs,
+            )
+        if seal_pi_log:
+            pi_log_path = store.seal(pi_log_path)
+        log.info(f"JSONL trace written to: {jsonl_path}", ticket=ticket, jsonl_path=str(jsonl_path))
+        log.info(f"Pi output written to: {pi_log_path}", ticket=ticket, pi_log_path=str(pi_log_path))
+    elif jsonl_path:
+        # Only JSON capture (stderr is interleaved into the trace, as before)
+        logs_dir.mkdir(parents=True, exist_ok=True)
+        jsonl_file = store.open_stream(ticket, attempt, JSONL) if store is not None else open(jsonl_path, "wb")
+        return_code, timed_out = _run_with_timeout(
+            args, cwd=cwd, stderr=subprocess.STDOUT, timeout_secs=timeout_secs,
+            stream_to=jsonl_file, parser=parser, phase_timeout_secs=phase_timeout_secs,
+        )
+        log.info(f"JSONL trace written to: {jsonl_path}", ticket=ticket, jsonl_path=str(jsonl_path))
+    elif pi_output == "file" and pi_log_path:
+        # Only pi output to file
+        pi_log_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(pi_log_path, "w", encoding="utf-8") as pi_log_file:
+            return_code, timed_out = _run_with_timeout(
+                args, cwd=cwd, stdout=pi_log_file, stderr=subprocess.STDOUT,
+                timeout_secs=timeout_secs
+            )
+        if seal_pi_log:
+            pi_log_path = store.seal(pi_log_path)
+        log.info(f"Pi output written to: {pi_log_path}", ticket=ticket, pi_log_path=str(pi_log_path))
+    elif pi_output == "discard":
+        # Discard output
+        with open(os.devnull, "w") as devnull:
+            return_code, timed_out = _run_with_timeout(
+                args, cwd=cwd, stdout=devnull, stderr=subprocess.STDOUT,
+                timeout_secs=timeout_secs
+            )
+    else:
+        # inherit - default behavior
+        return_code, timed_out = _run_with_timeout(args, cwd=cwd, timeout_secs=timeout_secs)
+
+    # Handle timeout
+    if timed_out:
+        if parser is not None and phase_timeout_secs and parser.phase_elapsed >= phase_timeout_secs:
+            log.error(f"Attempt stuck in phase '{parser.phase}' for over {phase_timeout_ms}ms", ticket=ticket, phase=parser.phase)
+        else:
+            log.error(f"Attempt timed out after {timeout_ms}ms", ticket=ticket)
+        return -1  # Special return code to indicate timeout for restart handling
+
+    # On failure with file capture, print exit code + log path
+    if return_code != 0 and pi_output == "file" and pi_log_path:
+        log.error(f"Command failed with exit code {return_code}. Output log: {pi_log_path}", ticket=ticket)
+
+    return return_code
+
+
+def extract_components(ticket_id: str, tag_prefix: str, allow_untagged: bool) -> Optional[set]:
+    if _native_queue is not None:
+        return _native_queue.components(ticket_id, tag_prefix, allow_untagged)
+    try:
+        proc = subprocess.run(["tk", "show", ticket_id], capture_output=True, text=True, check=False)
+    except Exception:
+        return None
+    text = proc.stdout
+    in_front = False
+    tags: List[str] = []
+    for line in text.splitlines():
+        if line.strip() == "---":
+            in_front = not in_front
+            continue
+        if in_front and line.startswith("tags:"):
+            value = line.split(":", 1)[1].strip()
+            if value.startswith("[") and value.endswith("]"):
+                value = value[1:-1]
+            tags = [t.strip() for t in value.split(",") if t.strip()]
+            break
+    components = [t for t in tags if t.startswith(tag_prefix)]
+    if not components:
+        if not allow_untagged:
+            return None
+        return {"__untagged__"}
+    return set(components)
+
+
+def select_parallel_tickets(
+    ready: List[str],
+    max_parallel: int,
+    allow_untagged: bool,
+    tag_prefix: str,
+    busy_components: Optional[set] = None,
+    components_out: Optional[Dict[str, Optional[set]]] = None,
+    predictor: Optional[FootprintPredictor] = None,
+    running: Optional[Dict[str, set]] = None,
+    overlaps_out: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> List[str]:
+    """Pick up to max_parallel ready tickets whose component tags do not overlap.
+
+    With a predictor (conflictPrediction=files), tickets conflict when their
+    predicted file footprints overlap instead, untagged tickets with a
+    prediction are eligible, and the largest conflict-free set is packed
+    (see _select_by_footprint).
+
+    Args:
+        ready: Ready ticket IDs in queue order
+        max_parallel: Maximum number of tickets to select
+        allow_untagged: Whether tickets without component tags may be selected
+        tag_prefix: Component tag prefix (e.g. "component:")
+        busy_components: Components already claimed by running tickets
+        components_out: Optional dict filled with ticket -> components for every
+            ticket inspected, so callers can reuse them without re-querying.
+        predictor: Footprint predictor enabling file-overlap conflicts
+        running: Running ticket -> components (used with a predictor)
+        overlaps_out: Optional dict filled with ticket -> predicted overlap
+            (selected tickets' footprints, skipped tickets' conflicts)
+
+    Returns:
+        Selected ticket IDs in queue order.
+    """
+    selected: List[str] = []
+    if max_parallel <= 0:
+        return selected
+    if predictor is not None:
+        return _select_by_footprint(
+            ready,
+            max_parallel,
+            allow_untagged,
+            tag_prefix,
+            predictor,
+            running or {},
+            components_out,
+            overlaps_out,
+        )
+    used: set = set(busy_components or ())
+    for ticket in ready:
+        comps = extract_components(ticket, tag_prefix, allow_untagged)
+        if components_out is not None:
+            components_out[ticket] = comps
+        if comps is None:
+            continue
+        if comps & used:
+            continue
+        selected.append(ticket)
+        used.update(comps)
+        if len(selected) >= max_parallel:
+            break
+    return selected
+
+
+def _select_by_footprint(
+    ready: List[str],
+    max_parallel: int,
+    allow_untagged: bool,
+    tag_prefix: str,
+    predictor: FootprintPredictor,
+    running: Dict[str, set],
+    components_out: Optional[Dict[str, Optional[set]]],
+    overlaps_out: Optional[Dict[str, Dict[str, Any]]],
+) -> List[str]:
+    """select_parallel_tickets with predicted file footprints.
+
+    Two tickets conflict when both have a predicted footprint and the
+    footprints share a file; otherwise the component-tag rule applies (an
+    untagged ticket counts as component `__untagged__`). Tickets with neither
+    a prediction nor a usable tag are skipped, as without prediction.
+    """
+    predictor.refresh()
+    tags: Dict[str, set] = {}
+    eligible: List[str] = []
+    for ticket in ready:
+        comps = extract_components(ticket, tag_prefix, allow_untagged)
+        footprint = predictor.predict(ticket)
+        if comps is None and footprint.known:
+            comps = {UNTAGGED_COMPONENT}
+        if components_out is not None:
+            components_out[ticket] = comps
+        if comps is None:
+            continue
+        tags[ticket] = comps
+        eligible.append(ticket)
+    for ticket, comps in running.items():
+        tags[ticket] = set(comps) or {UNTAGGED_COMPONENT}
+
+    def conflicts(a: str, b: str) -> List[str]:
+        first, second = predictor.predict(a), predictor.predict(b)
+        if first.known and second.known:
+            return sorted(first.files & second.files)
+        return sorted(tags.get(a, set()) & tags.get(b, set()))
+
+    blocked_by: Dict[str, Tuple[str, List[str]]] = {}
+    for ticket in eligible:
+        for other in running:
+            shared = conflicts(ticket, other)
+            if shared:
+                blocked_by[ticket] = (other, shared)
+                break
+
+    result = pack_batch(eligible, max_parallel, conflicts, blocked_by)
+    if overlaps_out is not None:
+        for ticket in result.selected:
+            overlaps_out[ticket] = predictor.predict(ticket).to_dict()
+        for ticket, (other, shared) in result.skipped.items():
+            overlaps_out[ticket] = {"conflicts_with": other, "shared": shared[:5], "overlap": len(shared)}
+    return result.selected
+
+
+def _remove_worktree(repo_root: Path, worktree_path: Path) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        ["git", "-C", str(repo_root), "worktree", "remove", "-f", str(worktree_path)],
+        capture_output=True,
+    )
+
+
+def _start_parallel_ticket(
+    ticket: str,
+    iteration: int,
+    *,
+    repo_root: Path,
+    worktrees_dir: Path,
+    ralph_dir: Path,
+    project_root: Path,
+    workflow: str,
+    workflow_flags: str,
+    capture_json: bool,
+    logs_dir: Optional[Path],
+    components: set,
+    ticket_title: Optional[str],
+    logger: RalphLogger,
+    mode: str = "parallel",
+    timeout_ms: int = 0,
+    attempt: int = 0,
+    worktree_pool: Optional[WorktreePool] = None,
+    merge_retries: int = 0,
+    queued_secs: float = 0.0,
+    previous: Optional[WorkerSlot] = None,
+    phase_timeout_ms: int = 0,
+    log_store: Optional[LogStore] = None,
+    worktree: Optional[Path] = None,
+) -> Optional[WorkerSlot]:
+    """Prepare a worktree for a ticket and launch `pi` in it.
+
+    With a worktree_pool, a pooled worktree is switched to `ralph/<ticket>`
+    (and a spare one is prepared in the background); otherwise a fresh
+    worktree is created. A given `worktree` (an interrupted ticket being
+    resumed) is used as it is. `pi` runs in its own session (process group) so a
+    timed-out attempt can be terminated together with any tools it spawned.
+    When relaunching, `previous` is the earlier attempt's slot; its timing
+    metrics are carried over. With capture_json, `pi` output is streamed live
+    to `<logs_dir>/<ticket>.jsonl` in the main checkout (see tf.ralph.pi_stream),
+    or to a per-attempt compressed file when a log_store is given.
+
+    Returns:
+        The running WorkerSlot, or None if the worktree could not be created
+        (the failure is recorded in progress).
+    """
+    setup_started = time.monotonic()
+    worktree_path = worktrees_dir / ticket
+    if worktree is None:
+        # Remove any existing worktree first
+        remove = _remove_worktree(repo_root, worktree_path)
+        if remove.returncode == 0:
+            logger.log_worktree_operation(
+                ticket, "remove", str(worktree_path), success=True, mode=mode, iteration=iteration, ticket_title=ticket_title
+            )
+    error_msg: Optional[str] = None
+    if worktree is not None:
+        operation = "reattach"
+        worktree_path = worktree
+    elif worktree_pool is not None:
+        operation = "acquire"
+        try:
+            worktree_path, _ = worktree_pool.acquire(ticket)
+        except WorktreeError as exc:
+            error_msg = str(exc)
+    else:
+        # Add new worktree
+        operation = "add"
+        add = subprocess.run(
+            ["git", "-C", str(repo_root), "worktree", "add", "-B", f"ralph/{ticket}", str(worktree_path), "HEAD"],
+            capture_output=True,
+        )
+        if add.returncode != 0:
+            error_msg = add.stderr.decode("utf-8", errors="replace") if add.stderr else "worktree add failed"
+    if error_msg is not None:
+        logger.log_worktree_operation(
+            ticket, operation, str(worktree_path), success=False, error=error_msg, mode=mode, iteration=iteration, ticket_title=ticket_title
+        )
+        logger.log_error_summary(ticket, f"worktree {operation} failed: {error_msg}", iteration=iteration, ticket_title=ticket_title)
+        update_state(ralph_dir, project_root, ticket, "FAILED", f"worktree {operation} failed: {error_msg}", repo_root / ".tf/knowledge")
+        return None
+    setup_secs = time.monotonic() - setup_started
+    logger.log_worktree_operation(
+        ticket,
+        operation,
+        str(worktree_path),
+        success=True,
+        mode=mode,
+        iteration=iteration,
+        ticket_title=ticket_title,
+        stats=worktree_pool.stats.to_dict() if worktree_pool is not None else None,
+    )
+    if worktree_pool is not None:
+        # Warm a spare worktree for the next ticket while this one runs.
+        worktree_pool.prepare()
+    if attempt == 0 and merge_retries == 0:
+        logger.log_ticket_start(ticket, mode=mode, iteration=iteration, ticket_title=ticket_title)
+
+    cmd = build_cmd(workflow, ticket, workflow_flags)
+    args = ["pi", "-p"]
+    if capture_json:
+        args.append("--mode")
+        args.append("json")
+    args.append(cmd)
+
+    jsonl_file = None
+    jsonl_path: Optional[Path] = None
+    stream: Optional[PiStream] = None
+    if capture_json and logs_dir:
+        # Central logs directory, so traces survive worktree cleanup and can be tailed live
+        logs_dir.mkdir(parents=True, exist_ok=True)
+        if log_store is not None:
+            log_attempt = log_store.next_attempt(ticket)
+            jsonl_path = log_store.path(ticket, log_attempt, JSONL)
+            jsonl_file = log_store.open_stream(ticket, log_attempt, JSONL)
+        else:
+            jsonl_path = logs_dir / f"{ticket}.jsonl"
+            jsonl_file = open(jsonl_path, "wb")
+        proc = subprocess.Popen(
+            args, cwd=worktree_path, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, start_new_session=True
+        )
+        stream = PiStream(proc.stdout, jsonl_file, PiEventParser(ticket, logger, mode=mode)).start()
+    else:
+        proc = subprocess.Popen(args, cwd=worktree_path, start_new_session=True)
+
+    return WorkerSlot(
+        ticket=ticket,
+        proc=proc,
+        worktree_path=worktree_path,
+        iteration=iteration,
+        components=set(components),
+        ticket_title=ticket_title,
+        log_file=jsonl_file,
+        log_path=jsonl_path,
+        timeout_secs=timeout_ms / 1000 if timeout_ms > 0 else None,
+        attempt=attempt,
+        merge_retries=merge_retries,
+        launched_at=previous.launched_at if previous is not None else setup_started,
+        queued_secs=previous.queued_secs if previous is not None else queued_secs,
+        setup_secs=(previous.setup_secs if previous is not None else 0.0) + setup_secs,
+        timeouts=previous.timeouts + int(previous.timed_out) if previous is not None else 0,
+        stream=stream,
+        phase_timeout_secs=phase_timeout_ms / 1000 if stream is not None and phase_timeout_ms > 0 else None,
+    )
+
+
+def _finish_parallel_ticket(
+    slot: WorkerSlot,
+    rc: int,
+    *,
+    repo_root: Path,
+    ralph_dir: Path,
+    project_root: Path,
+    workflow: str,
+    workflow_flags: str,
+    keep_worktrees: bool,
+    logger: RalphLogger,
+    mode: str = "parallel",
+    worktree_pool: Optional[WorktreePool] = None,
+    error: Optional[str] = None,
+    run_id: str = "",
+    workers: int = 1,
+    leases: Optional[LeaseManager] = None,
+    checkpoint: Optional[Checkpoint] = None,
+) -> int:
+    """Record the result of a finished parallel ticket and clean up its worktree.
+
+    Failed tickets keep their worktree for inspection (pooled worktrees are
+    retired to `<worktrees_dir>/<ticket>`); successful pooled worktrees are
+    returned to the pool. `error` overrides the failure message recorded for
+    a non-zero rc (e.g. when `pi` succeeded but the merge did not).
+
+    Returns:
+        The ticket's return code (0 on success).
+    """
+    ticket = slot.ticket
+    ticket_title = slot.ticket_title
+    iteration = slot.iteration
+    worktree_path = slot.worktree_path
+    slot.close_log()
+
+    if slot.log_path is not None:
+        # Log where the JSONL was written (central logs directory)
+        logger.info(
+            f"JSONL trace written to: {slot.log_path}",
+            ticket=ticket,
+            ticket_title=ticket_title,
+            jsonl_path=str(slot.log_path),
+            mode=mode,
+        )
+    cmd = build_cmd(workflow, ticket, workflow_flags)
+    logger.log_command_executed(ticket, cmd, rc, mode=mode, iteration=iteration, ticket_title=ticket_title)
+
+    metrics = ticket_metrics(
+        duration_secs=time.monotonic() - (slot.launched_at or slot.started_at),
+        attempts=slot.attempt + slot.merge_retries + 1,
+        exit_code=rc,
+        mode=mode,
+        workers=workers,
+        run_id=run_id,
+        timeouts=slot.timeouts + int(slot.timed_out),
+        queue_wait_secs=slot.queued_secs,
+        worktree_setup_secs=slot.setup_secs,
+    )
+    if rc != 0 and worktree_pool is not None:
+        worktree_path = worktree_pool.retire(worktree_path, ticket)
+    artifact_root = worktree_path / ".tf/knowledge"
+    if rc != 0:
+        if error:
+            error_msg = error
+        elif slot.timed_out and slot.stream is not None and slot.phase_timeout_secs and (
+            slot.stream.parser.phase_elapsed >= slot.phase_timeout_secs
+        ):
+            error_msg = (
+                f"Attempt stuck in phase '{slot.stream.parser.phase}' "
+                f"(phase timeout: {int(slot.phase_timeout_secs * 1000)}ms)"
+            )
+        elif slot.timed_out:
+            error_msg = (
+                f"Attempt timed out after {slot.attempt + 1} attempt(s) "
+                f"(timeout: {int((slot.timeout_secs or 0) * 1000)}ms)"
+            )
+        else:
+            error_msg = f"pi -p failed (exit {rc})"
+        artifact_path = str(artifact_root / "tickets" / ticket)
+        logger.log_ticket_complete(ticket, "FAILED", mode=mode, iteration=iteration, ticket_title=ticket_title)
+        logger.log_error_summary(ticket, error_msg, artifact_path=artifact_path, iteration=iteration, ticket_title=ticket_title)
+        update_state(ralph_dir, project_root, ticket, "FAILED", error_msg, artifact_root, metrics=metrics)
+        if leases is not None:
+            leases.complete(ticket, "FAILED", error=error_msg)
+        if checkpoint is not None:
+            checkpoint.finish(ticket)
+        return rc
+
+    logger.log_ticket_complete(ticket, "COMPLETE", mode=mode, iteration=iteration, ticket_title=ticket_title)
+    update_state(ralph_dir, project_root, ticket, "COMPLETE", "", artifact_root, metrics=metrics)
+    if leases is not None:
+        leases.complete(ticket, "COMPLETE")
+    if checkpoint is not None:
+        checkpoint.finish(ticket)
+
+    if worktree_pool is not None:
+        if keep_worktrees:
+            worktree_path = worktree_pool.retire(worktree_path, ticket)
+        else:
+            worktree_pool.release(worktree_path)
+        logger.log_worktree_operation(
+            ticket,
+            "retire" if keep_worktrees else "release",
+            str(worktree_path),
+            success=True,
+            mode=mode,
+            iteration=iteration,
+            ticket_title=ticket_title,
+            stats=worktree_pool.stats.to_dict(),
+        )
+    elif not keep_worktrees:
+        remove = _remove_worktree(repo_root, worktree_path)
+        if remove.returncode == 0:
+            logger.log_worktree_operation(
+                ticket, "remove", str(worktree_path), success=True, mode=mode, iteration=iteration, ticket_title=ticket_title
+            )
+        else:
+            error_msg = remove.stderr.decode("utf-8", errors="replace") if remove.stderr else "unknown error"
+            logger.log_worktree_operation(
+                ticket, "remove", str(worktree_path), success=False, error=error_msg, mode=mode, iteration=iteration, ticket_title=ticket_title
+            )
+            shutil.rmtree(worktree_path, ignore_errors=True)
+    return 0
+
+
+def _note_ready(ready_since: Dict[str, float], ready_ids: Iterable[str]) -> None:
+    """Remember when each ready ticket was first seen (queue wait metric)."""
+    now = time.monotonic()
+    for ticket in ready_ids:
+        ready_since.setdefault(ticket, now)
+
+
+def _wait_for_restarts(
+    restarts: List[WorkerSlot],
+    breaker: CircuitBreaker,
+    limiter: RateLimiter,
+    limit_keys: Callable[[str], List[str]],
+    default_wait: float,
+    logger: RalphLogger,
+    mode: str,
+    iteration: int,
+) -> None:
+    """Sleep until the breaker or the rate limits may admit a re-queued ticket."""
+    wait_secs = breaker.remaining()
+    reason = "circuit_open"
+    if not wait_secs:
+        reason = "rate_limited"
+        token_waits = [
+            blocked[1]
+            for blocked in (limiter.blocked(limit_keys(slot.ticket)) for slot in restarts)
+            if blocked is not None and blocked[1] is not None
+        ]
+        wait_secs = min(token_waits, default=default_wait)
+    wait_secs = max(wait_secs, 0.05)
+    logger.log_no_ticket_selected(sleep_seconds=round(wait_secs, 1), reason=reason, mode=mode, iteration=iteration)
+    time.sleep(wait_secs)
+
+
+def _wake_any(*checks: Optional[Callable[[], bool]]) -> Optional[Callable[[], bool]]:
+    """Combine WorkerPool.wait_any wake checks (None if there are none)."""
+    active = [check for check in checks if check is not None]
+    if not active:
+        return None
+    if len(active) == 1:
+        return active[0]
+    return lambda: any(check() for check in active)
+
+
+def _recycle_worktree(
+    slot: WorkerSlot,
+    *,
+    repo_root: Path,
+    logger: RalphLogger,
+    mode: str = "parallel",
+    worktree_pool: Optional[WorktreePool] = None,
+) -> None:
+    """Give up a ticket's worktree before the ticket is re-queued."""
+    if worktree_pool is not None:
+        worktree_pool.release(slot.worktree_path)
+        cleaned = True
+    else:
+        cleaned = _remove_worktree(repo_root, slot.worktree_path).returncode == 0
+    logger.log_worktree_operation(
+        slot.ticket,
+        "release" if worktree_pool is not None else "remove",
+        str(slot.worktree_path),
+        success=cleaned,
+        mode=mode,
+        iteration=slot.iteration,
+        ticket_title=slot.ticket_title,
+    )
+
+
+def _merge_parallel_ticket(
+    slot: WorkerSlot,
+    merge_queue: MergeQueue,
+    *,
+    logger: RalphLogger,
+    mode: str = "parallel",
+) -> MergeResult:
+    """Land a successful ticket's branch on the base branch and log the outcome."""
+    result = merge_queue.merge(slot.ticket, slot.worktree_path)
+    logger.log_merge_result(
+        slot.ticket,
+        result.status,
+        detail=result.detail,
+        mode=mode,
+        iteration=slot.iteration,
+        ticket_title=slot.ticket_title,
+        result=result.to_dict(),
+    )
+    return result
+
+
+def git_repo_root() -> Optional[Path]:
+    result = subprocess.run(["git", "rev-parse", "--show-toplevel"], capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    path = result.stdout.strip()
+    return Path(path) if path else None
+
+
+def parse_bool(value: Any, default: bool = False) -> bool:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return bool(value)
+    if isinstance(value, str):
+        return value.strip().lower() == "true"
+    return default
+
+
+def resolve_log_level(
+    cli_level: Optional[LogLevel] = None,
+    config: Optional[Dict[str, Any]] = None,
+) -> LogLevel:
+    """Resolve log level from CLI flags, env vars, and config (in that priority order).
+
+    Priority:
+    1. CLI flags (--verbose, --debug, --quiet)
+    2. Environment variables (RALPH_LOG_LEVEL, RALPH_VERBOSE, RALPH_DEBUG, RALPH_QUIET)
+    3. Config file (logLevel setting)
+    4. Default (normal)
+    """
+    # CLI flags take highest priority
+    if cli_level is not None:
+        return cli_level
+
+    # Environment variables
+    env_level = os.environ.get("RALPH_LOG_LEVEL", "").strip().lower()
+    if env_level:
+        return LogLevel.from_string(env_level)
+
+    if os.environ.get("RALPH_DEBUG", "").strip() == "1":
+        return LogLevel.DEBUG
+    if os.environ.get("RALPH_VERBOSE", "").strip() == "1":
+        return LogLevel.VERBOSE
+    if os.environ.get("RALPH_QUIET", "").strip() == "1":
+        return LogLevel.QUIET
+
+    # Config file
+    if config is not None:
+        config_level = config.get("logLevel", DEFAULTS["logLevel"])
+        if isinstance(config_level, str):
+            return LogLevel.from_string(config_level)
+
+    # Default
+    return LogLevel.NORMAL
+
+
+def log_level_to_flag(level: LogLevel) -> str:
+    """Convert LogLevel to a workflow flag string."""
+    mapping = {
+        LogLevel.QUIET: "--quiet",
+        LogLevel.NORMAL: "",
+        LogLevel.VERBOSE: "--verbose",
+        LogLevel.DEBUG: "--debug",
+    }
+    return mapping.get(level, "")
+
+
+def resolve_attempt_timeout_ms(config: Dict[str, Any]) -> int:
+    """Resolve attempt timeout from env var or config.
+
+    Priority:
+    1. RALPH_ATTEMPT_TIMEOUT_MS environment variable
+    2. Config file (attemptTimeoutMs)
+    3. Default (600000 = 10 minutes)
+
+    Returns:
+        Timeout in milliseconds (0 = no timeout)
+    """
+    # Environment variable takes highest priority
+    env_timeout = os.environ.get("RALPH_ATTEMPT_TIMEOUT_MS", "").strip()
+    if env_timeout:
+        try:
+            return int(env_timeout)
+        except ValueError:
+            pass
+
+    # Config file
+    config_timeout = config.get("attemptTimeoutMs", DEFAULTS["attemptTimeoutMs"])
+    try:
+        return int(config_timeout)
+    except (ValueError, TypeError):
+        return DEFAULTS["attemptTimeoutMs"]
+
+
+def resolve_phase_timeout_ms(config: Dict[str, Any]) -> int:
+    """Resolve the per-phase timeout from env var or config.
+
+    Priority:
+    1. RALPH_PHASE_TIMEOUT_MS environment variable
+    2. Config file (phaseTimeoutMs)
+    3. Default (0 = no phase timeout)
+
+    Only enforced when `pi` JSON output is captured (--capture-json), since
+    phases are detected from the streamed events.
+
+    Returns:
+        Timeout in milliseconds (0 = no timeout)
+    """
+    env_timeout = os.environ.get("RALPH_PHASE_TIMEOUT_MS", "").strip()
+    if env_timeout:
+        try:
+            return max(0, int(env_timeout))
+        except ValueError:
+            pass
+
+    try:
+        return max(0, int(config.get("phaseTimeoutMs", DEFAULTS["phaseTimeoutMs"])))
+    except (ValueError, TypeError):
+        return DEFAULTS["phaseTimeoutMs"]
+
+
+def resolve_max_restarts(config: Dict[str, Any]) -> int:
+    """Resolve max restarts from env var or config.
+
+    Priority:
+    1. RALPH_MAX_RESTARTS environment variable
+    2. Config file (maxRestarts)
+    3. Default (0 = no restarts)
+
+    Returns:
+        Maximum number of restarts (0 = no restarts)
+    """
+    # Environment variable takes highest priority
+    env_restarts = os.environ.get("RALPH_MAX_RESTARTS", "").strip()
+    if env_restarts:
+        try:
+            return int(env_restarts)
+        except ValueError:
+            pass
+
+    # Config file
+    config_restarts = config.get("maxRestarts", DEFAULTS["maxRestarts"])
+    try:
+        return int(config_restarts)
+    except (ValueError, TypeError):
+        return DEFAULTS["maxRestarts"]
+
+
+def resolve_session_dir(
+    project_root: Path,
+    config: Dict[str, Any],
+    raw_config: Optional[Dict[str, Any]] = None,
+    logger: Optional[RalphLogger] = None,
+) -> Optional[Path]:
+    """Resolve session directory with backward compatibility for legacy location.
+
+    Args:
+        project_root: Project root path
+        config: Merged config (defaults + user config)
+        raw_config: Raw user config to detect explicit sessionDir setting
+        logger: Optional logger for warnings
+
+    Returns:
+        Resolved session directory path or None if disabled
+    """
+    global _legacy_warning_emitted
+
+    # Check if user explicitly configured sessionDir (not using default)
+    raw = raw_config or {}
+    user_explicitly_set = "sessionDir" in raw and raw["sessionDir"] not in (None, "")
+
+    # Check for legacy sessions directory
+    legacy_path = project_root / LEGACY_SESSION_DIR
+    legacy_exists = legacy_path.is_dir() and any(legacy_path.iterdir())
+
+    # Check for force legacy env var
+    force_legacy = os.environ.get("RALPH_FORCE_LEGACY_SESSIONS", "").strip().lower() in ("1", "true", "yes")
+
+    # Determine which sessionDir to use
+    if force_legacy:
+        # User explicitly wants legacy behavior via env var
+        path = legacy_path
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    value = config.get("sessionDir", DEFAULTS["sessionDir"])
+    if value in (None, "", False):
+        return None
+
+    path = Path(str(value)).expanduser()
+    if not path.is_absolute():
+        path = project_root / path
+
+    # Emit warning if legacy exists and user hasn't explicitly configured sessionDir
+    if legacy_exists and not user_explicitly_set and not _legacy_warning_emitted:
+        _legacy_warning_emitted = True
+        warning_msg = (
+            f"\n[ralph] Warning: Legacy session directory detected at '{LEGACY_SESSION_DIR}'\n"
+            f"[ralph] New default location is: {DEFAULTS['sessionDir']}\n"
+            f"[ralph] Options:\n"
+            f"[ralph]   1. To use the new location: Move files from {LEGACY_SESSION_DIR} to {DEFAULTS['sessionDir']}\n"
+            f"[ralph]   2. To keep using legacy location: Set RALPH_FORCE_LEGACY_SESSIONS=1 or\n"
+            f"[ralph]      add '{{\"sessionDir\": \"{LEGACY_SESSION_DIR}\"}}' to .tf/ralph/config.json\n"
+        )
+        if logger:
+            logger.warn(warning_msg.strip())
+        else:
+            print(warning_msg, file=sys.stderr)
+
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def resolve_knowledge_dir(project_root: Path) -> Path:
+    settings_path = project_root / ".tf/config/settings.json"
+    if settings_path.exists():
+        try:
+            data = json_load(settings_path)
+            workflow = data.get("workflow", {}) if isinstance(data, dict) else {}
+            knowledge_dir = workflow.get("knowledgeDir", ".tf/knowledge") if isinstance(workflow, dict) else ".tf/knowledge"
+        except Exception:
+            knowledge_dir = ".tf/knowledge"
+    else:
+        knowledge_dir = ".tf/knowledge"
+
+    knowledge_path = Path(str(knowledge_dir)).expanduser()
+    if not knowledge_path.is_absolute():
+        knowledge_path = project_root / knowledge_path
+    return knowledge_path
+
+
+# An empty or unreadable single-loop lock younger than this is left alone
+LOCK_GRACE_SECS = 5.0
+
+
+def _boot_time() -> Optional[float]:
+    """System boot time (epoch seconds) from /proc/stat, if available."""
+    try:
+        with open("/proc/stat", encoding="ascii") as handle:
+            for line in handle:
+                if line.startswith("btime "):
+                    return float(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def _lock_holder(lock_path: Path) -> Tuple[bool, Optional[int]]:
+    """Check the single-loop lock; returns (stale, holder pid)."""
+    try:
+        text = lock_path.read_text(encoding="utf-8")
+        mtime = lock_path.stat().st_mtime
+    except FileNotFoundError:
+        return True, None
+    except OSError:
+        return False, None
+    try:
+        pid = int(text.split()[0])
+    except (IndexError, ValueError):
+        # Locks are linked into place complete, so this is not a writer mid-way;
+        # still leave a fresh one alone in case it was written by hand.
+        return time.time() - mtime >= LOCK_GRACE_SECS, None
+    boot_time = _boot_time()
+    if boot_time is not None and mtime < boot_time:
+        return True, pid
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True, pid
+    except OSError:
+        # PermissionError: alive, owned by another user
+        return False, pid
+    return False, pid
+
+
+def lock_acquire(ralph_dir: Path, logger: Optional[RalphLogger] = None) -> bool:
+    """Take the single-loop lock (a dead holder's lock is replaced).
+
+    The lock is written to a temp file and hard-linked into place, so it never
+    exists without the holder's PID. A lock written before the last reboot is
+    stale even if its PID has been reused by another process.
+    """
+    lock_path = ralph_dir / "lock"
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    for _ in range(2):
+        fd, temp_path = tempfile.mkstemp(dir=lock_path.parent, prefix=".lock.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                handle.write(f"{os.getpid()} {utc_now()}\n")
+            try:
+                os.link(temp_path, lock_path)
+                return True
+            except FileExistsError:
+                pass
+        finally:
+            os.unlink(temp_path)
+        stale, pid = _lock_holder(lock_path)
+        if stale:
+            try:
+                lock_path.unlink()
+            except FileNotFoundError:
+                pass
+            continue
+        holder = f" (pid {pid})" if pid is not None else ""
+        msg = f"Ralph loop already running{holder}. Remove {lock_path} if stale."
+        if logger:
+            logger.error(msg)
+        else:
+            print(msg, file=sys.stderr)
+        return False
+    return False
+
+
+def lock_release(ralph_dir: Path) -> None:
+    lock_path = ralph_dir / "lock"
+    if lock_path.exists():
+        lock_path.unlink()
+
+
+def set_state(ralph_dir: Path, state: str) -> None:
+    """Record a loop-state change and re-render progress.md."""
+    event_log = EventLog(ralph_dir)
+    event_log.record_state(state)
+    event_log.render()
+
+
+def export_metrics(ralph_dir: Path, config: Dict[str, Any], logger: Optional[RalphLogger] = None) -> Optional[Path]:
+    """Write the Prometheus textfile configured by metricsTextfile, if any."""
+    target = str(config.get("metricsTextfile", DEFAULTS["metricsTextfile"]) or "").strip()
+    if not target:
+        return None
+    path = Path(target).expanduser()
+    if not path.is_absolute():
+        path = ralph_dir.parent.parent / path
+    try:
+        return write_textfile(path, prometheus_text(compute_stats(EventLog(ralph_dir).events())))
+    except OSError as exc:
+        if logger:
+            logger.warn(f"Could not write metrics textfile {path}: {exc}")
+        return None
+
+
+def prune_logs(ralph_dir: Path, config: Dict[str, Any], logger: Optional[RalphLogger] = None) -> Tuple[int, int]:
+    """Apply logMaxAgeDays / logMaxMb retention to .tf/ralph/logs.
+
+    Returns:
+        Tuple of (files_removed, bytes_freed)
+    """
+    removed, freed = LogStore.from_config(ralph_dir / "logs", config).enforce_retention()
+    if removed and logger:
+        logger.info(f"Log retention: removed {removed} file(s), freed {freed / (1024 * 1024):.1f} MiB")
+    return removed, freed
+
+
+def render_progress(ralph_dir: Path) -> None:
+    """Regenerate progress.md from the event log (no-op before the first event)."""
+    event_log = EventLog(ralph_dir)
+    if event_log.events_path.exists() or event_log.counters_path.exists():
+        event_log.render()
+
+
+def clear_ticket_title_cache() -> None:
+    """Clear the ticket title cache.
+
+    Should be called at the start of each Ralph run to ensure fresh data.
+    """
+    _ticket_title_cache.clear()
+
+
+def extract_ticket_title(ticket: str, use_cache: bool = True) -> Optional[str]:
+    """Extract the ticket title from the ticket file.
+
+    Args:
+        ticket: The ticket ID to look up
+        use_cache: Whether to use the cache (default: True)
+
+    Returns:
+        The ticket title if found, None otherwise (enables graceful omission in logs)
+    """
+    # Check cache first
+    if use_cache and ticket in _ticket_title_cache:
+        return _ticket_title_cache[ticket]
+
+    if _native_queue is not None:
+        _ticket_title_cache[ticket] = _native_queue.title(ticket)
+        return _ticket_title_cache[ticket]
+
+    if shutil.which("tk") is None:
+        _ticket_title_cache[ticket] = None
+        return None
+    proc = subprocess.run(["tk", "show", ticket], capture_output=True, text=True)
+    if proc.returncode != 0:
+        _ticket_title_cache[ticket] = None
+        return None
+    in_front = False
+    title: Optional[str] = None
+    for line in proc.stdout.splitlines():
+        line_stripped = line.strip()
+        # Toggle frontmatter state when we see ---
+        if line_stripped == "---":
+            # If we've found a title and now entering frontmatter, we can return
+            if title is not None:
+                result = title if title else None
+                _ticket_title_cache[ticket] = result
+                return result
+            in_front = not in_front
+            continue
+        # Title appears before frontmatter (H1 heading)
+        if not in_front and line.startswith("# "):
+            title = line[2:].strip()
+    # Return title if found at end of file, else None
+    result = title if title else None
+    _ticket_title_cache[ticket] = result
+    return result
+
+
+def extract_ticket_titles(tickets: List[str]) -> Dict[str, Optional[str]]:
+    """Fetch titles for multiple tickets efficiently.
+
+    Uses the ticket title cache to avoid repeated tk show calls.
+
+    Returns a dict mapping ticket_id -> title (or None if not found).
+    """
+    titles: Dict[str, Optional[str]] = {}
+    for ticket in tickets:
+        titles[ticket] = extract_ticket_title(ticket)
+    return titles
+
+
+def extract_summary_and_commit(close_summary: Path, fallback_summary: str) -> Tuple[str, str]:
+    summary = fallback_summary
+    commit = ""
+    if close_summary.exists():
+        text = close_summary.read_text(encoding="utf-8")
+        for line in text.splitlines():
+            match = re.match(r"\s*[-*]?\s*Summary\s*:\s*(.+)$", line)
+            if match:
+                summary = match.group(1).strip()
+                break
+        for line in text.splitlines():
+            match = re.match(r"\s*[-*]?\s*Commit\s*:\s*(.+)$", line)
+            if match:
+                commit = match.group(1).strip()
+                break
+    return summary, commit
+
+
+def extract_issue_counts(review_path: Path) -> Tuple[int, int, int]:
+    crit = maj = minor = 0
+    if review_path.exists():
+        for line in review_path.read_text(encoding="utf-8").splitlines():
+            match = re.match(r"\s*[-*]?\s*Critical\s*:\s*(\d+)", line, re.IGNORECASE)
+            if match:
+                crit = int(match.group(1))
+            match = re.match(r"\s*[-*]?\s*Major\s*:\s*(\d+)", line, re.IGNORECASE)
+            if match:
+                maj = int(match.group(1))
+            match = re.match(r"\s*[-*]?\s*Minor\s*:\s*(\d+)", line, re.IGNORECASE)
+            if match:
+                minor = int(match.group(1))
+    return crit, maj, minor
+
+
+def extract_lesson_block(close_summary: Path) -> str:
+    if not close_summary.exists():
+        return ""
+    lines = close_summary.read_text(encoding="utf-8").splitlines()
+    in_lessons = False
+    buffer: List[str] = []
+    for line in lines:
+        if re.match(r"^#{2,3}\s+Lessons Learned", line):
+            in_lessons = True
+            continue
+        if in_lessons and re.match(r"^#{2,3}\s+", line):
+            break
+        if in_lessons:
+            buffer.append(line.rstrip())
+    return "\n".join(buffer).strip()
+
+
+def load_retry_state(artifact_dir: Path) -> Optional[Dict[str, Any]]:
+    """Load retry state from ticket artifact directory.
+    
+    Args:
+        artifact_dir: Path to ticket artifact directory
+        
+    Returns:
+        Retry state dict if valid, None otherwise
+    """
+    retry_state_path = artifact_dir / "retry-state.json"
+    if not retry_state_path.exists():
+        return None
+    
+    try:
+        data = json.loads(retry_state_path.read_text(encoding="utf-8"))
+        # Validate schema version and required fields
+        if data.get("version") != 1:
+            return None
+        if not all(k in data for k in ("ticketId", "attempts", "lastAttemptAt", "status")):
+            return None
+        return data
+    except Exception:
+        return None
+
+
+def is_ticket_blocked_by_retries(
+    ticket: str,
+    knowledge_dir: Path,
+    max_retries: int,
+    logger: Optional[RalphLogger] = None,
+) -> Tuple[bool, int, int]:
+    """Check if a ticket has exceeded max retry attempts.
+    
+    Args:
+        ticket: Ticket ID
+        knowledge_dir: Base knowledge directory
+        max_retries: Maximum allowed retries
+        logger: Optional logger
+        
+    Returns:
+        Tuple of (is_blocked, attempt_count, retry_count)
+        - is_blocked: True if ticket should be skipped (exceeded max retries)
+        - attempt_count: Number of attempts made (0 if no retry state)
+        - retry_count: Current retry counter (0 if no retry state)
+    """
+    artifact_dir = knowledge_dir / "tickets" / ticket
+    retry_state = load_retry_state(artifact_dir)
+    
+    if retry_state is None:
+        return False, 0, 0
+    
+    retry_count = retry_state.get("retryCount", 0)
+    attempts = retry_state.get("attempts", [])
+    attempt_count = len(attempts)
+    
+    # Check if max retries exceeded and last attempt was blocked
+    # Note: aggregate status is "active" even when blocked, need to check last attempt
+    last_attempt_blocked = False
+    if attempts:
+        last_attempt = attempts[-1]
+        last_attempt_blocked = last_attempt.get("status") == "blocked"
+    
+    is_blocked = retry_count >= max_retries and last_attempt_blocked
+    
+    if is_blocked and logger:
+        logger.warn(
+            f"Ticket {ticket} has exceeded max retries ({retry_count}/{max_retries}) - skipping",
+            ticket=ticket,
+        )
+    
+    return is_blocked, attempt_count, retry_count
+
+
+def resolve_max_retries_from_settings(project_root: Path) -> int:
+    """Resolve maxRetries from workflow.escalation config.
+    
+    Args:
+        project_root: Project root path
+        
+    Returns:
+        maxRetries value (default: 3)
+    """
+    settings_path = project_root / ".tf/config/settings.json"
+    if not settings_path.exists():
+        return 3
+    
+    try:
+        data = json.loads(settings_path.read_text(encoding="utf-8"))
+        workflow = data.get("workflow", {}) if isinstance(data, dict) else {}
+        escalation = workflow.get("escalation", {}) if isinstance(workflow, dict) else {}
+        return escalation.get("maxRetries", 3)
+    except Exception:
+        return 3
+
+
+def resolve_escalation_enabled(project_root: Path) -> bool:
+    """Check if retry escalation is enabled in settings.
+    
+    Args:
+        project_root: Project root path
+        
+    Returns:
+        True if escalation is enabled, False otherwise
+    """
+    settings_path = project_root / ".tf/config/settings.json"
+    if not settings_path.exists():
+        return False
+    
+    try:
+        data = json.loads(settings_path.read_text(encoding="utf-8"))
+        workflow = data.get("workflow", {}) if isinstance(data, dict) else {}
+        escalation = workflow.get("escalation", {}) if isinstance(workflow, dict) else {}
+        return escalation.get("enabled", False)
+    except Exception:
+        return False
+
+
+def update_state(
+    ralph_dir: Path,
+    project_root: Path,
+    ticket: str,
+    status: str,
+    error_msg: str = "",
+    artifact_root: Optional[Path] = None,
+    metrics: Optional[Dict[str, Any]] = None,
+) -> None:
+    agents_path = ralph_dir / "AGENTS.md"
+
+    knowledge_dir = artifact_root if artifact_root is not None else resolve_knowledge_dir(project_root)
+    artifact_dir = knowledge_dir / "tickets" / ticket
+    close_summary = artifact_dir / "close-summary.md"
+    review_path = artifact_dir / "review.md"
+
+    fallback_summary = extract_ticket_title(ticket)
+    summary, commit = extract_summary_and_commit(close_summary, fallback_summary)
+    crit, maj, minor = extract_issue_counts(review_path)
+    lesson_block = extract_lesson_block(close_summary)
+    
+    # Load retry state for progress tracking
+    retry_state = load_retry_state(artifact_dir)
+    attempt_count = len(retry_state.get("attempts", [])) if retry_state else 0
+    retry_count = retry_state.get("retryCount", 0) if retry_state else 0
+
+    # O(1) append; progress.md is rendered from the event log when the loop
+    # changes state or exits (see set_state / render_progress).
+    EventLog(ralph_dir).record_ticket(
+        ticket,
+        status,
+        summary=summary,
+        issues=(crit, maj, minor),
+        attempt=attempt_count,
+        retry_count=retry_count,
+        commit=commit,
+        error=error_msg,
+        metrics=metrics,
+    )
+    now = utc_now()
+
+    if lesson_block:
+        if not agents_path.exists():
+            # Create minimal template if AGENTS.md doesn't exist
+            template = (
+                "# Ralph Lessons Learned\n\n"
+                "## Patterns\n\n"
+                "## Gotchas\n"
+            )
+            agents_path.write_text(template, encoding="utf-8")
+        header = f"\n## Lesson from {ticket} ({now})\n\n"
+        agents_path.write_text(agents_path.read_text(encoding="utf-8") + header + lesson_block + "\n", encoding="utf-8")
+
+
+def parse_run_args(
+    args: List[str],
+) -> Tuple[Optional[str], bool, Optional[str], Optional[LogLevel], bool, bool, str, Optional[str]]:
+    """Parse arguments for 'tf ralph run'.
+
+    Returns:
+        Tuple of (ticket_override, dry_run, flags_override, log_level, capture_json,
+                  progress, pi_output, pi_output_file)
+    """
+    ticket_override: Optional[str] = None
+    dry_run = False
+    flags_override: Optional[str] = None
+    log_level: Optional[LogLevel] = None
+    capture_json = False
+    progress = False
+    pi_output = "inherit"
+    pi_output_file: Optional[str] = None
+    idx = 0
+    while idx < len(args):
+        arg = args[idx]
+        if arg == "--dry-run":
+            dry_run = True
+            idx += 1
+        elif arg == "--capture-json":
+            capture_json = True
+            idx += 1
+        elif arg == "--verbose":
+            log_level = LogLevel.VERBOSE
+            idx += 1
+        elif arg == "--debug":
+            log_level = LogLevel.DEBUG
+            idx += 1
+        elif arg == "--quiet":
+            log_level = LogLevel.QUIET
+            idx += 1
+        elif arg in ("--progress", "--progressbar"):
+            progress = True
+            idx += 1
+        elif arg == "--pi-output":
+            if idx + 1 >= len(args):
+                raise ValueError("Missing value after --pi-output")
+            pi_output = args[idx + 1]
+            idx += 2
+        elif arg.startswith("--pi-output="):
+            pi_output = arg.split("=", 1)[1]
+            idx += 1
+        elif arg == "--pi-output-file":
+            if idx + 1 >= len(args):
+                raise ValueError("Missing value after --pi-output-file")
+            pi_output_file = args[idx + 1]
+            idx += 2
+        elif arg.startswith("--pi-output-file="):
+            pi_output_file = arg.split("=", 1)[1]
+            idx += 1
+        elif arg == "--flags":
+            if idx + 1 >= len(args):
+                raise ValueError("Missing value after --flags")
+            flags_override = args[idx + 1]
+            idx += 2
+        elif arg.startswith("--flags="):
+            flags_override = arg.split("=", 1)[1]
+            idx += 1
+        elif arg in {"--help", "-h"}:
+            usage()
+            raise SystemExit(0)
+        else:
+            if ticket_override is None:
+                ticket_override = arg
+                idx += 1
+            else:
+                raise ValueError("Too many arguments for ralph run")
+    return ticket_override, dry_run, flags_override, log_level, capture_json, progress, pi_output, pi_output_file
+
+
+def parse_start_args(args: List[str]) -> Dict[str, Any]:
+    """Parse arguments for 'tf ralph start'."""
+    options: Dict[str, Any] = {
+        "max_iterations": None,
+        "dry_run": False,
+        "parallel_override": None,
+        "no_parallel": False,
+        "flags_override": None,
+        "log_level": None,
+        "capture_json": False,
+        "progress": False,
+        "pi_output": "inherit",
+        "pi_output_file": None,
+        "resume": False,
+    }
+    idx = 0
+    while idx < len(args):
+        arg = args[idx]
+        if arg == "--max-iterations":
+            if idx + 1 >= len(args):
+                raise ValueError("Missing value after --max-iterations")
+            options["max_iterations"] = int(args[idx + 1])
+            idx += 2
+        elif arg.startswith("--max-iterations="):
+            options["max_iterations"] = int(arg.split("=", 1)[1])
+            idx += 1
+        elif arg == "--parallel":
+            if idx + 1 >= len(args):
+                raise ValueError("Missing value after --parallel")
+            options["parallel_override"] = int(args[idx + 1])
+            idx += 2
+        elif arg.startswith("--parallel="):
+            options["parallel_override"] = int(arg.split("=", 1)[1])
+            idx += 1
+        elif arg == "--no-parallel":
+            options["no_parallel"] = True
+            idx += 1
+        elif arg == "--dry-run":
+            options["dry_run"] = True
+            idx += 1
+        elif arg == "--resume":
+            options["resume"] = True
+            idx += 1
+        elif arg == "--verbose":
+            options["log_level"] = LogLevel.VERBOSE
+            idx += 1
+        elif arg == "--debug":
+            options["log_level"] = LogLevel.DEBUG
+            idx += 1
+        elif arg == "--quiet":
+            options["log_level"] = LogLevel.QUIET
+            idx += 1
+        elif arg == "--capture-json":
+            options["capture_json"] = True
+            idx += 1
+        elif arg in ("--progress", "--progressbar"):
+            options["progress"] = True
+            idx += 1
+        elif arg == "--pi-output":
+            if idx + 1 >= len(args):
+                raise ValueError("Missing value after --pi-output")
+            options["pi_output"] = args[idx + 1]
+            idx += 2
+        elif arg.startswith("--pi-output="):
+            options["pi_output"] = arg.split("=", 1)[1]
+            idx += 1
+        elif arg == "--pi-output-file":
+            if idx + 1 >= len(args):
+                raise ValueError("Missing value after --pi-output-file")
+            options["pi_output_file"] = args[idx + 1]
+            idx += 2
+        elif arg.startswith("--pi-output-file="):
+            options["pi_output_file"] = arg.split("=", 1)[1]
+            idx += 1
+        elif arg == "--flags":
+            if idx + 1 >= len(args):
+                raise ValueError("Missing value after --flags")
+            options["flags_override"] = args[idx + 1]
+            idx += 2
+        elif arg.startswith("--flags="):
+            options["flags_override"] = arg.split("=", 1)[1]
+            idx += 1
+        elif arg in {"--help", "-h"}:
+            usage()
+            raise SystemExit(0)
+        else:
+            raise ValueError(f"Unknown option for ralph start: {arg}")
+    return options
+
+
+def _validate_pi_output(pi_output: str) -> bool:
+    """Validate --pi-output value."""
+    valid = {"inherit", "file", "discard"}
+    return pi_output in valid
+
+
+def ralph_run(args: List[str]) -> int:
+    try:
+        (
+            ticket_override,
+            dry_run,
+            flags_override,
+            cli_log_level,
+            cli_capture_json,
+            progress,
+            pi_output,
+            pi_output_file,
+        ) = parse_run_args(args)
+    except ValueError as exc:
+        print(str(exc), file=sys.stderr)
+        return 1
+
+    # Validate pi_output value
+    if not _validate_pi_output(pi_output):
+        print(f"Invalid --pi-output value: {pi_output}. Must be one of: inherit, file, discard", file=sys.stderr)
+        return 1
+
+    project_root = find_project_root()
+    if not project_root:
+        print("No .tf directory found. Run in a project with .tf/.", file=sys.stderr)
+        return 1
+
+    # Create logger early for consistent logging
+    # We need to load config first to get the default log level
+    temp_config = load_config(project_root / ".tf/ralph")
+    log_level = resolve_log_level(cli_log_level, temp_config)
+    logger = create_logger(level=log_level, mode="serial")
+
+    ralph_dir = ensure_ralph_dir(project_root, logger)
+    if not ralph_dir:
+        return 1
+
+    # Clear ticket title cache at the start of each run
+    clear_ticket_title_cache()
+
+    config = load_config(ralph_dir)
+    activate_ticket_source(project_root, config, logger)
+
+    # Resolve capture_json from CLI flag, env var, or config (in that order)
+    capture_json = cli_capture_json
+    if not capture_json:
+        env_capture = os.environ.get("RALPH_CAPTURE_JSON", "").strip()
+        if env_capture in ("1", "true", "yes"):
+            capture_json = True
+    if not capture_json:
+        capture_json = parse_bool(config.get("captureJson", DEFAULTS["captureJson"]), DEFAULTS["captureJson"])
+
+    ticket_query = sanitize_ticket_query(str(config.get("ticketQuery", DEFAULTS["ticketQuery"])), logger)
+    workflow = str(config.get("workflow", DEFAULTS["workflow"]))
+    workflow_flags = str(config.get("workflowFlags", DEFAULTS["workflowFlags"]))
+
+    # Add verbosity flag to workflow flags if set
+    level_flag = log_level_to_flag(log_level)
+    if level_flag:
+        workflow_flags = f"{workflow_flags} {level_flag}".strip()
+
+    if flags_override:
+        workflow_flags = f"{workflow_flags} {flags_override}".strip()
+
+    # Set up logs directory for JSON capture or pi output file mode
+    logs_dir: Optional[Path] = None
+    if capture_json or pi_output == "file":
+        logs_dir = ralph_dir / "logs"
+    if not dry_run:
+        prune_logs(ralph_dir, config, logger)
+
+    ticket = ticket_override
+    if not ticket and resolve_scheduling_mode(config) == "critical-path":
+        ticket, scores = select_critical_path_ticket(ticket_list_query(ticket_query), project_root)
+        if ticket:
+            logger.log_batch_selected(
+                [ticket], {ticket: []}, reason="critical_path", mode="serial", scores=score_summary([ticket], scores)
+            )
+    elif not ticket:
+        ticket = select_ticket(ticket_query)
+    if not ticket:
+        logger.error("No ready tickets found")
+        return 1
+
+    # Fetch ticket title only in verbose mode (DEBUG or VERBOSE)
+    ticket_title: Optional[str] = None
+    if log_level in (LogLevel.DEBUG, LogLevel.VERBOSE):
+        ticket_title = extract_ticket_title(ticket)
+        logger = logger.with_context(ticket=ticket, ticket_title=ticket_title)
+    else:
+        logger = logger.with_context(ticket=ticket)
+    logger.log_ticket_start(ticket, mode="serial", ticket_title=ticket_title)
+
+    # Resolve timeout and restart configuration
+    timeout_ms = resolve_attempt_timeout_ms(config)
+    phase_timeout_ms = resolve_phase_timeout_ms(config)
+    max_restarts = resolve_max_restarts(config)
+    quarantine = create_quarantine(project_root, config)
+
+    if dry_run:
+        logger.info(f"Dry run config: timeout={timeout_ms}ms, max_restarts={max_restarts}", ticket=ticket)
+
+    # Attempt ticket with optional restart loop
+    attempt = 0
+    max_attempts = max_restarts + 1 if max_restarts > 0 else 1
+    run_id = utc_now()
+    ticket_started = time.monotonic()
+
+    def run_metrics(rc: int) -> Dict[str, Any]:
+        attempts = attempt + 1 if rc != -1 else attempt
+        return ticket_metrics(
+            duration_secs=time.monotonic() - ticket_started,
+            attempts=attempts,
+            exit_code=rc,
+            mode="serial",
+            workers=1,
+            run_id=run_id,
+            timeouts=attempt,
+        )
+
+    while attempt < max_attempts:
+        if attempt > 0:
+            logger.info(f"Restart attempt {attempt}/{max_restarts}", ticket=ticket)
+
+        rc = run_ticket(
+            ticket,
+            workflow,
+            workflow_flags,
+            dry_run,
+            logger=logger,
+            mode="serial",
+            capture_json=capture_json,
+            logs_dir=logs_dir,
+            ticket_title=ticket_title,
+            pi_output=pi_output,
+            pi_output_file=pi_output_file,
+            timeout_ms=timeout_ms,
+            phase_timeout_ms=phase_timeout_ms,
+            log_store=LogStore.from_config(logs_dir, config) if logs_dir else None,
+        )
+
+        if dry_run:
+            logger.log_ticket_complete(ticket, "DRY_RUN", mode="serial", ticket_title=ticket_title)
+            return rc
+
+        # Success case
+        if rc == 0:
+            logger.log_ticket_complete(ticket, "COMPLETE", mode="serial", ticket_title=ticket_title)
+            update_state(ralph_dir, project_root, ticket, "COMPLETE", "", metrics=run_metrics(rc))
+            quarantine.record_success(ticket)
+            render_progress(ralph_dir)
+            return 0
+
+        # Timeout case - check if we should restart
+        if rc == -1:  # Timeout
+            attempt += 1
+            if attempt < max_attempts:
+                logger.warn(f"Attempt timed out, restarting ({attempt}/{max_restarts})", ticket=ticket)
+                continue
+            else:
+                error_msg = f"Attempt timed out after {max_attempts} attempt(s) (timeout: {timeout_ms}ms)"
+                logger.log_error_summary(ticket, error_msg, ticket_title=ticket_title)
+                update_state(ralph_dir, project_root, ticket, "FAILED", error_msg, metrics=run_metrics(rc))
+                quarantine.record_failure(ticket, error_msg)
+                render_progress(ralph_dir)
+                return rc
+
+        # Non-timeout failure - don't restart
+        error_msg = f"pi -p failed (exit {rc})"
+        logger.log_error_summary(ticket, error_msg, ticket_title=ticket_title)
+        update_state(ralph_dir, project_root, ticket, "FAILED", error_msg, metrics=run_metrics(rc))
+        quarantine.record_failure(ticket, error_msg)
+        render_progress(ralph_dir)
+        return rc
+
+    return 1
+
+
+def ralph_start(args: List[str]) -> int:
+    try:
+        options = parse_start_args(args)
+    except ValueError as exc:
+        print(str(exc), file=sys.stderr)
+        return 1
+
+    # Validate pi_output value
+    pi_output = options.get("pi_output", "inherit")
+    if not _validate_pi_output(pi_output):
+        print(f"Invalid --pi-output value: {pi_output}. Must be one of: inherit, file, discard", file=sys.stderr)
+        return 1
+
+    project_root = find_project_root()
+    if not project_root:
+        print("No .tf directory found. Run in a project with .tf/.", file=sys.stderr)
+        return 1
+
+    # Create logger early for consistent logging
+    temp_config = load_config(project_root / ".tf/ralph")
+    log_level = resolve_log_level(options.get("log_level"), temp_config)
+    logger = create_logger(level=log_level, mode="serial")
+
+    ralph_dir = ensure_ralph_dir(project_root, logger)
+    if not ralph_dir:
+        return 1
+
+    # Clear ticket title cache at the start of each run
+    clear_ticket_title_cache()
+
+    config = load_config(ralph_dir)
+    activate_ticket_source(project_root, config, logger)
+
+    # Resolve capture_json from CLI flag, env var, or config (in that order)
+    capture_json = options.get("capture_json", False)
+    if not capture_json:
+        env_capture = os.environ.get("RALPH_CAPTURE_JSON", "").strip()
+        if env_capture in ("1", "true", "yes"):
+            capture_json = True
+    if not capture_json:
+        capture_json = parse_bool(config.get("captureJson", DEFAULTS["captureJson"]), DEFAULTS["captureJson"])
+
+    # Set up logs directory for JSON capture or pi output file mode
+    pi_output = options.get("pi_output", "inherit")
+    pi_output_file = options.get("pi_output_file")
+    logs_dir: Optional[Path] = None
+    if capture_json or pi_output == "file":
+        logs_dir = ralph_dir / "logs"
+        logs_dir.mkdir(parents=True, exist_ok=True)
+
+    max_iterations = options["max_iterations"] or int(config.get("maxIterations", DEFAULTS["maxIterations"]))
+    sleep_between = int(config.get("sleepBetweenTickets", DEFAULTS["sleepBetweenTickets"]))
+    sleep_retries = int(config.get("sleepBetweenRetries", DEFAULTS["sleepBetweenRetries"]))
+    ticket_query = sanitize_ticket_query(str(config.get("ticketQuery", DEFAULTS["ticketQuery"])), logger)
+    completion_check = str(config.get("completionCheck", DEFAULTS["completionCheck"]))
+    workflow = str(config.get("workflow", DEFAULTS["workflow"]))
+    workflow_flags = str(config.get("workflowFlags", DEFAULTS["workflowFlags"]))
+    promise_on_complete = parse_bool(
+        config.get("promiseOnComplete", DEFAULTS["promiseOnComplete"]),
+        DEFAULTS["promiseOnComplete"],
+    )
+
+    # Add verbosity flag to workflow flags if set
+    level_flag = log_level_to_flag(log_level)
+    if level_flag:
+        workflow_flags = f"{workflow_flags} {level_flag}".strip()
+
+    if options["flags_override"]:
+        workflow_flags = f"{workflow_flags} {options['flags_override']}".strip()
+
+    parallel_workers = int(config.get("parallelWorkers", DEFAULTS["parallelWorkers"]))
+    if options["parallel_override"] is not None:
+        parallel_workers = options["parallel_override"]
+    if options["no_parallel"]:
+        parallel_workers = 1
+
+    use_parallel = parallel_workers
+    repo_root = None
+    if use_parallel > 1:
+        repo_root = git_repo_root()
+        if repo_root is None:
+            logger.warn("git repo not found; falling back to serial")
+            use_parallel = 1
+
+    # Retry escalation works in both modes: retry-state.json updates are
+    # locked per artifact directory (see tf.retry_state).
+    escalation_enabled = resolve_escalation_enabled(project_root)
+    max_retries = resolve_max_retries_from_settings(project_root)
+
+    # Timeout/restart apply to both modes; parallel mode enforces them per worker slot
+    timeout_ms = resolve_attempt_timeout_ms(config)
+    phase_timeout_ms = resolve_phase_timeout_ms(config)
+    max_restarts = resolve_max_restarts(config)
+
+    # Validate: --progress is only supported in serial mode
+    progress = options.get("progress", False)
+    if progress and use_parallel > 1:
+        print("Error: --progress is not supported with --parallel > 1 (serial mode only)", file=sys.stderr)
+        return 1
+
+    # When --progress is used in TTY mode, force --pi-output=file to prevent progress bar corruption
+    if progress and sys.stderr.isatty() and pi_output == "inherit":
+        pi_output = "file"
+        logs_dir = ralph_dir / "logs"
+        logs_dir.mkdir(parents=True, exist_ok=True)
+        logger.info("--progress in TTY mode: forcing --pi-output=file to prevent progress bar corruption")
+    log_store = LogStore.from_config(logs_dir, config) if logs_dir else None
+
+    # Ready-ticket ordering: ticketQuery/tk ready order, or critical-path scoring
+    critical_path = resolve_scheduling_mode(config) == "critical-path"
+
+    # Failure isolation: a failed ticket is recorded and the loop moves on (failurePolicy=stop
+    # restores ending the loop); repeat offenders are quarantined, mass failure pauses the loop
+    stop_on_failure = resolve_failure_policy(config) == "stop"
+    quarantine = create_quarantine(project_root, config)
+    breaker = create_circuit_breaker(config)
+    # Tickets that failed during this run are tried again only after everything else
+    failed_run: set[str] = set()
+    first_failure_rc = 0
+
+    # rateLimits: tickets wait while a provider/model their workflow run uses is saturated
+    limiter = create_rate_limiter(config, logger)
+    workflow_models = load_workflow_models(project_root, workflow, workflow_flags) if limiter.enabled else None
+    ticket_limit_keys: Dict[str, List[str]] = {}
+
+    def limit_keys(ticket: str) -> List[str]:
+        if workflow_models is None:
+            return []
+        if ticket not in ticket_limit_keys:
+            artifact_dir = resolve_knowledge_dir(project_root) / "tickets" / ticket
+            ticket_limit_keys[ticket] = limiter.keys(workflow_models.for_ticket(artifact_dir))
+        return ticket_limit_keys[ticket]
+
+    def release_limits(ticket: str) -> None:
+        limiter.release(ticket)
+        # Escalation may change the models of the next run
+        ticket_limit_keys.pop(ticket, None)
+
+    mode = "parallel" if use_parallel > 1 else "serial"
+    logger = logger.with_context(mode=mode)
+    logger.log_loop_start(mode=mode, max_iterations=max_iterations, parallel_workers=use_parallel if use_parallel > 1 else None)
+
+    lock_acquired = False
+    # coordination=lease: no global lock; each ticket is claimed with a lease instead
+    leases: Optional[LeaseManager] = None
+    if not options["dry_run"]:
+        if resolve_coordination(config) == "lease":
+            leases = create_lease_manager(project_root, config)
+            leases.start_heartbeat()
+            logger.info(f"Claiming tickets with leases as {leases.holder} (ttl {leases.ttl_secs:g}s)")
+        elif not lock_acquire(ralph_dir, logger):
+            return 1
+        lock_acquired = True
+        set_state(ralph_dir, "RUNNING")
+        prune_logs(ralph_dir, config, logger)
+
+    # Crash-safe loop state for `--resume` (one loop per project; with leases, other loops take over)
+    checkpoint = Checkpoint(ralph_dir, mode=mode, enabled=not options["dry_run"] and leases is None)
+    resume_queue: List[InFlight] = []
+    if options["resume"] and leases is not None:
+        logger.warn("--resume is ignored with coordination=lease (expired leases are taken over instead)")
+    if checkpoint.enabled:
+        previous_run = Checkpoint.load(ralph_dir)
+        if not options["resume"]:
+            if previous_run is not None and previous_run.tickets:
+                logger.warn(
+                    f"The previous run was interrupted with {len(previous_run.tickets)} ticket(s) in flight "
+                    f"({', '.join(previous_run.tickets)}); use 'tf ralph start --resume' to continue them"
+                )
+        elif previous_run is None:
+            logger.info("No checkpoint to resume; starting a new run")
+        else:
+            checkpoint.iteration = previous_run.iteration
+            if previous_run.mode == mode:
+                checkpoint.tickets = dict(previous_run.tickets)
+                resume_queue = sorted(previous_run.tickets.values(), key=lambda inflight: inflight.iteration)
+            elif previous_run.tickets:
+                logger.warn(f"Checkpoint was written in {previous_run.mode} mode; its in-flight tickets start over")
+            logger.info(
+                f"Resuming at iteration {previous_run.iteration} with {len(resume_queue)} interrupted ticket(s)",
+                event="resume",
+                tickets=[inflight.ticket for inflight in resume_queue],
+            )
+        checkpoint.save()
+    interrupted = False
+
+    pool: Optional[WorkerPool] = None
+    worktree_pool: Optional[WorktreePool] = None
+    merge_queue: Optional[MergeQueue] = None
+    # Metrics: run identity and when each ticket was first seen ready (for queue wait)
+    run_id = utc_now()
+    ready_since: Dict[str, float] = {}
+    # Wakes the loop on ticket changes; sleepBetweenTickets/sleepBetweenRetries become upper bounds
+    watcher = create_ticket_watcher(project_root, config, logger)
+    try:
+        iteration = checkpoint.iteration
+
+        if use_parallel <= 1:
+            # Initialize progress display if requested
+            progress_display = ProgressDisplay(output=sys.stderr) if progress else None
+
+            # Track queue state for ready/blocked counts
+            completed_tickets: set[str] = set()
+            running_ticket: Optional[str] = None
+            list_query = ticket_list_query(ticket_query)
+            ready_ids, blocked_ids = _refresh_pending_state(list_query, logger)
+            _note_ready(ready_since, ready_ids)
+
+            # --resume: a ticket that closed before the interruption only needs recording
+            for inflight in list(resume_queue):
+                artifact_dir = resolve_knowledge_dir(project_root) / "tickets" / inflight.ticket
+                if resume_phase(artifact_dir, inflight.started_at) != DONE:
+                    continue
+                resume_queue.remove(inflight)
+                logger.info("Ticket closed before the interruption; recording it", ticket=inflight.ticket)
+                update_state(ralph_dir, project_root, inflight.ticket, "COMPLETE", "")
+                checkpoint.finish(inflight.ticket)
+                completed_tickets.add(inflight.ticket)
+                _record_outcome(inflight.ticket, 0, quarantine=quarantine, breaker=breaker, logger=logger, mode=mode)
+
+            while iteration < max_iterations:
+                refresh_tickets()
+                if backlog_empty(completion_check):
+                    logger.log_loop_complete(reason="backlog_empty", iterations_completed=iteration, mode=mode)
+                    if not options["dry_run"]:
+                        set_state(ralph_dir, "COMPLETE")
+                    if promise_on_complete:
+                        print("<promise>COMPLETE</promise>")
+                    return first_failure_rc
+
+                if not breaker.allow():
+                    sleep_sec = breaker.remaining()
+                    logger.log_no_ticket_selected(sleep_seconds=sleep_sec, reason="circuit_open", mode=mode, iteration=iteration)
+                    time.sleep(sleep_sec)
+                    continue
+
+                # --resume: the interrupted ticket goes first
+                inflight = resume_queue.pop(0) if resume_queue else None
+                if inflight is not None:
+                    ticket = inflight.ticket
+                    iteration = inflight.iteration
+                elif critical_path:
+                    ranked, scores = rank_ready_tickets(list_ready_tickets(list_query), project_root)
+                    ranked = _skip_failing(ranked, quarantine, failed_run)
+                    if leases is not None:
+                        ticket = leases.claim_first(ranked)
+                    else:
+                        ticket = ranked[0] if ranked else None
+                    if ticket:
+                        logger.log_batch_selected(
+                            [ticket],
+                            {ticket: []},
+                            reason="critical_path",
+                            mode=mode,
+                            iteration=iteration,
+                            scores=score_summary([ticket], scores),
+                        )
+                elif leases is not None:
+                    # Skip tickets other loops hold; claim the first free one
+                    ticket = leases.claim_first(_skip_failing(list_ready_tickets(list_query), quarantine, failed_run))
+                else:
+                    ticket = select_ticket(ticket_query)
+                    if ticket and (ticket in failed_run or quarantine.is_quarantined(ticket)):
+                        candidates = _skip_failing(list_ready_tickets(list_query), quarantine, failed_run)
+                        ticket = candidates[0] if candidates else None
+                if not ticket and quarantine.entries():
+                    ready = list_ready_tickets(list_query)
+                    if ready and not quarantine.filter(ready):
+                        # Only quarantined tickets are left: waiting would not change that
+                        logger.warn(
+                            f"All {len(ready)} ready tickets are quarantined "
+                            f"(see: tf ralph quarantine)",
+                            event="all_quarantined",
+                            mode=mode,
+                        )
+                        logger.log_loop_complete(reason="quarantined", iterations_completed=iteration, mode=mode)
+                        if not options["dry_run"]:
+                            set_state(ralph_dir, "COMPLETE")
+                        return first_failure_rc or 1
+                if not ticket:
+                    sleep_sec = sleep_retries / 1000
+                    logger.log_no_ticket_selected(sleep_seconds=sleep_sec, reason="no_ready_tickets", mode=mode, iteration=iteration)
+                    ready_ids, blocked_ids = _refresh_pending_state(list_query, logger)
+                    _note_ready(ready_since, ready_ids)
+                    _idle(watcher, sleep_sec)
+                    continue
+
+                # Check if ticket has exceeded max retries (when escalation is enabled)
+                if escalation_enabled:
+                    knowledge_dir = resolve_knowledge_dir(project_root)
+                    is_blocked, attempt_count, retry_count = is_ticket_blocked_by_retries(
+                        ticket, knowledge_dir, max_retries, logger
+                    )
+                    if is_blocked:
+                        logger.warn(
+                            f"Skipping ticket {ticket}: max retries ({max_retries}) exceeded "
+                            f"(retryCount={retry_count})",
+                            ticket=ticket,
+                        )
+                        # Mark as failed in progress and continue
+                        if not options["dry_run"]:
+                            error_msg = f"Max retries ({max_retries}) exceeded - ticket blocked"
+                            update_state(ralph_dir, project_root, ticket, "BLOCKED", error_msg)
+                            if leases is not None:
+                                leases.complete(ticket, "BLOCKED", error=error_msg)
+                        iteration += 1
+                        continue
+
+                # Wait while a provider/model this run uses is saturated
+                if not limiter.acquire(ticket, limit_keys(ticket)):
+                    blocked = limiter.blocked(limit_keys(ticket))
+                    sleep_sec = blocked[1] if blocked and blocked[1] is not None else sleep_retries / 1000
+                    if leases is not None:
+                        leases.release(ticket)
+                    if inflight is not None:
+                        resume_queue.insert(0, inflight)
+                    logger.log_no_ticket_selected(
+                        sleep_seconds=round(sleep_sec, 1), reason="rate_limited", mode=mode, iteration=iteration
+                    )
+                    time.sleep(sleep_sec)
+                    continue
+
+                ticket_flags = workflow_flags
+                if inflight is not None:
+                    # Skip the phases the interrupted attempt finished (their artifacts are fresh)
+                    phase = resume_phase(resolve_knowledge_dir(project_root) / "tickets" / ticket, inflight.started_at)
+                    ticket_flags = resume_flags(workflow_flags, phase)
+                    if phase is not None:
+                        logger.info(f"Resuming interrupted ticket from phase '{phase}'", ticket=ticket)
+
+                # Mark ticket as running and compute queue state from in-memory sets.
+                running_ticket = ticket
+                # A ticket that failed earlier in this run is running again, not done
+                completed_tickets.discard(ticket)
+                pending_ids = ready_ids | blocked_ids
+                queue_state = _compute_queue_state_snapshot(
+                    pending_ids=pending_ids,
+                    blocked_ids=blocked_ids,
+                    running_ids={running_ticket},
+                    completed_ids=completed_tickets,
+                )
+
+                # Update progress display at ticket start
+                if progress_display:
+                    progress_display.start_ticket(ticket, iteration, str(queue_state.total), queue_state=queue_state)
+
+                # Fetch ticket title only in verbose mode (DEBUG or VERBOSE)
+                ticket_title: Optional[str] = None
+                if log_level in (LogLevel.DEBUG, LogLevel.VERBOSE):
+                    ticket_title = extract_ticket_title(ticket)
+                    ticket_logger = logger.with_context(ticket=ticket, ticket_title=ticket_title, iteration=iteration)
+                else:
+                    ticket_logger = logger.with_context(ticket=ticket, iteration=iteration)
+                ticket_logger.log_ticket_start(ticket, mode="serial", iteration=iteration, ticket_title=ticket_title, queue_state=queue_state)
+
+                breaker.launched(ticket)
+
+                # Bounded restart loop for timeout handling
+                attempt = 0
+                max_attempts = max_restarts + 1 if max_restarts > 0 else 1
+                ticket_rc = 0
+                timeouts = 0
+                ticket_started = time.monotonic()
+                queue_wait = ticket_started - ready_since.pop(ticket, ticket_started)
+
+                while attempt < max_attempts:
+                    attempt += 1
+                    if attempt > 1:
+                        ticket_logger.info(f"Restart attempt {attempt - 1}/{max_restarts} for ticket (timeout: {timeout_ms}ms)", ticket=ticket)
+                    checkpoint.start(ticket, iteration, attempt=attempt - 1)
+
+                    cmd = build_cmd(workflow, ticket, ticket_flags)
+                    ticket_rc = run_ticket(
+                        ticket,
+                        workflow,
+                        ticket_flags,
+                        options["dry_run"],
+                        logger=ticket_logger,
+                        mode="serial",
+                        capture_json=capture_json,
+                        logs_dir=logs_dir,
+                        ticket_title=ticket_title,
+                        pi_output=pi_output,
+                        pi_output_file=pi_output_file,
+                        timeout_ms=timeout_ms,
+                        phase_timeout_ms=phase_timeout_ms,
+                        log_store=log_store,
+                    )
+                    ticket_logger.log_command_executed(ticket, cmd, ticket_rc, mode="serial", iteration=iteration, ticket_title=ticket_title)
+
+                    if options["dry_run"]:
+                        break  # Only one attempt in dry-run mode
+
+                    # Success case - exit restart loop
+                    if ticket_rc == 0:
+                        break
+
+                    # Timeout case (-1) - restart if we haven't exceeded max_restarts
+                    if ticket_rc == -1:
+                        timeouts += 1
+                        if attempt < max_attempts:
+                            ticket_logger.warn(f"Attempt {attempt} timed out after {timeout_ms}ms, retrying...", ticket=ticket)
+                            continue
+                        else:
+                            # Max restarts exceeded - ticket will be marked FAILED below
+                            ticket_logger.error(f"Ticket timed out after {attempt} attempt(s) (timeout: {timeout_ms}ms)", ticket=ticket)
+                            break
+                    else:
+                        # Non-timeout failure - don't restart
+                        break
+
+                release_limits(ticket)
+
+                if leases is not None and not options["dry_run"] and not leases.confirm(ticket):
+                    # Another loop took the ticket over (e.g. our heartbeat stalled): it records the ticket
+                    ticket_logger.warn("Lease taken over by another loop; dropping this run's result", ticket=ticket)
+                    running_ticket = None
+                    checkpoint.finish(ticket)
+                    iteration += 1
+                    _idle(watcher, sleep_between / 1000)
+                    continue
+
+                # Handle final result after restart loop
+                if not options["dry_run"]:
+                    # done includes both success and failure per queue-state semantics.
+                    completed_tickets.add(ticket)
+                    running_ticket = None
+
+                    # Refresh queue state once after completion so blocked->ready transitions
+                    # are reflected without duplicate relisting in the same iteration.
+                    ready_ids, blocked_ids = _refresh_pending_state(list_query, ticket_logger)
+                    _note_ready(ready_since, ready_ids)
+                    metrics = ticket_metrics(
+                        duration_secs=time.monotonic() - ticket_started,
+                        attempts=attempt,
+                        exit_code=ticket_rc,
+                        mode="serial",
+                        workers=1,
+                        run_id=run_id,
+                        timeouts=timeouts,
+                        queue_wait_secs=queue_wait,
+                    )
+                    pending_ids = ready_ids | blocked_ids
+                    queue_state = _compute_queue_state_snapshot(
+                        pending_ids=pending_ids,
+                        blocked_ids=blocked_ids,
+                        running_ids=set(),
+                        completed_ids=completed_tickets,
+                    )
+
+                    if ticket_rc != 0:
+                        if ticket_rc == -1:
+                            error_msg = f"Ticket failed after {attempt} attempt(s) due to timeout (threshold: {timeout_ms}ms)"
+                        else:
+                            error_msg = f"pi -p failed (exit {ticket_rc})"
+                        # Update progress display on failure
+                        if progress_display:
+                            progress_display.complete_ticket(ticket, "FAILED", iteration, queue_state=queue_state)
+                        knowledge_dir = resolve_knowledge_dir(project_root)
+                        artifact_path = str(knowledge_dir / "tickets" / ticket)
+                        ticket_logger.log_ticket_complete(ticket, "FAILED", mode="serial", iteration=iteration, ticket_title=ticket_title, queue_state=queue_state)
+                        ticket_logger.log_error_summary(ticket, error_msg, artifact_path=artifact_path, iteration=iteration, ticket_title=ticket_title)
+                        update_state(ralph_dir, project_root, ticket, "FAILED", error_msg, metrics=metrics)
+                        checkpoint.finish(ticket)
+                        if leases is not None:
+                            leases.complete(ticket, "FAILED", error=error_msg)
+                        _record_outcome(
+                            ticket, ticket_rc, quarantine=quarantine, breaker=breaker, logger=ticket_logger, mode=mode
+                        )
+                        if stop_on_failure:
+                            return ticket_rc
+                        first_failure_rc = first_failure_rc or ticket_rc
+                        failed_run.add(ticket)
+                        iteration += 1
+                        _idle(watcher, sleep_between / 1000)
+                        continue
+                    # Update progress display on success
+                    if progress_display:
+                        progress_display.complete_ticket(ticket, "COMPLETE", iteration, queue_state=queue_state)
+                    ticket_logger.log_ticket_complete(ticket, "COMPLETE", mode="serial", iteration=iteration, ticket_title=ticket_title, queue_state=queue_state)
+                    update_state(ralph_dir, project_root, ticket, "COMPLETE", "", metrics=metrics)
+                    checkpoint.finish(ticket)
+                    if leases is not None:
+                        leases.complete(ticket, "COMPLETE")
+                    _record_outcome(ticket, 0, quarantine=quarantine, breaker=breaker, logger=ticket_logger, mode=mode)
+
+                iteration += 1
+                _idle(watcher, sleep_between / 1000)
+
+            logger.log_loop_complete(reason="max_iterations_reached", iterations_completed=iteration, mode=mode)
+            if not options["dry_run"]:
+                set_state(ralph_dir, "COMPLETE")
+            if promise_on_complete:
+                print("<promise>COMPLETE</promise>")
+            return first_failure_rc
+
+        worktrees_dir = Path(str(config.get("parallelWorktreesDir", DEFAULTS["parallelWorktreesDir"])))
+        if not worktrees_dir.is_absolute():
+            worktrees_dir = repo_root / worktrees_dir
+        allow_untagged = parse_bool(
+            config.get("parallelAllowUntagged", DEFAULTS["parallelAllowUntagged"]),
+            DEFAULTS["parallelAllowUntagged"],
+        )
+        tag_prefix = str(config.get("componentTagPrefix", DEFAULTS["componentTagPrefix"]))
+        keep_worktrees = parse_bool(
+            config.get("parallelKeepWorktrees", DEFAULTS["parallelKeepWorktrees"]),
+            DEFAULTS["parallelKeepWorktrees"],
+        )
+
+        worktrees_dir.mkdir(parents=True, exist_ok=True)
+        list_query = ticket_list_query(ticket_query)
+
+        if not ensure_pi() or not prompt_exists(project_root, logger):
+            return 1
+
+        if not options["dry_run"] and parse_bool(
+            config.get("parallelWorktreePool", DEFAULTS["parallelWorktreePool"]),
+            DEFAULTS["parallelWorktreePool"],
+        ):
+            # One spare worktree beyond the worker count is kept warm in the background.
+            worktree_pool = WorktreePool(repo_root, worktrees_dir, size=use_parallel + 1)
+            worktree_pool.prepare()
+
+        merge_retries = max(0, int(config.get("parallelMergeRetries", DEFAULTS["parallelMergeRetries"])))
+        if not options["dry_run"] and parse_bool(
+            config.get("parallelAutoMerge", DEFAULTS["parallelAutoMerge"]),
+            DEFAULTS["parallelAutoMerge"],
+        ):
+            try:
+                merge_queue = MergeQueue(repo_root)
+            except MergeError as exc:
+                logger.warn(f"parallelAutoMerge disabled: {exc}")
+
+        pool = WorkerPool(use_parallel)
+        # autoscale: parallelWorkers becomes the ceiling; the pool runs autoscaler.workers slots
+        autoscaler: Optional[Autoscaler] = None
+        saturated = False
+        if resolve_autoscale(config):
+            autoscaler = create_autoscaler(config, use_parallel)
+            pool.max_workers = autoscaler.workers
+            logger.info(
+                f"Autoscaling between {autoscaler.min_workers} and {autoscaler.max_workers} workers",
+                event="autoscale_start",
+                mode=mode,
+            )
+        # Predicted file overlap instead of component tags (conflictPrediction=files)
+        predictor = create_footprint_predictor(project_root, config)
+        finished: List[Tuple[WorkerSlot, int]] = []
+        # Tickets skipped (and recorded as BLOCKED) for exceeding maxRetries
+        retry_blocked: set = set()
+        # Timed-out attempts waiting to be relaunched in a fresh worktree
+        restarts: List[WorkerSlot] = []
+        # Successful tickets whose merge waits for the main checkout to be clean again
+        merge_waiting: List[WorkerSlot] = []
+        failed_rc = 0
+        retry_wait_secs = sleep_retries / 1000
+        finish_kwargs: Dict[str, Any] = dict(
+            repo_root=repo_root,
+            ralph_dir=ralph_dir,
+            project_root=project_root,
+            workflow=workflow,
+            workflow_flags=workflow_flags,
+            keep_worktrees=keep_worktrees,
+            logger=logger,
+            mode=mode,
+            worktree_pool=worktree_pool,
+            run_id=run_id,
+            workers=use_parallel,
+            leases=leases,
+            checkpoint=checkpoint,
+        )
+
+        def lease_lost(slot: WorkerSlot) -> bool:
+            """True (and logged) if another loop took the ticket over; its result is not recorded."""
+            if leases is None or leases.confirm(slot.ticket):
+                return False
+            logger.warn(
+                "Lease taken over by another loop; dropping this run's result",
+                ticket=slot.ticket,
+                iteration=slot.iteration,
+            )
+            checkpoint.finish(slot.ticket)
+            return True
+
+        # Wake waits when a running ticket's lease is lost, so its worker is stopped promptly
+        lost_running = (lambda: bool(leases.lost_tickets() & pool.running_tickets)) if leases is not None else None
+
+        if resume_queue:
+            # --resume: reattach the interrupted run's tickets to the worktrees they ran in
+            subprocess.run(["git", "-C", str(repo_root), "worktree", "prune"], capture_output=True)
+            for inflight in resume_queue:
+                ticket = inflight.ticket
+                worktree = Path(inflight.worktree) if inflight.worktree else None
+                phase: Optional[str] = None
+                if worktree is not None and worktree.is_dir():
+                    phase = resume_phase(worktree / ".tf/knowledge" / "tickets" / ticket, inflight.started_at)
+                if phase not in (None, DONE) and pool.free_slots == 0:
+                    # More interrupted tickets than workers now
+                    phase = None
+                if phase is not None and worktree_pool is not None and not worktree_pool.adopt(worktree, ticket):
+                    phase = None
+                if phase is None:
+                    # Nothing to keep: the ticket starts over when it is selected again
+                    logger.info("Interrupted ticket starts over", ticket=ticket)
+                    if worktree is not None and worktree_pool is None and worktree.exists():
+                        remove = _remove_worktree(repo_root, worktree)
+                        logger.log_worktree_operation(
+                            ticket, "remove", str(worktree), success=remove.returncode == 0, mode=mode, iteration=inflight.iteration
+                        )
+                    checkpoint.finish(ticket)
+                    continue
+                components = extract_components(ticket, tag_prefix, allow_untagged) or set()
+                if phase == DONE:
+                    # Closed before the interruption: merge and record it like a finished worker
+                    logger.info("Ticket closed before the interruption; recording it", ticket=ticket)
+                    finished.append(
+                        (
+                            WorkerSlot(
+                                ticket=ticket,
+                                proc=None,
+                                worktree_path=worktree,
+                                iteration=inflight.iteration,
+                                components=components,
+                                attempt=inflight.attempt,
+                                merge_retries=inflight.merge_retries,
+                            ),
+                            0,
+                        )
+                    )
+                    continue
+                logger.info(f"Resuming interrupted ticket from phase '{phase}'", ticket=ticket)
+                # Admitted by the interrupted run: not held back by rateLimits or the breaker
+                slot = _start_parallel_ticket(
+                    ticket,
+                    inflight.iteration,
+                    repo_root=repo_root,
+                    worktrees_dir=worktrees_dir,
+                    ralph_dir=ralph_dir,
+                    project_root=project_root,
+                    workflow=workflow,
+                    workflow_flags=resume_flags(workflow_flags, phase),
+                    capture_json=capture_json,
+                    logs_dir=logs_dir,
+                    components=components,
+                    ticket_title=None,
+                    logger=logger,
+                    mode=mode,
+                    timeout_ms=timeout_ms,
+                    phase_timeout_ms=phase_timeout_ms,
+                    log_store=log_store,
+                    worktree_pool=worktree_pool,
+                    attempt=inflight.attempt,
+                    merge_retries=inflight.merge_retries,
+                    worktree=worktree,
+                )
+                if slot is not None:
+                    pool.add(slot)
+                    checkpoint.start(ticket, inflight.iteration, inflight.attempt, inflight.merge_retries, worktree)
+                else:
+                    checkpoint.finish(ticket)
+
+        while True:
+            if leases is not None:
+                # Stop workers whose ticket another loop took over; their results are dropped below
+                for ticket in sorted(leases.lost_tickets() & pool.running_tickets):
+                    lost_slot = pool.terminate(ticket)
+                    if lost_slot is not None:
+                        finished.append((lost_slot, TIMEOUT_RC))
+            # Retry blocked merges on every pass, alongside the workers that just exited.
+            finished = finished + [(slot, 0) for slot in merge_waiting]
+            merge_waiting = []
+            # Stream results into progress as soon as each worker exits.
+            for slot, rc in finished + pool.reap():
+                # A restart or merge re-run acquires its limits again when relaunched
+                release_limits(slot.ticket)
+                if lease_lost(slot):
+                    _recycle_worktree(slot, repo_root=repo_root, logger=logger, mode=mode, worktree_pool=worktree_pool)
+                    continue
+                if slot.timed_out and slot.attempt < max_restarts and failed_rc == 0:
+                    if autoscaler is not None:
+                        autoscaler.record(
+                            Outcome(
+                                autoscaler.workers,
+                                time.monotonic() - slot.started_at,
+                                ok=False,
+                                timed_out=True,
+                                provider_errors=_provider_errors(slot),
+                            )
+                        )
+                    logger.warn(
+                        f"Attempt timed out, restarting ({slot.attempt + 1}/{max_restarts})",
+                        ticket=slot.ticket,
+                        iteration=slot.iteration,
+                    )
+                    _recycle_worktree(slot, repo_root=repo_root, logger=logger, mode=mode, worktree_pool=worktree_pool)
+                    restarts.append(slot)
+                    continue
+                merge_error: Optional[str] = None
+                if rc == 0 and merge_queue is not None:
+                    # Merge in completion order so the next worktree starts from the new tip.
+                    merge = _merge_parallel_ticket(slot, merge_queue, logger=logger, mode=mode)
+                    if merge.status == BLOCKED and failed_rc == 0:
+                        if not slot.merge_blocked:
+                            logger.warn(
+                                f"Merge blocked: {merge.detail}; keeping ralph/{slot.ticket} queued",
+                                ticket=slot.ticket,
+                                iteration=slot.iteration,
+                            )
+                        slot.merge_blocked = True
+                        merge_waiting.append(slot)
+                        continue
+                    if merge.status == CONFLICT and slot.merge_retries < merge_retries and failed_rc == 0:
+                        logger.warn(
+                            f"Merge conflict on {merge_queue.base_branch}, re-queueing "
+                            f"({slot.merge_retries + 1}/{merge_retries})",
+                            ticket=slot.ticket,
+                            iteration=slot.iteration,
+                        )
+                        _recycle_worktree(slot, repo_root=repo_root, logger=logger, mode=mode, worktree_pool=worktree_pool)
+                        slot.merge_retries += 1
+                        restarts.append(slot)
+                        continue
+                    if not merge.ok:
+                        rc = 1
+                        merge_error = f"merge {merge.status}: {merge.detail}"
+                ticket_rc = _finish_parallel_ticket(slot, rc, error=merge_error, **finish_kwargs)
+                if autoscaler is not None:
+                    autoscaler.record(
+                        Outcome(
+                            autoscaler.workers,
+                            time.monotonic() - slot.started_at,
+                            ok=ticket_rc == 0,
+                            timed_out=slot.timed_out,
+                            provider_errors=_provider_errors(slot),
+                        )
+                    )
+                _record_outcome(slot.ticket, ticket_rc, quarantine=quarantine, breaker=breaker, logger=logger, mode=mode)
+                if ticket_rc != 0:
+                    first_failure_rc = first_failure_rc or ticket_rc
+                    failed_run.add(slot.ticket)
+                    if stop_on_failure and failed_rc == 0:
+                        failed_rc = ticket_rc
+            finished = []
+
+            if autoscaler is not None:
+                decision = autoscaler.decide(saturated, running=[_provider_errors(slot) for slot in pool.slots])
+                if decision is not None:
+                    pool.max_workers = decision.workers
+                    logger.log_scale_decision(
+                        decision.workers, decision.previous, decision.reason, mode=mode, signals=decision.signals
+                    )
+
+            if failed_rc != 0:
+                # Stop launching, but let in-flight workers finish and be recorded.
+                # Their worktrees were already given up, so don't hand them back to the pool.
+                recycled_kwargs = dict(finish_kwargs, worktree_pool=None)
+                for slot in restarts:
+                    if lease_lost(slot):
+                        continue
+                    if slot.timed_out:
+                        _finish_parallel_ticket(slot, TIMEOUT_RC, **recycled_kwargs)
+                    else:
+                        _finish_parallel_ticket(slot, 1, error="merge conflict: not re-run after failure", **recycled_kwargs)
+                restarts = []
+                for slot in merge_waiting:
+                    if not lease_lost(slot):
+                        _finish_parallel_ticket(slot, 1, error="merge blocked: not retried after failure", **recycled_kwargs)
+                merge_waiting = []
+                if not pool:
+                    return failed_rc
+                finished = pool.wait_any(wake=lost_running)
+                continue
+
+            # Re-queued tickets go first: they keep their iteration and component claim.
+            while restarts and pool.free_slots > 0 and breaker.allow():
+                # First re-queued ticket whose providers have room
+                index = next(
+                    (i for i, queued in enumerate(restarts) if limiter.acquire(queued.ticket, limit_keys(queued.ticket))),
+                    None,
+                )
+                if index is None:
+                    break
+                previous = restarts.pop(index)
+                if lease_lost(previous):
+                    release_limits(previous.ticket)
+                    continue
+                # Merge-conflict re-runs don't consume the timeout restart budget.
+                attempt = previous.attempt + 1 if previous.timed_out else previous.attempt
+                if previous.timed_out:
+                    logger.info(f"Restart attempt {attempt}/{max_restarts}", ticket=previous.ticket)
+                else:
+                    logger.info(f"Re-running on updated base ({previous.merge_retries}/{merge_retries})", ticket=previous.ticket)
+                slot = _start_parallel_ticket(
+                    previous.ticket,
+                    previous.iteration,
+                    repo_root=repo_root,
+                    worktrees_dir=worktrees_dir,
+                    ralph_dir=ralph_dir,
+                    project_root=project_root,
+                    workflow=workflow,
+                    workflow_flags=workflow_flags,
+                    capture_json=capture_json,
+                    logs_dir=logs_dir,
+                    components=previous.components,
+                    ticket_title=previous.ticket_title,
+                    logger=logger,
+                    mode=mode,
+                    timeout_ms=timeout_ms,
+                    phase_timeout_ms=phase_timeout_ms,
+                    log_store=log_store,
+                    worktree_pool=worktree_pool,
+                    attempt=attempt,
+                    merge_retries=previous.merge_retries,
+                    previous=previous,
+                )
+                breaker.launched(previous.ticket)
+                if slot is not None:
+                    pool.add(slot)
+                    checkpoint.start(previous.ticket, slot.iteration, attempt, slot.merge_retries, slot.worktree_path)
+                else:
+                    checkpoint.finish(previous.ticket)
+                    release_limits(previous.ticket)
+                    breaker.record(previous.ticket, ok=False)
+                    if leases is not None:
+                        leases.complete(previous.ticket, "FAILED", error="worktree setup failed")
+
+            if iteration >= max_iterations:
+                if pool:
+                    finished = pool.wait_any(timeout=retry_wait_secs if merge_waiting else None, wake=lost_running)
+                    continue
+                if merge_waiting and not restarts:
+                    # Blocked merges only need the main checkout to be cleaned up
+                    time.sleep(retry_wait_secs)
+                    continue
+                if not restarts:
+                    break
+                # Re-queued tickets are held back by the breaker or a token bucket (quotas are
+                # free with nothing running); both clear with time, so wait instead of leaving
+                # them unrecorded.
+                _wait_for_restarts(restarts, breaker, limiter, limit_keys, retry_wait_secs, logger, mode, iteration)
+                continue
+
+            if pool.free_slots == 0:
+                # While autoscaling could add a worker, wake up for the next decision
+                full_timeout: Optional[float] = None
+                if autoscaler is not None and saturated and autoscaler.workers < autoscaler.max_workers:
+                    full_timeout = max(autoscaler.interval_secs, retry_wait_secs)
+                elif merge_waiting:
+                    full_timeout = retry_wait_secs
+                finished = pool.wait_any(timeout=full_timeout, wake=lost_running)
+                continue
+
+            refresh_tickets()
+            if not pool and not restarts and not merge_waiting and backlog_empty(completion_check):
+                logger.log_loop_complete(reason="backlog_empty", iterations_completed=iteration, mode=mode)
+                if not options["dry_run"]:
+                    set_state(ralph_dir, "COMPLETE")
+                if promise_on_complete:
+                    print("<promise>COMPLETE</promise>")
+                return first_failure_rc
+
+            if not breaker.allow():
+                # Circuit open: launch nothing until the cooldown ends (or the half-open probe reports)
+                wait_secs = breaker.remaining() or retry_wait_secs
+                if pool:
+                    finished = pool.wait_any(timeout=wait_secs, wake=lost_running)
+                else:
+                    logger.log_no_ticket_selected(
+                        sleep_seconds=wait_secs, reason="circuit_open", mode=mode, iteration=iteration
+                    )
+                    time.sleep(wait_secs)
+                continue
+
+            # Half-open: a single probe ticket decides whether the breaker closes
+            slots_to_fill = 1 if breaker.state == HALF_OPEN else min(pool.free_slots, max_iterations - iteration)
+            listed = list_ready_tickets(list_query)
+            requeued = {previous.ticket for previous in restarts}
+            unmerged = {waiting.ticket for waiting in merge_waiting}
+            ready = [
+                t for t in listed
+                if t not in pool
+                and t not in requeued
+                and t not in unmerged
+                and (leases is None or leases.available(t))
+            ]
+            if escalation_enabled:
+                # Same max-retries skip as serial mode, recorded once per ticket
+                knowledge_dir = resolve_knowledge_dir(project_root)
+                for ticket in ready:
+                    if ticket in retry_blocked:
+                        continue
+                    if not is_ticket_blocked_by_retries(ticket, knowledge_dir, max_retries, logger)[0]:
+                        continue
+                    retry_blocked.add(ticket)
+                    if not options["dry_run"]:
+                        error_msg = f"Max retries ({max_retries}) exceeded - ticket blocked"
+                        update_state(ralph_dir, project_root, ticket, "BLOCKED", error_msg)
+                        if leases is not None:
+                            leases.complete(ticket, "BLOCKED", error=error_msg)
+                ready = [t for t in ready if t not in retry_blocked]
+            _note_ready(ready_since, ready)
+            scores: Dict[str, TicketScore] = {}
+            if critical_path:
+                ready, scores = rank_ready_tickets(ready, project_root)
+            ready = _skip_failing(ready, quarantine, failed_run)
+            # Tickets whose provider/model is saturated wait; others still launch
+            throttled: Dict[str, Tuple[str, Optional[float]]] = {}
+            if limiter.enabled:
+                # Re-queued tickets still waiting here were held back by their limits too
+                for ticket in [*ready, *requeued]:
+                    blocked = limiter.blocked(limit_keys(ticket))
+                    if blocked is not None:
+                        throttled[ticket] = blocked
+                ready = [t for t in ready if t not in throttled]
+            components_by_ticket: Dict[str, Optional[set]] = {}
+            overlaps: Dict[str, Dict[str, Any]] = {}
+            selected = select_parallel_tickets(
+                ready,
+                slots_to_fill,
+                allow_untagged,
+                tag_prefix,
+                busy_components=pool.busy_components,
+                components_out=components_by_ticket,
+                predictor=predictor,
+                running={slot.ticket: slot.components for slot in pool.slots},
+                overlaps_out=overlaps,
+            )
+
+            # Ready tickets left waiting only because the slots ran out (autoscaling demand)
+            saturated = len(selected) >= slots_to_fill and len(ready) > len(selected)
+
+            used_fallback = False
+            if not selected and not pool:
+                fallback_ticket = select_ticket(ticket_query)
+                if (
+                    fallback_ticket
+                    and fallback_ticket not in retry_blocked
+                    and fallback_ticket not in requeued
+                    and fallback_ticket not in unmerged
+                    and not quarantine.is_quarantined(fallback_ticket)
+                    and limiter.blocked(limit_keys(fallback_ticket)) is None
+                    and (leases is None or leases.available(fallback_ticket))
+                ):
+                    selected = [fallback_ticket]
+                    used_fallback = True
+            if limiter.enabled:
+                # Tickets in one batch may share a provider: admit them one at a time
+                selected = [t for t in selected if limiter.acquire(t, limit_keys(t))]
+            if leases is not None:
+                # Another loop may have claimed a ticket since it was listed
+                claimed = [t for t in selected if leases.claim(t)]
+                for ticket in set(selected) - set(claimed):
+                    release_limits(ticket)
+                selected = claimed
+
+            # Wake when the first throttled ticket gets a token (quotas free up when a worker exits)
+            token_waits = [wait for _, wait in throttled.values() if wait is not None]
+            if token_waits:
+                retry_wait = min(retry_wait_secs, max(min(token_waits), 0.05))
+            else:
+                retry_wait = retry_wait_secs
+
+            if not selected:
+                if not pool and not restarts and not merge_waiting and listed and not quarantine.filter(listed):
+                    # Only quarantined tickets are left: waiting would not change that
+                    logger.warn(
+                        f"All {len(listed)} ready tickets are quarantined (see: tf ralph quarantine)",
+                        event="all_quarantined",
+                        mode=mode,
+                    )
+                    logger.log_loop_complete(reason="quarantined", iterations_completed=iteration, mode=mode)
+                    if not options["dry_run"]:
+                        set_state(ralph_dir, "COMPLETE")
+                    return first_failure_rc or 1
+                if not pool:
+                    logger.log_no_ticket_selected(
+                        sleep_seconds=retry_wait,
+                        reason="rate_limited" if throttled else "no_ready_tickets",
+                        mode=mode,
+                        iteration=iteration,
+                    )
+                    _idle(watcher, retry_wait)
+                else:
+                    # Remaining ready tickets conflict with running ones (or none are ready):
+                    # wait for a worker or a ticket change, re-checking the queue at the retry interval.
+                    finished = pool.wait_any(
+                        timeout=retry_wait, wake=_wake_any(watcher.changed if watcher else None, lost_running)
+                    )
+                continue
+
+            # Build component tags map for logging
+            component_tags: Dict[str, List[str]] = {}
+            for ticket in selected:
+                if ticket not in components_by_ticket:
+                    components_by_ticket[ticket] = extract_components(ticket, tag_prefix, allow_untagged)
+                comps = components_by_ticket[ticket]
+                # Remove __untagged__ marker for display, show as empty/untagged
+                component_tags[ticket] = [c for c in comps if c != "__untagged__"] if comps else []
+
+            # Fetch ticket titles only in verbose mode (DEBUG or VERBOSE)
+            ticket_titles: Dict[str, Optional[str]] = {}
+            if log_level in (LogLevel.DEBUG, LogLevel.VERBOSE):
+                ticket_titles = extract_ticket_titles(selected)
+
+            reason = "fallback" if used_fallback else "component_diversity"
+            if critical_path and not used_fallback:
+                reason = "critical_path"
+            elif predictor is not None and not used_fallback:
+                reason = "predicted_overlap"
+            batch_scores = score_summary(selected, scores)
+            for ticket in selected:
+                if ticket in overlaps:
+                    batch_scores[ticket] = {**batch_scores.get(ticket, {}), **overlaps[ticket]}
+            logger.log_batch_selected(
+                selected,
+                component_tags,
+                reason=reason,
+                mode=mode,
+                iteration=iteration,
+                scores=batch_scores,
+                skipped={
+                    **{t: o for t, o in overlaps.items() if t not in selected},
+                    **{t: {"rate_limited": key} for t, (key, _) in throttled.items()},
+                },
+            )
+
+            if options["dry_run"]:
+                for ticket in selected:
+                    cmd = build_cmd(workflow, ticket, workflow_flags)
+                    json_note = " --mode json" if capture_json else ""
+                    logger.info(
+                        f"Dry run: pi -p{json_note} \"{cmd}\" (worktree)",
+                        ticket=ticket,
+                        ticket_title=ticket_titles.get(ticket),
+                    )
+                    release_limits(ticket)
+                iteration += len(selected)
+                _idle(watcher, sleep_between / 1000)
+                continue
+
+            for ticket in selected:
+                slot = _start_parallel_ticket(
+                    ticket,
+                    iteration,
+                    repo_root=repo_root,
+                    worktrees_dir=worktrees_dir,
+                    ralph_dir=ralph_dir,
+                    project_root=project_root,
+                    workflow=workflow,
+                    workflow_flags=workflow_flags,
+                    capture_json=capture_json,
+                    logs_dir=logs_dir,
+                    components=components_by_ticket.get(ticket) or set(),
+                    ticket_title=ticket_titles.get(ticket),
+                    logger=logger,
+                    mode=mode,
+                    timeout_ms=timeout_ms,
+                    phase_timeout_ms=phase_timeout_ms,
+                    log_store=log_store,
+                    worktree_pool=worktree_pool,
+                    queued_secs=time.monotonic() - ready_since.pop(ticket, time.monotonic()),
+                )
+                iteration += 1
+                breaker.launched(ticket)
+                if slot is not None:
+                    pool.add(slot)
+                    checkpoint.start(ticket, slot.iteration, worktree=slot.worktree_path)
+                else:
+                    release_limits(ticket)
+                    breaker.record(ticket, ok=False)
+                    if leases is not None:
+                        leases.complete(ticket, "FAILED", error="worktree setup failed")
+
+            if pool:
+                # Block until any worker exits; while slots are free, also wake on ticket
+                # changes (or at the retry interval) so newly-ready tickets are picked up promptly.
+                timeout = retry_wait_secs if pool.free_slots > 0 or merge_waiting else None
+                wake = watcher.changed if watcher is not None and pool.free_slots > 0 else None
+                finished = pool.wait_any(timeout=timeout, wake=_wake_any(wake, lost_running))
+
+        logger.log_loop_complete(reason="max_iterations_reached", iterations_completed=iteration, mode=mode)
+        if not options["dry_run"]:
+            set_state(ralph_dir, "COMPLETE")
+        if promise_on_complete:
+            print("<promise>COMPLETE</promise>")
+        return first_failure_rc
+    except BaseException:
+        # Interrupted (Ctrl-C, crash): keep the checkpoint for --resume
+        interrupted = True
+        raise
+    finally:
+        if not interrupted:
+            checkpoint.clear()
+        if watcher is not None:
+            watcher.close()
+        if leases is not None:
+            # Tickets still held (interrupt/failure) become claimable again at once.
+            leases.close()
+        if pool is not None:
+            # Workers run in their own sessions; don't leave them running on exit/interrupt.
+            pool.terminate_all()
+        if worktree_pool is not None:
+            worktree_pool.close()
+        if lock_acquired:
+            render_progress(ralph_dir)
+            export_metrics(ralph_dir, config, logger)
+            prune_logs(ralph_dir, config, logger)
+            if leases is None:
+                lock_release(ralph_dir)
+
+
+def ralph_progress(args: List[str]) -> int:
+    """Show, render or compact the Ralph event log behind progress.md."""
+    render = False
+    compact = False
+    keep: Optional[int] = None
+    idx = 0
+    try:
+        while idx < len(args):
+            arg = args[idx]
+            if arg == "--render":
+                render = True
+                idx += 1
+            elif arg == "--compact":
+                compact = True
+                idx += 1
+            elif arg == "--keep":
+                if idx + 1 >= len(args):
+                    raise ValueError("Missing value after --keep")
+                keep = int(args[idx + 1])
+                idx += 2
+            elif arg.startswith("--keep="):
+                keep = int(arg.split("=", 1)[1])
+                idx += 1
+            elif arg in {"--help", "-h"}:
+                usage()
+                return 0
+            else:
+                raise ValueError(f"Unknown option for ralph progress: {arg}")
+    except ValueError as exc:
+        print(str(exc), file=sys.stderr)
+        return 1
+    if keep is not None and not compact:
+        print("--keep requires --compact", file=sys.stderr)
+        return 1
+
+    project_root = find_project_root()
+    if not project_root:
+        print("No .tf directory found. Run in a project with .tf/.", file=sys.stderr)
+        return 1
+
+    event_log = EventLog(project_root / ".tf/ralph")
+    if compact:
+        before, after = event_log.compact(keep)
+        print(f"Compacted {event_log.events_path}: {before} -> {after} events")
+    if render or compact:
+        print(f"Rendered {event_log.render()}")
+    if not (render or compact):
+        counters = event_log.counters()
+        print(f"Status: {counters.get('status')}")
+        print(f"Tickets completed: {counters.get('completed', 0)}")
+        print(f"Tickets failed: {counters.get('failed', 0)}")
+        print(f"Total iterations: {counters.get('total', 0)}")
+        print(f"Last updated: {counters.get('last_updated') or '(never)'}")
+    return 0
+
+
+def ralph_stats(args: List[str]) -> int:
+    """Report Ralph throughput metrics recorded in the event log."""
+    as_json = False
+    prometheus: Optional[str] = None
+    idx = 0
+    while idx < len(args):
+        arg = args[idx]
+        if arg == "--json":
+            as_json = True
+            idx += 1
+        elif arg == "--prometheus":
+            if idx + 1 >= len(args):
+                print("Missing value after --prometheus", file=sys.stderr)
+                return 1
+            prometheus = args[idx + 1]
+            idx += 2
+        elif arg.startswith("--prometheus="):
+            prometheus = arg.split("=", 1)[1]
+            idx += 1
+        elif arg in {"--help", "-h"}:
+            usage()
+            return 0
+        else:
+            print(f"Unknown option for ralph stats: {arg}", file=sys.stderr)
+            return 1
+
+    project_root = find_project_root()
+    if not project_root:
+        print("No .tf directory found. Run in a project with .tf/.", file=sys.stderr)
+        return 1
+
+    stats = compute_stats(EventLog(project_root / ".tf/ralph").events())
+    if prometheus == "-":
+        print(prometheus_text(stats), end="")
+        return 0
+    if prometheus:
+        print(f"Wrote {write_textfile(Path(prometheus), prometheus_text(stats))}", file=sys.stderr)
+    if as_json:
+        print(json.dumps(stats.to_dict(), indent=2, sort_keys=True))
+    elif not prometheus:
+        print(format_stats(stats))
+    return 0
+
+
+def ralph_plan(args: List[str]) -> int:
+    """Print the projected execution schedule of the open backlog (see tf.ralph.plan)."""
+    as_json = False
+    show_timeline = True
+    worker_counts: List[int] = []
+    max_iterations: Optional[int] = None
+    default_secs = DEFAULT_DURATION_SECS
+    idx = 0
+    try:
+        while idx < len(args):
+            arg = args[idx]
+            name, _, inline = arg.partition("=")
+            if name in {"--workers", "--max-iterations", "--default-duration"}:
+                if inline:
+                    value = inline
+                    idx += 1
+                elif idx + 1 < len(args):
+                    value = args[idx + 1]
+                    idx += 2
+                else:
+                    raise ValueError(f"Missing value after {name}")
+                if name == "--workers":
+                    worker_counts = [max(1, int(part)) for part in value.split(",") if part.strip()]
+                elif name == "--max-iterations":
+                    max_iterations = int(value)
+                else:
+                    default_secs = float(value)
+            elif arg == "--json":
+                as_json = True
+                idx += 1
+            elif arg == "--no-timeline":
+                show_timeline = False
+                idx += 1
+            elif arg in {"--help", "-h"}:
+                usage()
+                return 0
+            else:
+                raise ValueError(f"Unknown option for ralph plan: {arg}")
+    except ValueError as exc:
+        print(str(exc), file=sys.stderr)
+        return 1
+
+    project_root = find_project_root()
+    if not project_root:
+        print("No .tf directory found. Run in a project with .tf/.", file=sys.stderr)
+        return 1
+
+    ralph_dir = project_root / ".tf/ralph"
+    config = load_config(ralph_dir)
+    if not worker_counts:
+        worker_counts = [max(1, int(config.get("parallelWorkers", DEFAULTS["parallelWorkers"])))]
+    if max_iterations is None:
+        max_iterations = int(config.get("maxIterations", DEFAULTS["maxIterations"]))
+    tag_prefix = str(config.get("componentTagPrefix", DEFAULTS["componentTagPrefix"]))
+    allow_untagged = parse_bool(
+        config.get("parallelAllowUntagged", DEFAULTS["parallelAllowUntagged"]),
+        DEFAULTS["parallelAllowUntagged"],
+    )
+    tickets = all_tickets(project_root)
+    conflict_predictor = create_footprint_predictor(project_root, config)
+    # Similar past tickets also drive the duration estimates when prediction is off
+    similar = conflict_predictor or FootprintPredictor(
+        project_root, resolve_knowledge_dir(project_root) / "tickets", lambda: tickets
+    )
+    estimator = DurationEstimator(
+        EventLog(ralph_dir).events(), tickets, tag_prefix=tag_prefix, default_secs=default_secs, predictor=similar
+    )
+    started_at = time.time()
+    plans = [
+        build_plan(
+            tickets,
+            estimator,
+            workers=workers,
+            scheduling=resolve_scheduling_mode(config),
+            tag_prefix=tag_prefix,
+            allow_untagged=allow_untagged,
+            predictor=conflict_predictor if workers > 1 else None,
+            max_iterations=max_iterations,
+            started_at=started_at,
+        )
+        for workers in worker_counts
+    ]
+
+    if as_json:
+        data: Any = [plan.to_dict() for plan in plans] if len(plans) > 1 else plans[0].to_dict()
+        print(json.dumps(data, indent=2, sort_keys=True))
+    elif len(plans) > 1:
+        print(format_sweep(plans))
+    else:
+        print(format_plan(plans[0], timeline=show_timeline))
+    return 0
+
+
+def ralph_quarantine(args: List[str]) -> int:
+    """List quarantined tickets and failure counts, or release tickets."""
+    as_json = False
+    clear = False
+    release: List[str] = []
+    idx = 0
+    while idx < len(args):
+        arg = args[idx]
+        if arg == "--release" or arg.startswith("--release="):
+            if "=" in arg:
+                release.append(arg.split("=", 1)[1])
+                idx += 1
+            elif idx + 1 < len(args):
+                release.append(args[idx + 1])
+                idx += 2
+            else:
+                print("Missing value after --release", file=sys.stderr)
+                return 1
+        elif arg == "--clear":
+            clear = True
+            idx += 1
+        elif arg == "--json":
+            as_json = True
+            idx += 1
+        elif arg in {"--help", "-h"}:
+            usage()
+            return 0
+        else:
+            print(f"Unknown option for ralph quarantine: {arg}", file=sys.stderr)
+            return 1
+
+    project_root = find_project_root()
+    if not project_root:
+        print("No .tf directory found. Run in a project with .tf/.", file=sys.stderr)
+        return 1
+
+    quarantine = create_quarantine(project_root, load_config(project_root / ".tf/ralph"))
+    if clear:
+        print(f"Released {quarantine.clear()} ticket(s)")
+        return 0
+    if release:
+        rc = 0
+        for ticket in release:
+            if quarantine.release(ticket):
+                print(f"Released {ticket}")
+            else:
+                print(f"No failures recorded for {ticket}", file=sys.stderr)
+                rc = 1
+        return rc
+
+    entries = quarantine.entries()
+    if as_json:
+        data = {
+            ticket: dict(entry, quarantined=quarantine.is_quarantined(ticket))
+            for ticket, entry in sorted(entries.items())
+        }
+        print(json.dumps(data, indent=2, sort_keys=True))
+        return 0
+    if not entries:
+        print("No failed tickets recorded")
+        return 0
+    for ticket, entry in sorted(entries.items()):
+        state = "quarantined" if quarantine.is_quarantined(ticket) else "watching"
+        print(f"{ticket:<16} {state:<12} failures={entry.get('failures', 0):<3} {entry.get('last_error', '')}")
+    return 0
+
+
+def ralph_logs(args: List[str]) -> int:
+    """Print a ticket's `pi` log (decompressed), or list its attempts."""
+    ticket: Optional[str] = None
+    attempt: Optional[int] = None
+    kind = JSONL
+    list_only = False
+    idx = 0
+    while idx < len(args):
+        arg = args[idx]
+        if arg in {"--attempt", "-n"} or arg.startswith("--attempt="):
+            if "=" in arg:
+                value = arg.split("=", 1)[1]
+                idx += 1
+            elif idx + 1 < len(args):
+                value = args[idx + 1]
+                idx += 2
+            else:
+                print(f"Missing value after {arg}", file=sys.stderr)
+                return 1
+            try:
+                attempt = int(value)
+            except ValueError:
+                print(f"Invalid attempt number: {value}", file=sys.stderr)
+                return 1
+        elif arg == "--output":
+            kind = OUTPUT
+            idx += 1
+        elif arg == "--list":
+            list_only = True
+            idx += 1
+        elif arg in {"--help", "-h"}:
+            usage()
+            return 0
+        elif arg.startswith("-"):
+            print(f"Unknown option for ralph logs: {arg}", file=sys.stderr)
+            return 1
+        elif ticket is None:
+            ticket = arg
+            idx += 1
+        else:
+            print(f"Unexpected argument for ralph logs: {arg}", file=sys.stderr)
+            return 1
+
+    if not ticket:
+        print("Usage: tf ralph logs <ticket> [--attempt N] [--output] [--list]", file=sys.stderr)
+        return 1
+    project_root = find_project_root()
+    if not project_root:
+        print("No .tf directory found. Run in a project with .tf/.", file=sys.stderr)
+        return 1
+
+    store = LogStore(project_root / ".tf/ralph/logs")
+    if list_only:
+        entries = store.files(ticket)
+        if not entries:
+            print(f"No logs for {ticket}", file=sys.stderr)
+            return 1
+        for entry in entries:
+            print(f"attempt {entry.attempt}  {entry.kind:5}  {entry.path.stat().st_size:>10}  {entry.path.name}")
+        return 0
+
+    entry = store.find(ticket, attempt, kind)
+    if entry is None:
+        which = f"attempt {attempt}" if attempt is not None else "any attempt"
+        print(f"No {kind} log for {ticket} ({which})", file=sys.stderr)
+        return 1
+    out = sys.stdout.buffer if hasattr(sys.stdout, "buffer") else None
+    try:
+        for chunk in store.read_chunks(entry):
+            if out is not None:
+                out.write(chunk)
+            else:
+                sys.stdout.write(chunk.decode("utf-8", errors="replace"))
+        if out is not None:
+            out.flush()
+    except RuntimeError as exc:
+        print(str(exc), file=sys.stderr)
+        return 1
+    except BrokenPipeError:
+        pass
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    if argv is None:
+        argv = sys.argv[1:]
+
+    if not argv or argv[0] in {"help", "--help", "-h"}:
+        usage()
+        return 0
+
+    subcmd = argv[0]
+    rest = argv[1:]
+
+    if subcmd == "run":
+        return ralph_run(rest)
+    if subcmd == "start":
+        return ralph_start(rest)
+    if subcmd == "progress":
+        return ralph_progress(rest)
+    if subcmd == "stats":
+        return ralph_stats(rest)
+    if subcmd == "logs":
+        return ralph_logs(rest)
+    if subcmd == "plan":
+        return ralph_plan(rest)
+    if subcmd == "quarantine":
+        return ralph_quarantine(rest)
+    if subcmd == "simulate":
+        from tf.ralph.simulate import main as simulate_main
+
+        return simulate_main(rest)
+
+    print(f"Unknown ralph subcommand: {subcmd}", file=sys.stderr)
+    usage()
+    return 1
+
 
-__all__ = ["QueueStateSnapshot", "get_queue_state"]
\ No newline at end of file
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,245 @@
+"""Adaptive worker count for parallel Ralph (`"autoscale": true`).
+
+With autoscaling, `parallelWorkers` is the ceiling and the loop runs between
+`autoscaleMinWorkers` and that many workers. At most once per
+`autoscaleIntervalMs` the Autoscaler looks at:
+
+- system load: 1-minute load average per CPU above `autoscaleMaxLoad`
+  scales down, below ~70% of it allows scaling up;
+- memory: MemAvailable below `autoscaleMinFreeMemMb` scales down, and
+  scaling up needs room for one more worker (`autoscaleWorkerMemMb`);
+- recent ticket durations: when tickets at the current worker count take
+  SLOWDOWN_FACTOR x longer (median) than at fewer workers, the extra
+  concurrency is contention, not throughput, so it scales down;
+- error and timeout rates: failed/timed-out tickets, and provider errors
+  seen in the pi JSON output (`--capture-json`), above ERROR_RATE_THRESHOLD
+  halve the worker count (rate limits get worse with more callers).
+
+Scaling up is additive (+1, and only while ready tickets are waiting for a
+slot); scaling down on load, memory or slowdown is -1. Running workers are
+never stopped: a lower target just leaves freed slots empty.
+
+Signals a platform cannot report (no /proc/meminfo, no load average) are
+treated as healthy.
+"""
+
+from __future__ import annotations
+
+import os
+import statistics
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+# Failed share of recent tickets (window + running) that halves the workers
+ERROR_RATE_THRESHOLD = 0.25
+
+# Median duration at the current level vs fewer workers that counts as contention
+SLOWDOWN_FACTOR = 1.5
+
+# Samples needed before a rate or median is trusted
+MIN_SAMPLES = 3
+
+# Load per CPU must be below this share of autoscaleMaxLoad to scale up
+SCALE_UP_LOAD_SHARE = 0.7
+
+MEMINFO = Path("/proc/meminfo")
+
+
+@dataclass
+class SystemSample:
+    """Load and memory at one point in time (None = not available here)."""
+
+    load_per_cpu: Optional[float] = None
+    mem_available_mb: Optional[float] = None
+
+
+def sample_system(meminfo: Path = MEMINFO) -> SystemSample:
+    """Read the 1-minute load average per CPU and available memory."""
+    sample = SystemSample()
+    try:
+        sample.load_per_cpu = os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (AttributeError, OSError):
+        pass
+    try:
+        with open(meminfo, encoding="ascii") as handle:
+            for line in handle:
+                if line.startswith("MemAvailable:"):
+                    sample.mem_available_mb = int(line.split()[1]) / 1024
+                    break
+    except (OSError, ValueError, IndexError):
+        pass
+    return sample
+
+
+@dataclass
+class Outcome:
+    """A finished ticket run as seen by the autoscaler."""
+
+    workers: int
+    duration_secs: float
+    ok: bool = True
+    timed_out: bool = False
+    provider_errors: int = 0
+
+    @property
+    def errored(self) -> bool:
+        return not self.ok or self.timed_out or self.provider_errors > 0
+
+
+@dataclass
+class ScaleDecision:
+    """A change of the worker target, with the signals behind it."""
+
+    workers: int
+    previous: int
+    reason: str
+    signals: Dict[str, Any] = field(default_factory=dict)
+
+
+class Autoscaler:
+    """Chooses the number of active parallel workers.
+
+    Example:
+        >>> scaler = Autoscaler(min_workers=1, max_workers=4)
+        >>> scaler.record(Outcome(workers=1, duration_secs=600))
+        >>> decision = scaler.decide(saturated=True)
+        >>> decision.workers if decision else scaler.workers
+        2
+    """
+
+    def __init__(
+        self,
+        min_workers: int,
+        max_workers: int,
+        *,
+        max_load: float = 1.0,
+        min_free_mem_mb: float = 2048,
+        worker_mem_mb: float = 1024,
+        interval_secs: float = 30.0,
+        window: int = 20,
+        sampler: Callable[[], SystemSample] = sample_system,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            min_workers: Lower bound (and starting worker count)
+            max_workers: Upper bound (parallelWorkers)
+            max_load: 1-minute load average per CPU that triggers scaling down
+            min_free_mem_mb: Available memory below which workers are shed
+            worker_mem_mb: Memory one more worker is expected to need
+            interval_secs: Minimum time between two decisions
+            window: Recent ticket outcomes kept for rates and durations
+            sampler: Source of load/memory samples (for tests)
+            clock: Monotonic time source (for tests)
+        """
+        self.max_workers = max(1, int(max_workers))
+        self.min_workers = min(self.max_workers, max(1, int(min_workers)))
+        self.max_load = float(max_load)
+        self.min_free_mem_mb = float(min_free_mem_mb)
+        self.worker_mem_mb = float(worker_mem_mb)
+        self.interval_secs = max(0.0, float(interval_secs))
+        self.workers = self.min_workers
+        self._outcomes: Deque[Outcome] = deque(maxlen=max(MIN_SAMPLES, int(window)))
+        self._sampler = sampler
+        self._clock = clock
+        self._last_decision: Optional[float] = None
+
+    def record(self, outcome: Outcome) -> None:
+        """Add a finished ticket run."""
+        self._outcomes.append(outcome)
+
+    def error_rate(self, running_errors: int = 0, running: int = 0) -> Optional[float]:
+        """Errored share of recent outcomes plus running workers that hit provider errors."""
+        total = len(self._outcomes) + running
+        if total < MIN_SAMPLES:
+            return None
+        return (sum(1 for o in self._outcomes if o.errored) + running_errors) / total
+
+    def slowdown(self, workers: Optional[int] = None) -> Optional[float]:
+        """Median successful duration at a worker count / at fewer workers."""
+        level = self.workers if workers is None else workers
+        here: List[float] = []
+        below: List[float] = []
+        for outcome in self._outcomes:
+            if not outcome.ok or outcome.timed_out:
+                continue
+            if outcome.workers == level:
+                here.append(outcome.duration_secs)
+            elif outcome.workers < level:
+                below.append(outcome.duration_secs)
+        if len(here) < MIN_SAMPLES or len(below) < MIN_SAMPLES:
+            return None
+        baseline = statistics.median(below)
+        return statistics.median(here) / baseline if baseline > 0 else None
+
+    def decide(self, saturated: bool, running: Iterable[int] = ()) -> Optional[ScaleDecision]:
+        """Re-evaluate the worker target.
+
+        Args:
+            saturated: Ready tickets were left waiting because every slot was busy
+            running: Provider errors seen so far by each running worker
+
+        Returns:
+            The decision when the target changed (self.workers is updated), else None.
+        """
+        now = self._clock()
+        if self._last_decision is not None and now - self._last_decision < self.interval_secs:
+            return None
+        self._last_decision = now
+
+        running = list(running)
+        sample = self._sampler()
+        error_rate = self.error_rate(sum(1 for errors in running if errors > 0), len(running))
+        slowdown = self.slowdown()
+        signals: Dict[str, Any] = {
+            "load_per_cpu": _round(sample.load_per_cpu),
+            "mem_available_mb": _round(sample.mem_available_mb, 0),
+            "error_rate": _round(error_rate),
+            "slowdown": _round(slowdown),
+        }
+
+        target, reason = self._target(sample, error_rate, slowdown, saturated)
+        target = min(self.max_workers, max(self.min_workers, target))
+        if target == self.workers:
+            return None
+        decision = ScaleDecision(target, self.workers, reason, signals)
+        self.workers = target
+        return decision
+
+    def _target(
+        self,
+        sample: SystemSample,
+        error_rate: Optional[float],
+        slowdown: Optional[float],
+        saturated: bool,
+    ) -> Tuple[int, str]:
+        current = self.workers
+        if error_rate is not None and error_rate >= ERROR_RATE_THRESHOLD:
+            return current // 2, "error_rate"
+        if sample.mem_available_mb is not None and sample.mem_available_mb < self.min_free_mem_mb:
+            return current - 1, "memory"
+        if sample.load_per_cpu is not None and sample.load_per_cpu > self.max_load:
+            return current - 1, "load"
+        if slowdown is not None and slowdown >= SLOWDOWN_FACTOR:
+            return current - 1, "slowdown"
+        if not saturated:
+            return current, "no_demand"
+        above = self.slowdown(current + 1)
+        if above is not None and above >= SLOWDOWN_FACTOR:
+            # Already seen to be slower with one more worker (until those samples age out)
+            return current, "slowdown"
+        if sample.load_per_cpu is not None and sample.load_per_cpu > self.max_load * SCALE_UP_LOAD_SHARE:
+            return current, "load"
+        if (
+            sample.mem_available_mb is not None
+            and sample.mem_available_mb < self.min_free_mem_mb + self.worker_mem_mb
+        ):
+            return current, "memory"
+        return current + 1, "headroom"
+
+
+def _round(value: Optional[float], digits: int = 2) -> Optional[float]:
+    return round(value, digits) if value is not None else None
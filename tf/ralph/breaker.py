@@ -0,0 +1,134 @@
+"""Circuit breaker that pauses the Ralph loop when most tickets fail.
+
+When the model provider is down or rate-limited, or the checkout is broken,
+every ticket fails the same way and each failure still costs a `pi` session.
+The breaker watches the outcome of the last `breakerWindow` ticket runs:
+
+- closed: tickets launch normally. When at least MIN_SAMPLES outcomes are
+  in the window and the failed share reaches `breakerThreshold`, it opens.
+- open: no tickets launch until `breakerCooldownMs` has passed.
+- half-open: one probe ticket launches. Success closes the breaker (with an
+  empty window); failure opens it again with twice the cooldown (up to
+  MAX_COOLDOWN_FACTOR x).
+
+When the breaker opens, the failures that tripped it are returned so the
+loop can take them back from the quarantine counts (an outage is not the
+tickets' fault).
+"""
+
+from __future__ import annotations
+
+import time
+from collections import deque
+from typing import Callable, Deque, List, Optional, Tuple
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Outcomes needed in the window before the failure rate is trusted
+MIN_SAMPLES = 4
+
+# Repeated trips back off the cooldown up to this multiple
+MAX_COOLDOWN_FACTOR = 8
+
+
+class CircuitBreaker:
+    """Sliding-window failure-rate breaker.
+
+    Example:
+        >>> breaker = CircuitBreaker(window=10, threshold=0.6, cooldown_secs=300)
+        >>> if breaker.allow():
+        ...     breaker.record("pt-abc1", ok=False)
+    """
+
+    def __init__(
+        self,
+        window: int = 10,
+        threshold: float = 0.6,
+        cooldown_secs: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            window: Number of recent ticket outcomes considered (0 = disabled)
+            threshold: Failed share of the window that opens the breaker
+            cooldown_secs: Pause before a probe ticket is allowed
+            clock: Monotonic time source (for tests)
+        """
+        self.window = max(0, int(window))
+        self.threshold = float(threshold)
+        self.cooldown_secs = max(0.0, float(cooldown_secs))
+        self.state = CLOSED
+        self.trips = 0
+        self._clock = clock
+        self._outcomes: Deque[Tuple[str, bool]] = deque(maxlen=self.window or 1)
+        self._opened_at = 0.0
+        self._cooldown = self.cooldown_secs
+        self._probe: Optional[str] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0 and 0 < self.threshold <= 1
+
+    @property
+    def failure_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return sum(1 for _, ok in self._outcomes if not ok) / len(self._outcomes)
+
+    def remaining(self) -> float:
+        """Seconds until a probe may launch (0 unless open)."""
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self._opened_at + self._cooldown - self._clock())
+
+    def allow(self) -> bool:
+        """True if a ticket may launch now (moves open -> half-open after the cooldown)."""
+        if not self.enabled or self.state == CLOSED:
+            return True
+        if self.state == OPEN and self.remaining() <= 0:
+            self.state = HALF_OPEN
+            self._probe = None
+        if self.state == HALF_OPEN:
+            return self._probe is None
+        return False
+
+    def launched(self, ticket: str) -> None:
+        """Note a launch; in half-open state it is the probe."""
+        if self.state == HALF_OPEN and self._probe is None:
+            self._probe = ticket
+
+    def record(self, ticket: str, ok: bool) -> List[str]:
+        """Record a finished ticket run.
+
+        Returns:
+            The failed tickets in the window when this outcome opens the
+            breaker (empty otherwise, including when a probe fails again).
+        """
+        if not self.enabled:
+            return []
+        if self.state == HALF_OPEN and ticket == self._probe:
+            self._probe = None
+            if ok:
+                self.state = CLOSED
+                self._outcomes.clear()
+                self._cooldown = self.cooldown_secs
+            else:
+                self._open(min(self._cooldown * 2, self.cooldown_secs * MAX_COOLDOWN_FACTOR))
+            return []
+        self._outcomes.append((ticket, ok))
+        if self.state != CLOSED or len(self._outcomes) < min(MIN_SAMPLES, self.window):
+            return []
+        if self.failure_rate < self.threshold:
+            return []
+        failed = [t for t, passed in self._outcomes if not passed]
+        self._outcomes.clear()
+        self._open(self.cooldown_secs)
+        return failed
+
+    def _open(self, cooldown: float) -> None:
+        self.state = OPEN
+        self.trips += 1
+        self._opened_at = self._clock()
+        self._cooldown = cooldown
@@ -0,0 +1,211 @@
+"""Crash-safe checkpoint of the Ralph loop (`.tf/ralph/checkpoint.json`).
+
+When the loop process dies (reboot, dropped SSH session, OOM kill) the
+tickets it was running are left half done: their worktrees stay behind and
+the artifacts written so far are not connected to anything. The loop writes
+a small checkpoint whenever a ticket is launched or finishes:
+
+    {"version": 1, "pid": 4242, "mode": "parallel", "iteration": 7,
+     "tickets": {"pt-abc1": {"iteration": 5, "attempt": 0, "merge_retries": 0,
+                             "worktree": ".../.tf/ralph/worktrees/pool-2",
+                             "started_at": 1760000000.0}}}
+
+It is replaced atomically (temp file, fsync, rename), so a crash leaves the
+previous or the new version, never a torn one, and it is removed when the
+loop exits normally. `tf ralph start --resume` reads it back: the iteration
+count carries on, and for each in-flight ticket resume_phase() looks at
+which workflow artifacts were written during the interrupted attempt:
+
+- close-summary.md: the ticket finished; only the loop's bookkeeping (and in
+  parallel mode the merge) is left to do.
+- an earlier artifact: the ticket is run again with `--resume-from <phase>`
+  (in its old worktree in parallel mode), skipping the finished phases.
+- nothing: the ticket starts over and its worktree is cleaned up.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from tf.utils import atomic_write_text
+
+CHECKPOINT_FILE = "checkpoint.json"
+CHECKPOINT_VERSION = 1
+
+# /tf workflow phases in order, with the artifact each one leaves in the ticket's artifact dir
+PHASES = (
+    ("research", "research.md"),
+    ("implement", "implementation.md"),
+    ("review", "review.md"),
+    ("fix", "fixes.md"),
+    ("close", "close-summary.md"),
+)
+
+# resume_phase() result when the interrupted attempt already closed the ticket
+DONE = "done"
+
+# Workflow flag naming the first phase to run (see skills/tf-workflow)
+RESUME_FLAG = "--resume-from"
+
+# Coarse filesystem timestamps: artifacts this much older than the attempt still count
+MTIME_SLACK_SECS = 2.0
+
+
+@dataclass
+class InFlight:
+    """A ticket that was running when the checkpoint was written."""
+
+    ticket: str
+    iteration: int
+    attempt: int = 0
+    merge_retries: int = 0
+    worktree: Optional[str] = None
+    started_at: float = 0.0
+
+
+class Checkpoint:
+    """Loop state persisted after every launch and finish.
+
+    Example:
+        >>> checkpoint = Checkpoint(ralph_dir, mode="parallel")
+        >>> checkpoint.start("pt-abc1", iteration=0, worktree=path)
+        >>> checkpoint.finish("pt-abc1")
+        >>> checkpoint.clear()  # normal exit
+    """
+
+    def __init__(self, ralph_dir: Path, mode: str = "serial", enabled: bool = True):
+        """
+        Args:
+            ralph_dir: The loop's .tf/ralph directory
+            mode: "serial" or "parallel" (resuming needs the same mode)
+            enabled: False turns save/clear into no-ops (dry runs, lease coordination)
+        """
+        self.path = Path(ralph_dir) / CHECKPOINT_FILE
+        self.mode = mode
+        self.enabled = enabled
+        self.pid = os.getpid()
+        self.iteration = 0
+        self.tickets: Dict[str, InFlight] = {}
+
+    @classmethod
+    def load(cls, ralph_dir: Path) -> Optional["Checkpoint"]:
+        """Read a checkpoint left by an earlier run (None if absent or unreadable)."""
+        checkpoint = cls(ralph_dir)
+        try:
+            data = json.loads(checkpoint.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if not isinstance(data, dict) or data.get("version") != CHECKPOINT_VERSION:
+            return None
+        try:
+            checkpoint.mode = str(data.get("mode", "serial"))
+            checkpoint.pid = int(data.get("pid", 0))
+            checkpoint.iteration = int(data.get("iteration", 0))
+            for ticket, entry in (data.get("tickets") or {}).items():
+                checkpoint.tickets[str(ticket)] = InFlight(
+                    ticket=str(ticket),
+                    iteration=int(entry.get("iteration", 0)),
+                    attempt=int(entry.get("attempt", 0)),
+                    merge_retries=int(entry.get("merge_retries", 0)),
+                    worktree=entry.get("worktree"),
+                    started_at=float(entry.get("started_at", 0.0)),
+                )
+        except (AttributeError, TypeError, ValueError):
+            return None
+        return checkpoint
+
+    def start(
+        self,
+        ticket: str,
+        iteration: int,
+        attempt: int = 0,
+        merge_retries: int = 0,
+        worktree: Optional[Path] = None,
+        started_at: Optional[float] = None,
+    ) -> None:
+        """Record a launch (a restart keeps the original start time)."""
+        previous = self.tickets.get(ticket)
+        if started_at is None:
+            started_at = previous.started_at if previous is not None else time.time()
+        self.tickets[ticket] = InFlight(
+            ticket=ticket,
+            iteration=iteration,
+            attempt=attempt,
+            merge_retries=merge_retries,
+            worktree=str(worktree) if worktree is not None else None,
+            started_at=started_at,
+        )
+        self.iteration = max(self.iteration, iteration + 1)
+        self.save()
+
+    def finish(self, ticket: str) -> None:
+        """Record that a ticket's result was handled by the loop."""
+        if self.tickets.pop(ticket, None) is not None:
+            self.save()
+
+    def save(self) -> None:
+        if not self.enabled:
+            return
+        data: Dict[str, Any] = {
+            "version": CHECKPOINT_VERSION,
+            "pid": self.pid,
+            "mode": self.mode,
+            "iteration": self.iteration,
+            "tickets": {ticket: _entry(inflight) for ticket, inflight in self.tickets.items()},
+        }
+        # fsync: survive a power loss/reboot, not just a killed process
+        atomic_write_text(self.path, json.dumps(data, indent=2, sort_keys=True) + "\n", fsync=True)
+
+    def clear(self) -> None:
+        """Remove the checkpoint (the loop exited normally)."""
+        self.tickets = {}
+        if not self.enabled:
+            return
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _entry(inflight: InFlight) -> Dict[str, Any]:
+    entry = asdict(inflight)
+    entry.pop("ticket")
+    return entry
+
+
+def resume_phase(artifact_dir: Path, since: float) -> Optional[str]:
+    """First workflow phase still to run for an attempt interrupted after `since`.
+
+    Artifacts written before the attempt started (earlier attempts) are
+    ignored. Phases after the last fresh artifact are re-run even if older
+    ones are missing (e.g. research disabled).
+
+    Returns:
+        None when no phase finished during the attempt, DONE when the
+        close summary was written, else the phase name to resume from.
+    """
+    last = -1
+    for index, (_, name) in enumerate(PHASES):
+        try:
+            mtime = (artifact_dir / name).stat().st_mtime
+        except OSError:
+            continue
+        if mtime >= since - MTIME_SLACK_SECS:
+            last = index
+    if last < 0:
+        return None
+    if last == len(PHASES) - 1:
+        return DONE
+    return PHASES[last + 1][0]
+
+
+def resume_flags(workflow_flags: str, phase: Optional[str]) -> str:
+    """Workflow flags for a resumed run (unchanged when starting over)."""
+    if phase is None or phase == DONE:
+        return workflow_flags
+    return f"{workflow_flags} {RESUME_FLAG} {phase}".strip()
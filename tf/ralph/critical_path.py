@@ -0,0 +1,109 @@
+"""Critical-path scoring for Ralph ticket selection.
+
+Scores ready tickets by how much downstream work they unblock, so long
+dependency chains start early instead of serialising at the end of a run:
+
+- depth: length of the longest chain of unclosed tickets that (transitively)
+  depend on the ticket
+- fanout: number of unclosed tickets that depend on it directly
+- priority: ticket priority (0 = highest), used as a tie-breaker
+
+Ranking order is depth desc, fanout desc, priority asc, then ticket ID.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Iterable, Mapping, Optional
+
+from tf.ralph.ticket_queue import ticket_priority
+from tf.ticket_loader import Ticket
+
+
+@dataclass(frozen=True)
+class TicketScore:
+    """Critical-path score of a single ticket."""
+
+    ticket: str
+    depth: int
+    fanout: int
+    priority: int
+
+    def sort_key(self) -> tuple[int, int, int, str]:
+        return (-self.depth, -self.fanout, self.priority, self.ticket)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"depth": self.depth, "fanout": self.fanout, "priority": self.priority}
+
+    def __str__(self) -> str:
+        return f"depth={self.depth} fanout={self.fanout} P{self.priority}"
+
+
+def score_tickets(tickets: Iterable[Ticket]) -> dict[str, TicketScore]:
+    """Compute critical-path scores for every unclosed ticket.
+
+    Closed tickets are ignored both as nodes and as dependents. Dependency
+    cycles are tolerated: a ticket already on the current path contributes
+    no further depth.
+
+    Args:
+        tickets: All known tickets (any status)
+
+    Returns:
+        Dict mapping ticket ID -> TicketScore for unclosed tickets.
+    """
+    open_tickets = {t.id: t for t in tickets if (t.status or "").lower() != "closed"}
+
+    dependents: dict[str, set[str]] = {ticket_id: set() for ticket_id in open_tickets}
+    for ticket in open_tickets.values():
+        for dep in ticket.deps or []:
+            if dep in dependents:
+                dependents[dep].add(ticket.id)
+
+    depth: dict[str, int] = {}
+    for root in open_tickets:
+        if root in depth:
+            continue
+        # Iterative post-order DFS over dependents (avoids recursion limits on long chains).
+        on_path: set[str] = {root}
+        stack: list[tuple[str, list[str]]] = [(root, sorted(dependents[root]))]
+        while stack:
+            node, pending = stack[-1]
+            while pending and (pending[-1] in depth or pending[-1] in on_path):
+                pending.pop()
+            if pending:
+                child = pending.pop()
+                on_path.add(child)
+                stack.append((child, sorted(dependents[child])))
+                continue
+            stack.pop()
+            on_path.discard(node)
+            depth[node] = max((depth[c] + 1 for c in dependents[node] if c in depth), default=0)
+
+    return {
+        ticket_id: TicketScore(
+            ticket=ticket_id,
+            depth=depth[ticket_id],
+            fanout=len(dependents[ticket_id]),
+            priority=ticket_priority(ticket),
+        )
+        for ticket_id, ticket in open_tickets.items()
+    }
+
+
+def rank_tickets(ready: Iterable[str], scores: Mapping[str, TicketScore]) -> list[str]:
+    """Order ready ticket IDs by critical-path score.
+
+    Tickets without a score (e.g. not found on disk) keep their relative
+    queue order after all scored tickets.
+    """
+    ready = list(ready)
+    scored = sorted((t for t in ready if t in scores), key=lambda t: scores[t].sort_key())
+    return scored + [t for t in ready if t not in scores]
+
+
+def score_summary(tickets: Iterable[str], scores: Optional[Mapping[str, TicketScore]]) -> dict[str, dict[str, Any]]:
+    """Serializable scores for the given tickets (for structured logging)."""
+    if not scores:
+        return {}
+    return {t: scores[t].to_dict() for t in tickets if t in scores}
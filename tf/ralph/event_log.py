@@ -0,0 +1,329 @@
+"""Append-only event store behind `.tf/ralph/progress.md`.
+
+Ralph used to rewrite the whole of `progress.md` (scanning every line for the
+counters) on every ticket, which is O(history) per ticket and unsafe when
+parallel workers finish at the same time. Instead, each ticket result and
+loop-state change is appended as one JSON line to `events.jsonl`, and the
+running totals live in a small `counters.json` snapshot. Both are updated
+under an exclusive lock, so an append costs the same after ten tickets or
+ten thousand.
+
+`progress.md` is a rendered view of the two files. It is a snapshot: it is
+regenerated when the loop changes state (starts, completes) or exits, after
+`tf ralph run`, and on demand with `tf ralph progress --render`, but not
+after every ticket (that would make each result O(history) again). Use
+`tf ralph progress` or `counters()` for the live totals. `compact()` drops state events and, optionally,
+all but the newest ticket entries; the counters are unaffected.
+
+An existing hand-maintained or pre-event-log `progress.md` is imported on
+first use: its statistics seed the counters and its history is kept verbatim
+below the rendered entries.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from tf.utils import atomic_write_text, locked_file
+
+EVENTS_FILE = "events.jsonl"
+COUNTERS_FILE = "counters.json"
+LOCK_FILE = "events.lock"
+PROGRESS_FILE = "progress.md"
+
+# Marker preceding history entries in progress.md
+HISTORY_MARKER = "<!-- Auto-appended entries below -->"
+
+EMPTY_COUNTERS: Dict[str, Any] = {
+    "status": "RUNNING",
+    "started": None,
+    "last_updated": None,
+    "completed": 0,
+    "failed": 0,
+    "total": 0,
+    "events": 0,
+}
+
+
+def _utc_now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _parse_legacy_progress(text: str) -> tuple[Dict[str, Any], str]:
+    """Extract counters and the raw history block from an existing progress.md."""
+    counters = dict(EMPTY_COUNTERS)
+    patterns = {
+        "completed": r"^- Tickets completed: (\d+)",
+        "failed": r"^- Tickets failed: (\d+)",
+        "total": r"^- Total iterations: (\d+)",
+    }
+    for key, pattern in patterns.items():
+        match = re.search(pattern, text, re.MULTILINE)
+        if match:
+            counters[key] = int(match.group(1))
+    match = re.search(r"^- Status: (\S+)", text, re.MULTILINE)
+    if match:
+        counters["status"] = match.group(1)
+    match = re.search(r"^- Started: (\S+)", text, re.MULTILINE)
+    if match and match.group(1) != "(not":
+        counters["started"] = match.group(1)
+    history = text.split(HISTORY_MARKER, 1)[1] if HISTORY_MARKER in text else ""
+    return counters, history.strip("\n")
+
+
+class EventLog:
+    """Append-only Ralph event store with a counters snapshot.
+
+    Example:
+        >>> log = EventLog(project_root / ".tf/ralph")
+        >>> log.record_ticket("pt-abc1", "COMPLETE", summary="Add login")
+        >>> log.render()  # regenerate progress.md
+    """
+
+    def __init__(self, ralph_dir: Path):
+        self.ralph_dir = Path(ralph_dir)
+        self.events_path = self.ralph_dir / EVENTS_FILE
+        self.counters_path = self.ralph_dir / COUNTERS_FILE
+        self.progress_path = self.ralph_dir / PROGRESS_FILE
+        self._lock_path = self.ralph_dir / LOCK_FILE
+
+    # -- storage ---------------------------------------------------------------
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Serialise writers across threads and processes (no-op without fcntl)."""
+        self.ralph_dir.mkdir(parents=True, exist_ok=True)
+        with locked_file(self._lock_path):
+            yield
+
+    def _read_counters(self) -> Dict[str, Any]:
+        try:
+            data = json.loads(self.counters_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return self._import_legacy()
+        counters = dict(EMPTY_COUNTERS)
+        if isinstance(data, dict):
+            counters.update(data)
+        return counters
+
+    def _rebuild_counters(self) -> Dict[str, Any]:
+        """Recompute counters by replaying events (only if counters.json was lost)."""
+        counters = dict(EMPTY_COUNTERS)
+        for event in self.events():
+            counters["events"] += 1
+            counters["started"] = counters["started"] or event.get("ts")
+            counters["last_updated"] = event.get("ts") or counters["last_updated"]
+            if event.get("type") == "ticket":
+                counters["total"] += 1
+                counters["failed" if event.get("status") == "FAILED" else "completed"] += 1
+                counters["status"] = "RUNNING"
+            elif event.get("type") == "state":
+                counters["status"] = event.get("state") or counters["status"]
+        return counters
+
+    def _import_legacy(self) -> Dict[str, Any]:
+        """Seed counters (and a history block) from a pre-existing progress.md."""
+        if self.events_path.exists():
+            return self._rebuild_counters()
+        if not self.progress_path.exists():
+            return dict(EMPTY_COUNTERS)
+        counters, history = _parse_legacy_progress(self.progress_path.read_text(encoding="utf-8"))
+        if history:
+            self._write_event({"type": "import", "ts": _utc_now(), "history": history})
+            counters["events"] += 1
+        return counters
+
+    def _write_event(self, event: Dict[str, Any]) -> None:
+        with open(self.events_path, "a", encoding="utf-8") as handle:
+            handle.write(json.dumps(event, sort_keys=True) + "\n")
+
+    def _append(self, event: Dict[str, Any], update: Dict[str, Any]) -> Dict[str, Any]:
+        with self._locked():
+            counters = self._read_counters()
+            self._write_event(event)
+            for key, value in update.items():
+                if key in ("completed", "failed", "total"):
+                    counters[key] += value
+                else:
+                    counters[key] = value
+            counters["events"] += 1
+            counters["last_updated"] = event["ts"]
+            if not counters.get("started"):
+                counters["started"] = event["ts"]
+            atomic_write_text(self.counters_path, json.dumps(counters, indent=2, sort_keys=True) + "\n")
+            return counters
+
+    # -- writers ---------------------------------------------------------------
+
+    def record_ticket(
+        self,
+        ticket: str,
+        status: str,
+        *,
+        summary: str = "",
+        issues: tuple[int, int, int] = (0, 0, 0),
+        attempt: int = 0,
+        retry_count: int = 0,
+        commit: str = "",
+        error: str = "",
+        metrics: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Append a ticket result and bump the counters.
+
+        FAILED counts as failed; every other status (COMPLETE, BLOCKED)
+        counts as completed, as in the original progress.md format.
+        `metrics` (see tf.ralph.metrics.ticket_metrics) is stored verbatim.
+
+        Returns:
+            The updated counters snapshot.
+        """
+        event: Dict[str, Any] = {
+            "type": "ticket",
+            "ts": _utc_now(),
+            "ticket": ticket,
+            "status": status,
+            "summary": summary,
+            "issues": list(issues),
+            "attempt": attempt,
+            "retry_count": retry_count,
+        }
+        if commit:
+            event["commit"] = commit
+        if error:
+            event["error"] = error
+        if metrics:
+            event["metrics"] = metrics
+        update: Dict[str, Any] = {"status": "RUNNING", "total": 1}
+        update["failed" if status == "FAILED" else "completed"] = 1
+        return self._append(event, update)
+
+    def record_state(self, state: str) -> Dict[str, Any]:
+        """Append a loop-state change (RUNNING, COMPLETE, ...)."""
+        return self._append({"type": "state", "ts": _utc_now(), "state": state}, {"status": state})
+
+    # -- readers ---------------------------------------------------------------
+
+    def counters(self) -> Dict[str, Any]:
+        """Current counters snapshot (O(1); imports a legacy progress.md once)."""
+        if not self.counters_path.exists() and self.progress_path.exists() and not self.events_path.exists():
+            with self._locked():
+                counters = self._read_counters()
+                atomic_write_text(self.counters_path, json.dumps(counters, indent=2, sort_keys=True) + "\n")
+                return counters
+        return self._read_counters()
+
+    def events(self) -> Iterator[Dict[str, Any]]:
+        """Iterate over stored events, oldest first (corrupt lines are skipped)."""
+        if not self.events_path.exists():
+            return
+        with open(self.events_path, encoding="utf-8") as handle:
+            for line in handle:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(event, dict):
+                    yield event
+
+    # -- views -----------------------------------------------------------------
+
+    def render_text(self) -> str:
+        """Render progress.md content from the counters and ticket events."""
+        counters = self.counters()
+        entries: List[str] = []
+        legacy: List[str] = []
+        for event in self.events():
+            kind = event.get("type")
+            if kind == "ticket":
+                entries.append(_format_entry(event))
+            elif kind == "import" and event.get("history"):
+                legacy.append(str(event["history"]))
+        entries.reverse()  # newest first, as entries used to be inserted after the marker
+
+        started = counters.get("started") or "(not started)"
+        lines = [
+            "# Ralph Loop Progress",
+            "",
+            "## Current State",
+            "",
+            f"- Status: {counters.get('status') or 'RUNNING'}",
+            "- Current ticket: (none)",
+            f"- Started: {started}",
+            f"- Last updated: {counters.get('last_updated') or started}",
+            "",
+            "## Statistics",
+            "",
+            f"- Tickets completed: {counters.get('completed', 0)}",
+            f"- Tickets failed: {counters.get('failed', 0)}",
+            f"- Total iterations: {counters.get('total', 0)}",
+            "",
+            "## History",
+            "",
+            HISTORY_MARKER,
+        ]
+        lines.extend(entries)
+        lines.extend(legacy)
+        return "\n".join(lines) + "\n"
+
+    def render(self, path: Optional[Path] = None) -> Path:
+        """Regenerate progress.md (or path) from the event store.
+
+        Returns:
+            The path written.
+        """
+        target = Path(path) if path is not None else self.progress_path
+        text = self.render_text()
+        target.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(target, text)
+        return target
+
+    # -- maintenance -------------------------------------------------------------
+
+    def compact(self, keep: Optional[int] = None) -> tuple[int, int]:
+        """Rewrite events.jsonl without state events (and old ticket entries).
+
+        Args:
+            keep: Keep only the newest `keep` ticket events (None = keep all).
+                Counters are cumulative and are not changed.
+
+        Returns:
+            Tuple of (events before, events after).
+        """
+        with self._locked():
+            counters = self._read_counters()
+            events = list(self.events())
+            tickets = [e for e in events if e.get("type") == "ticket"]
+            if keep is not None:
+                tickets = tickets[-keep:] if keep > 0 else []
+            kept = [e for e in events if e.get("type") == "import"] + tickets
+            self.ralph_dir.mkdir(parents=True, exist_ok=True)
+            atomic_write_text(self.events_path, "".join(json.dumps(e, sort_keys=True) + "\n" for e in kept))
+            counters["events"] = len(kept)
+            atomic_write_text(self.counters_path, json.dumps(counters, indent=2, sort_keys=True) + "\n")
+        return len(events), len(kept)
+
+
+def _format_entry(event: Dict[str, Any]) -> str:
+    ticket = event.get("ticket", "?")
+    status = event.get("status", "?")
+    crit, maj, minor = (list(event.get("issues") or []) + [0, 0, 0])[:3]
+    entry_lines = [
+        f"- {ticket}: {status} ({event.get('ts', '')})",
+        f"  - Summary: {event.get('summary', '')}",
+        f"  - Issues: Critical({crit})/Major({maj})/Minor({minor})",
+        f"  - Attempt: {event.get('attempt', 0)}, Retry Count: {event.get('retry_count', 0)}",
+        f"  - Status: {status}",
+    ]
+    if event.get("commit"):
+        entry_lines.append(f"  - Commit: {event['commit']}")
+    if event.get("error"):
+        entry_lines.append(f"  - Error: {event['error']}")
+    return "\n".join(entry_lines)
@@ -0,0 +1,406 @@
+"""File-footprint prediction for parallel ticket selection.
+
+Component tags are a coarse proxy for "these two tickets touch the same
+code". The knowledge base records what past tickets actually changed
+(`<knowledgeDir>/tickets/<id>/files_changed.txt`), so a ready ticket's file
+footprint can be estimated from similar past tickets:
+
+- Features of a ticket are its tags and the words of its title, weighted by
+  inverse document frequency over the history (so "add" or "fix" count for
+  little and `component:ralph` or "scheduler" for a lot).
+- Similarity is weighted Jaccard over those features. The footprint is every
+  file changed by at least FILE_SHARE of the (similarity-weighted) nearest
+  NEIGHBOURS, plus files named in the title (`tf/ralph/scheduler.py`,
+  `ticket_loader`) and the ticket's own earlier changes when it is reopened.
+
+Two tickets with known footprints conflict when the footprints share a file.
+A ticket without a prediction (no similar history) falls back to the
+component-tag rule. `pack_batch` then picks the largest conflict-free set of
+ready tickets, preferring queue order.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import re
+from dataclasses import dataclass, field
+from pathlib import Path, PurePosixPath
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Set, Tuple
+
+from tf.ticket_loader import Ticket
+
+FILES_CHANGED = "files_changed.txt"
+
+# Number of most similar past tickets a prediction is built from
+NEIGHBOURS = 5
+
+# Past tickets less similar than this are ignored
+MIN_SIMILARITY = 0.15
+
+# A file is predicted when neighbours holding this share of the similarity changed it
+FILE_SHARE = 0.3
+
+# pack_batch searches exhaustively among this many candidates (queue order), then greedily
+MAX_PACK_CANDIDATES = 24
+
+# Upper bound on search steps per pack_batch call
+MAX_PACK_STEPS = 20000
+
+_STOP_WORDS = frozenset(
+    "a an and are as at be by for from in into is it of on or the to with without via "
+    "add adds added fix fixes fixed make use using update support new when should can".split()
+)
+_WORD = re.compile(r"[a-z0-9]+")
+# Title tokens that look like a file, path or module name
+_PATH_HINT = re.compile(r"[A-Za-z0-9_\-]+(?:[./][A-Za-z0-9_\-]+)+|[A-Za-z0-9]+(?:_[A-Za-z0-9]+)+")
+
+
+@dataclass(frozen=True)
+class Footprint:
+    """Predicted set of files a ticket will change."""
+
+    ticket: str
+    files: frozenset = frozenset()
+    # Similarity of the closest past ticket (1.0 for direct evidence)
+    confidence: float = 0.0
+    neighbours: Tuple[str, ...] = ()
+
+    @property
+    def known(self) -> bool:
+        return bool(self.files)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"predicted_files": len(self.files), "confidence": round(self.confidence, 2)}
+
+
+@dataclass
+class PackResult:
+    """Outcome of pack_batch."""
+
+    selected: List[str] = field(default_factory=list)
+    # Ticket left out -> (conflicting selected or running ticket, shared files)
+    skipped: Dict[str, Tuple[str, List[str]]] = field(default_factory=dict)
+
+
+def normalize_path(raw: str, project_root: Path) -> Optional[str]:
+    """Repository-relative POSIX path for a files_changed.txt line (None to ignore).
+
+    Absolute paths recorded on another machine are mapped to the longest
+    suffix that exists in this checkout.
+    """
+    line = raw.strip()
+    if not line or line.startswith("#"):
+        return None
+    path = PurePosixPath(line.replace("\\", "/"))
+    if path.is_absolute():
+        try:
+            return path.relative_to(PurePosixPath(project_root.as_posix())).as_posix()
+        except ValueError:
+            pass
+        parts = path.parts[1:]
+        for start in range(len(parts) - 1):
+            candidate = PurePosixPath(*parts[start:])
+            if (project_root / candidate).exists():
+                return candidate.as_posix()
+        return None
+    normalized = os.path.normpath(path.as_posix()).replace(os.sep, "/")
+    if normalized.startswith(".."):
+        return None
+    return normalized
+
+
+def ticket_features(ticket: Optional[Ticket]) -> Set[str]:
+    """Tags and title words of a ticket."""
+    if ticket is None:
+        return set()
+    features = {f"tag:{str(tag).strip().lower()}" for tag in (ticket.tags or []) if str(tag).strip()}
+    for word in _WORD.findall((ticket.title or "").lower()):
+        if len(word) >= 3 and word not in _STOP_WORDS and not word.isdigit():
+            features.add(f"term:{word}")
+    return features
+
+
+def path_hints(title: str) -> Set[str]:
+    """Lower-cased file/module names mentioned in a title (`tf/cli.py`, `ticket_loader`)."""
+    hints: Set[str] = set()
+    for token in _PATH_HINT.findall(title or ""):
+        token = token.strip("./").lower()
+        if token:
+            hints.add(token)
+            hints.add(PurePosixPath(token).name)
+    return hints
+
+
+class FootprintPredictor:
+    """Predicts ticket file footprints from the knowledge base history.
+
+    Example:
+        >>> predictor = FootprintPredictor(project_root, knowledge_dir / "tickets", queue.tickets)
+        >>> predictor.predict("pt-abc1").files
+        frozenset({'tf/ralph/__init__.py', 'tests/test_ralph.py'})
+    """
+
+    def __init__(
+        self,
+        project_root: Path,
+        history_dir: Path,
+        tickets: Callable[[], Mapping[str, Ticket]],
+    ):
+        """
+        Args:
+            project_root: Repository root (paths are made relative to it)
+            history_dir: `<knowledgeDir>/tickets` with per-ticket files_changed.txt
+            tickets: Returns all known tickets (any status) by ID
+        """
+        self.project_root = Path(project_root)
+        self.history_dir = Path(history_dir)
+        self._tickets = tickets
+        self._knowledge_prefix = self._relative_prefix(self.history_dir.parent)
+        # ticket -> (mtime_ns, size, files)
+        self._history: Dict[str, Tuple[int, int, frozenset]] = {}
+        self._idf: Dict[str, float] = {}
+        self._features: Dict[str, Set[str]] = {}
+        self._predictions: Dict[str, Footprint] = {}
+        self._ticket_map: Mapping[str, Ticket] = {}
+        self._ticket_key: Optional[int] = None
+        self._loaded = False
+
+    # ---------------------------------------------------------------- history
+
+    @property
+    def history(self) -> Dict[str, frozenset]:
+        """Files changed by each past ticket."""
+        return {ticket: files for ticket, (_, _, files) in self._history.items()}
+
+    def refresh(self) -> bool:
+        """Pick up new history and ticket edits; call once per selection round.
+
+        Re-reads only files_changed.txt files that were added, changed or
+        removed, and drops cached predictions when the history or any
+        ticket's title/tags changed.
+
+        Returns:
+            True if cached predictions were dropped.
+        """
+        self._loaded = True
+        history_changed = self._refresh_history()
+        self._ticket_map = self._tickets()
+        ticket_key = hash(
+            frozenset((ticket_id, t.title, tuple(t.tags or ())) for ticket_id, t in self._ticket_map.items())
+        )
+        if not history_changed and ticket_key == self._ticket_key:
+            return False
+        self._ticket_key = ticket_key
+        self._build_index()
+        return True
+
+    def _refresh_history(self) -> bool:
+        seen: Dict[str, Tuple[int, int]] = {}
+        try:
+            entries = list(os.scandir(self.history_dir))
+        except OSError:
+            entries = []
+        for entry in entries:
+            if not entry.is_dir(follow_symlinks=False):
+                continue
+            try:
+                stat = os.stat(os.path.join(entry.path, FILES_CHANGED))
+            except OSError:
+                continue
+            seen[entry.name] = (stat.st_mtime_ns, stat.st_size)
+
+        changed = set(self._history) - set(seen)
+        for ticket in changed:
+            del self._history[ticket]
+        for ticket, (mtime_ns, size) in seen.items():
+            cached = self._history.get(ticket)
+            if cached is not None and cached[:2] == (mtime_ns, size):
+                continue
+            self._history[ticket] = (mtime_ns, size, self._read_files(self.history_dir / ticket / FILES_CHANGED))
+            changed.add(ticket)
+        return bool(changed)
+
+    def _read_files(self, path: Path) -> frozenset:
+        try:
+            lines = path.read_text(encoding="utf-8", errors="replace").splitlines()
+        except OSError:
+            return frozenset()
+        files = set()
+        for line in lines:
+            normalized = normalize_path(line, self.project_root)
+            # Knowledge-base artefacts are per ticket and never conflict
+            if normalized and not (self._knowledge_prefix and normalized.startswith(self._knowledge_prefix)):
+                files.add(normalized)
+        return frozenset(files)
+
+    def _relative_prefix(self, path: Path) -> str:
+        try:
+            return Path(path).resolve().relative_to(self.project_root.resolve()).as_posix() + "/"
+        except (OSError, ValueError):
+            return ""
+
+    # ------------------------------------------------------------- prediction
+
+    def _build_index(self) -> None:
+        self._features = {ticket_id: ticket_features(self._ticket_map.get(ticket_id)) for ticket_id in self._history}
+        counts: Dict[str, int] = {}
+        for features in self._features.values():
+            for feature in features:
+                counts[feature] = counts.get(feature, 0) + 1
+        total = max(1, len(self._features))
+        self._idf = {feature: math.log(1 + total / count) for feature, count in counts.items()}
+        self._predictions.clear()
+
+    def _weight(self, feature: str) -> float:
+        # Features never seen in the history are as specific as the rarest ones
+        return self._idf.get(feature, math.log(1 + max(1, len(self._features))))
+
+    def similarity(self, a: Set[str], b: Set[str]) -> float:
+        """IDF-weighted Jaccard similarity of two feature sets."""
+        union = a | b
+        if not union:
+            return 0.0
+        shared = sum(self._weight(feature) for feature in a & b)
+        return shared / sum(self._weight(feature) for feature in union)
+
+    def predict(self, ticket_id: str) -> Footprint:
+        """Predicted footprint of a ticket (cached until refresh() sees a change)."""
+        if not self._loaded:
+            self.refresh()
+        cached = self._predictions.get(ticket_id)
+        if cached is not None:
+            return cached
+        footprint = self._predict(ticket_id, self._ticket_map.get(ticket_id))
+        self._predictions[ticket_id] = footprint
+        return footprint
+
+    def _predict(self, ticket_id: str, ticket: Optional[Ticket]) -> Footprint:
+        files: Set[str] = set()
+        confidence = 0.0
+        own = self._history[ticket_id][2] if ticket_id in self._history else frozenset()
+        if own:
+            # Reopened ticket: it will most likely touch the same files again
+            files.update(own)
+            confidence = 1.0
+
+        features = ticket_features(ticket)
+        ranked: List[Tuple[float, str]] = []
+        if features:
+            for other, other_features in self._features.items():
+                if other == ticket_id or not self._history[other][2]:
+                    continue
+                score = self.similarity(features, other_features)
+                if score >= MIN_SIMILARITY:
+                    ranked.append((score, other))
+        ranked.sort(key=lambda item: (-item[0], item[1]))
+        neighbours = ranked[:NEIGHBOURS]
+        if neighbours:
+            total = sum(score for score, _ in neighbours)
+            share: Dict[str, float] = {}
+            for score, other in neighbours:
+                for path in self._history[other][2]:
+                    share[path] = share.get(path, 0.0) + score / total
+            files.update(path for path, value in share.items() if value >= FILE_SHARE)
+            confidence = max(confidence, neighbours[0][0])
+
+        hints = path_hints(ticket.title if ticket is not None else "")
+        if hints:
+            for _, _, past in self._history.values():
+                for path in past:
+                    lowered = path.lower()
+                    if lowered in hints or PurePosixPath(lowered).name in hints or PurePosixPath(lowered).stem in hints:
+                        files.add(path)
+                        confidence = 1.0
+
+        return Footprint(
+            ticket=ticket_id,
+            files=frozenset(files),
+            confidence=confidence,
+            neighbours=tuple(other for _, other in neighbours),
+        )
+
+
+def pack_batch(
+    candidates: Sequence[str],
+    slots: int,
+    conflicts: Callable[[str, str], Sequence[str]],
+    blocked_by: Optional[Mapping[str, Tuple[str, List[str]]]] = None,
+) -> PackResult:
+    """Largest conflict-free subset of candidates, up to `slots` tickets.
+
+    Among equally large sets the one that is earliest in queue order wins.
+    The first MAX_PACK_CANDIDATES candidates are searched exhaustively (within
+    MAX_PACK_STEPS); any remaining slots are then filled greedily.
+
+    Args:
+        candidates: Eligible ticket IDs in queue order
+        slots: Maximum number of tickets to select
+        conflicts: Returns the overlapping files of two tickets (empty if none);
+            a conflict without a file list (e.g. shared component tag) is
+            reported as a non-empty placeholder sequence
+        blocked_by: Candidates that conflict with running tickets, with the
+            running ticket and shared files; they are never selected
+
+    Returns:
+        PackResult with the selection (queue order) and why others were skipped.
+    """
+    result = PackResult()
+    blocked = dict(blocked_by or {})
+    result.skipped.update(blocked)
+    pool = [ticket for ticket in candidates if ticket not in blocked]
+    if slots <= 0 or not pool:
+        return result
+
+    head = pool[:MAX_PACK_CANDIDATES]
+    clash: Dict[Tuple[str, str], Sequence[str]] = {}
+
+    def overlap(a: str, b: str) -> Sequence[str]:
+        key = (a, b) if a < b else (b, a)
+        if key not in clash:
+            clash[key] = conflicts(a, b)
+        return clash[key]
+
+    best: List[int] = []
+    steps = 0
+    target = min(slots, len(head))
+
+    def search(index: int, chosen: List[int]) -> None:
+        nonlocal best, steps
+        if len(chosen) > len(best):
+            best = list(chosen)
+        if len(best) >= target or steps >= MAX_PACK_STEPS:
+            return
+        # Not enough candidates left to beat the best set found so far
+        if len(chosen) + (len(head) - index) <= len(best):
+            return
+        for position in range(index, len(head)):
+            steps += 1
+            ticket = head[position]
+            if any(overlap(head[other], ticket) for other in chosen):
+                continue
+            chosen.append(position)
+            search(position + 1, chosen)
+            chosen.pop()
+            if len(best) >= target or steps >= MAX_PACK_STEPS:
+                return
+
+    search(0, [])
+    selected = [head[position] for position in best]
+    for ticket in pool[MAX_PACK_CANDIDATES:]:
+        if len(selected) >= slots:
+            break
+        if not any(overlap(other, ticket) for other in selected):
+            selected.append(ticket)
+    result.selected = selected
+
+    chosen = set(selected)
+    for ticket in pool:
+        if ticket in chosen:
+            continue
+        for other in selected:
+            shared = overlap(other, ticket)
+            if shared:
+                result.skipped[ticket] = (other, list(shared))
+                break
+    return result
@@ -0,0 +1,351 @@
+"""Per-ticket leases so several Ralph loops can drain one backlog.
+
+With `coordination: "lease"`, loops (on one machine or on several hosts
+sharing the repository, e.g. over NFS) no longer take the global
+`.tf/ralph/lock`. Instead each loop claims a ticket before running it:
+
+    .tf/ralph/leases/<ticket>.lease   {"holder", "host", "pid", "expires", ...}
+    .tf/ralph/leases/ledger.jsonl     one line per finished ticket
+
+- Claiming, renewing, stealing and releasing a lease happen under a POSIX
+  record lock on the ticket's `<ticket>.lock` file (NFS supports these via
+  lockd), so each one reads the lease and acts on it without another loop
+  acting in between.
+- A new lease is created with O_CREAT | O_EXCL, which is atomic on local
+  filesystems and NFSv3+ (and keeps claims exclusive where record locks are
+  unavailable).
+- The holder renews (heartbeats) its leases from a background thread every
+  ttl/3 by replacing the lease file atomically, so the lease never
+  disappears while it is held. A lease whose `expires` has passed belongs to
+  a crashed or partitioned loop and may be stolen (replaced the same way);
+  the old holder finds another holder in it on its next renewal and marks
+  the ticket lost. The loop drops the result of a lost ticket (and stops
+  its worker) instead of recording it.
+- Finished tickets are appended to the ledger (under a POSIX record lock,
+  which NFS supports via lockd) and their lease is released. A ticket whose
+  latest ledger entry is newer than its ticket file is not picked up again,
+  which covers the window before another loop's `tk close` is visible (e.g.
+  until a parallel worktree branch is merged).
+
+Expiry uses wall-clock time, so hosts sharing a lease directory need
+roughly synchronised clocks (well within the TTL).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from tf.utils import atomic_write_text, locked_file
+
+# Default lease lifetime without a heartbeat
+DEFAULT_TTL_SECS = 120.0
+
+LEASE_SUFFIX = ".lease"
+LOCK_SUFFIX = ".lock"
+LEDGER_NAME = "ledger.jsonl"
+
+
+def default_holder_id() -> str:
+    """Identify this loop: host, pid and a random suffix (pids repeat across hosts)."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class LeaseManager:
+    """Claims, renews and releases ticket leases for one Ralph loop.
+
+    Example:
+        >>> leases = LeaseManager(ralph_dir / "leases", ttl_secs=120)
+        >>> leases.start_heartbeat()
+        >>> ticket = leases.claim_first(["pt-abc1", "pt-def2"])
+        >>> ...
+        >>> leases.complete(ticket, "COMPLETE")
+        >>> leases.close()
+    """
+
+    def __init__(
+        self,
+        leases_dir: Path,
+        holder: Optional[str] = None,
+        ttl_secs: float = DEFAULT_TTL_SECS,
+        tickets_dir: Optional[Path] = None,
+    ):
+        """
+        Args:
+            leases_dir: Shared directory holding lease files and the ledger
+            holder: This loop's holder ID (default: host:pid:random)
+            ttl_secs: Lease lifetime; leases are renewed every ttl/3
+            tickets_dir: `.tickets` directory, used to ignore ledger entries
+                older than the ticket file (reopened tickets)
+        """
+        self.leases_dir = Path(leases_dir)
+        self.holder = holder or default_holder_id()
+        self.ttl_secs = max(1.0, float(ttl_secs))
+        self.tickets_dir = Path(tickets_dir) if tickets_dir is not None else None
+        self.ledger_path = self.leases_dir / LEDGER_NAME
+        self.held: set[str] = set()
+        # Tickets whose lease was taken over by another holder
+        self.lost: set[str] = set()
+        self._lock = threading.Lock()
+        # Record locks do not exclude threads of the same process
+        self._file_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._ledger: Dict[str, Dict[str, Any]] = {}
+        self._ledger_offset = 0
+        self.leases_dir.mkdir(parents=True, exist_ok=True)
+
+    # ---------------------------------------------------------------- leases
+
+    def lease_path(self, ticket: str) -> Path:
+        return self.leases_dir / f"{ticket}{LEASE_SUFFIX}"
+
+    def read(self, ticket: str) -> Optional[Dict[str, Any]]:
+        """Current lease for a ticket (None if unclaimed or unreadable)."""
+        return self._read_file(self.lease_path(ticket))
+
+    def is_expired(self, lease: Dict[str, Any], now: Optional[float] = None) -> bool:
+        now = time.time() if now is None else now
+        try:
+            return float(lease.get("expires", 0)) <= now
+        except (TypeError, ValueError):
+            return True
+
+    def available(self, ticket: str) -> bool:
+        """True if this loop may claim the ticket (or already holds it)."""
+        if ticket in self.held:
+            return True
+        if self._finished_elsewhere(ticket):
+            return False
+        lease = self.read(ticket)
+        return lease is None or self.is_expired(lease)
+
+    def claim(self, ticket: str) -> bool:
+        """Atomically claim a ticket, stealing an expired lease if needed.
+
+        Returns:
+            True if this loop now holds the ticket's lease.
+        """
+        with self._lock:
+            if ticket in self.held:
+                return True
+        if self._finished_elsewhere(ticket):
+            return False
+        path = self.lease_path(ticket)
+        with self._locked(ticket):
+            if not self._create_exclusive(path, self._lease_body(ticket)):
+                current = self._read_file(path)
+                if current is not None and not self.is_expired(current):
+                    return False
+                if current is None and not self._abandoned(path):
+                    return False
+                self._write(path, self._lease_body(ticket))
+        with self._lock:
+            self.held.add(ticket)
+            self.lost.discard(ticket)
+        return True
+
+    def claim_first(self, tickets: Iterable[str]) -> Optional[str]:
+        """Claim the first ticket in order that is not held by another loop."""
+        for ticket in tickets:
+            if self.claim(ticket):
+                return ticket
+        return None
+
+    def renew(self, ticket: str) -> bool:
+        """Extend a held lease; returns False (and marks it lost) if another loop took it.
+
+        The lease is checked and replaced under the ticket's lock, so a steal
+        is never overwritten and the lease file exists throughout.
+        """
+        path = self.lease_path(ticket)
+        with self._locked(ticket):
+            current = self._read_file(path)
+            if current is None or current.get("holder") != self.holder:
+                self._mark_lost(ticket)
+                return False
+            now = time.time()
+            try:
+                self._write(path, dict(current, expires=now + self.ttl_secs, renewed=now))
+            except OSError:
+                return False
+        return True
+
+    def confirm(self, ticket: str) -> bool:
+        """Renew a lease before recording its ticket; False if another loop took it over.
+
+        A renewal that fails for another reason (e.g. a transient I/O error)
+        does not count as lost.
+        """
+        return self.renew(ticket) or ticket not in self.lost_tickets()
+
+    def lost_tickets(self) -> set[str]:
+        """Tickets whose lease was taken over (snapshot, safe from the heartbeat thread)."""
+        with self._lock:
+            return set(self.lost)
+
+    def _mark_lost(self, ticket: str) -> None:
+        with self._lock:
+            self.held.discard(ticket)
+            self.lost.add(ticket)
+
+    def heartbeat(self) -> List[str]:
+        """Renew every held lease; returns the tickets that were lost."""
+        with self._lock:
+            held = sorted(self.held)
+        return [ticket for ticket in held if not self.renew(ticket)]
+
+    def release(self, ticket: str) -> None:
+        """Give up a lease (only if this loop still holds it)."""
+        with self._lock:
+            self.held.discard(ticket)
+        path = self.lease_path(ticket)
+        with self._locked(ticket):
+            current = self._read_file(path)
+            if current is not None and current.get("holder") == self.holder:
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+
+    def release_all(self) -> None:
+        with self._lock:
+            held = list(self.held)
+        for ticket in held:
+            self.release(ticket)
+
+    def active(self) -> List[Dict[str, Any]]:
+        """Unexpired leases of all loops."""
+        leases = []
+        for path in sorted(self.leases_dir.glob(f"*{LEASE_SUFFIX}")):
+            lease = self._read_file(path)
+            if lease is not None and not self.is_expired(lease):
+                leases.append(lease)
+        return leases
+
+    # ---------------------------------------------------------------- ledger
+
+    def complete(self, ticket: str, status: str, **fields: Any) -> None:
+        """Record a finished ticket in the shared ledger and release its lease."""
+        entry = {"ticket": ticket, "status": status, "holder": self.holder, "ts": time.time(), **fields}
+        line = (json.dumps(entry, sort_keys=True) + "\n").encode("utf-8")
+        with locked_file(self.ledger_path, record_lock=True) as fd:
+            os.write(fd, line)
+            os.fsync(fd)
+        self.release(ticket)
+
+    def ledger(self) -> Dict[str, Dict[str, Any]]:
+        """Latest ledger entry per ticket (read incrementally)."""
+        try:
+            with open(self.ledger_path, "rb") as handle:
+                handle.seek(self._ledger_offset)
+                data = handle.read()
+        except FileNotFoundError:
+            return self._ledger
+        # Only consume complete lines; a partial last line is re-read next time.
+        end = data.rfind(b"\n") + 1
+        for raw in data[:end].splitlines():
+            try:
+                entry = json.loads(raw)
+            except ValueError:
+                continue
+            if isinstance(entry, dict) and entry.get("ticket"):
+                self._ledger[str(entry["ticket"])] = entry
+        self._ledger_offset += end
+        return self._ledger
+
+    def _finished_elsewhere(self, ticket: str) -> bool:
+        entry = self.ledger().get(ticket)
+        if entry is None or entry.get("status") != "COMPLETE":
+            return False
+        if self.tickets_dir is not None:
+            try:
+                # Reopened since (ticket file changed after the ledger entry)
+                if (self.tickets_dir / f"{ticket}.md").stat().st_mtime > float(entry.get("ts", 0)):
+                    return False
+            except (OSError, TypeError, ValueError):
+                pass
+        return True
+
+    # ------------------------------------------------------------- heartbeat
+
+    def start_heartbeat(self, interval: Optional[float] = None) -> None:
+        """Renew held leases in a background thread (every ttl/3 by default)."""
+        if self._thread is not None:
+            return
+        interval = interval if interval is not None else self.ttl_secs / 3
+
+        def beat() -> None:
+            while not self._stop.wait(interval):
+                self.heartbeat()
+
+        self._thread = threading.Thread(target=beat, name="ralph-lease-heartbeat", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        """Stop the heartbeat and release every held lease."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.release_all()
+
+    # -------------------------------------------------------------- internals
+
+    @contextmanager
+    def _locked(self, ticket: str) -> Iterator[None]:
+        """Hold the ticket's lease lock against other loops and this loop's threads."""
+        lock_path = self.leases_dir / f"{ticket}{LOCK_SUFFIX}"
+        with self._file_lock, locked_file(lock_path, record_lock=True, required=False):
+            yield
+
+    @staticmethod
+    def _write(path: Path, body: Dict[str, Any]) -> None:
+        atomic_write_text(path, json.dumps(body, sort_keys=True), fsync=True)
+
+    def _lease_body(self, ticket: str) -> Dict[str, Any]:
+        now = time.time()
+        return {
+            "ticket": ticket,
+            "holder": self.holder,
+            "host": socket.gethostname(),
+            "pid": os.getpid(),
+            "acquired": now,
+            "expires": now + self.ttl_secs,
+            "ttl": self.ttl_secs,
+        }
+
+    @staticmethod
+    def _create_exclusive(path: Path, body: Dict[str, Any]) -> bool:
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        except FileExistsError:
+            return False
+        try:
+            os.write(fd, json.dumps(body, sort_keys=True).encode("utf-8"))
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        return True
+
+    @staticmethod
+    def _read_file(path: Path) -> Optional[Dict[str, Any]]:
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        return data if isinstance(data, dict) else None
+
+    def _abandoned(self, path: Path) -> bool:
+        """True if an unreadable lease is old enough to be stale (not mid-create)."""
+        try:
+            return time.time() - path.stat().st_mtime >= self.ttl_secs
+        except FileNotFoundError:
+            return True
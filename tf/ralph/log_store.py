@@ -0,0 +1,295 @@
+"""Per-attempt, compressed `pi` logs under `.tf/ralph/logs/`.
+
+Every `pi` attempt gets its own files instead of overwriting the ticket's
+previous log:
+
+    <ticket>.<attempt>.jsonl.gz   JSON events (--capture-json)
+    <ticket>.<attempt>.log.gz     Other pi output (--pi-output file)
+
+JSON events are compressed while they are streamed (tf.ralph.pi_stream
+writes into the compressing writer). Output that a subprocess writes to a
+file descriptor directly is written plain and compressed when the attempt
+ends (seal). `zstd` needs the optional `zstandard` package; without it gzip
+is used. Plain `<ticket>.jsonl` / `<ticket>.log` files from older versions
+are still listed and read as attempt 0.
+
+Retention is applied at loop start and exit: files older than the age
+limit are deleted first, then the oldest files until the directory fits
+the size limit.
+"""
+
+from __future__ import annotations
+
+import gzip
+import re
+import shutil
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+# Compression name -> file suffix
+COMPRESSION_SUFFIXES = {"gzip": ".gz", "zstd": ".zst", "none": ""}
+
+# Log kinds written per attempt
+JSONL = "jsonl"
+OUTPUT = "log"
+
+# Minimum seconds between flushes of a compressed stream (flushing every
+# small write would defeat compression; this still lets `tf ralph logs`
+# follow a running attempt)
+FLUSH_INTERVAL_SECS = 1.0
+
+_NAME_RE = re.compile(r"^(?P<ticket>.+?)(?:\.(?P<attempt>\d+))?\.(?P<kind>jsonl|log)(?P<suffix>\.gz|\.zst)?$")
+
+
+@dataclass(frozen=True)
+class LogFile:
+    """One log file in the store."""
+
+    path: Path
+    ticket: str
+    attempt: int
+    kind: str
+
+    @property
+    def compression(self) -> str:
+        for name, suffix in COMPRESSION_SUFFIXES.items():
+            if suffix and self.path.name.endswith(suffix):
+                return name
+        return "none"
+
+
+class _StreamWriter:
+    """Binary writer over a compressed stream with throttled flushes."""
+
+    def __init__(self, raw: IO[bytes], stream: Any, flush: Any):
+        self._raw = raw
+        self._stream = stream
+        self._flush = flush
+        self._flushed_at = time.monotonic()
+
+    def write(self, data: bytes) -> int:
+        self._stream.write(data)
+        return len(data)
+
+    def flush(self) -> None:
+        now = time.monotonic()
+        if now - self._flushed_at >= FLUSH_INTERVAL_SECS:
+            self._flush()
+            self._raw.flush()
+            self._flushed_at = now
+
+    def close(self) -> None:
+        if self._stream is None:
+            return
+        stream, self._stream = self._stream, None
+        stream.close()
+        if not self._raw.closed:
+            self._raw.close()
+
+
+def parse_log_name(path: Path) -> Optional[LogFile]:
+    """Parse a log file name (None if the file is not a ticket log)."""
+    match = _NAME_RE.match(path.name)
+    if not match:
+        return None
+    return LogFile(path, match.group("ticket"), int(match.group("attempt") or 0), match.group("kind"))
+
+
+class LogStore:
+    """Per-attempt ticket logs with compression and retention.
+
+    Example:
+        >>> store = LogStore(ralph_dir / "logs", compression="gzip", max_bytes=1 << 30)
+        >>> attempt = store.next_attempt("pt-abc1")
+        >>> sink = store.open_stream("pt-abc1", attempt, JSONL)
+    """
+
+    def __init__(
+        self,
+        logs_dir: Path,
+        compression: str = "gzip",
+        max_bytes: int = 0,
+        max_age_days: float = 0,
+    ):
+        """
+        Args:
+            logs_dir: Directory holding the logs
+            compression: "gzip", "zstd" or "none" (zstd falls back to gzip
+                when `zstandard` is not installed)
+            max_bytes: Total size limit (0 = unlimited)
+            max_age_days: Delete logs older than this (0 = keep forever)
+        """
+        compression = (compression or "none").strip().lower()
+        if compression not in COMPRESSION_SUFFIXES:
+            raise ValueError(f"Unknown log compression: {compression}")
+        if compression == "zstd" and zstandard is None:
+            compression = "gzip"
+        self.logs_dir = Path(logs_dir)
+        self.compression = compression
+        self.max_bytes = max(0, int(max_bytes))
+        self.max_age_days = max(0.0, float(max_age_days))
+
+    @classmethod
+    def from_config(cls, logs_dir: Path, config: Dict[str, Any]) -> LogStore:
+        """Build a store from Ralph config (logCompression, logMaxMb, logMaxAgeDays)."""
+        compression = str(config.get("logCompression", "gzip"))
+        if compression not in COMPRESSION_SUFFIXES:
+            compression = "gzip"
+        try:
+            max_mb = float(config.get("logMaxMb", 0) or 0)
+        except (TypeError, ValueError):
+            max_mb = 0.0
+        try:
+            max_age_days = float(config.get("logMaxAgeDays", 0) or 0)
+        except (TypeError, ValueError):
+            max_age_days = 0.0
+        return cls(logs_dir, compression, int(max_mb * 1024 * 1024), max_age_days)
+
+    # ------------------------------------------------------------------ writing
+
+    def files(self, ticket: Optional[str] = None) -> List[LogFile]:
+        """Log files in the store (optionally for one ticket), oldest attempt first."""
+        if not self.logs_dir.is_dir():
+            return []
+        found = []
+        for path in self.logs_dir.iterdir():
+            entry = parse_log_name(path) if path.is_file() else None
+            if entry is not None and (ticket is None or entry.ticket == ticket):
+                found.append(entry)
+        return sorted(found, key=lambda e: (e.ticket, e.attempt, e.kind))
+
+    def next_attempt(self, ticket: str) -> int:
+        """Attempt number for the ticket's next `pi` run (1-based)."""
+        return max((entry.attempt for entry in self.files(ticket)), default=0) + 1
+
+    def path(self, ticket: str, attempt: int, kind: str, compressed: bool = True) -> Path:
+        suffix = COMPRESSION_SUFFIXES[self.compression] if compressed else ""
+        return self.logs_dir / f"{ticket}.{attempt}.{kind}{suffix}"
+
+    def open_stream(self, ticket: str, attempt: int, kind: str = JSONL) -> IO[bytes]:
+        """Open a binary writer that compresses as it goes."""
+        self.logs_dir.mkdir(parents=True, exist_ok=True)
+        raw = open(self.path(ticket, attempt, kind), "wb")
+        if self.compression == "gzip":
+            stream = gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6)
+            return _StreamWriter(raw, stream, stream.flush)  # type: ignore[return-value]
+        if self.compression == "zstd":
+            stream = zstandard.ZstdCompressor(level=3).stream_writer(raw, closefd=False)
+            return _StreamWriter(raw, stream, lambda: stream.flush(zstandard.FLUSH_BLOCK))  # type: ignore[return-value]
+        return raw
+
+    def seal(self, path: Path) -> Path:
+        """Compress a plain log written by a subprocess; returns the final path."""
+        path = Path(path)
+        if self.compression == "none" or not path.exists():
+            return path
+        target = path.with_name(path.name + COMPRESSION_SUFFIXES[self.compression])
+        with open(path, "rb") as source:
+            if self.compression == "gzip":
+                with gzip.open(target, "wb", compresslevel=6) as sink:
+                    shutil.copyfileobj(source, sink)
+            else:
+                with open(target, "wb") as raw:
+                    zstandard.ZstdCompressor(level=3).copy_stream(source, raw)
+        path.unlink()
+        return target
+
+    # ------------------------------------------------------------------ reading
+
+    def find(self, ticket: str, attempt: Optional[int] = None, kind: str = JSONL) -> Optional[LogFile]:
+        """The ticket's log of the given kind for an attempt (default: latest)."""
+        matches = [entry for entry in self.files(ticket) if entry.kind == kind]
+        if attempt is not None:
+            matches = [entry for entry in matches if entry.attempt == attempt]
+        return matches[-1] if matches else None
+
+    def read_chunks(self, entry: LogFile, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        """Yield the decompressed content of a log file.
+
+        Decompression is incremental, so a stream that is still being written
+        (or was cut off) yields everything up to its last flushed block
+        instead of raising.
+        """
+        if entry.compression == "zstd" and zstandard is None:
+            raise RuntimeError(f"{entry.path.name} is zstd-compressed; install `zstandard` to read it")
+        with open(entry.path, "rb") as raw:
+            decompressor = self._decompressor(entry.compression)
+            while True:
+                data = raw.read(chunk_size)
+                if not data:
+                    return
+                if decompressor is None:
+                    yield data
+                    continue
+                while data:
+                    chunk = decompressor.decompress(data)
+                    if chunk:
+                        yield chunk
+                    data = b""
+                    if getattr(decompressor, "eof", False):
+                        # Concatenated gzip members / zstd frames
+                        data = decompressor.unused_data
+                        decompressor = self._decompressor(entry.compression)
+
+    @staticmethod
+    def _decompressor(compression: str) -> Any:
+        if compression == "gzip":
+            return zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if compression == "zstd":
+            return zstandard.ZstdDecompressor().decompressobj()
+        return None
+
+    # ---------------------------------------------------------------- retention
+
+    def enforce_retention(self, now: Optional[float] = None) -> Tuple[int, int]:
+        """Delete logs past the age limit, then the oldest until under the size limit.
+
+        Returns:
+            Tuple of (files_removed, bytes_freed)
+        """
+        if not self.max_bytes and not self.max_age_days:
+            return 0, 0
+        now = time.time() if now is None else now
+        entries: List[Tuple[float, int, Path]] = []
+        for entry in self.files():
+            try:
+                stat = entry.path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+        entries.sort()
+
+        removed = freed = 0
+        keep: List[Tuple[float, int, Path]] = []
+        cutoff = now - self.max_age_days * 86400 if self.max_age_days else None
+        for mtime, size, path in entries:
+            if cutoff is not None and mtime < cutoff:
+                if self._unlink(path):
+                    removed, freed = removed + 1, freed + size
+            else:
+                keep.append((mtime, size, path))
+        if self.max_bytes:
+            total = sum(size for _, size, _ in keep)
+            for _, size, path in keep:
+                if total <= self.max_bytes:
+                    break
+                if self._unlink(path):
+                    removed, freed = removed + 1, freed + size
+                total -= size
+        return removed, freed
+
+    @staticmethod
+    def _unlink(path: Path) -> bool:
+        try:
+            path.unlink()
+            return True
+        except FileNotFoundError:
+            return False
@@ -0,0 +1,226 @@
+"""Merge queue for Ralph parallel mode (`parallelAutoMerge`).
+
+Each parallel ticket runs on its own `ralph/<ticket>` branch in a worktree.
+Without merging, later tickets start from a stale base and ticket closures
+made in a worktree never reach the main checkout. The merge queue lands
+finished branches on the base branch in completion order:
+
+- If the base branch has not moved since the ticket started, the base is
+  fast-forwarded to the ticket branch.
+- Otherwise the ticket branch is rebased onto the current base tip inside its
+  worktree, then fast-forwarded.
+- A rebase conflict is aborted and reported as ``conflict`` so the caller can
+  re-queue the ticket on the updated tip instead of failing the loop.
+- If the base branch is checked out and the main checkout has local changes
+  to files the merge would update, nothing is touched and the merge is
+  reported as ``blocked``; the ticket branch stays queued until the checkout
+  is clean again.
+
+Because the base branch only ever moves forward, worktrees created after a
+merge (which start from ``HEAD`` of the main checkout) see the new tip.
+"""
+
+from __future__ import annotations
+
+import subprocess
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+# Merge outcomes
+MERGED = "merged"
+EMPTY = "empty"
+CONFLICT = "conflict"
+BLOCKED = "blocked"
+ERROR = "error"
+
+
+class MergeError(RuntimeError):
+    """Raised when the merge queue cannot be set up."""
+
+
+@dataclass
+class MergeResult:
+    """Outcome of merging one ticket branch.
+
+    Attributes:
+        ticket: Ticket ID whose branch was merged
+        status: One of "merged", "empty", "conflict", "blocked" or "error"
+        branch: The ticket branch (`ralph/<ticket>`)
+        base_branch: Branch the ticket was merged into
+        commit: Base tip after the merge (None unless merged)
+        rebased: True if the branch had to be rebased onto a newer base
+        detail: Error, conflict or blocking details
+    """
+
+    ticket: str
+    status: str
+    branch: str
+    base_branch: str
+    commit: Optional[str] = None
+    rebased: bool = False
+    detail: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        """True if the ticket's work is on the base branch (or there was none)."""
+        return self.status in (MERGED, EMPTY)
+
+    def to_dict(self) -> dict[str, Any]:
+        data: dict[str, Any] = {
+            "merge_status": self.status,
+            "branch": self.branch,
+            "base_branch": self.base_branch,
+            "rebased": self.rebased,
+        }
+        if self.commit:
+            data["commit"] = self.commit
+        return data
+
+
+class MergeQueue:
+    """Serialises ticket branch merges onto a base branch.
+
+    Example:
+        >>> queue = MergeQueue(repo_root)
+        >>> result = queue.merge("pt-abc1", worktree_path)
+        >>> if result.status == "conflict":
+        ...     ...  # re-queue pt-abc1 on the new tip
+    """
+
+    def __init__(self, repo_root: Path, base_branch: Optional[str] = None):
+        """Create a merge queue.
+
+        Args:
+            repo_root: Main checkout of the repository
+            base_branch: Branch to merge into (default: branch checked out in repo_root)
+
+        Raises:
+            MergeError: If base_branch is not given and HEAD is detached.
+        """
+        self.repo_root = Path(repo_root)
+        if base_branch is None:
+            result = self._git("symbolic-ref", "--quiet", "--short", "HEAD")
+            if result.returncode != 0 or not result.stdout.strip():
+                raise MergeError("HEAD is detached; cannot determine the base branch")
+            base_branch = result.stdout.strip()
+        self.base_branch = base_branch
+        self.merged = 0
+        self.conflicts = 0
+
+    # -- git helpers -------------------------------------------------------
+
+    def _git(self, *args: str, cwd: Optional[Path] = None) -> subprocess.CompletedProcess:
+        return subprocess.run(
+            ["git", "-C", str(cwd or self.repo_root), *args],
+            capture_output=True,
+            text=True,
+        )
+
+    @staticmethod
+    def _detail(result: subprocess.CompletedProcess) -> str:
+        return (result.stderr or result.stdout or "").strip() or f"exit {result.returncode}"
+
+    def _rev(self, ref: str, cwd: Optional[Path] = None) -> Optional[str]:
+        result = self._git("rev-parse", "--verify", "--quiet", f"{ref}^{{commit}}", cwd=cwd)
+        return result.stdout.strip() if result.returncode == 0 else None
+
+    def _is_ancestor(self, ancestor: str, descendant: str) -> bool:
+        return self._git("merge-base", "--is-ancestor", ancestor, descendant).returncode == 0
+
+    def _base_checked_out(self) -> bool:
+        result = self._git("symbolic-ref", "--quiet", "--short", "HEAD")
+        return result.returncode == 0 and result.stdout.strip() == self.base_branch
+
+    def _dirty_paths(self, old: str, new: str) -> list[str]:
+        """Local changes in the main checkout that a fast-forward from old to new would touch."""
+        changed = self._git("diff", "--name-only", old, new)
+        if changed.returncode != 0:
+            return []
+        local = self._git("diff", "--name-only", "HEAD")
+        untracked = self._git("ls-files", "--others", "--exclude-standard")
+        dirty = set(local.stdout.splitlines()) | set(untracked.stdout.splitlines())
+        return sorted(dirty.intersection(changed.stdout.splitlines()))
+
+    def _rebase(self, worktree_path: Path, onto: str) -> tuple[Optional[subprocess.CompletedProcess], list[str]]:
+        """Rebase the worktree's branch onto `onto`.
+
+        Returns:
+            Tuple of (failed result or None, conflicting paths). A failed rebase
+            is aborted, leaving the branch where it was.
+        """
+        result = self._git("rebase", "--quiet", onto, cwd=worktree_path)
+        if result.returncode == 0:
+            return None, []
+        unmerged = self._git("diff", "--name-only", "--diff-filter=U", cwd=worktree_path)
+        conflicts = unmerged.stdout.split() if unmerged.returncode == 0 else []
+        self._git("rebase", "--abort", cwd=worktree_path)
+        return result, conflicts
+
+    def _advance(self, new: str, old: str) -> subprocess.CompletedProcess:
+        """Fast-forward the base branch from old to new."""
+        if self._base_checked_out():
+            # Keep the main checkout's working tree in step with the branch.
+            return self._git("merge", "--ff-only", "--quiet", new)
+        ref = f"refs/heads/{self.base_branch}"
+        return self._git("update-ref", "-m", "ralph: merge queue fast-forward", ref, new, old)
+
+    # -- public API ------------------------------------------------------------
+
+    def merge(self, ticket: str, worktree_path: Path) -> MergeResult:
+        """Land the ticket's committed work on the base branch.
+
+        Args:
+            ticket: Ticket ID (its branch is `ralph/<ticket>`)
+            worktree_path: Worktree the ticket ran in (used for rebasing)
+
+        Returns:
+            MergeResult describing the outcome; conflicts leave the base
+            branch untouched and the ticket branch at its original commit,
+            and a blocked merge leaves both (and the main checkout) as they
+            were so it can be retried later.
+        """
+        branch = f"ralph/{ticket}"
+        result = MergeResult(ticket=ticket, status=ERROR, branch=branch, base_branch=self.base_branch)
+
+        base_tip = self._rev(f"refs/heads/{self.base_branch}")
+        head = self._rev("HEAD", cwd=worktree_path)
+        if base_tip is None or head is None:
+            result.detail = f"cannot resolve {self.base_branch if base_tip is None else branch}"
+            return result
+
+        if self._is_ancestor(head, base_tip):
+            # No commits beyond the base: nothing to land.
+            result.status = EMPTY
+            return result
+
+        if not self._is_ancestor(base_tip, head):
+            failed, conflicts = self._rebase(worktree_path, base_tip)
+            if failed is not None:
+                if conflicts:
+                    result.status = CONFLICT
+                    result.detail = "conflicts in " + ", ".join(conflicts)
+                    self.conflicts += 1
+                else:
+                    result.detail = self._detail(failed)
+                return result
+            result.rebased = True
+            head = self._rev("HEAD", cwd=worktree_path) or head
+
+        if self._base_checked_out():
+            dirty = self._dirty_paths(base_tip, head)
+            if dirty:
+                # `merge --ff-only` would refuse; the branch is fine, the checkout is not
+                result.status = BLOCKED
+                result.detail = "main checkout dirty: " + ", ".join(dirty)
+                return result
+
+        advanced = self._advance(head, base_tip)
+        if advanced.returncode != 0:
+            result.detail = self._detail(advanced)
+            return result
+
+        result.status = MERGED
+        result.commit = head
+        self.merged += 1
+        return result
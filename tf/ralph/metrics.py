@@ -0,0 +1,229 @@
+"""Ralph throughput metrics (`tf ralph stats`).
+
+Per-ticket metrics are attached to the ticket events in `events.jsonl` (see
+tf.ralph.event_log) from timestamps the loop already takes: when a ticket
+became ready, when its worktree was set up, when `pi` was launched and when
+the result was recorded. Nothing is measured beyond those points.
+
+This module aggregates them into a report (throughput, duration percentiles,
+failure rate, worker utilisation) and a Prometheus textfile that a local
+node-exporter textfile collector can pick up.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from tf.utils import atomic_write_text
+
+
+def ticket_metrics(
+    *,
+    duration_secs: float,
+    attempts: int,
+    exit_code: int,
+    mode: str,
+    workers: int,
+    run_id: str,
+    timeouts: int = 0,
+    queue_wait_secs: float = 0.0,
+    worktree_setup_secs: float = 0.0,
+) -> Dict[str, Any]:
+    """Build the metrics dict stored with a ticket event.
+
+    Args:
+        duration_secs: Wall time from first launch (incl. worktree setup) to result
+        attempts: Number of `pi` runs for the ticket
+        exit_code: Final return code (-1 = timed out)
+        mode: "serial" or "parallel"
+        workers: Worker slots in the run (1 for serial)
+        run_id: Identifier of the loop run (its start timestamp)
+        timeouts: Attempts terminated on timeout
+        queue_wait_secs: Time between the ticket being seen ready and launched
+        worktree_setup_secs: Time spent creating/resetting worktrees
+    """
+    return {
+        "duration_secs": round(max(0.0, duration_secs), 3),
+        "attempts": attempts,
+        "restarts": max(0, attempts - 1),
+        "timeouts": timeouts,
+        "queue_wait_secs": round(max(0.0, queue_wait_secs), 3),
+        "worktree_setup_secs": round(max(0.0, worktree_setup_secs), 3),
+        "exit_code": exit_code,
+        "mode": mode,
+        "workers": max(1, workers),
+        "run_id": run_id,
+    }
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of values (0.0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+@dataclass
+class RalphStats:
+    """Aggregated Ralph metrics over the recorded ticket events."""
+
+    tickets: int = 0
+    completed: int = 0
+    failed: int = 0
+    timeouts: int = 0
+    restarts: int = 0
+    runs: int = 0
+    busy_secs: float = 0.0
+    span_secs: float = 0.0
+    capacity_secs: float = 0.0
+    queue_wait_secs: float = 0.0
+    worktree_setup_secs: float = 0.0
+    p50_duration_secs: float = 0.0
+    p95_duration_secs: float = 0.0
+    by_mode: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def failure_rate(self) -> float:
+        return self.failed / self.tickets if self.tickets else 0.0
+
+    @property
+    def throughput_per_hour(self) -> float:
+        return self.tickets / (self.span_secs / 3600) if self.span_secs > 0 else 0.0
+
+    @property
+    def utilisation(self) -> float:
+        """Fraction of worker-slot time spent on tickets."""
+        return min(1.0, self.busy_secs / self.capacity_secs) if self.capacity_secs > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["failure_rate"] = round(self.failure_rate, 4)
+        data["throughput_per_hour"] = round(self.throughput_per_hour, 3)
+        data["utilisation"] = round(self.utilisation, 4)
+        return data
+
+
+def _epoch(ts: str) -> Optional[float]:
+    try:
+        return datetime.strptime(ts, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def compute_stats(events: Iterable[Dict[str, Any]]) -> RalphStats:
+    """Aggregate ticket events that carry metrics.
+
+    Throughput and utilisation use each run's span: from the earliest ticket
+    start to the latest result. Utilisation is busy time over workers x span.
+    """
+    stats = RalphStats()
+    durations: List[float] = []
+    runs: Dict[str, Dict[str, float]] = {}
+    for event in events:
+        metrics = event.get("metrics")
+        if event.get("type") != "ticket" or not isinstance(metrics, dict):
+            continue
+        duration = float(metrics.get("duration_secs", 0.0))
+        stats.tickets += 1
+        if event.get("status") == "FAILED":
+            stats.failed += 1
+        else:
+            stats.completed += 1
+        stats.timeouts += int(metrics.get("timeouts", 0))
+        stats.restarts += int(metrics.get("restarts", 0))
+        stats.queue_wait_secs += float(metrics.get("queue_wait_secs", 0.0))
+        stats.worktree_setup_secs += float(metrics.get("worktree_setup_secs", 0.0))
+        stats.busy_secs += duration
+        mode = str(metrics.get("mode", "serial"))
+        stats.by_mode[mode] = stats.by_mode.get(mode, 0) + 1
+        durations.append(duration)
+
+        finished = _epoch(str(event.get("ts", "")))
+        if finished is None:
+            continue
+        run = runs.setdefault(
+            str(metrics.get("run_id", "")),
+            {"start": finished - duration, "end": finished, "workers": 1.0},
+        )
+        run["start"] = min(run["start"], finished - duration)
+        run["end"] = max(run["end"], finished)
+        run["workers"] = max(run["workers"], float(metrics.get("workers", 1)))
+
+    for run in runs.values():
+        span = max(0.0, run["end"] - run["start"])
+        stats.span_secs += span
+        stats.capacity_secs += span * run["workers"]
+    stats.runs = len(runs)
+    stats.p50_duration_secs = round(percentile(durations, 50), 3)
+    stats.p95_duration_secs = round(percentile(durations, 95), 3)
+    stats.busy_secs = round(stats.busy_secs, 3)
+    return stats
+
+
+def format_stats(stats: RalphStats) -> str:
+    """Human-readable report for `tf ralph stats`."""
+    if not stats.tickets:
+        return "No ticket metrics recorded yet."
+    lines = [
+        f"Tickets:              {stats.tickets} ({stats.completed} complete, {stats.failed} failed) over {stats.runs} run(s)",
+        f"Throughput:           {stats.throughput_per_hour:.2f} tickets/hour",
+        f"Ticket duration:      p50 {stats.p50_duration_secs:.1f}s, p95 {stats.p95_duration_secs:.1f}s",
+        f"Failure rate:         {stats.failure_rate:.1%}",
+        f"Timeouts / restarts:  {stats.timeouts} / {stats.restarts}",
+        f"Queue wait (total):   {stats.queue_wait_secs:.1f}s",
+        f"Worktree setup:       {stats.worktree_setup_secs:.1f}s",
+        f"Worker utilisation:   {stats.utilisation:.1%}",
+    ]
+    return "\n".join(lines)
+
+
+def prometheus_text(stats: RalphStats) -> str:
+    """Render stats in the Prometheus text exposition format."""
+    metrics = [
+        ("ralph_tickets_total", "counter", "Tickets processed by Ralph.", [
+            ('status="complete"', stats.completed),
+            ('status="failed"', stats.failed),
+        ]),
+        ("ralph_ticket_timeouts_total", "counter", "Attempts terminated on timeout.", [("", stats.timeouts)]),
+        ("ralph_ticket_restarts_total", "counter", "Ticket re-runs after the first attempt.", [("", stats.restarts)]),
+        ("ralph_ticket_duration_seconds", "summary", "Ticket wall time.", [
+            ('quantile="0.5"', stats.p50_duration_secs),
+            ('quantile="0.95"', stats.p95_duration_secs),
+        ]),
+        ("ralph_ticket_duration_seconds_sum", None, None, [("", stats.busy_secs)]),
+        ("ralph_ticket_duration_seconds_count", None, None, [("", stats.tickets)]),
+        ("ralph_queue_wait_seconds_total", "counter", "Time tickets waited between ready and launch.", [
+            ("", round(stats.queue_wait_secs, 3)),
+        ]),
+        ("ralph_worktree_setup_seconds_total", "counter", "Time spent preparing worktrees.", [
+            ("", round(stats.worktree_setup_secs, 3)),
+        ]),
+        ("ralph_throughput_tickets_per_hour", "gauge", "Tickets per hour of loop run time.", [
+            ("", round(stats.throughput_per_hour, 3)),
+        ]),
+        ("ralph_failure_ratio", "gauge", "Failed tickets over all tickets.", [("", round(stats.failure_rate, 4))]),
+        ("ralph_worker_utilisation_ratio", "gauge", "Busy worker-slot time over available slot time.", [
+            ("", round(stats.utilisation, 4)),
+        ]),
+    ]
+    lines: List[str] = []
+    for name, kind, help_text, samples in metrics:
+        # _sum/_count samples belong to the preceding summary and carry no HELP/TYPE
+        if kind is not None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            label_text = f"{{{labels}}}" if labels else ""
+            lines.append(f"{name}{label_text} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def write_textfile(path: Path, text: str) -> Path:
+    """Atomically write a Prometheus textfile (collectors must never see partial files)."""
+    return atomic_write_text(path, text)
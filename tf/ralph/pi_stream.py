@@ -0,0 +1,254 @@
+"""Live reader for `pi --mode json` output.
+
+With JSON capture enabled, `pi` writes one JSON event per line to stdout.
+Instead of redirecting that to a file nobody reads until the run is over, a
+PiStream tails the process's stdout pipe in a background thread, copies the
+raw bytes to the ticket's log in the central `.tf/ralph/logs/` directory and
+feeds each line to a PiEventParser, which reports tool executions and
+workflow phase changes through the RalphLogger as they happen.
+
+Memory stays bounded regardless of log size: data is handled in fixed-size
+chunks, a line longer than MAX_LINE_BYTES is still written to the log but is
+not parsed, and only a bounded number of in-flight tool calls is tracked.
+
+Phases are inferred from the workflow's observable actions: writing a ticket
+artifact (`research.md`, `implementation.md`, `review.md`, `fixes.md`,
+`close-summary.md`), spawning reviewer subagents, or running `tk close`.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import IO, Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Workflow phases, in the order the /tf chain runs them
+PHASES = ("research", "implement", "review", "fix", "close")
+
+# Ticket artifact file name -> phase that writes it
+ARTIFACT_PHASES: Dict[str, str] = {
+    "research.md": "research",
+    "implementation.md": "implement",
+    "review.md": "review",
+    "fixes.md": "fix",
+    "close-summary.md": "close",
+    "chain-summary.md": "close",
+}
+
+# Lines longer than this are logged but not parsed
+MAX_LINE_BYTES = 1024 * 1024
+
+# Bytes read from the pipe per call
+READ_CHUNK = 64 * 1024
+
+# In-flight tool calls remembered (to name the tool on tool_execution_end)
+MAX_PENDING_TOOLS = 256
+
+# Phase reported before the first phase-specific action
+START_PHASE = "start"
+
+
+class PiEventParser:
+    """Turns `pi --mode json` events into Ralph log events.
+
+    Example:
+        >>> parser = PiEventParser("pt-abc1", logger, mode="parallel")
+        >>> parser.feed(b'{"type": "tool_execution_start", "toolName": "bash", ...}')
+        >>> parser.phase
+        'implement'
+    """
+
+    def __init__(self, ticket: str, logger: Any = None, mode: str = "serial"):
+        self.ticket = ticket
+        self.logger = logger
+        self.mode = mode
+        self.phase = START_PHASE
+        self.phase_started = time.monotonic()
+        self.last_event_at: Optional[float] = None
+        self.events = 0
+        self.tool_calls = 0
+        self.tool_errors = 0
+        # Model/provider failures: assistant turns ending in an error, pi auto-retries
+        self.provider_errors = 0
+        self.skipped_lines = 0
+        self._pending: OrderedDict[str, str] = OrderedDict()
+
+    @property
+    def phase_elapsed(self) -> float:
+        """Seconds spent in the current phase."""
+        return time.monotonic() - self.phase_started
+
+    def feed(self, line: bytes) -> None:
+        """Handle one line of output (non-JSON lines are counted and ignored)."""
+        line = line.strip()
+        if not line:
+            return
+        try:
+            event = json.loads(line)
+        except ValueError:
+            self.skipped_lines += 1
+            return
+        if isinstance(event, dict):
+            self.events += 1
+            self.last_event_at = time.monotonic()
+            self._handle(event)
+
+    def skip(self) -> None:
+        """Record a line that was too long to parse."""
+        self.skipped_lines += 1
+
+    def _handle(self, event: Dict[str, Any]) -> None:
+        kind = event.get("type")
+        if kind == "tool_execution_start":
+            name = str(event.get("toolName") or "unknown")
+            call_id = event.get("toolCallId")
+            if call_id is not None:
+                self._pending[str(call_id)] = name
+                while len(self._pending) > MAX_PENDING_TOOLS:
+                    self._pending.popitem(last=False)
+            args = event.get("args")
+            phase = detect_phase(name, args if isinstance(args, dict) else {})
+            if phase:
+                self._enter(phase)
+        elif kind == "tool_execution_end":
+            call_id = event.get("toolCallId")
+            name = event.get("toolName") or self._pending.pop(str(call_id), None) or "unknown"
+            if call_id is not None:
+                self._pending.pop(str(call_id), None)
+            success = not event.get("isError")
+            self.tool_calls += 1
+            if not success:
+                self.tool_errors += 1
+            if self.logger is not None:
+                self.logger.log_tool_execution(self.ticket, str(name), success=success, mode=self.mode)
+        elif kind == "auto_retry_start":
+            self.provider_errors += 1
+        elif kind == "message_end":
+            message = event.get("message")
+            if isinstance(message, dict) and message.get("stopReason") == "error":
+                self.provider_errors += 1
+
+    def _enter(self, phase: str) -> None:
+        if phase == self.phase:
+            return
+        previous = self.phase
+        self.phase = phase
+        self.phase_started = time.monotonic()
+        if self.logger is not None:
+            self.logger.log_phase_transition(self.ticket, previous, phase, mode=self.mode)
+
+
+def detect_phase(tool_name: str, args: Dict[str, Any]) -> Optional[str]:
+    """Infer the workflow phase a tool call belongs to, if it is phase-specific."""
+    name = tool_name.lower()
+    if name in ("write", "edit"):
+        path = str(args.get("path") or args.get("file_path") or "")
+        return ARTIFACT_PHASES.get(os.path.basename(path))
+    if name == "subagent":
+        return "review"
+    if name == "bash":
+        command = str(args.get("command") or "")
+        if "tk close" in command:
+            return "close"
+    return None
+
+
+class PiStream:
+    """Background thread copying a pi stdout pipe to a log and a parser.
+
+    The stream owns the sink: it closes it once the pipe ends, and nothing
+    else may close it while the reader runs.
+
+    Example:
+        >>> proc = subprocess.Popen(args, stdout=subprocess.PIPE)
+        >>> stream = PiStream(proc.stdout, open(log_path, "wb"), parser).start()
+        >>> proc.wait()
+        >>> stream.join()
+    """
+
+    def __init__(self, source: IO[bytes], sink: Optional[IO[bytes]], parser: PiEventParser):
+        self.source = source
+        self.sink = sink
+        self.parser = parser
+        self.bytes_read = 0
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> PiStream:
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        buffer = bytearray()
+        oversized = False
+        fd = self.source.fileno()
+        try:
+            while True:
+                chunk = os.read(fd, READ_CHUNK)
+                if not chunk:
+                    break
+                self.bytes_read += len(chunk)
+                if self.sink is not None:
+                    try:
+                        self.sink.write(chunk)
+                        self.sink.flush()
+                    except (OSError, ValueError) as e:
+                        # Keep draining the pipe (pi blocks on a full one) and parsing
+                        logger.warning(f"Cannot write pi log: {e}. Further output is not logged.")
+                        self._close_sink()
+                start = 0
+                while True:
+                    newline = chunk.find(b"\n", start)
+                    if newline < 0:
+                        break
+                    if oversized:
+                        self.parser.skip()
+                        oversized = False
+                    else:
+                        buffer += chunk[start:newline]
+                        self.parser.feed(bytes(buffer))
+                    buffer.clear()
+                    start = newline + 1
+                if not oversized:
+                    buffer += chunk[start:]
+                    if len(buffer) > MAX_LINE_BYTES:
+                        buffer.clear()
+                        oversized = True
+            if buffer and not oversized:
+                self.parser.feed(bytes(buffer))
+            elif oversized:
+                self.parser.skip()
+        except (OSError, ValueError):
+            pass
+        finally:
+            try:
+                self.source.close()
+            except OSError:
+                pass
+            self._close_sink()
+
+    def _close_sink(self) -> None:
+        sink, self.sink = self.sink, None
+        if sink is None:
+            return
+        try:
+            sink.close()
+        except (OSError, ValueError) as e:
+            logger.warning(f"Cannot close pi log: {e}")
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the pipe to drain.
+
+        Returns:
+            True if the reader finished (False if it timed out).
+        """
+        if self._thread is None:
+            return True
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
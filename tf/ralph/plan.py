@@ -0,0 +1,562 @@
+"""Projected Ralph execution schedule (`tf ralph plan`).
+
+Replays Ralph's scheduling policy over the current backlog with estimated
+ticket durations and zero loop overhead:
+
+- Durations come from the `duration_secs` metrics of completed tickets in
+  `.tf/ralph/events.jsonl` (wall time including restarts): the median over
+  the most similar past tickets (see tf.ralph.footprint), else over tickets
+  sharing a component tag, else over all history, else a default.
+- The schedule is a list schedule: whenever a worker is free, ready tickets
+  are started in queue order (priority, then ID) or critical-path rank,
+  skipping tickets that conflict with running ones (shared component tag,
+  or predicted file overlap with conflictPrediction=files). With one worker
+  the first ready ticket always runs, as in serial mode.
+- The critical path is the dependency chain with the longest estimated
+  duration, a lower bound on the makespan however many workers run.
+
+Tickets whose dependencies can never close (unknown IDs, tickets in another
+status, dependency cycles) are reported as unschedulable.
+"""
+
+from __future__ import annotations
+
+import heapq
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from tf.ralph.critical_path import rank_tickets, score_tickets
+from tf.ralph.footprint import FootprintPredictor, pack_batch
+from tf.ralph.metrics import percentile
+from tf.ralph.ticket_queue import ACTIVE_STATUSES, UNTAGGED_COMPONENT, ticket_priority
+from tf.ticket_loader import Ticket
+
+# Estimate for tickets when no history has been recorded yet
+DEFAULT_DURATION_SECS = 900.0
+
+# Component medians need at least this many completed tickets
+MIN_COMPONENT_SAMPLES = 3
+
+
+@dataclass
+class PlanTask:
+    """A ticket to schedule with its estimated duration."""
+
+    ticket: str
+    duration: float
+    # Unclosed dependencies (all of them scheduled too)
+    deps: Tuple[str, ...] = ()
+    # Component tags; None = not eligible for parallel batches (only runs alone)
+    components: Optional[frozenset] = None
+    source: str = "default"
+    # The loop stops launching new tickets when this one finishes (a final failure)
+    fatal: bool = False
+
+
+@dataclass
+class ScheduledRun:
+    """A ticket placed on a worker, in seconds from the start of the run."""
+
+    ticket: str
+    worker: int
+    start: float
+    end: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"ticket": self.ticket, "worker": self.worker, "start": round(self.start, 1), "end": round(self.end, 1)}
+
+
+@dataclass
+class Schedule:
+    """Result of list_schedule: runs in launch order."""
+
+    runs: List[ScheduledRun] = field(default_factory=list)
+    workers: int = 1
+    # Ticket whose final failure stopped new launches, if any
+    stopped_by: Optional[str] = None
+    # Tickets not launched because the launch limit was reached
+    not_started: List[str] = field(default_factory=list)
+
+    @property
+    def makespan(self) -> float:
+        return max((run.end for run in self.runs), default=0.0)
+
+    @property
+    def busy_secs(self) -> float:
+        return sum(run.end - run.start for run in self.runs)
+
+    @property
+    def utilisation(self) -> float:
+        capacity = self.workers * self.makespan
+        return self.busy_secs / capacity if capacity > 0 else 0.0
+
+    def timeline(self) -> Dict[int, List[ScheduledRun]]:
+        """Runs per worker (1-based), in start order."""
+        lanes: Dict[int, List[ScheduledRun]] = {worker: [] for worker in range(1, self.workers + 1)}
+        for run in sorted(self.runs, key=lambda r: (r.start, r.worker)):
+            lanes[run.worker].append(run)
+        return lanes
+
+
+def component_conflicts(tasks: Mapping[str, PlanTask]) -> Callable[[str, str], Sequence[str]]:
+    """Conflict rule of parallel mode without prediction: shared component tags."""
+
+    def conflicts(a: str, b: str) -> Sequence[str]:
+        return sorted((tasks[a].components or frozenset()) & (tasks[b].components or frozenset()))
+
+    return conflicts
+
+
+def list_schedule(
+    tasks: Mapping[str, PlanTask],
+    order: Sequence[str],
+    workers: int,
+    conflicts: Optional[Callable[[str, str], Sequence[str]]] = None,
+    pack: bool = False,
+    max_launches: Optional[int] = None,
+) -> Schedule:
+    """Simulate Ralph's launch policy with zero loop overhead.
+
+    Args:
+        tasks: Tickets to run by ID; dependencies outside `tasks` count as closed
+        order: Queue order (tickets missing from it go last, by ID)
+        workers: Worker slots (1 = serial loop)
+        conflicts: Shared resources of two tickets (default: component tags)
+        pack: Pick the largest conflict-free batch (conflictPrediction=files)
+            instead of the first tickets in order
+        max_launches: Stop launching after this many tickets (maxIterations)
+
+    Returns:
+        Schedule with every launched run.
+    """
+    workers = max(1, workers)
+    conflicts = conflicts or component_conflicts(tasks)
+    ranked = [t for t in order if t in tasks]
+    ranked += sorted(set(tasks) - set(ranked))
+    position = {ticket: index for index, ticket in enumerate(ranked)}
+    schedule = Schedule(workers=workers)
+    done: set = set()
+    pending = list(ranked)
+    running: Dict[str, ScheduledRun] = {}
+    free = list(range(1, workers + 1))
+    finishing: List[Tuple[float, int, str]] = []
+    now = 0.0
+
+    while True:
+        if schedule.stopped_by is None and free and pending:
+            ready = [t for t in pending if all(dep in done or dep not in tasks for dep in tasks[t].deps)]
+            budget = len(free) if max_launches is None else min(len(free), max_launches - len(schedule.runs))
+            for ticket in _select(ready, budget, workers, tasks, running, conflicts, pack):
+                worker = heapq.heappop(free)
+                run = ScheduledRun(ticket, worker, now, now + max(0.0, tasks[ticket].duration))
+                schedule.runs.append(run)
+                running[ticket] = run
+                pending.remove(ticket)
+                heapq.heappush(finishing, (run.end, position[ticket], ticket))
+        if not running:
+            break
+        now, _, ticket = heapq.heappop(finishing)
+        run = running.pop(ticket)
+        heapq.heappush(free, run.worker)
+        if tasks[ticket].fatal:
+            schedule.stopped_by = schedule.stopped_by or ticket
+        else:
+            done.add(ticket)
+    schedule.not_started = pending
+    return schedule
+
+
+def _select(
+    ready: List[str],
+    slots: int,
+    workers: int,
+    tasks: Mapping[str, PlanTask],
+    running: Mapping[str, ScheduledRun],
+    conflicts: Callable[[str, str], Sequence[str]],
+    pack: bool,
+) -> List[str]:
+    if slots <= 0 or not ready:
+        return []
+    if workers == 1:
+        return ready[:1]
+    eligible = [t for t in ready if tasks[t].components is not None]
+    blocked = {}
+    for ticket in eligible:
+        for other in running:
+            shared = conflicts(ticket, other)
+            if shared:
+                blocked[ticket] = (other, list(shared))
+                break
+    if pack:
+        selected = pack_batch(eligible, slots, conflicts, blocked).selected
+    else:
+        selected = []
+        for ticket in eligible:
+            if ticket in blocked or any(conflicts(ticket, other) for other in selected):
+                continue
+            selected.append(ticket)
+            if len(selected) >= slots:
+                break
+    if not selected and not running:
+        # Fallback when no ticket is eligible: the first ready ticket runs alone
+        selected = ready[:1]
+    return selected
+
+
+def critical_path(tasks: Mapping[str, PlanTask]) -> Tuple[List[str], float]:
+    """Dependency chain with the longest total estimated duration.
+
+    Returns:
+        Tuple of (ticket IDs, first to last; total duration in seconds).
+    """
+    finish: Dict[str, float] = {}
+    previous: Dict[str, Optional[str]] = {}
+    for ticket in topological_order(tasks):
+        best_dep = None
+        best_end = 0.0
+        for dep in tasks[ticket].deps:
+            if dep in finish and (finish[dep] > best_end or (finish[dep] == best_end and best_dep is None)):
+                best_dep, best_end = dep, finish[dep]
+        finish[ticket] = best_end + tasks[ticket].duration
+        previous[ticket] = best_dep
+    if not finish:
+        return [], 0.0
+    tail = max(sorted(finish), key=lambda t: finish[t])
+    path = []
+    node: Optional[str] = tail
+    while node is not None:
+        path.append(node)
+        node = previous[node]
+    return path[::-1], finish[tail]
+
+
+def topological_order(tasks: Mapping[str, PlanTask]) -> List[str]:
+    """Tasks in dependency order (ties by ID); tickets on a cycle are left out."""
+    waiting = {t: sum(1 for dep in task.deps if dep in tasks) for t, task in tasks.items()}
+    dependents: Dict[str, List[str]] = {t: [] for t in tasks}
+    for ticket, task in tasks.items():
+        for dep in task.deps:
+            if dep in tasks:
+                dependents[dep].append(ticket)
+    heap = [t for t, count in waiting.items() if count == 0]
+    heapq.heapify(heap)
+    ordered = []
+    while heap:
+        ticket = heapq.heappop(heap)
+        ordered.append(ticket)
+        for child in dependents[ticket]:
+            waiting[child] -= 1
+            if waiting[child] == 0:
+                heapq.heappush(heap, child)
+    return ordered
+
+
+class DurationEstimator:
+    """Estimates ticket durations from completed-ticket metrics.
+
+    Example:
+        >>> estimator = DurationEstimator(EventLog(ralph_dir).events(), tickets)
+        >>> estimator.estimate("pt-abc1")
+        (1260.0, 'component')
+    """
+
+    def __init__(
+        self,
+        events: Iterable[Dict[str, Any]],
+        tickets: Mapping[str, Ticket],
+        tag_prefix: str = "component:",
+        default_secs: float = DEFAULT_DURATION_SECS,
+        predictor: Optional[FootprintPredictor] = None,
+    ):
+        """
+        Args:
+            events: Event log entries (ticket events with metrics are used)
+            tickets: All known tickets (any status) by ID, for component tags
+            tag_prefix: Component tag prefix
+            default_secs: Estimate when no history applies
+            predictor: Footprint predictor whose nearest neighbours give the
+                "similar" estimate
+        """
+        self.default_secs = default_secs
+        self.tag_prefix = tag_prefix
+        self.tickets = tickets
+        self.predictor = predictor
+        # Latest completed duration per ticket
+        self.durations: Dict[str, float] = {}
+        for event in events:
+            metrics = event.get("metrics")
+            if event.get("type") != "ticket" or event.get("status") != "COMPLETE" or not isinstance(metrics, dict):
+                continue
+            try:
+                self.durations[str(event.get("ticket"))] = float(metrics.get("duration_secs", 0.0))
+            except (TypeError, ValueError):
+                continue
+        self._by_component: Dict[str, List[float]] = {}
+        for ticket_id, duration in self.durations.items():
+            for tag in self._components(ticket_id):
+                self._by_component.setdefault(tag, []).append(duration)
+        self._overall = percentile(list(self.durations.values()), 50) if self.durations else None
+        if predictor is not None:
+            predictor.refresh()
+
+    def _components(self, ticket_id: str) -> List[str]:
+        ticket = self.tickets.get(ticket_id)
+        return [str(tag) for tag in (ticket.tags or []) if str(tag).startswith(self.tag_prefix)] if ticket else []
+
+    def estimate(self, ticket_id: str) -> Tuple[float, str]:
+        """Estimated duration in seconds and where it came from.
+
+        Sources: "similar" (nearest past tickets), "component" (tickets with a
+        shared component tag), "history" (all completed tickets), "default".
+        """
+        if self.predictor is not None:
+            similar = [self.durations[t] for t in self.predictor.predict(ticket_id).neighbours if t in self.durations]
+            if similar:
+                return percentile(similar, 50), "similar"
+        samples = [d for tag in self._components(ticket_id) for d in self._by_component.get(tag, [])]
+        if len(samples) >= MIN_COMPONENT_SAMPLES:
+            return percentile(samples, 50), "component"
+        if self._overall is not None:
+            return self._overall, "history"
+        return self.default_secs, "default"
+
+
+@dataclass
+class Plan:
+    """Projected run of the current backlog."""
+
+    schedule: Schedule
+    tasks: Dict[str, PlanTask]
+    titles: Dict[str, str]
+    critical_path: List[str]
+    critical_path_secs: float
+    unschedulable: Dict[str, str]
+    scheduling: str
+    conflict_prediction: str
+    max_iterations: int
+    # Schedule cut off at maxIterations launches (None if the limit is not reached)
+    limited: Optional[Schedule] = None
+    started_at: float = 0.0
+
+    @property
+    def total_work_secs(self) -> float:
+        return sum(task.duration for task in self.tasks.values())
+
+    @property
+    def finish_at(self) -> float:
+        return self.started_at + self.schedule.makespan
+
+    def to_dict(self) -> Dict[str, Any]:
+        schedule = self.schedule
+        data: Dict[str, Any] = {
+            "workers": schedule.workers,
+            "scheduling": self.scheduling,
+            "conflict_prediction": self.conflict_prediction,
+            "tickets": len(self.tasks),
+            "makespan_secs": round(schedule.makespan, 1),
+            "started_at": round(self.started_at, 1),
+            "finish_at": round(self.finish_at, 1),
+            "total_work_secs": round(self.total_work_secs, 1),
+            "utilisation": round(schedule.utilisation, 4),
+            "critical_path": self.critical_path,
+            "critical_path_secs": round(self.critical_path_secs, 1),
+            "max_iterations": self.max_iterations,
+            "iterations_needed": len(schedule.runs),
+            "order": [
+                dict(
+                    run.to_dict(),
+                    estimate_secs=round(self.tasks[run.ticket].duration, 1),
+                    source=self.tasks[run.ticket].source,
+                    title=self.titles.get(run.ticket, ""),
+                )
+                for run in schedule.runs
+            ],
+            "unschedulable": self.unschedulable,
+        }
+        if self.limited is not None:
+            data["stops_after_secs"] = round(self.limited.makespan, 1)
+            data["not_started"] = self.limited.not_started
+        return data
+
+
+def build_plan(
+    tickets: Mapping[str, Ticket],
+    estimator: DurationEstimator,
+    *,
+    workers: int,
+    scheduling: str = "queue",
+    tag_prefix: str = "component:",
+    allow_untagged: bool = False,
+    predictor: Optional[FootprintPredictor] = None,
+    max_iterations: int = 0,
+    started_at: float = 0.0,
+) -> Plan:
+    """Project how Ralph would work through the active tickets.
+
+    Args:
+        tickets: All known tickets (any status) by ID
+        estimator: Duration estimates per ticket
+        workers: Worker slots (1 = serial)
+        scheduling: "queue" or "critical-path"
+        tag_prefix: Component tag prefix
+        allow_untagged: parallelAllowUntagged
+        predictor: Predicted file overlap decides conflicts (conflictPrediction=files)
+        max_iterations: maxIterations (0 = unlimited)
+        started_at: Epoch time the run starts (for finish_at)
+    """
+    active = {
+        t.id: t for t in tickets.values() if (t.status or "").lower() in ACTIVE_STATUSES
+    }
+    unschedulable: Dict[str, str] = {}
+    for ticket in active.values():
+        for dep in ticket.deps or []:
+            status = (tickets[dep].status or "").lower() if dep in tickets else ""
+            if status == "closed" or dep in active:
+                continue
+            unschedulable[ticket.id] = f"depends on {dep} ({status or 'unknown ticket'})"
+            break
+
+    tasks: Dict[str, PlanTask] = {}
+    for ticket_id in sorted(active):
+        if ticket_id in unschedulable:
+            continue
+        ticket = active[ticket_id]
+        components = {str(tag) for tag in (ticket.tags or []) if str(tag).startswith(tag_prefix)}
+        if not components and (allow_untagged or (predictor is not None and predictor.predict(ticket_id).known)):
+            components = {UNTAGGED_COMPONENT}
+        duration, source = estimator.estimate(ticket_id)
+        tasks[ticket_id] = PlanTask(
+            ticket=ticket_id,
+            duration=duration,
+            deps=tuple(dep for dep in ticket.deps or [] if dep in active),
+            components=frozenset(components) if components else None,
+            source=source,
+        )
+    # Drop tickets that wait (directly or not) on unschedulable ones, then cycles
+    changed = True
+    while changed:
+        changed = False
+        for ticket_id, task in list(tasks.items()):
+            blocker = next((dep for dep in task.deps if dep not in tasks), None)
+            if blocker is not None:
+                unschedulable[ticket_id] = f"depends on unschedulable {blocker}"
+                del tasks[ticket_id]
+                changed = True
+    acyclic = set(topological_order(tasks))
+    for ticket_id in sorted(set(tasks) - acyclic):
+        unschedulable[ticket_id] = "dependency cycle"
+        del tasks[ticket_id]
+
+    order = [t.id for t in sorted((active[t] for t in tasks), key=lambda t: (ticket_priority(t), t.id))]
+    if scheduling == "critical-path":
+        order = rank_tickets(order, score_tickets(tickets.values()))
+
+    conflicts = None
+    if predictor is not None:
+        component_rule = component_conflicts(tasks)
+
+        def conflicts(a: str, b: str) -> Sequence[str]:
+            first, second = predictor.predict(a), predictor.predict(b)
+            if first.known and second.known:
+                return sorted(first.files & second.files)
+            return component_rule(a, b)
+
+    pack = predictor is not None
+    schedule = list_schedule(tasks, order, workers, conflicts, pack=pack)
+    limited = None
+    if max_iterations and len(schedule.runs) > max_iterations:
+        limited = list_schedule(tasks, order, workers, conflicts, pack=pack, max_launches=max_iterations)
+    path, path_secs = critical_path(tasks)
+    return Plan(
+        schedule=schedule,
+        tasks=tasks,
+        titles={t: active[t].title or "" for t in tasks},
+        critical_path=path,
+        critical_path_secs=path_secs,
+        unschedulable=dict(sorted(unschedulable.items())),
+        scheduling=scheduling,
+        conflict_prediction="files" if predictor is not None else "off",
+        max_iterations=max_iterations,
+        limited=limited,
+        started_at=started_at,
+    )
+
+
+def format_duration(secs: float) -> str:
+    """Compact duration: 45s, 12m, 3h 05m."""
+    secs = max(0.0, secs)
+    if secs < 60:
+        return f"{secs:.0f}s"
+    minutes = int(round(secs / 60))
+    if minutes < 60:
+        return f"{minutes}m"
+    return f"{minutes // 60}h {minutes % 60:02d}m"
+
+
+def _offset(secs: float) -> str:
+    minutes = int(round(secs / 60))
+    return f"+{minutes // 60}:{minutes % 60:02d}"
+
+
+def format_plan(plan: Plan, timeline: bool = True) -> str:
+    """Human-readable report for `tf ralph plan`."""
+    schedule = plan.schedule
+    if not plan.tasks:
+        lines = ["No open tickets to plan."]
+    else:
+        mode = "serial" if schedule.workers == 1 else f"{schedule.workers} workers"
+        conflicts = "predicted file overlap" if plan.conflict_prediction == "files" else "component tags"
+        finish = datetime.fromtimestamp(plan.finish_at).strftime("%Y-%m-%d %H:%M")
+        lines = [
+            f"Plan: {len(plan.tasks)} tickets, {mode}, {plan.scheduling} scheduling"
+            + (f", conflicts by {conflicts}" if schedule.workers > 1 else ""),
+            f"Estimated makespan:   {format_duration(schedule.makespan)} (finish ~{finish})",
+            f"Total work:           {format_duration(plan.total_work_secs)}, utilisation {schedule.utilisation:.0%}",
+            f"Critical path:        {format_duration(plan.critical_path_secs)} "
+            f"({len(plan.critical_path)} tickets, lower bound for any worker count)",
+        ]
+        if plan.limited is not None:
+            lines.append(
+                f"maxIterations:        {plan.max_iterations} < {len(schedule.runs)} tickets: the loop stops after "
+                f"{format_duration(plan.limited.makespan)} with {len(plan.limited.not_started)} not started"
+            )
+        elif plan.max_iterations:
+            lines.append(f"maxIterations:        {plan.max_iterations} (enough for {len(schedule.runs)} tickets)")
+        sources: Dict[str, int] = {}
+        for task in plan.tasks.values():
+            sources[task.source] = sources.get(task.source, 0) + 1
+        lines.append("Estimates from:       " + ", ".join(f"{n} {s}" for s, n in sorted(sources.items())))
+
+        lines += ["", "Projected order:"]
+        for index, run in enumerate(schedule.runs, 1):
+            task = plan.tasks[run.ticket]
+            title = plan.titles.get(run.ticket, "")
+            lines.append(
+                f"  {index:>3}. {_offset(run.start):>7} {run.ticket:<14} w{run.worker:<3}"
+                f"{format_duration(task.duration):>8}  {task.source:<9} {title}".rstrip()
+            )
+        if timeline and schedule.workers > 1:
+            lines += ["", "Worker timeline:"]
+            for worker, runs in schedule.timeline().items():
+                cells = [f"{_offset(run.start)} {run.ticket}" for run in runs]
+                lines.append(f"  w{worker:<3} " + (" | ".join(cells) if cells else "(idle)"))
+        lines += ["", "Critical path:", "  " + " -> ".join(plan.critical_path)]
+    if plan.unschedulable:
+        lines += ["", "Unschedulable:"]
+        lines += [f"  {ticket}: {reason}" for ticket, reason in plan.unschedulable.items()]
+    return "\n".join(lines)
+
+
+def format_sweep(plans: Sequence[Plan]) -> str:
+    """One line per worker count, for sizing parallelWorkers."""
+    lines = ["workers  makespan   utilisation  finish"]
+    for plan in plans:
+        finish = datetime.fromtimestamp(plan.finish_at).strftime("%Y-%m-%d %H:%M")
+        lines.append(
+            f"{plan.schedule.workers:>7}  {format_duration(plan.schedule.makespan):>9}  "
+            f"{plan.schedule.utilisation:>11.0%}  {finish}"
+        )
+    if plans:
+        lines.append(f"Critical path: {format_duration(plans[0].critical_path_secs)} (no worker count finishes sooner)")
+    return "\n".join(lines)
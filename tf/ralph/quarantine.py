@@ -0,0 +1,184 @@
+"""Quarantine for tickets that keep failing (`.tf/ralph/quarantine.json`).
+
+Ralph used to re-pick a ticket that failed on every run (and, with
+failurePolicy=isolate, on every pass of the same run), spending a full
+`pi` session on work that is going nowhere. Each failed ticket run now
+increments the ticket's consecutive-failure count; at `quarantineAfter`
+failures the ticket is quarantined and skipped by ticket selection.
+
+A quarantined ticket is released when:
+- it completes (e.g. run by hand with `tf ralph run <ticket>`),
+- its ticket file changes after it was quarantined (edited, reopened), or
+- it is released with `tf ralph quarantine --release <ticket>` (or `--clear`).
+
+The file is shared by every loop on the project and updated under an
+exclusive lock, like the event log.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from tf.utils import atomic_write_text, locked_file
+
+QUARANTINE_FILE = "quarantine.json"
+LOCK_FILE = "quarantine.lock"
+
+
+class Quarantine:
+    """Consecutive-failure counts and quarantined tickets.
+
+    Example:
+        >>> quarantine = Quarantine(ralph_dir, threshold=2, tickets_dir=project_root / ".tickets")
+        >>> quarantine.record_failure("pt-abc1", "pi -p failed (exit 1)")
+        False
+        >>> quarantine.record_failure("pt-abc1", "pi -p failed (exit 1)")
+        True
+        >>> quarantine.is_quarantined("pt-abc1")
+        True
+    """
+
+    def __init__(self, ralph_dir: Path, threshold: int = 2, tickets_dir: Optional[Path] = None):
+        """
+        Args:
+            ralph_dir: `.tf/ralph` directory holding quarantine.json
+            threshold: Consecutive failed runs before quarantine (0 = never quarantine)
+            tickets_dir: `.tickets` directory; a ticket file changed after the
+                quarantine releases the ticket
+        """
+        self.ralph_dir = Path(ralph_dir)
+        self.path = self.ralph_dir / QUARANTINE_FILE
+        self.threshold = max(0, int(threshold))
+        self.tickets_dir = Path(tickets_dir) if tickets_dir is not None else None
+        self._lock_path = self.ralph_dir / LOCK_FILE
+        self._cache: Dict[str, Dict[str, Any]] = {}
+        self._cache_key: Optional[tuple] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0
+
+    # ---------------------------------------------------------------- storage
+
+    @contextmanager
+    def _locked(self) -> Iterator[Dict[str, Dict[str, Any]]]:
+        """Read-modify-write the entries under the lock."""
+        self.ralph_dir.mkdir(parents=True, exist_ok=True)
+        with locked_file(self._lock_path):
+            entries = self._read()
+            yield entries
+            self._write(entries)
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict):
+            return {}
+        return {str(ticket): entry for ticket, entry in data.items() if isinstance(entry, dict)}
+
+    def _write(self, entries: Dict[str, Dict[str, Any]]) -> None:
+        atomic_write_text(self.path, json.dumps(entries, indent=2, sort_keys=True) + "\n")
+        self._cache_key = None
+
+    def entries(self) -> Dict[str, Dict[str, Any]]:
+        """All entries by ticket (re-read only when the file changed)."""
+        try:
+            stat = self.path.stat()
+        except OSError:
+            self._cache, self._cache_key = {}, None
+            return {}
+        key = (stat.st_mtime_ns, stat.st_size)
+        if key != self._cache_key:
+            self._cache, self._cache_key = self._read(), key
+        return self._cache
+
+    # ---------------------------------------------------------------- updates
+
+    def record_failure(self, ticket: str, error: str = "") -> bool:
+        """Count a failed run of a ticket.
+
+        Returns:
+            True if the ticket was quarantined by this failure.
+        """
+        now = time.time()
+        with self._locked() as entries:
+            entry = entries.setdefault(ticket, {"failures": 0})
+            entry["failures"] = int(entry.get("failures", 0)) + 1
+            entry["last_error"] = error
+            entry["last_failed"] = now
+            newly = self.enabled and entry["failures"] >= self.threshold and not entry.get("quarantined")
+            if newly:
+                entry["quarantined"] = now
+        return bool(newly)
+
+    def record_success(self, ticket: str) -> None:
+        """Reset a ticket's failure count (and release it)."""
+        if ticket not in self.entries():
+            return
+        with self._locked() as entries:
+            entries.pop(ticket, None)
+
+    def forgive(self, tickets: Iterable[str]) -> List[str]:
+        """Take back one failure per ticket (failures blamed on an outage).
+
+        Returns:
+            Tickets released from quarantine as a result.
+        """
+        released = []
+        with self._locked() as entries:
+            for ticket in tickets:
+                entry = entries.get(ticket)
+                if entry is None:
+                    continue
+                entry["failures"] = max(0, int(entry.get("failures", 0)) - 1)
+                if entry.get("quarantined") and entry["failures"] < self.threshold:
+                    del entry["quarantined"]
+                    released.append(ticket)
+                if entry["failures"] == 0:
+                    del entries[ticket]
+        return released
+
+    def release(self, ticket: str) -> bool:
+        """Remove a ticket's entry; returns False if it had none."""
+        if ticket not in self.entries():
+            return False
+        with self._locked() as entries:
+            return entries.pop(ticket, None) is not None
+
+    def clear(self) -> int:
+        """Remove every entry; returns how many there were."""
+        with self._locked() as entries:
+            count = len(entries)
+            entries.clear()
+        return count
+
+    # ---------------------------------------------------------------- queries
+
+    def is_quarantined(self, ticket: str) -> bool:
+        entry = self.entries().get(ticket)
+        if not entry or not entry.get("quarantined"):
+            return False
+        if self.tickets_dir is not None:
+            try:
+                # Edited since it was quarantined: give it another chance
+                if (self.tickets_dir / f"{ticket}.md").stat().st_mtime > float(entry["quarantined"]):
+                    return False
+            except (OSError, TypeError, ValueError):
+                pass
+        return True
+
+    def quarantined(self) -> List[str]:
+        """Currently quarantined tickets, sorted."""
+        return sorted(ticket for ticket in self.entries() if self.is_quarantined(ticket))
+
+    def filter(self, tickets: Iterable[str]) -> List[str]:
+        """Tickets that are not quarantined, in the given order."""
+        if not self.entries():
+            return list(tickets)
+        return [ticket for ticket in tickets if not self.is_quarantined(ticket)]
@@ -0,0 +1,255 @@
+"""Per-provider and per-model launch limits for Ralph workers (`rateLimits`).
+
+A `/tf` run calls several models: the `tf` prompt's model for the main
+session plus the researcher, reviewers, fixer and closer agents, each
+resolved through `metaModels` (tf.frontmatter.resolve_meta_model). When
+several workers hit the same provider at once they get throttled and whole
+tickets fail, so `.tf/ralph/config.json` can cap launches per provider
+(`openai-codex`) or per model (`openai-codex/gpt-5.2`):
+
+    "rateLimits": {
+      "openai-codex": {"maxConcurrent": 2, "perMinute": 4, "burst": 2},
+      "zai/glm-4.7": {"maxConcurrent": 1}
+    }
+
+- maxConcurrent: running tickets whose run uses the provider/model
+- perMinute / burst: token bucket; each ticket launch (including a
+  restart) takes one token from every bucket its models map to, buckets
+  refill at perMinute and hold at most burst tokens (default: 1)
+
+A ticket is held back while any of its limits is saturated; tickets whose
+models map to other providers keep launching (for example a retry whose
+fixer or worker model was escalated via `workflow.escalation`). A run is
+treated as using all of its models for its whole duration (the agents run
+one after another, but which one is active is not known up front).
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from tf.frontmatter import resolve_meta_model
+from tf.retry_state import RetryState
+
+# Agents a /tf run uses besides the prompt's own model (see skills/tf-workflow)
+RESEARCH_AGENTS = ("researcher", "researcher-fetch")
+MERGE_AGENT = "review-merge"
+FIXER_AGENT = "fixer"
+CLOSER_AGENT = "closer"
+
+
+@dataclass
+class Limit:
+    """Launch limits for one provider or model."""
+
+    key: str
+    max_concurrent: Optional[int] = None
+    per_minute: Optional[float] = None
+    burst: float = 1.0
+
+
+def parse_limits(raw: Any) -> Dict[str, Limit]:
+    """Parse the `rateLimits` config value.
+
+    Raises:
+        ValueError: If the value or an entry is malformed.
+    """
+    if not raw:
+        return {}
+    if not isinstance(raw, Mapping):
+        raise ValueError("rateLimits must be an object mapping provider or model to limits")
+    limits: Dict[str, Limit] = {}
+    for key, entry in raw.items():
+        if not isinstance(entry, Mapping):
+            raise ValueError(f"rateLimits.{key} must be an object")
+        try:
+            max_concurrent = entry.get("maxConcurrent")
+            per_minute = entry.get("perMinute")
+            limit = Limit(
+                key=str(key),
+                max_concurrent=int(max_concurrent) if max_concurrent is not None else None,
+                per_minute=float(per_minute) if per_minute is not None else None,
+                burst=max(1.0, float(entry.get("burst", 1))),
+            )
+        except (TypeError, ValueError):
+            raise ValueError(f"rateLimits.{key}: maxConcurrent, perMinute and burst must be numbers") from None
+        if (limit.max_concurrent is not None and limit.max_concurrent < 1) or (
+            limit.per_minute is not None and limit.per_minute <= 0
+        ):
+            raise ValueError(f"rateLimits.{key}: limits must be positive")
+        limits[limit.key] = limit
+    return limits
+
+
+def model_provider(model: str) -> str:
+    """Provider part of a model ID (`openai-codex/gpt-5.2` -> `openai-codex`)."""
+    return model.split("/", 1)[0]
+
+
+def workflow_models(settings: Dict[str, Any], workflow: str = "/tf", flags: str = "") -> Dict[str, str]:
+    """Models a workflow run will use, by prompt/agent name.
+
+    Follows the /tf chain: the prompt itself, research unless disabled,
+    the enabled reviewers (plus the review merge), fixer and closer.
+    """
+    workflow_config = settings.get("workflow", {}) if isinstance(settings.get("workflow"), dict) else {}
+    flag_set = set(flags.split())
+    prompt = workflow.lstrip("/").split()[0] if workflow.strip() else "tf"
+    names: List[str] = [prompt]
+    research = bool(workflow_config.get("enableResearcher", True))
+    if "--with-research" in flag_set:
+        research = True
+    if "--no-research" in flag_set:
+        research = False
+    if research:
+        names.extend(RESEARCH_AGENTS)
+    reviewers = [str(name) for name in workflow_config.get("enableReviewers", []) or []]
+    names.extend(reviewers)
+    if reviewers:
+        names.append(MERGE_AGENT)
+    if workflow_config.get("enableFixer", True):
+        names.append(FIXER_AGENT)
+    if workflow_config.get("enableCloser", True):
+        names.append(CLOSER_AGENT)
+
+    models: Dict[str, str] = {}
+    for name in names:
+        model = resolve_meta_model(settings, name).get("model")
+        if model:
+            models[name] = str(model)
+    return models
+
+
+class WorkflowModels:
+    """Resolves the models each ticket's next workflow run will use.
+
+    Example:
+        >>> models = WorkflowModels(settings, "/tf", "--auto")
+        >>> models.for_ticket(knowledge_dir / "tickets" / "pt-abc1")
+        ['kimi-coding/k2p5', 'minimax/MiniMax-M2.1', ...]
+    """
+
+    def __init__(self, settings: Dict[str, Any], workflow: str = "/tf", flags: str = ""):
+        self.base = workflow_models(settings, workflow, flags)
+        self.prompt = next(iter(self.base), "")
+        workflow_config = settings.get("workflow", {}) if isinstance(settings.get("workflow"), dict) else {}
+        escalation = workflow_config.get("escalation", {})
+        self.escalation: Dict[str, Any] = escalation if isinstance(escalation, dict) else {}
+
+    def for_ticket(self, artifact_dir: Path) -> List[str]:
+        """Distinct models, with retry escalation applied for tickets that were tried before."""
+        models = dict(self.base)
+        if self.escalation.get("enabled"):
+            state = RetryState.load(artifact_dir)
+            if state is not None:
+                escalated = state.resolve_escalation(
+                    self.escalation,
+                    {
+                        "fixer": models.get(FIXER_AGENT, ""),
+                        "reviewerSecondOpinion": models.get("reviewer-second-opinion", ""),
+                    },
+                )
+                if escalated.fixer and FIXER_AGENT in models:
+                    models[FIXER_AGENT] = escalated.fixer
+                if escalated.reviewerSecondOpinion and "reviewer-second-opinion" in models:
+                    models["reviewer-second-opinion"] = escalated.reviewerSecondOpinion
+                if escalated.worker and self.prompt:
+                    models[self.prompt] = escalated.worker
+        return list(dict.fromkeys(models.values()))
+
+
+class _Bucket:
+    def __init__(self, per_minute: float, burst: float, now: float):
+        self.rate = per_minute / 60.0
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_secs(self) -> float:
+        return max(0.0, (1.0 - self.tokens) / self.rate)
+
+
+class RateLimiter:
+    """Concurrency quotas and token buckets keyed by provider or model.
+
+    Example:
+        >>> limiter = RateLimiter(parse_limits({"openai-codex": {"maxConcurrent": 1}}))
+        >>> keys = limiter.keys(["openai-codex/gpt-5.2", "zai/glm-4.7"])
+        >>> limiter.acquire("pt-abc1", keys), limiter.acquire("pt-def2", keys)
+        (True, False)
+        >>> limiter.release("pt-abc1")
+    """
+
+    def __init__(self, limits: Dict[str, Limit], clock: Callable[[], float] = time.monotonic):
+        self.limits = limits
+        self._clock = clock
+        now = clock()
+        self._buckets = {
+            key: _Bucket(limit.per_minute, limit.burst, now)
+            for key, limit in limits.items()
+            if limit.per_minute
+        }
+        self._running: Dict[str, int] = {key: 0 for key in limits}
+        self._held: Dict[str, List[str]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.limits)
+
+    def keys(self, models: Iterable[str]) -> List[str]:
+        """Limit keys (models and their providers) that apply to a set of models."""
+        keys: List[str] = []
+        for model in models:
+            for key in (model, model_provider(model)):
+                if key in self.limits and key not in keys:
+                    keys.append(key)
+        return keys
+
+    def blocked(self, keys: Iterable[str]) -> Optional[Tuple[str, Optional[float]]]:
+        """The first saturated limit and, for a token bucket, seconds until a token.
+
+        Returns:
+            None if a launch would be admitted, else (key, wait) where wait is
+            None when the limit is a concurrency quota (frees when a ticket ends).
+        """
+        now = self._clock()
+        for key in keys:
+            limit = self.limits[key]
+            if limit.max_concurrent is not None and self._running[key] >= limit.max_concurrent:
+                return key, None
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.refill(now)
+                if bucket.tokens < 1.0:
+                    return key, bucket.wait_secs()
+        return None
+
+    def acquire(self, ticket: str, keys: Iterable[str]) -> bool:
+        """Admit a launch: take a token and a concurrency slot for every key."""
+        keys = list(keys)
+        if self.blocked(keys) is not None:
+            return False
+        self.release(ticket)
+        for key in keys:
+            self._running[key] += 1
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.tokens -= 1.0
+        self._held[ticket] = keys
+        return True
+
+    def release(self, ticket: str) -> None:
+        """Give back the concurrency slots a finished ticket held (tokens are spent)."""
+        for key in self._held.pop(ticket, []):
+            self._running[key] = max(0, self._running[key] - 1)
+
+    def usage(self) -> Dict[str, int]:
+        """Running tickets per limited provider/model."""
+        return dict(self._running)
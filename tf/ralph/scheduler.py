@@ -0,0 +1,293 @@
+"""Continuous worker-slot scheduler for Ralph parallel mode.
+
+Tracks in-flight `pi` processes per ticket so the loop can refill a worker
+slot as soon as any process exits, instead of waiting for a whole batch to
+finish before selecting the next one. Slots may carry a deadline; expired
+processes are terminated (SIGTERM, then SIGKILL) when the pool is reaped.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import signal
+import subprocess
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO, Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# How often (in seconds) running processes are polled while waiting for a free slot.
+DEFAULT_POLL_INTERVAL = 0.25
+
+# Seconds to wait after SIGTERM before escalating to SIGKILL.
+TERMINATE_GRACE_SECS = 5.0
+
+# Return code reported for an attempt terminated on timeout.
+TIMEOUT_RC = -1
+
+
+def _signal_process(proc: subprocess.Popen, sig: int) -> None:
+    """Send a signal to the process group the process leads, or to the process itself.
+
+    Processes started with start_new_session=True lead their own group, so the
+    signal also reaches any tools `pi` spawned. Processes sharing our group are
+    signalled individually to avoid hitting ourselves.
+    """
+    try:
+        pgid = os.getpgid(proc.pid)
+        if pgid == proc.pid and pgid != os.getpgrp():
+            os.killpg(pgid, sig)
+            return
+    except (AttributeError, ProcessLookupError, PermissionError, OSError):
+        pass
+    try:
+        proc.send_signal(sig)
+    except ProcessLookupError:
+        pass
+
+
+def terminate_process(proc: subprocess.Popen, grace_secs: float = TERMINATE_GRACE_SECS) -> int:
+    """Terminate a process safely: SIGTERM, wait, SIGKILL, then reap.
+
+    Args:
+        proc: Process to terminate
+        grace_secs: Seconds to wait after SIGTERM before SIGKILL
+
+    Returns:
+        The process exit status after reaping.
+    """
+    # Step 1: Try graceful termination (SIGTERM)
+    _signal_process(proc, signal.SIGTERM)
+    # Step 2: Wait briefly for graceful shutdown
+    try:
+        proc.wait(timeout=grace_secs)
+    except subprocess.TimeoutExpired:
+        # Step 3: Force kill if still running (SIGKILL)
+        _signal_process(proc, getattr(signal, "SIGKILL", signal.SIGTERM))
+    # Step 4: Must wait to reap the process and prevent zombies
+    return proc.wait()
+
+
+@dataclass
+class WorkerSlot:
+    """A ticket running in one parallel worker slot.
+
+    Attributes:
+        ticket: Ticket ID being processed
+        proc: The `pi` process handling the ticket (None for a ticket that
+            `tf ralph start --resume` found already finished; never pooled)
+        worktree_path: Git worktree the process runs in
+        iteration: Loop iteration index assigned when the ticket was launched
+        components: Component tags claimed by this ticket (conflict guard)
+        ticket_title: Optional ticket title for verbose logging
+        log_file: Optional open file receiving the process output
+        log_path: Path of log_file, kept after the file is closed
+        started_at: Monotonic start time, for duration reporting
+        timeout_secs: Attempt timeout in seconds (None = no timeout)
+        attempt: Zero-based attempt number (restarts increment it)
+        timed_out: Set when the process was terminated on timeout
+        merge_retries: Times the ticket was re-queued after a merge conflict
+        merge_blocked: Set while the merge waits for a dirty main checkout
+        launched_at: Monotonic time the ticket's first attempt started setting up
+        queued_secs: Time between the ticket being seen ready and first launched
+        setup_secs: Time spent preparing worktrees, summed over attempts
+        timeouts: Earlier attempts of this ticket that timed out
+        stream: Live reader of the process's JSON output (tf.ralph.pi_stream.PiStream)
+        phase_timeout_secs: Maximum seconds in one workflow phase (needs stream)
+    """
+
+    ticket: str
+    proc: Optional[subprocess.Popen]
+    worktree_path: Path
+    iteration: int
+    components: set[str] = field(default_factory=set)
+    ticket_title: Optional[str] = None
+    log_file: Optional[IO[Any]] = None
+    log_path: Optional[Path] = None
+    started_at: float = field(default_factory=time.monotonic)
+    timeout_secs: Optional[float] = None
+    attempt: int = 0
+    timed_out: bool = False
+    merge_retries: int = 0
+    merge_blocked: bool = False
+    launched_at: Optional[float] = None
+    queued_secs: float = 0.0
+    setup_secs: float = 0.0
+    timeouts: int = 0
+    stream: Optional[Any] = None
+    phase_timeout_secs: Optional[float] = None
+
+    @property
+    def deadline(self) -> Optional[float]:
+        """Monotonic time after which the attempt is terminated, if any.
+
+        The earlier of the attempt timeout and, when the output is streamed,
+        the current phase's start plus phase_timeout_secs.
+        """
+        deadlines = []
+        if self.timeout_secs:
+            deadlines.append(self.started_at + self.timeout_secs)
+        if self.phase_timeout_secs and self.stream is not None:
+            deadlines.append(self.stream.parser.phase_started + self.phase_timeout_secs)
+        return min(deadlines) if deadlines else None
+
+    def close_log(self) -> None:
+        """Wait for the output stream to drain, or close the log file if there is none.
+
+        The stream owns its log file and closes it when the pipe ends. If it
+        is still reading after TERMINATE_GRACE_SECS (e.g. a grandchild holds
+        the pipe open), the file is left to it rather than closed under it.
+        """
+        if self.stream is not None:
+            if not self.stream.join(timeout=TERMINATE_GRACE_SECS):
+                logger.warning(
+                    f"Output of {self.ticket} is still being read after {TERMINATE_GRACE_SECS}s; "
+                    f"{self.log_path or 'its log'} is closed when the pipe ends"
+                )
+        elif self.log_file is not None:
+            self.log_file.close()
+        self.log_file = None
+
+
+class WorkerPool:
+    """Fixed-size pool of worker slots with non-blocking reaping.
+
+    Example:
+        >>> pool = WorkerPool(max_workers=4)
+        >>> pool.add(slot)
+        >>> for slot, rc in pool.wait_any():
+        ...     print(slot.ticket, rc)
+    """
+
+    def __init__(self, max_workers: int, poll_interval: float = DEFAULT_POLL_INTERVAL):
+        self.max_workers = max(1, int(max_workers))
+        self.poll_interval = poll_interval
+        self._slots: dict[str, WorkerSlot] = {}
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, ticket: object) -> bool:
+        return ticket in self._slots
+
+    @property
+    def slots(self) -> list[WorkerSlot]:
+        """Currently running slots, in launch order."""
+        return list(self._slots.values())
+
+    @property
+    def running_tickets(self) -> set[str]:
+        """IDs of tickets currently running."""
+        return set(self._slots)
+
+    @property
+    def busy_components(self) -> set[str]:
+        """Union of component tags claimed by running tickets."""
+        busy: set[str] = set()
+        for slot in self._slots.values():
+            busy.update(slot.components)
+        return busy
+
+    @property
+    def free_slots(self) -> int:
+        """Number of slots that can accept a new ticket."""
+        return max(0, self.max_workers - len(self._slots))
+
+    def add(self, slot: WorkerSlot) -> None:
+        """Register a newly launched ticket.
+
+        Raises:
+            ValueError: If the ticket is already running or the pool is full.
+        """
+        if slot.ticket in self._slots:
+            raise ValueError(f"Ticket already running: {slot.ticket}")
+        if self.free_slots <= 0:
+            raise ValueError("No free worker slots")
+        self._slots[slot.ticket] = slot
+
+    def reap(self) -> list[tuple[WorkerSlot, int]]:
+        """Collect finished slots without blocking on running processes.
+
+        Processes past their deadline are terminated (see terminate_process)
+        and reported with TIMEOUT_RC and slot.timed_out set.
+
+        Returns:
+            List of (slot, return_code) for every process that has exited,
+            in launch order. Reaped slots are removed from the pool.
+        """
+        finished: list[tuple[WorkerSlot, int]] = []
+        now = time.monotonic()
+        for ticket, slot in list(self._slots.items()):
+            rc = slot.proc.poll()
+            if rc is None:
+                deadline = slot.deadline
+                if deadline is None or now < deadline:
+                    continue
+                terminate_process(slot.proc)
+                slot.timed_out = True
+                rc = TIMEOUT_RC
+            del self._slots[ticket]
+            slot.close_log()
+            finished.append((slot, rc))
+        return finished
+
+    def wait_any(
+        self, timeout: Optional[float] = None, wake: Optional[Callable[[], bool]] = None
+    ) -> list[tuple[WorkerSlot, int]]:
+        """Block until at least one running process exits.
+
+        Args:
+            timeout: Maximum seconds to wait (None = wait indefinitely).
+            wake: Checked every poll; returning True ends the wait early
+                (e.g. TicketWatcher.changed when ticket files change).
+
+        Returns:
+            Finished (slot, return_code) pairs; empty if the pool is empty,
+            the timeout elapsed or wake() fired first.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._slots:
+            finished = self.reap()
+            if finished:
+                return finished
+            if wake is not None and wake():
+                return []
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return []
+                time.sleep(min(self.poll_interval, remaining))
+            else:
+                time.sleep(self.poll_interval)
+        return []
+
+    def terminate(self, ticket: str) -> Optional[WorkerSlot]:
+        """Terminate one ticket's process and remove it from the pool.
+
+        Returns:
+            The removed slot, or None if the ticket is not running.
+        """
+        slot = self._slots.pop(ticket, None)
+        if slot is None:
+            return None
+        if slot.proc.poll() is None:
+            terminate_process(slot.proc)
+        slot.close_log()
+        return slot
+
+    def terminate_all(self) -> list[WorkerSlot]:
+        """Terminate every running process and empty the pool.
+
+        Returns:
+            The slots that were still running.
+        """
+        slots = self.slots
+        for slot in slots:
+            if slot.proc.poll() is None:
+                terminate_process(slot.proc)
+            slot.close_log()
+        self._slots.clear()
+        return slots
@@ -0,0 +1,610 @@
+"""Deterministic Ralph simulator and scheduler benchmarks (`tf ralph simulate`).
+
+Runs the real `ralph_start` loop in a throw-away project against synthetic
+tickets, with fake `pi` and `tk` executables put first on PATH:
+
+- fake `pi` sleeps for the ticket's scripted duration (scaled by
+  `time_scale`), then closes the ticket in `.tickets/` like `tk close` would.
+  A scripted failure hangs until Ralph's attempt timeout kills it, so
+  failures exercise `maxRestarts` instead of ending the run.
+- fake `tk` implements `ready`, `blocked`, `show` and `close` over
+  `.tickets/`, and counts every invocation.
+
+Ticket graphs, durations and failures come from a seeded RNG, so a scenario
+always produces the same backlog and outcomes; only the loop's own overhead
+varies between runs. Results are JSON:
+
+- makespan: wall time of the run, and in simulated seconds
+- ideal_makespan: the same schedule with zero loop overhead (list scheduling
+  with Ralph's ordering and component rules); the difference divided by the
+  iterations is the scheduling overhead per iteration
+- utilisation: fake `pi` busy time over workers x makespan
+- loop_cpu_ms_per_iteration: CPU used by the loop process itself
+- tk_calls / pi_calls: subprocesses spawned
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from tf.ralph.critical_path import rank_tickets, score_tickets
+from tf.ralph.metrics import percentile
+from tf.ralph.plan import PlanTask, list_schedule
+from tf.ralph.ticket_queue import UNTAGGED_COMPONENT
+from tf.ticket_loader import Ticket
+
+SHAPES = ("independent", "chain", "fanout", "fanin", "layered", "random")
+DISTRIBUTIONS = ("fixed", "uniform", "lognormal")
+
+# Scripted attempt timeout, relative to the longest ticket duration
+TIMEOUT_FACTOR = 2.0
+
+# Ralph's timeout has a 1 s resolution floor in practice (process polling, SIGTERM grace)
+MIN_TIMEOUT_MS = 1000
+
+SPEC_ENV = "RALPH_SIM_SPEC"
+ROOT_ENV = "RALPH_SIM_ROOT"
+EVENTS_ENV = "RALPH_SIM_EVENTS"
+
+
+@dataclass
+class Scenario:
+    """Synthetic backlog and loop settings for one simulated run."""
+
+    name: str = "default"
+    tickets: int = 20
+    shape: str = "layered"
+    workers: int = 1
+    seed: int = 0
+    # Durations in simulated seconds
+    mean_duration: float = 600.0
+    distribution: str = "lognormal"
+    spread: float = 0.5
+    # Probability that an attempt fails (hangs until the attempt timeout)
+    failure_rate: float = 0.0
+    max_restarts: int = 1
+    # Number of distinct component tags (0 = untagged, parallelAllowUntagged)
+    components: int = 6
+    # Real seconds per simulated second
+    time_scale: float = 0.001
+    scheduling: str = "queue"
+    # Extra Ralph config (e.g. {"ticketWatch": "poll"})
+    config: Dict[str, Any] = field(default_factory=dict)
+
+    def validate(self) -> None:
+        if self.shape not in SHAPES:
+            raise ValueError(f"Unknown shape: {self.shape} (choose from {', '.join(SHAPES)})")
+        if self.distribution not in DISTRIBUTIONS:
+            raise ValueError(f"Unknown distribution: {self.distribution} (choose from {', '.join(DISTRIBUTIONS)})")
+        if self.tickets < 1 or self.workers < 1:
+            raise ValueError("tickets and workers must be at least 1")
+        if not 0.0 <= self.failure_rate < 1.0:
+            raise ValueError("failure_rate must be in [0, 1)")
+        if self.time_scale <= 0 or self.mean_duration <= 0:
+            raise ValueError("time_scale and mean_duration must be positive")
+
+
+@dataclass
+class SimTicket:
+    """One synthetic ticket and its scripted outcome."""
+
+    id: str
+    deps: List[str]
+    duration: float
+    components: List[str]
+    priority: int = 2
+    # Outcome per attempt: True = attempt fails (hangs until timeout)
+    failures: List[bool] = field(default_factory=list)
+
+    @property
+    def failed_attempts(self) -> int:
+        """Attempts that fail before the first success (all of them if none succeeds)."""
+        count = 0
+        for failed in self.failures:
+            if not failed:
+                break
+            count += 1
+        return count
+
+    @property
+    def succeeds(self) -> bool:
+        return self.failed_attempts < len(self.failures)
+
+
+# ------------------------------------------------------------------ generation
+
+
+def generate_tickets(scenario: Scenario) -> List[SimTicket]:
+    """Build the scenario's ticket graph with durations and failures (deterministic)."""
+    scenario.validate()
+    rng = random.Random(scenario.seed)
+    ids = [f"sim-{index:04d}" for index in range(scenario.tickets)]
+    deps = _dependencies(scenario.shape, ids, rng)
+    tickets = []
+    for index, ticket_id in enumerate(ids):
+        components = [f"component:c{rng.randrange(scenario.components)}"] if scenario.components > 0 else []
+        tickets.append(
+            SimTicket(
+                id=ticket_id,
+                deps=deps[index],
+                duration=_duration(scenario, rng),
+                components=components,
+                priority=rng.choice((1, 2, 2, 3)),
+                failures=[rng.random() < scenario.failure_rate for _ in range(scenario.max_restarts + 1)],
+            )
+        )
+    return tickets
+
+
+def _dependencies(shape: str, ids: List[str], rng: random.Random) -> List[List[str]]:
+    count = len(ids)
+    deps: List[List[str]] = [[] for _ in ids]
+    if shape == "chain":
+        for index in range(1, count):
+            deps[index] = [ids[index - 1]]
+    elif shape == "fanout":
+        for index in range(1, count):
+            deps[index] = [ids[0]]
+    elif shape == "fanin":
+        deps[-1] = ids[:-1] if count > 1 else []
+    elif shape == "layered":
+        width = max(1, round(math.sqrt(count)))
+        for index in range(width, count):
+            layer_start = (index // width - 1) * width
+            previous = ids[layer_start:layer_start + width]
+            deps[index] = sorted(rng.sample(previous, min(len(previous), rng.randint(1, 2))))
+    elif shape == "random":
+        probability = min(1.0, 2.0 / max(1, count))
+        for index in range(1, count):
+            deps[index] = [ids[other] for other in range(index) if rng.random() < probability]
+    return deps
+
+
+def _duration(scenario: Scenario, rng: random.Random) -> float:
+    mean = scenario.mean_duration
+    if scenario.distribution == "fixed":
+        value = mean
+    elif scenario.distribution == "uniform":
+        value = rng.uniform(mean * (1 - scenario.spread), mean * (1 + scenario.spread))
+    else:
+        sigma = max(0.0, scenario.spread)
+        value = rng.lognormvariate(math.log(mean) - sigma * sigma / 2, sigma)
+    return round(max(mean * 0.05, value), 3)
+
+
+def attempt_timeout_secs(scenario: Scenario, tickets: List[SimTicket]) -> float:
+    """Real-time attempt timeout used for the run (scripted failures hang until it)."""
+    longest = max(ticket.duration for ticket in tickets) * scenario.time_scale
+    return max(MIN_TIMEOUT_MS / 1000, longest * TIMEOUT_FACTOR)
+
+
+# ------------------------------------------------------------ ideal schedule
+
+
+def ideal_makespan(scenario: Scenario, tickets: List[SimTicket], timeout_secs: float) -> float:
+    """Makespan in real seconds of Ralph's policy with zero loop overhead.
+
+    Uses the `tf ralph plan` list scheduler (tf.ralph.plan.list_schedule).
+    A restarted ticket is re-queued first, so its failed attempts (each
+    costing the attempt timeout) and final run occupy one worker back to
+    back. A ticket that runs out of attempts stops new launches, as Ralph
+    does.
+    """
+    tasks = {}
+    for ticket in tickets:
+        failed = min(ticket.failed_attempts, len(ticket.failures))
+        duration = failed * timeout_secs
+        if ticket.succeeds:
+            duration += ticket.duration * scenario.time_scale
+        tasks[ticket.id] = PlanTask(
+            ticket=ticket.id,
+            duration=duration,
+            deps=tuple(ticket.deps),
+            components=frozenset(ticket.components or [UNTAGGED_COMPONENT]),
+            fatal=not ticket.succeeds,
+        )
+    return list_schedule(tasks, _queue_order(scenario, tickets), scenario.workers).makespan
+
+
+def _queue_order(scenario: Scenario, tickets: List[SimTicket]) -> List[str]:
+    if scenario.scheduling == "critical-path":
+        scores = score_tickets(
+            Ticket(id=t.id, status="open", title=t.id, file_path=Path(f"{t.id}.md"), deps=t.deps, priority=t.priority)
+            for t in tickets
+        )
+        return rank_tickets(sorted(t.id for t in tickets), scores)
+    return [t.id for t in sorted(tickets, key=lambda t: (t.priority, t.id))]
+
+
+# ------------------------------------------------------------- project setup
+
+
+def ticket_markdown(ticket: SimTicket) -> str:
+    deps = ", ".join(ticket.deps)
+    tags = ", ".join(ticket.components)
+    return (
+        "---\n"
+        f"id: {ticket.id}\n"
+        "status: open\n"
+        f"deps: [{deps}]\n"
+        "links: []\n"
+        "created: 2026-01-01T00:00:00Z\n"
+        "type: task\n"
+        f"priority: {ticket.priority}\n"
+        f"tags: [{tags}]\n"
+        "---\n"
+        f"# Synthetic ticket {ticket.id}\n"
+    )
+
+
+_FAKE_PI = r'''#!{python}
+import json, os, sys, time
+
+spec = json.load(open(os.environ["RALPH_SIM_SPEC"]))
+prompt = sys.argv[-1].split()
+ticket = prompt[1] if len(prompt) > 1 else ""
+info = spec["tickets"].get(ticket)
+root = os.environ["RALPH_SIM_ROOT"]
+counter = os.path.join(root, ".sim", "attempts", ticket)
+try:
+    attempt = int(open(counter).read())
+except (OSError, ValueError):
+    attempt = 0
+with open(counter, "w") as handle:
+    handle.write(str(attempt + 1))
+
+json_mode = "--mode" in sys.argv
+started = time.time()
+if json_mode:
+    print(json.dumps({"type": "agent_start"}), flush=True)
+failed = info is None or (attempt < len(info["failures"]) and info["failures"][attempt])
+if failed:
+    time.sleep(spec["hang_secs"])
+    sys.exit(1)
+time.sleep(info["duration"] * spec["time_scale"])
+path = os.path.join(root, ".tickets", ticket + ".md")
+text = open(path).read().replace("status: open", "status: closed", 1)
+tmp = path + ".tmp"
+with open(tmp, "w") as handle:
+    handle.write(text)
+os.replace(tmp, path)
+fd = os.open(os.environ["RALPH_SIM_EVENTS"], os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+os.write(fd, (json.dumps({"ticket": ticket, "attempt": attempt, "start": started, "end": time.time()}) + "\n").encode())
+os.close(fd)
+if json_mode:
+    print(json.dumps({"type": "agent_end"}), flush=True)
+'''
+
+_FAKE_TK = r'''#!{python}
+import os, re, sys
+
+root = os.environ["RALPH_SIM_ROOT"]
+with open(os.path.join(root, ".sim", "tk_calls"), "a") as handle:
+    handle.write(" ".join(sys.argv[1:]) + "\n")
+tickets_dir = os.path.join(root, ".tickets")
+
+def load():
+    tickets = {}
+    for name in sorted(os.listdir(tickets_dir)):
+        if not name.endswith(".md"):
+            continue
+        text = open(os.path.join(tickets_dir, name)).read()
+        status = re.search(r"^status: (\S+)", text, re.M).group(1)
+        deps = [d.strip() for d in re.search(r"^deps: \[(.*)\]", text, re.M).group(1).split(",") if d.strip()]
+        priority = int(re.search(r"^priority: (\d+)", text, re.M).group(1))
+        tickets[name[:-3]] = (status, deps, priority, text)
+    return tickets
+
+command = sys.argv[1] if len(sys.argv) > 1 else ""
+tickets = load()
+closed = {t for t, (status, _, _, _) in tickets.items() if status == "closed"}
+if command in ("ready", "blocked"):
+    rows = []
+    for ticket, (status, deps, priority, _) in tickets.items():
+        if status == "closed":
+            continue
+        unmet = [d for d in deps if d not in closed]
+        if (command == "ready") == (not unmet):
+            rows.append((priority, ticket))
+    for priority, ticket in sorted(rows):
+        print(f"{ticket} [P{priority}][open] - Synthetic ticket {ticket}")
+elif command == "show" and len(sys.argv) > 2 and sys.argv[2] in tickets:
+    print(tickets[sys.argv[2]][3], end="")
+elif command == "close" and len(sys.argv) > 2 and sys.argv[2] in tickets:
+    path = os.path.join(tickets_dir, sys.argv[2] + ".md")
+    open(path, "w").write(tickets[sys.argv[2]][3].replace("status: open", "status: closed", 1))
+else:
+    sys.exit(1)
+'''
+
+
+def write_project(root: Path, scenario: Scenario, tickets: List[SimTicket], timeout_secs: float) -> Dict[str, str]:
+    """Create the simulated project (git repo, tickets, Ralph config, fake tools).
+
+    Returns:
+        Environment variables the fake tools need (PATH included).
+    """
+    root.mkdir(parents=True, exist_ok=True)
+    sim_dir = root / ".sim"
+    bin_dir = sim_dir / "bin"
+    (sim_dir / "attempts").mkdir(parents=True, exist_ok=True)
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    (root / ".tickets").mkdir(exist_ok=True)
+    for ticket in tickets:
+        (root / ".tickets" / f"{ticket.id}.md").write_text(ticket_markdown(ticket), encoding="utf-8")
+    (root / ".pi" / "prompts").mkdir(parents=True, exist_ok=True)
+    (root / ".pi" / "prompts" / "tf.md").write_text("Simulated /tf prompt\n", encoding="utf-8")
+    ralph_dir = root / ".tf" / "ralph"
+    ralph_dir.mkdir(parents=True, exist_ok=True)
+    config = {
+        "maxIterations": len(tickets) * (scenario.max_restarts + 1) + 1,
+        "parallelWorkers": scenario.workers,
+        "parallelAllowUntagged": scenario.components == 0,
+        # The fake pi closes tickets in the main checkout, so there is nothing to merge
+        "parallelAutoMerge": False,
+        "attemptTimeoutMs": max(MIN_TIMEOUT_MS, int(timeout_secs * 1000)),
+        "maxRestarts": scenario.max_restarts,
+        "schedulingMode": scenario.scheduling,
+        "promiseOnComplete": False,
+        # ideal_makespan models a ticket that never succeeds as ending the run
+        "failurePolicy": "stop",
+        "breakerWindow": 0,
+        "sleepBetweenTickets": 5000,
+        "sleepBetweenRetries": 1000,
+        **scenario.config,
+    }
+    (ralph_dir / "config.json").write_text(json.dumps(config, indent=2), encoding="utf-8")
+    (root / ".gitignore").write_text(".tf/ralph/\n.sim/\n", encoding="utf-8")
+
+    spec = {
+        "time_scale": scenario.time_scale,
+        "hang_secs": timeout_secs * 10 + 5,
+        "tickets": {t.id: {"duration": t.duration, "failures": t.failures} for t in tickets},
+    }
+    (sim_dir / "spec.json").write_text(json.dumps(spec), encoding="utf-8")
+    for name, template in (("pi", _FAKE_PI), ("tk", _FAKE_TK)):
+        path = bin_dir / name
+        path.write_text(template.replace("{python}", sys.executable), encoding="utf-8")
+        path.chmod(0o755)
+
+    git_env = dict(
+        os.environ,
+        GIT_AUTHOR_NAME="ralph-sim",
+        GIT_AUTHOR_EMAIL="ralph-sim@localhost",
+        GIT_COMMITTER_NAME="ralph-sim",
+        GIT_COMMITTER_EMAIL="ralph-sim@localhost",
+    )
+    for cmd in (["git", "init", "-q"], ["git", "add", "-A"], ["git", "commit", "-q", "-m", "Simulated backlog"]):
+        subprocess.run(cmd, cwd=root, env=git_env, check=True, capture_output=True)
+
+    return {
+        "PATH": f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}",
+        SPEC_ENV: str(sim_dir / "spec.json"),
+        ROOT_ENV: str(root),
+        EVENTS_ENV: str(sim_dir / "events.jsonl"),
+    }
+
+
+@contextmanager
+def _environment(root: Path, env: Dict[str, str]) -> Iterator[None]:
+    saved_env = {key: os.environ.get(key) for key in env}
+    saved_cwd = os.getcwd()
+    os.environ.update(env)
+    os.chdir(root)
+    try:
+        yield
+    finally:
+        os.chdir(saved_cwd)
+        for key, value in saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+# -------------------------------------------------------------------- running
+
+
+def run_scenario(scenario: Scenario, workdir: Optional[Path] = None, verbose: bool = False) -> Dict[str, Any]:
+    """Run the real Ralph loop on a synthetic backlog and measure it.
+
+    Args:
+        scenario: Backlog and loop settings
+        workdir: Directory for the simulated project (default: a temp dir,
+            removed afterwards)
+        verbose: Show Ralph's log output (default: errors only)
+
+    Returns:
+        JSON-serializable result with the scenario and its measurements.
+    """
+    from tf import ralph
+
+    tickets = generate_tickets(scenario)
+    timeout_secs = attempt_timeout_secs(scenario, tickets)
+    cleanup = workdir is None
+    root = Path(tempfile.mkdtemp(prefix="ralph-sim-")) if workdir is None else Path(workdir)
+    try:
+        env = write_project(root, scenario, tickets, timeout_secs)
+        args = ["--pi-output", "discard"]
+        if scenario.workers > 1:
+            args += ["--parallel", str(scenario.workers)]
+        if not verbose:
+            args.append("--quiet")
+        with _environment(root, env):
+            cpu_started = time.process_time()
+            started = time.time()
+            rc = ralph.ralph_start(args)
+            makespan = time.time() - started
+            loop_cpu = time.process_time() - cpu_started
+        return _measure(scenario, tickets, root, rc, started, makespan, loop_cpu, timeout_secs)
+    finally:
+        if cleanup:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+def _measure(
+    scenario: Scenario,
+    tickets: List[SimTicket],
+    root: Path,
+    rc: int,
+    started: float,
+    makespan: float,
+    loop_cpu: float,
+    timeout_secs: float,
+) -> Dict[str, Any]:
+    events = []
+    events_path = root / ".sim" / "events.jsonl"
+    if events_path.exists():
+        events = [json.loads(line) for line in events_path.read_text(encoding="utf-8").splitlines() if line.strip()]
+    tk_calls_path = root / ".sim" / "tk_calls"
+    tk_calls = len(tk_calls_path.read_text(encoding="utf-8").splitlines()) if tk_calls_path.exists() else 0
+    attempts = 0
+    for counter in (root / ".sim" / "attempts").iterdir():
+        try:
+            attempts += int(counter.read_text())
+        except ValueError:
+            pass
+
+    completed = {event["ticket"] for event in events}
+    busy = sum(event["end"] - event["start"] for event in events)
+    # Failed attempts kept a worker busy until the timeout
+    busy += sum(min(ticket.failed_attempts, scenario.max_restarts + 1) for ticket in tickets) * timeout_secs
+    by_id = {ticket.id: ticket for ticket in tickets}
+    ends = {event["ticket"]: event["end"] for event in events}
+    latencies = []
+    for event in events:
+        deps = by_id[event["ticket"]].deps
+        if event["attempt"] > 0 or any(dep not in ends for dep in deps):
+            continue
+        ready_at = max([started, *(ends[dep] for dep in deps)])
+        latencies.append(max(0.0, event["start"] - ready_at))
+
+    ideal = ideal_makespan(scenario, tickets, timeout_secs)
+    iterations = max(1, attempts)
+    return {
+        "scenario": asdict(scenario),
+        "rc": rc,
+        "tickets": len(tickets),
+        "completed": len(completed),
+        "pi_calls": attempts,
+        "tk_calls": tk_calls,
+        "makespan_secs": round(makespan, 3),
+        "simulated_makespan_secs": round(makespan / scenario.time_scale, 1),
+        "ideal_makespan_secs": round(ideal, 3),
+        "efficiency": round(ideal / makespan, 3) if makespan > 0 else 0.0,
+        "overhead_ms_per_iteration": round(max(0.0, makespan - ideal) * 1000 / iterations, 1),
+        "loop_cpu_ms_per_iteration": round(loop_cpu * 1000 / iterations, 2),
+        "utilisation": round(busy / (scenario.workers * makespan), 3) if makespan > 0 else 0.0,
+        "dispatch_latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 1),
+            "p95": round(percentile(latencies, 95) * 1000, 1),
+        },
+    }
+
+
+# Benchmark suite: loop overhead across graph shapes and worker counts
+BENCH_SCENARIOS = [
+    Scenario(name="serial-independent", shape="independent", tickets=20, workers=1),
+    Scenario(name="serial-chain", shape="chain", tickets=20, workers=1),
+    Scenario(name="parallel4-independent", shape="independent", tickets=40, workers=4),
+    Scenario(name="parallel4-layered", shape="layered", tickets=40, workers=4),
+    Scenario(name="parallel4-fanout", shape="fanout", tickets=40, workers=4),
+    Scenario(name="parallel4-layered-critical-path", shape="layered", tickets=40, workers=4, scheduling="critical-path"),
+    Scenario(name="parallel4-flaky", shape="random", tickets=30, workers=4, failure_rate=0.1, max_restarts=2),
+]
+
+
+def run_bench(scenarios: Optional[List[Scenario]] = None, verbose: bool = False) -> Dict[str, Any]:
+    """Run the benchmark suite; returns {"results": [...]} with one entry per scenario."""
+    results = []
+    for scenario in scenarios or BENCH_SCENARIOS:
+        results.append(run_scenario(scenario, verbose=verbose))
+    return {"python": sys.version.split()[0], "platform": sys.platform, "results": results}
+
+
+# ------------------------------------------------------------------------ CLI
+
+_INT_OPTIONS = {"--tickets": "tickets", "--workers": "workers", "--seed": "seed", "--components": "components",
+                "--max-restarts": "max_restarts"}
+_FLOAT_OPTIONS = {"--mean-duration": "mean_duration", "--spread": "spread", "--failure-rate": "failure_rate",
+                  "--time-scale": "time_scale"}
+_STR_OPTIONS = {"--shape": "shape", "--distribution": "distribution", "--scheduling": "scheduling", "--name": "name"}
+
+
+def main(args: List[str]) -> int:
+    """Entry point for `tf ralph simulate`."""
+    scenario = Scenario()
+    bench = False
+    verbose = False
+    output: Optional[str] = None
+    workdir: Optional[Path] = None
+    idx = 0
+    try:
+        while idx < len(args):
+            arg = args[idx]
+            name, _, inline = arg.partition("=")
+            if name in _INT_OPTIONS or name in _FLOAT_OPTIONS or name in _STR_OPTIONS or name in (
+                "--set", "--output", "--workdir"
+            ):
+                if inline:
+                    value = inline
+                    idx += 1
+                elif idx + 1 < len(args):
+                    value = args[idx + 1]
+                    idx += 2
+                else:
+                    raise ValueError(f"Missing value after {name}")
+                if name in _INT_OPTIONS:
+                    setattr(scenario, _INT_OPTIONS[name], int(value))
+                elif name in _FLOAT_OPTIONS:
+                    setattr(scenario, _FLOAT_OPTIONS[name], float(value))
+                elif name in _STR_OPTIONS:
+                    setattr(scenario, _STR_OPTIONS[name], value)
+                elif name == "--set":
+                    key, sep, raw = value.partition("=")
+                    if not sep:
+                        raise ValueError("--set expects KEY=VALUE")
+                    try:
+                        scenario.config[key] = json.loads(raw)
+                    except ValueError:
+                        scenario.config[key] = raw
+                elif name == "--output":
+                    output = value
+                else:
+                    workdir = Path(value)
+            elif arg == "--bench":
+                bench = True
+                idx += 1
+            elif arg == "--verbose":
+                verbose = True
+                idx += 1
+            else:
+                raise ValueError(f"Unknown option for ralph simulate: {arg}")
+        if bench:
+            result = run_bench(verbose=verbose)
+        else:
+            scenario.validate()
+            result = run_scenario(scenario, workdir=workdir, verbose=verbose)
+    except (ValueError, subprocess.CalledProcessError) as exc:
+        print(str(exc), file=sys.stderr)
+        return 1
+
+    text = json.dumps(result, indent=2, sort_keys=True)
+    if output:
+        Path(output).write_text(text + "\n", encoding="utf-8")
+        print(f"Wrote {output}", file=sys.stderr)
+    else:
+        print(text)
+    return 0
@@ -0,0 +1,134 @@
+"""Native in-process ready/blocked ticket queue for Ralph.
+
+Replaces the `tk ready` / `tk blocked` / `tk show` subprocesses used by the
+Ralph loop with an in-memory view of `.tickets/*.md` built on TicketLoader.
+The view is refreshed incrementally with TicketLoader.refresh(): each refresh
+is a single directory scan, and only files whose mtime or size changed are
+re-parsed. Refreshing is explicit (the loop calls `refresh()` once per
+iteration); the accessors read the in-memory view, loading it on first use.
+
+Semantics mirror `tk`:
+- Ready: status in {open, in_progress} and every dependency is closed
+- Blocked: status in {open, in_progress} and any dependency is not closed
+  (unknown dependency IDs count as not closed)
+- Ready tickets are ordered by priority (0 = highest, default 2), then ID
+"""
+
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+from typing import Mapping, Optional
+
+from tf.ticket_loader import Ticket, TicketLoader, TicketLoadError
+
+logger = logging.getLogger(__name__)
+
+# Statuses that can be picked up by the loop (same as `tk ready`)
+ACTIVE_STATUSES = frozenset({"open", "in_progress"})
+
+# Priority assumed for tickets without one (matches `tk create` default)
+DEFAULT_PRIORITY = 2
+
+# Component marker for untagged tickets when parallelAllowUntagged is set
+UNTAGGED_COMPONENT = "__untagged__"
+
+
+class TicketQueue:
+    """In-memory ready/blocked queue over a `.tickets` directory.
+
+    Example:
+        >>> queue = TicketQueue(Path(".tickets"))
+        >>> queue.ready()
+        ['pt-abc1', 'pt-def2']
+        >>> queue.components("pt-abc1", "component:", allow_untagged=False)
+        {'component:cli'}
+    """
+
+    def __init__(self, tickets_dir: Path):
+        self.tickets_dir = Path(tickets_dir)
+        self._loader = TicketLoader(self.tickets_dir)
+        self._by_id: Mapping[str, Ticket] = {}
+        self._loaded = False
+
+    def refresh(self) -> bool:
+        """Re-scan the tickets directory, re-parsing only changed files.
+
+        Returns:
+            True if any ticket file was added, modified or removed.
+        """
+        try:
+            changes = self._loader.refresh()
+        except (OSError, TicketLoadError) as exc:
+            logger.warning(f"Cannot scan tickets directory {self.tickets_dir}: {exc}")
+            return False
+        self._by_id = self._loader.by_id
+        self._loaded = True
+        return bool(changes)
+
+    def _view(self) -> Mapping[str, Ticket]:
+        """Tickets by ID as of the last refresh (loading them on first use)."""
+        if not self._loaded:
+            self.refresh()
+        return self._by_id
+
+    def tickets(self) -> dict[str, Ticket]:
+        """All parsed tickets by ID (as of the last refresh)."""
+        return dict(self._view())
+
+    def get(self, ticket_id: str) -> Optional[Ticket]:
+        """Get a ticket by ID (as of the last refresh)."""
+        return self._view().get(ticket_id)
+
+    def _status(self, ticket_id: str) -> str:
+        ticket = self._by_id.get(ticket_id)
+        return (ticket.status or "").lower() if ticket else "unknown"
+
+    def unmet_deps(self, ticket: Ticket) -> list[str]:
+        """Dependencies of a ticket that are not closed."""
+        return [dep for dep in (ticket.deps or []) if self._status(dep) != "closed"]
+
+    def ready(self) -> list[str]:
+        """IDs of ready tickets, highest priority first."""
+        ready = [
+            ticket
+            for ticket in self._view().values()
+            if (ticket.status or "").lower() in ACTIVE_STATUSES and not self.unmet_deps(ticket)
+        ]
+        ready.sort(key=lambda t: (ticket_priority(t), t.id))
+        return [ticket.id for ticket in ready]
+
+    def blocked(self) -> list[str]:
+        """IDs of active tickets waiting on unclosed dependencies."""
+        return sorted(
+            ticket.id
+            for ticket in self._view().values()
+            if (ticket.status or "").lower() in ACTIVE_STATUSES and self.unmet_deps(ticket)
+        )
+
+    def title(self, ticket_id: str) -> Optional[str]:
+        """Ticket title, or None if unknown or empty."""
+        ticket = self.get(ticket_id)
+        return (ticket.title or None) if ticket else None
+
+    def components(self, ticket_id: str, tag_prefix: str, allow_untagged: bool) -> Optional[set]:
+        """Component tags of a ticket (same contract as ralph.extract_components).
+
+        Returns:
+            Set of tags starting with tag_prefix; {"__untagged__"} for untagged
+            tickets when allow_untagged is set; otherwise None.
+        """
+        ticket = self.get(ticket_id)
+        tags = [str(tag) for tag in (ticket.tags or [])] if ticket else []
+        components = {tag for tag in tags if tag.startswith(tag_prefix)}
+        if not components:
+            return {UNTAGGED_COMPONENT} if allow_untagged else None
+        return components
+
+
+def ticket_priority(ticket: Ticket) -> int:
+    """Numeric ticket priority, defaulting to DEFAULT_PRIORITY when missing or invalid."""
+    try:
+        return int(ticket.priority) if ticket.priority is not None else DEFAULT_PRIORITY
+    except (TypeError, ValueError):
+        return DEFAULT_PRIORITY
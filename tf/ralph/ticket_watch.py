@@ -0,0 +1,263 @@
+"""Wake the Ralph loop when ticket files change.
+
+The loop used to sleep a fixed `sleepBetweenTickets` after every ticket and
+`sleepBetweenRetries` whenever nothing was ready. A TicketWatcher turns those
+sleeps into upper bounds: `wait(timeout)` returns as soon as anything under
+`.tickets/` or `.tf/knowledge/tickets/` changes.
+
+Changes are noticed from the moment the watcher is created, so a change that
+happens while a ticket runs (e.g. `tk close` marking it done) makes the next
+wait return immediately.
+
+Backends:
+- inotify (Linux, via ctypes; no extra dependency). Sub-directories are
+  watched too, and directories created later are added as they appear.
+- polling: compares a stat snapshot of the watched directories every
+  POLL_INTERVAL_SECS. Used elsewhere, or when inotify is unavailable.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Seconds between snapshots in the polling backend
+POLL_INTERVAL_SECS = 0.5
+
+# inotify constants (linux/inotify.h)
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = (
+    _IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE | _IN_DELETE_SELF
+)
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def _load_inotify() -> Optional[ctypes.CDLL]:
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        # The running interpreter already links libc (find_library would spawn ldconfig)
+        libc = ctypes.CDLL(None, use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class TicketWatcher:
+    """Blocks until ticket files change or a timeout elapses.
+
+    Example:
+        >>> watcher = TicketWatcher([project_root / ".tickets", project_root / ".tf/knowledge/tickets"])
+        >>> watcher.wait(10.0)  # True if something changed, False after 10 s
+        >>> watcher.close()
+    """
+
+    def __init__(self, paths: Iterable[Path], backend: str = "auto"):
+        """
+        Args:
+            paths: Directories to watch (missing ones are picked up once created)
+            backend: "auto" (inotify where available), "inotify" or "poll"
+        """
+        self.paths = [Path(p) for p in paths]
+        self._fd: Optional[int] = None
+        self._libc: Optional[ctypes.CDLL] = None
+        self._watches: Dict[int, Path] = {}
+        self._watched: set[Path] = set()
+        self._snapshot: Optional[Tuple] = None
+        if backend in ("auto", "inotify"):
+            self._start_inotify()
+        self.backend = "inotify" if self._fd is not None else "poll"
+        if self._fd is None:
+            self._snapshot = self._take_snapshot()
+
+    # ------------------------------------------------------------------ public
+
+    def changed(self) -> bool:
+        """Non-blocking check: has anything changed since the last check/wait?"""
+        return self.wait(0)
+
+    def wait(self, timeout: float) -> bool:
+        """Wait up to timeout seconds for a change.
+
+        Returns:
+            True if a change was seen (pending changes are consumed), False
+            if the timeout elapsed first.
+        """
+        timeout = max(0.0, timeout)
+        if self._fd is not None:
+            return self._wait_inotify(timeout)
+        return self._wait_poll(timeout)
+
+    def close(self) -> None:
+        if self._fd is not None:
+            try:
+                os.close(self._fd)
+            except OSError:
+                pass
+            self._fd = None
+            self._watches.clear()
+            self._watched.clear()
+
+    def __enter__(self) -> TicketWatcher:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    # ---------------------------------------------------------------- inotify
+
+    def _start_inotify(self) -> None:
+        libc = _load_inotify()
+        if libc is None:
+            return
+        fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if fd < 0:
+            return
+        self._libc = libc
+        self._fd = fd
+        self._add_missing_watches()
+
+    def _add_watch(self, path: Path) -> None:
+        if path in self._watched or self._fd is None or self._libc is None:
+            return
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(str(path)), _WATCH_MASK)
+        if wd >= 0:
+            self._watches[wd] = path
+            self._watched.add(path)
+
+    def _add_tree(self, root: Path) -> None:
+        self._add_watch(root)
+        try:
+            entries = list(os.scandir(root))
+        except OSError:
+            return
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                self._add_tree(Path(entry.path))
+
+    def _add_missing_watches(self) -> bool:
+        """Watch roots that did not exist before; True if any were added."""
+        added = False
+        for root in self.paths:
+            if root not in self._watched and root.is_dir():
+                self._add_tree(root)
+                added = True
+        return added
+
+    def _wait_inotify(self, timeout: float) -> bool:
+        assert self._fd is not None
+        deadline = time.monotonic() + timeout
+        while True:
+            if self._add_missing_watches():
+                # A watched root appeared: that is a change in itself.
+                self._drain()
+                return True
+            remaining = deadline - time.monotonic()
+            # Missing roots cannot be watched, so re-check for them periodically.
+            all_watched = all(root in self._watched for root in self.paths)
+            step = remaining if all_watched else min(remaining, POLL_INTERVAL_SECS)
+            try:
+                readable, _, _ = select.select([self._fd], [], [], max(0.0, step))
+            except InterruptedError:
+                readable = []
+            if readable and self._drain():
+                return True
+            if time.monotonic() >= deadline:
+                return False
+
+    def _drain(self) -> bool:
+        """Read all pending events; returns True if there were any."""
+        assert self._fd is not None
+        seen = False
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return seen
+            except OSError:
+                return seen
+            if not data:
+                return seen
+            seen = True
+            for path, mask in self._parse(data):
+                if mask & _IN_ISDIR and mask & (_IN_CREATE | _IN_MOVED_TO) and path is not None:
+                    self._add_tree(path)
+                if mask & _IN_DELETE_SELF:
+                    self._forget(path)
+
+    def _parse(self, data: bytes) -> List[Tuple[Optional[Path], int]]:
+        events: List[Tuple[Optional[Path], int]] = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            parent = self._watches.get(wd)
+            if parent is None:
+                events.append((None, mask))
+            elif mask & _IN_DELETE_SELF:
+                events.append((parent, mask))
+            else:
+                events.append((parent / os.fsdecode(name) if name else parent, mask))
+        return events
+
+    def _forget(self, path: Optional[Path]) -> None:
+        if path is None:
+            return
+        for wd, watched in list(self._watches.items()):
+            if watched == path:
+                del self._watches[wd]
+        self._watched.discard(path)
+
+    # ---------------------------------------------------------------- polling
+
+    def _take_snapshot(self) -> Tuple:
+        entries: List[Tuple[str, int, int]] = []
+        for root in self.paths:
+            self._scan(root, entries, depth=1)
+        return tuple(sorted(entries))
+
+    def _scan(self, directory: Path, entries: List[Tuple[str, int, int]], depth: int) -> None:
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    try:
+                        stat = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    entries.append((entry.path, stat.st_mtime_ns, stat.st_size))
+                    if depth > 0 and entry.is_dir(follow_symlinks=False):
+                        self._scan(Path(entry.path), entries, depth - 1)
+        except OSError:
+            return
+
+    def _wait_poll(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while True:
+            snapshot = self._take_snapshot()
+            if snapshot != self._snapshot:
+                self._snapshot = snapshot
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(POLL_INTERVAL_SECS, remaining))
@@ -0,0 +1,322 @@
+"""Reusable git worktree pool for Ralph parallel mode.
+
+Creating a worktree per ticket (`git worktree add`) checks out the whole tree,
+which dominates start-up time on large repositories. The pool keeps a set of
+persistent worktrees under `parallelWorktreesDir` (named `pool-<n>`) and moves
+them between tickets with a cheap `git checkout -f -B` + `git clean`, which only
+touches files that differ between the old and new base.
+
+Released worktrees are detached and cleaned in a background thread, and a
+spare worktree is prepared ahead of time while tickets run, so acquiring one
+for the next ticket is usually just a branch switch. The pool never creates
+more than `size` worktrees: when all of them are busy, `acquire` waits for one
+to be released.
+"""
+
+from __future__ import annotations
+
+import shutil
+import subprocess
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+# Directory name prefix for pooled worktrees
+POOL_PREFIX = "pool-"
+
+
+class WorktreeError(RuntimeError):
+    """Raised when a worktree cannot be created or reset."""
+
+
+@dataclass
+class WorktreePoolStats:
+    """Counters describing worktree pool effectiveness."""
+
+    hits: int = 0
+    misses: int = 0
+    prepared: int = 0
+    resets: int = 0
+    reset_secs_total: float = 0.0
+    last_reset_secs: float = 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "pool_hits": self.hits,
+            "pool_misses": self.misses,
+            "pool_prepared": self.prepared,
+            "pool_hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "reset_secs": round(self.last_reset_secs, 3),
+            "reset_secs_avg": round(self.reset_secs_total / self.resets, 3) if self.resets else 0.0,
+        }
+
+
+class WorktreePool:
+    """Pool of persistent git worktrees reused across tickets.
+
+    Example:
+        >>> pool = WorktreePool(repo_root, repo_root / ".tf/ralph/worktrees", size=3)
+        >>> path, hit = pool.acquire("pt-abc1")
+        >>> ...  # run pi in path on branch ralph/pt-abc1
+        >>> pool.release(path)
+        >>> pool.close()
+    """
+
+    def __init__(self, repo_root: Path, worktrees_dir: Path, size: int):
+        self.repo_root = Path(repo_root)
+        self.worktrees_dir = Path(worktrees_dir)
+        self.size = max(1, int(size))
+        self.stats = WorktreePoolStats()
+        self._cond = threading.Condition()
+        self._idle: list[Path] = []
+        self._busy: dict[Path, str] = {}
+        # Paths owned by background jobs (being prepared or released)
+        self._pending: set[Path] = set()
+        self._in_flight = 0
+        self._threads: list[threading.Thread] = []
+        self._discover()
+
+    # -- git helpers -------------------------------------------------------
+
+    def _git(self, *args: str, cwd: Optional[Path] = None) -> subprocess.CompletedProcess:
+        return subprocess.run(
+            ["git", "-C", str(cwd or self.repo_root), *args],
+            capture_output=True,
+            text=True,
+        )
+
+    def _check(self, result: subprocess.CompletedProcess, what: str) -> None:
+        if result.returncode != 0:
+            detail = (result.stderr or result.stdout or "").strip() or f"exit {result.returncode}"
+            raise WorktreeError(f"{what} failed: {detail}")
+
+    def _discover(self) -> None:
+        """Adopt pooled worktrees left by a previous run."""
+        result = self._git("worktree", "list", "--porcelain")
+        if result.returncode != 0:
+            return
+        root = self.worktrees_dir.resolve()
+        for line in result.stdout.splitlines():
+            if not line.startswith("worktree "):
+                continue
+            path = Path(line[len("worktree "):].strip())
+            if path.parent.resolve() == root and path.name.startswith(POOL_PREFIX) and path.is_dir():
+                self._idle.append(self.worktrees_dir / path.name)
+        self._idle.sort()
+
+    def _resolve(self, base: str) -> str:
+        """Resolve base to a commit in the main checkout (HEAD differs per worktree)."""
+        result = self._git("rev-parse", "--verify", f"{base}^{{commit}}")
+        self._check(result, f"git rev-parse {base}")
+        return result.stdout.strip()
+
+    def _managed(self) -> set[Path]:
+        return set(self._idle) | set(self._busy) | self._pending
+
+    def _next_path(self) -> Path:
+        managed = self._managed()
+        index = 1
+        while True:
+            path = self.worktrees_dir / f"{POOL_PREFIX}{index}"
+            if path not in managed and not path.exists():
+                return path
+            index += 1
+
+    def _create(self, path: Path, base: str, branch: Optional[str] = None) -> None:
+        self.worktrees_dir.mkdir(parents=True, exist_ok=True)
+        if branch:
+            args = ("worktree", "add", "-B", branch, str(path), base)
+        else:
+            args = ("worktree", "add", "--detach", str(path), base)
+        self._check(self._git(*args), "git worktree add")
+
+    def _reset(self, path: Path, base: str, branch: str) -> None:
+        self._check(self._git("checkout", "-f", "-B", branch, base, cwd=path), "git checkout")
+        self._check(self._git("clean", "-ffdq", cwd=path), "git clean")
+
+    def _detach(self, path: Path) -> None:
+        # Frees the ticket branch so it can be checked out elsewhere (e.g. on restart).
+        self._check(self._git("checkout", "-f", "--detach", cwd=path), "git checkout --detach")
+        self._check(self._git("clean", "-ffdq", cwd=path), "git clean")
+
+    def _discard(self, path: Path) -> None:
+        self._git("worktree", "remove", "-f", str(path))
+        if path.exists():
+            shutil.rmtree(path, ignore_errors=True)
+
+    # -- background jobs -----------------------------------------------------
+
+    def _spawn(self, target: Any, path: Path, *args: Any) -> None:
+        """Run a job that will hand a worktree back to the idle list (caller holds the lock)."""
+        self._in_flight += 1
+        self._pending.add(path)
+        thread = threading.Thread(target=target, args=(path, *args), daemon=True)
+        self._threads = [t for t in self._threads if t.is_alive()]
+        self._threads.append(thread)
+        thread.start()
+
+    def _finish_job(self, path: Path, ok: bool) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            self._pending.discard(path)
+            if ok:
+                self._idle.append(path)
+            self._cond.notify_all()
+
+    def _release_job(self, path: Path) -> None:
+        try:
+            self._detach(path)
+            ok = True
+        except WorktreeError:
+            self._discard(path)
+            ok = False
+        self._finish_job(path, ok)
+
+    def _prepare_job(self, path: Path, base: str) -> None:
+        try:
+            self._create(path, base)
+            ok = True
+            with self._cond:
+                self.stats.prepared += 1
+        except WorktreeError:
+            self._discard(path)
+            ok = False
+        self._finish_job(path, ok)
+
+    # -- public API ------------------------------------------------------------
+
+    @property
+    def idle_count(self) -> int:
+        with self._cond:
+            return len(self._idle)
+
+    def prepare(self, base: str = "HEAD") -> bool:
+        """Create a spare worktree in the background if none is idle.
+
+        Returns:
+            True if a background preparation was started.
+        """
+        with self._cond:
+            if self._idle or self._in_flight or len(self._managed()) >= self.size:
+                return False
+            try:
+                commit = self._resolve(base)
+            except WorktreeError:
+                return False
+            self._spawn(self._prepare_job, self._next_path(), commit)
+            return True
+
+    def acquire(self, ticket: str, base: str = "HEAD", timeout: Optional[float] = None) -> tuple[Path, bool]:
+        """Check out `ralph/<ticket>` at base in a pooled worktree.
+
+        Waits for in-flight background jobs when no worktree is idle, and
+        creates a new worktree only when none will become available and the
+        pool has fewer than `size`. When all `size` worktrees are busy, waits
+        for another thread to release (or retire) one.
+
+        Args:
+            ticket: Ticket ID; the worktree is switched to `ralph/<ticket>`
+            base: Commit-ish to start the branch from
+            timeout: Seconds to wait for a worktree (None waits indefinitely)
+
+        Returns:
+            Tuple of (worktree path, hit) where hit is True if an existing
+            worktree was reused.
+
+        Raises:
+            WorktreeError: If the worktree cannot be created or reset, or none
+                became available within timeout.
+        """
+        branch = f"ralph/{ticket}"
+        commit = self._resolve(base)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while not self._idle and (self._in_flight or len(self._managed()) >= self.size):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise WorktreeError(f"all {self.size} pooled worktrees are busy")
+                self._cond.wait(remaining)
+            if self._idle:
+                path = self._idle.pop(0)
+                hit = True
+            else:
+                path = self._next_path()
+                hit = False
+            self._busy[path] = ticket
+
+        started = time.monotonic()
+        try:
+            if hit:
+                self._reset(path, commit, branch)
+            else:
+                self._create(path, commit, branch)
+        except WorktreeError:
+            with self._cond:
+                self._busy.pop(path, None)
+                self._cond.notify_all()
+            self._discard(path)
+            raise
+        elapsed = time.monotonic() - started
+
+        with self._cond:
+            if hit:
+                self.stats.hits += 1
+                self.stats.resets += 1
+                self.stats.reset_secs_total += elapsed
+                self.stats.last_reset_secs = elapsed
+            else:
+                self.stats.misses += 1
+        return path, hit
+
+    def adopt(self, path: Path, ticket: str) -> bool:
+        """Hand an idle worktree left by a previous run back to its ticket as is.
+
+        Used when resuming an interrupted ticket in the worktree it was
+        running in (no checkout or clean).
+
+        Returns:
+            True if the worktree was idle in the pool and is now busy.
+        """
+        path = self.worktrees_dir / Path(path).name
+        with self._cond:
+            if path not in self._idle:
+                return False
+            self._idle.remove(path)
+            self._busy[path] = ticket
+            return True
+
+    def release(self, path: Path) -> None:
+        """Return a worktree to the pool; it is detached and cleaned in the background."""
+        with self._cond:
+            self._busy.pop(path, None)
+            self._spawn(self._release_job, path)
+
+    def retire(self, path: Path, name: str) -> Path:
+        """Take a worktree out of the pool, keeping its files for inspection.
+
+        The worktree is moved to `worktrees_dir/<name>` (replacing any previous
+        worktree there) and detached so its branch can be reused.
+
+        Returns:
+            The worktree's new location (the original path if the move failed).
+        """
+        with self._cond:
+            self._busy.pop(path, None)
+            # The pool has room for a new worktree again
+            self._cond.notify_all()
+        target = self.worktrees_dir / name
+        if target.exists():
+            self._discard(target)
+        if self._git("worktree", "move", str(path), str(target)).returncode != 0:
+            target = path
+        self._git("checkout", "--detach", cwd=target)
+        return target
+
+    def close(self) -> None:
+        """Wait for background jobs to finish."""
+        for thread in list(self._threads):
+            thread.join()
+        self._threads = []
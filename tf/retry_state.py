@@ -5,20 +5,28 @@ This module provides functionality for:
 - Detecting BLOCKED status from close-summary.md and review.md
 - Resolving escalation models based on attempt number
 - Managing retry counters and reset policies
+
+Several Ralph workers (or loops) may touch the same ticket's retry state.
+Writers hold an advisory lock on the artifact directory (fcntl.flock on the
+directory itself, so no lock file is left behind) and `start_attempt` /
+`complete_attempt` re-read the file under that lock before changing it, so
+concurrent updates are applied one after another instead of overwriting each
+other. Files are replaced atomically, so readers never need the lock.
 """
 
 from __future__ import annotations
 
 import json
 import logging
-import os
 import re
 import shutil
+from contextlib import contextmanager
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, TypedDict
+from typing import Any, Iterator, TypedDict
 
+from .utils import atomic_write_text, locked_file
 
 # Schema version for future migrations
 SCHEMA_VERSION = 1
@@ -114,6 +122,23 @@ class EscalatedModels:
     worker: str | None = None
 
 
+@contextmanager
+def lock_artifact_dir(artifact_dir: str | Path) -> Iterator[None]:
+    """Hold an exclusive advisory lock on a ticket's artifact directory.
+
+    The lock is taken on the directory itself, so it works across processes
+    and threads without leaving a lock file behind. Where locking is not
+    available (Windows, some network filesystems) this is a no-op.
+
+    Args:
+        artifact_dir: Path to ticket artifact directory (created if missing)
+    """
+    path = Path(artifact_dir)
+    path.mkdir(parents=True, exist_ok=True)
+    with locked_file(path, required=False):
+        yield
+
+
 class RetryState:
     """Manages retry state for a single ticket.
 
@@ -166,22 +191,37 @@ class RetryState:
             RetryState instance if file exists and is valid, None otherwise
         """
         path = Path(artifact_dir) / "retry-state.json"
+        data = cls._read_data(path)
+        if data is None:
+            return None
+
+        ticket_id = data.get("ticketId", path.parent.name)
+        return cls(artifact_dir, ticket_id=ticket_id, data=data)
+
+    @classmethod
+    def _read_data(cls, path: Path) -> RetryStateData | None:
+        """Read and validate a retry state file.
+
+        Args:
+            path: Path to retry-state.json
+
+        Returns:
+            Parsed state if the file exists and is valid, None otherwise
+        """
         if not path.exists():
             return None
 
         try:
             with open(path, encoding="utf-8") as f:
                 data = json.load(f)
-
-            # Validate required fields
-            if not cls._validate_schema(data):
-                return None
-
-            ticket_id = data.get("ticketId", path.parent.name)
-            return cls(artifact_dir, ticket_id=ticket_id, data=data)
         except (json.JSONDecodeError, IOError):
             return None
 
+        # Validate required fields
+        if not isinstance(data, dict) or not cls._validate_schema(data):
+            return None
+        return data  # type: ignore[return-value]
+
     @staticmethod
     def _validate_schema(data: dict[str, Any]) -> bool:
         """Validate retry state schema.
@@ -216,14 +256,24 @@ class RetryState:
         }
 
     def save(self) -> None:
-        """Save retry state to file atomically."""
-        self.artifact_dir.mkdir(parents=True, exist_ok=True)
-        temp_path = self.state_path.with_suffix(".tmp")
+        """Save retry state to file atomically (under the artifact directory lock)."""
+        with lock_artifact_dir(self.artifact_dir):
+            atomic_write_text(self.state_path, json.dumps(self._data, indent=2))
 
-        with open(temp_path, "w", encoding="utf-8") as f:
-            json.dump(self._data, f, indent=2)
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        """Atomic read-modify-write of the state file.
 
-        os.replace(temp_path, self.state_path)
+        Under the artifact directory lock, reloads the latest saved state
+        (another worker may have changed it), lets the caller modify it and
+        writes it back. Nothing is written if the caller raises.
+        """
+        with lock_artifact_dir(self.artifact_dir):
+            current = self._read_data(self.state_path)
+            if current is not None:
+                self._data = current
+            yield
+            atomic_write_text(self.state_path, json.dumps(self._data, indent=2))
 
     def start_attempt(
         self,
@@ -236,6 +286,9 @@ class RetryState:
         If the last attempt has status "in_progress", resumes that attempt
         instead of creating a duplicate. This handles crashes/restarts.
 
+        The change is applied to the latest saved state and written back
+        atomically, so concurrent workers never lose each other's attempts.
+
         Args:
             trigger: Why this attempt was started
             quality_gate: Quality gate configuration and counts
@@ -244,6 +297,15 @@ class RetryState:
         Returns:
             Attempt number (1-indexed)
         """
+        with self._transaction():
+            return self._start_attempt(trigger, quality_gate, escalation)
+
+    def _start_attempt(
+        self,
+        trigger: str,
+        quality_gate: QualityGateState | None,
+        escalation: EscalationState | None,
+    ) -> int:
         now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
 
         # Check if we should resume an in-progress attempt
@@ -286,10 +348,17 @@ class RetryState:
     ) -> None:
         """Complete the current attempt.
 
+        Like start_attempt, this is an atomic read-modify-write of the
+        saved state.
+
         Args:
             status: Final status ("blocked", "closed", "error")
             close_summary_ref: Path to close summary relative to artifact dir
         """
+        with self._transaction():
+            self._complete_attempt(status, close_summary_ref)
+
+    def _complete_attempt(self, status: str, close_summary_ref: str) -> None:
         if not self._data["attempts"]:
             raise ValueError("No in-progress attempt to complete")
 
@@ -404,13 +473,14 @@ class RetryState:
         Args:
             backup: If True, backup existing state before resetting
         """
-        if backup and self.state_path.exists():
-            timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
-            backup_path = self.state_path.with_suffix(f".json.bak.{timestamp}")
-            shutil.copy2(self.state_path, backup_path)
-
-        self._data = self._create_empty_state(self.ticket_id)
-        self.save()
+        with lock_artifact_dir(self.artifact_dir):
+            if backup and self.state_path.exists():
+                timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+                backup_path = self.state_path.with_suffix(f".json.bak.{timestamp}")
+                shutil.copy2(self.state_path, backup_path)
+
+            self._data = self._create_empty_state(self.ticket_id)
+            atomic_write_text(self.state_path, json.dumps(self._data, indent=2))
 
     def to_dict(self) -> RetryStateData:
         """Get underlying state data.
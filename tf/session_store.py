@@ -8,11 +8,12 @@ from __future__ import annotations
 
 import json
 import os
-import tempfile
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Optional
 
+from .utils import atomic_write_text
+
 # Schema version for session files
 SCHEMA_VERSION = 1
 
@@ -52,26 +53,7 @@ def _atomic_write_json(path: Path, data: dict[str, Any]) -> None:
     
     This ensures readers never see a partially written file.
     """
-    path.parent.mkdir(parents=True, exist_ok=True)
-    
-    # Use a temp file in the same directory to ensure rename is atomic
-    fd, temp_path = tempfile.mkstemp(
-        dir=path.parent,
-        prefix=f".{path.name}.",
-        suffix=".tmp"
-    )
-    try:
-        with os.fdopen(fd, "w", encoding="utf-8") as handle:
-            json.dump(data, handle, indent=2)
-            handle.write("\n")
-        os.rename(temp_path, path)
-    except Exception:
-        # Clean up temp file on failure
-        try:
-            os.unlink(temp_path)
-        except FileNotFoundError:
-            pass
-        raise
+    atomic_write_text(path, json.dumps(data, indent=2) + "\n")
 
 
 def _read_json(path: Path) -> Optional[dict[str, Any]]:
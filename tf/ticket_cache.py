@@ -0,0 +1,206 @@
+"""Persistent metadata cache for TicketLoader (`.tf/cache/tickets.json`).
+
+Parsing every `.tickets/*.md` file with YAML on each `load_all()` is the
+dominant cost of the TUI, the web board and `workflow_status` on large
+backlogs. The cache stores the parsed frontmatter, title and body offset of
+each ticket file keyed by file name, `st_mtime_ns` and `st_size`:
+
+    {"version": 2, "parser": "yaml", "tickets_dir": "/repo/.tickets",
+     "files": {"pt-abc1.md": {"mtime_ns": 1760000000000000000, "size": 412,
+                              "frontmatter": {"id": "pt-abc1", ...},
+                              "title": "Add login", "body_offset": 160}}}
+
+A warm load only stats the directory entries; files whose key changed are
+re-parsed and files that disappeared are dropped. The file is replaced
+atomically (temp file + rename), so concurrent readers see either the old
+or the new version; concurrent writers are last-one-wins, which is safe
+because every entry is re-validated against the file's stat on use.
+
+Frontmatter timestamps parsed by YAML (`created: 2026-02-09T00:28:00Z`) are
+stored as tagged ISO strings and restored as datetime/date objects, so a
+ticket loaded from the cache equals one parsed from disk.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import time
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Optional
+
+from tf.utils import atomic_write_text
+
+logger = logging.getLogger(__name__)
+
+CACHE_FILE = "tickets.json"
+CACHE_VERSION = 2
+
+# Files modified this recently are not cached: a second edit within the
+# filesystem's timestamp granularity could keep the same mtime and size
+RACY_WINDOW_NS = 2_000_000_000
+
+_DATETIME_TAG = "__datetime__"
+_DATE_TAG = "__date__"
+
+
+def default_cache_path(tickets_dir: Path) -> Optional[Path]:
+    """Cache location for a tickets directory (None outside a tf project).
+
+    The cache lives next to the tickets in the project's `.tf` directory;
+    directories without one (ad-hoc paths, tests) are not cached.
+    """
+    tf_dir = Path(tickets_dir).parent / ".tf"
+    if not tf_dir.is_dir():
+        return None
+    return tf_dir / "cache" / CACHE_FILE
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {_DATETIME_TAG: value.isoformat()}
+    if isinstance(value, date):
+        return {_DATE_TAG: value.isoformat()}
+    raise TypeError(f"Cannot cache {type(value).__name__}")
+
+
+def _decode(obj: dict[str, Any]) -> Any:
+    if len(obj) == 1:
+        if _DATETIME_TAG in obj:
+            return datetime.fromisoformat(obj[_DATETIME_TAG])
+        if _DATE_TAG in obj:
+            return date.fromisoformat(obj[_DATE_TAG])
+    return obj
+
+
+class TicketCache:
+    """Parsed ticket metadata keyed by file name, mtime and size.
+
+    Example:
+        >>> cache = TicketCache(Path(".tf/cache/tickets.json"), tickets_dir, parser="yaml")
+        >>> entry = cache.get("pt-abc1.md", stat.st_mtime_ns, stat.st_size)
+        >>> if entry is None:
+        ...     cache.put("pt-abc1.md", stat.st_mtime_ns, stat.st_size, frontmatter, title)
+        >>> cache.save(seen={"pt-abc1.md"})
+    """
+
+    def __init__(self, path: Path, tickets_dir: Path, parser: str):
+        """
+        Args:
+            path: Cache file location
+            tickets_dir: Directory the cached file names are relative to
+            parser: Frontmatter parser in use ("yaml" or "basic"); a cache
+                written by the other parser is discarded
+        """
+        self.path = Path(path)
+        self.tickets_dir = str(Path(tickets_dir).resolve())
+        self.parser = parser
+        # file name -> {"mtime_ns", "size", "frontmatter", "title", "body_offset"}
+        self._files: dict[str, dict[str, Any]] = {}
+        self._loaded = False
+        self._dirty = False
+
+    def _load(self) -> None:
+        self._loaded = True
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"), object_hook=_decode)
+        except (OSError, ValueError) as e:
+            if not isinstance(e, FileNotFoundError):
+                logger.debug(f"Ignoring unreadable ticket cache {self.path}: {e}")
+            return
+        if (
+            not isinstance(data, dict)
+            or data.get("version") != CACHE_VERSION
+            or data.get("parser") != self.parser
+            or data.get("tickets_dir") != self.tickets_dir
+            or not isinstance(data.get("files"), dict)
+        ):
+            return
+        self._files = data["files"]
+
+    def get(self, name: str, mtime_ns: int, size: int) -> Optional[dict[str, Any]]:
+        """Cached entry for a file if its mtime and size still match.
+
+        Returns:
+            Dict with "frontmatter" (None if the file has none), "title" and
+            "body_offset", or None on a miss.
+        """
+        if not self._loaded:
+            self._load()
+        entry = self._files.get(name)
+        if not isinstance(entry, dict) or entry.get("mtime_ns") != mtime_ns or entry.get("size") != size:
+            return None
+        if "frontmatter" not in entry or "title" not in entry:
+            return None
+        return entry
+
+    def put(
+        self,
+        name: str,
+        mtime_ns: int,
+        size: int,
+        frontmatter: Optional[dict],
+        title: str,
+        body_offset: int = 0,
+    ) -> None:
+        """Record a freshly parsed file (skipped if recently modified or not storable)."""
+        if not self._loaded:
+            self._load()
+        if time.time_ns() - mtime_ns < RACY_WINDOW_NS:
+            self._forget(name)
+            return
+        entry = {
+            "mtime_ns": mtime_ns,
+            "size": size,
+            "frontmatter": frontmatter,
+            "title": title,
+            "body_offset": body_offset,
+        }
+        try:
+            # Only cache what comes back unchanged (e.g. no sets or non-string keys)
+            if json.loads(json.dumps(entry, default=_encode), object_hook=_decode) != entry:
+                raise ValueError("frontmatter does not round-trip")
+        except (TypeError, ValueError) as e:
+            logger.debug(f"Not caching {name}: {e}")
+            self._forget(name)
+            return
+        self._files[name] = entry
+        self._dirty = True
+
+    def _forget(self, name: str) -> None:
+        if self._files.pop(name, None) is not None:
+            self._dirty = True
+
+    def save(self, seen: set[str]) -> None:
+        """Drop entries for files not in `seen` and write the cache if it changed.
+
+        Failures (read-only checkout, full disk) are logged and ignored.
+        """
+        if not self._loaded:
+            self._load()
+        for name in [name for name in self._files if name not in seen]:
+            del self._files[name]
+            self._dirty = True
+        if not self._dirty:
+            return
+        data = {
+            "version": CACHE_VERSION,
+            "parser": self.parser,
+            "tickets_dir": self.tickets_dir,
+            "files": self._files,
+        }
+        try:
+            self._write(json.dumps(data, default=_encode, separators=(",", ":")))
+        except OSError as e:
+            logger.debug(f"Cannot write ticket cache {self.path}: {e}")
+            return
+        self._dirty = False
+
+    def _write(self, text: str) -> None:
+        cache_dir = self.path.parent
+        if not cache_dir.is_dir():
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            # Keep the cache out of version control without touching the project's .gitignore
+            (cache_dir / ".gitignore").write_text("*\n", encoding="utf-8")
+        atomic_write_text(self.path, text)
@@ -1,22 +1,37 @@
 """Ticket loader for UI with frontmatter parsing and lazy body loading.
 
 This module provides efficient loading of ticket metadata from `.tickets/*.md` files,
-with support for lazy loading of full ticket body content.
+with support for lazy loading of full ticket body content. Files are read only
+up to their title and the `tk` frontmatter grammar is parsed without YAML where
+possible (see tf.ticket_reader). Parsed metadata is
+cached in `.tf/cache/tickets.json` (see tf.ticket_cache) so repeated loads only
+re-parse files that changed. Large directories (or slow network mounts) are
+read with a thread or process pool, and large boards can use the slotted
+CompactTicket record instead of Ticket.
 """
 
 from __future__ import annotations
 
 import logging
+import os
 import re
+import sys
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional
+from types import MappingProxyType
+from typing import Any, Mapping, Optional
+
+from tf.ticket_cache import TicketCache, default_cache_path
+from tf.ticket_reader import TicketHead, parse_tk_frontmatter, read_ticket_head
 
 # Optional YAML import - fall back to basic parsing if not available
 try:
     import yaml
 
     HAS_YAML = True
+    # libyaml-backed loader when available (same results, much faster)
+    _YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
 except ImportError:
     HAS_YAML = False
 
@@ -28,6 +43,15 @@ FRONTMATTER_PATTERN = re.compile(r"^---\s*\r?\n(.*?)\r?\n---\s*\r?\n(.*)$", re.D
 # Regex pattern for markdown title (first # heading)
 TITLE_PATTERN = re.compile(r"^#\s*(.+)$", re.MULTILINE)
 
+# Files to stat or read before a worker pool is used (smaller loads stay sequential)
+PARALLEL_THRESHOLD = 256
+
+# Worker threads for parallel loads; override with TF_TICKET_WORKERS (1 disables)
+DEFAULT_LOAD_WORKERS = 8
+
+# "thread" suits slow file opens (NFS, sshfs), "process" suits parse-heavy loads; override with TF_TICKET_POOL
+LOAD_POOLS = ("thread", "process")
+
 
 @dataclass
 class Ticket:
@@ -48,6 +72,8 @@ class Ticket:
         links: List of linked tickets
         _body: Cached body content (None until loaded)
         _body_loaded: Whether body has been loaded
+        _body_offset: Byte offset of the body in the file, if known
+        _file_key: (mtime_ns, size) of the file the offset was read from
     """
 
     id: str
@@ -64,6 +90,8 @@ class Ticket:
     links: list[str] = field(default_factory=list)
     _body: Optional[str] = field(default=None, repr=False)
     _body_loaded: bool = field(default=False, repr=False)
+    _body_offset: Optional[int] = field(default=None, repr=False, compare=False)
+    _file_key: Optional[tuple[int, int]] = field(default=None, repr=False, compare=False)
 
     @property
     def body(self) -> str:
@@ -79,20 +107,7 @@ class Ticket:
     def _load_body(self) -> None:
         """Load the body content from disk."""
         try:
-            content = self.file_path.read_text(encoding="utf-8")
-            # Extract body after frontmatter
-            match = FRONTMATTER_PATTERN.match(content)
-            if match:
-                body_content = match.group(2)
-            else:
-                body_content = content
-
-            # Remove title line if present
-            lines = body_content.split("\n")
-            if lines and lines[0].startswith("# "):
-                body_content = "\n".join(lines[1:]).lstrip("\n")
-
-            self._body = body_content
+            self._body = _read_body(self.file_path, self._body_offset, self._file_key)
         except (IOError, OSError) as e:
             logger.warning(f"Failed to load body for ticket {self.id}: {e}")
             self._body = ""
@@ -114,6 +129,129 @@ class Ticket:
         return "\n".join(parts)
 
 
+class CompactTicket:
+    """Memory-lean, read-only-by-convention ticket record for large boards.
+
+    Same attributes, `body` and `get_summary()` as Ticket, but slotted:
+    `deps`, `tags` and `links` are tuples, IDs, status, type, assignee and
+    tags are interned (so 50k tickets share one "open" string), all tickets
+    of a directory share one directory Path, and the body is re-read from
+    its byte offset on every access instead of being kept in memory.
+    Built by `TicketLoader(compact=True)`.
+    """
+
+    __slots__ = (
+        "id",
+        "status",
+        "title",
+        "_dir",
+        "_name",
+        "deps",
+        "tags",
+        "assignee",
+        "external_ref",
+        "priority",
+        "ticket_type",
+        "created",
+        "links",
+        "_body_offset",
+        "_file_key",
+    )
+
+    # Compared by __eq__ and shown by __repr__, like Ticket's dataclass fields
+    _FIELDS = (
+        "id", "status", "title", "file_path", "deps", "tags", "assignee",
+        "external_ref", "priority", "ticket_type", "created", "links",
+    )
+
+    def __init__(
+        self,
+        id: str,
+        status: str,
+        title: str,
+        file_path: Path,
+        deps: Any = (),
+        tags: Any = (),
+        assignee: Optional[str] = None,
+        external_ref: Optional[str] = None,
+        priority: Optional[int] = None,
+        ticket_type: Optional[str] = None,
+        created: Optional[str] = None,
+        links: Any = (),
+        _body_offset: Optional[int] = None,
+        _file_key: Optional[tuple[int, int]] = None,
+    ):
+        file_path = Path(file_path)
+        self.id = _intern(id)
+        self.status = _intern(status)
+        self.title = title
+        self._dir = _shared_dir(file_path.parent)
+        self._name = file_path.name
+        self.deps = _freeze(deps)
+        self.tags = _freeze(tags)
+        self.assignee = _intern(assignee)
+        self.external_ref = external_ref
+        self.priority = priority
+        self.ticket_type = _intern(ticket_type)
+        self.created = created
+        self.links = _freeze(links)
+        self._body_offset = _body_offset
+        self._file_key = _file_key
+
+    @property
+    def file_path(self) -> Path:
+        """Path to the ticket markdown file."""
+        return self._dir / self._name
+
+    @property
+    def body(self) -> str:
+        """Read the ticket body (excluding frontmatter and title) from disk.
+
+        Not cached: callers that need it repeatedly should keep the result.
+        """
+        try:
+            return _read_body(self.file_path, self._body_offset, self._file_key)
+        except (IOError, OSError) as e:
+            logger.warning(f"Failed to load body for ticket {self.id}: {e}")
+            return ""
+
+    get_summary = Ticket.get_summary
+
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self._FIELDS)
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self._FIELDS)
+        return f"{self.__class__.__name__}({fields})"
+
+
+@dataclass
+class TicketChanges:
+    """Tickets added, modified and removed since the previous load or refresh.
+
+    Attributes:
+        added: Tickets whose ID was not loaded before
+        modified: Tickets whose file changed (new Ticket objects)
+        removed: Previously loaded tickets that are gone
+    """
+
+    added: list[Ticket] = field(default_factory=list)
+    modified: list[Ticket] = field(default_factory=list)
+    removed: list[Ticket] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.modified or self.removed)
+
+    @property
+    def ids(self) -> set[str]:
+        """IDs of all changed tickets."""
+        return {t.id for t in (*self.added, *self.modified, *self.removed)}
+
+
 class TicketLoadError(Exception):
     """Raised when a ticket cannot be loaded."""
     pass
@@ -124,6 +262,8 @@ class TicketLoader:
 
     This loader provides:
     - Efficient loading of frontmatter + title only (fast for many tickets)
+    - A persistent metadata cache, so unchanged files are not re-parsed
+    - Incremental refresh reporting added/modified/removed tickets
     - Lazy loading of full body content (on demand)
     - Graceful handling of malformed tickets (warnings, no crashes)
 
@@ -136,17 +276,49 @@ class TicketLoader:
         ...     print(ticket.body[:100])
     """
 
-    def __init__(self, tickets_dir: Optional[Path] = None):
+    def __init__(
+        self,
+        tickets_dir: Optional[Path] = None,
+        cache_path: Optional[Path] = None,
+        use_cache: bool = True,
+        workers: Optional[int] = None,
+        pool: Optional[str] = None,
+        parallel_threshold: int = PARALLEL_THRESHOLD,
+        compact: bool = False,
+    ):
         """Initialize the loader.
 
         Args:
             tickets_dir: Optional path to tickets directory.
                         If not provided, resolves to `.tickets` in repo root or cwd.
+            cache_path: Optional metadata cache file. Defaults to
+                        `.tf/cache/tickets.json` next to the tickets directory
+                        (no cache when there is no `.tf` directory).
+            use_cache: Set to False to always parse every ticket file.
+            workers: Pool size for loads of at least parallel_threshold files
+                        (default: TF_TICKET_WORKERS, else 8 threads or one
+                        process per CPU; 1 disables parallel loading).
+            pool: "thread" or "process" (default: TF_TICKET_POOL, else "thread").
+            parallel_threshold: Minimum number of files to stat or read
+                        before the pool is used.
+            compact: Build CompactTicket records (tuples, interned strings,
+                        bodies not kept in memory) for large boards.
         """
         self.tickets_dir = tickets_dir or self._resolve_tickets_dir()
         self._tickets: list[Ticket] = []
         self._by_id: dict[str, Ticket] = {}
+        # file name -> (mtime_ns, size, parsed ticket or None if unparsable)
+        self._files: dict[str, tuple[int, int, Optional[Ticket]]] = {}
         self._loaded = False
+        if use_cache and cache_path is None:
+            cache_path = default_cache_path(self.tickets_dir)
+        self._cache: Optional[TicketCache] = None
+        if use_cache and cache_path is not None:
+            self._cache = TicketCache(cache_path, self.tickets_dir, parser="yaml" if HAS_YAML else "basic")
+        self.pool = _resolve_pool(pool)
+        self.workers = _resolve_workers(workers, self.pool)
+        self.parallel_threshold = parallel_threshold
+        self.compact = compact
 
     def _resolve_tickets_dir(self) -> Path:
         """Resolve the tickets directory from repo root or cwd.
@@ -173,30 +345,220 @@ class TicketLoader:
         Raises:
             TicketLoadError: If tickets directory cannot be found.
         """
+        entries = self._scan()
+
+        names = sorted(entries)
+        tickets = self._load_entries([(name, *entries[name]) for name in names])
+        self._files = {
+            name: (entries[name][1], entries[name][2], ticket) for name, ticket in zip(names, tickets)
+        }
+
+        self._tickets = [ticket for _, _, ticket in self._files.values() if ticket]
+        self._by_id = {ticket.id: ticket for ticket in self._tickets}
+        self._save_cache()
+
+        self._loaded = True
+        return self._tickets.copy()
+
+    def refresh(self) -> TicketChanges:
+        """Re-scan the tickets directory, re-parsing only changed files.
+
+        Updates the loaded tickets in place. The first call (before any
+        load) loads everything and reports every ticket as added.
+
+        Returns:
+            TicketChanges with the added, modified and removed tickets
+            (falsy when nothing changed).
+
+        Raises:
+            TicketLoadError: If tickets directory cannot be found.
+        """
+        if not self._loaded:
+            return TicketChanges(added=self.load_all())
+
+        entries = self._scan()
+        before = {ticket.id: ticket for _, _, ticket in self._files.values() if ticket}
+        changed = False
+
+        for name in [name for name in self._files if name not in entries]:
+            del self._files[name]
+            changed = True
+
+        pending = []
+        added_names = False
+        for name, (entry, mtime_ns, size) in entries.items():
+            cached = self._files.get(name)
+            if cached is not None and cached[:2] == (mtime_ns, size):
+                continue
+            added_names = added_names or cached is None
+            pending.append((name, entry, mtime_ns, size))
+        for (name, _, mtime_ns, size), ticket in zip(pending, self._load_entries(pending)):
+            self._files[name] = (mtime_ns, size, ticket)
+            changed = True
+
+        if not changed:
+            return TicketChanges()
+        if added_names:
+            self._files = dict(sorted(self._files.items()))
+
+        self._tickets[:] = [ticket for _, _, ticket in self._files.values() if ticket]
+        after = {ticket.id: ticket for ticket in self._tickets}
+        changes = TicketChanges(
+            added=[ticket for ticket_id, ticket in after.items() if ticket_id not in before],
+            modified=[
+                ticket
+                for ticket_id, ticket in after.items()
+                if ticket_id in before and before[ticket_id] is not ticket
+            ],
+            removed=[ticket for ticket_id, ticket in before.items() if ticket_id not in after],
+        )
+        for ticket in changes.removed:
+            del self._by_id[ticket.id]
+        for ticket in (*changes.added, *changes.modified):
+            self._by_id[ticket.id] = ticket
+        self._save_cache()
+        return changes
+
+    def _scan(self) -> dict[str, tuple[os.DirEntry, int, int]]:
+        """Stat all ticket files in one scandir pass (hidden files skipped like glob).
+
+        Returns:
+            Mapping of file name to (entry, mtime_ns, size).
+        """
         if not self.tickets_dir.exists():
             raise TicketLoadError(
                 f"Tickets directory not found: {self.tickets_dir}\n"
                 "Run 'tk init' to create it."
             )
 
-        self._tickets = []
-        self._by_id = {}
+        listed = [
+            entry
+            for entry in os.scandir(self.tickets_dir)
+            if entry.name.endswith(".md") and not entry.name.startswith(".")
+        ]
+        if self._parallel(len(listed)):
+            # Stats are I/O-bound, so threads regardless of the pool setting
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                stats = [
+                    stat
+                    for chunk_stats in executor.map(_stat_chunk, self._chunks(listed))
+                    for stat in chunk_stats
+                ]
+        else:
+            stats = _stat_chunk(listed)
+
+        entries: dict[str, tuple[os.DirEntry, int, int]] = {}
+        for entry, stat in zip(listed, stats):
+            # None: removed between listing and stat
+            if stat is not None:
+                entries[entry.name] = (entry, stat.st_mtime_ns, stat.st_size)
+        return entries
+
+    def _parallel(self, count: int) -> bool:
+        return self.workers > 1 and count >= max(1, self.parallel_threshold)
+
+    def _chunks(self, items: list) -> list[list]:
+        """Split work into a few chunks per worker (one task per file costs more than a local read)."""
+        size = max(1, -(-len(items) // (self.workers * 4)))
+        return [items[start:start + size] for start in range(0, len(items), size)]
+
+    def _load_entries(self, items: list[tuple[str, os.DirEntry, int, int]]) -> list[Optional[Ticket]]:
+        """Load (name, entry, mtime_ns, size) items in order, reading files in parallel when there are many."""
+        prefetched = self._prefetch(items)
+        return [
+            self._load_entry(entry, mtime_ns, size, prefetched.get(name))
+            for name, entry, mtime_ns, size in items
+        ]
+
+    def _prefetch(self, items: list[tuple[str, os.DirEntry, int, int]]) -> dict[str, Any]:
+        """Read the files that are not cached with the worker pool.
 
-        # Find all .md files in tickets directory
-        ticket_files = sorted(self.tickets_dir.glob("*.md"))
+        Returns:
+            Mapping of file name to _read_metadata()'s result or the exception
+            it raised. Empty when the load stays sequential; files whose
+            chunk failed (e.g. the pool could not start) are left out and
+            read sequentially.
+        """
+        todo = [
+            (name, entry.path)
+            for name, entry, mtime_ns, size in items
+            if self._cache is None or self._cache.get(name, mtime_ns, size) is None
+        ]
+        if not self._parallel(len(todo)):
+            return {}
 
-        for file_path in ticket_files:
-            try:
-                ticket = self._parse_ticket(file_path)
-                if ticket:
-                    self._tickets.append(ticket)
-                    self._by_id[ticket.id] = ticket
-            except Exception as e:
-                logger.warning(f"Skipping malformed ticket {file_path.name}: {e}")
-                continue
+        executor: Executor
+        if self.pool == "process":
+            # Workers get a bare loader (no cache, no loaded tickets) to keep pickling cheap
+            reader = TicketLoader(self.tickets_dir, use_cache=False, workers=1)
+            executor = ProcessPoolExecutor(max_workers=self.workers)
+        else:
+            reader = self
+            executor = ThreadPoolExecutor(max_workers=self.workers)
+
+        results: dict[str, Any] = {}
+        with executor:
+            futures = [
+                (chunk, executor.submit(_read_chunk, reader, [path for _, path in chunk]))
+                for chunk in self._chunks(todo)
+            ]
+            for chunk, future in futures:
+                try:
+                    chunk_results = future.result()
+                except Exception as e:
+                    logger.debug(f"Parallel ticket read failed, reading {len(chunk)} files sequentially: {e}")
+                    continue
+                results.update(zip((name for name, _ in chunk), chunk_results))
+        return results
 
-        self._loaded = True
-        return self._tickets.copy()
+    def _load_entry(
+        self,
+        entry: os.DirEntry,
+        mtime_ns: int,
+        size: int,
+        prefetched: Any = None,
+    ) -> Optional[Ticket]:
+        """Build a ticket from the cache, parsing the file only if it changed.
+
+        Args:
+            entry: Directory entry of the ticket file
+            mtime_ns: Modification time from the scan
+            size: File size from the scan
+            prefetched: _read_metadata() result (or exception) from a pool worker
+
+        Returns:
+            The ticket, or None (with a warning) if the file is malformed.
+        """
+        file_path = Path(entry.path)
+        try:
+            if self._cache is not None:
+                cached = self._cache.get(entry.name, mtime_ns, size)
+                if cached is not None:
+                    return self._build_ticket(
+                        file_path, cached["frontmatter"], cached["title"], cached.get("body_offset"), (mtime_ns, size)
+                    )
+
+            if prefetched is None:
+                if self._cache is None:
+                    return self._parse_ticket(file_path)
+                prefetched = self._read_metadata(file_path)
+            elif isinstance(prefetched, Exception):
+                raise prefetched
+
+            frontmatter, head = prefetched
+            ticket = self._build_ticket(
+                file_path, frontmatter, head.title, head.body_offset, (head.mtime_ns, head.size)
+            )
+            if self._cache is not None:
+                self._cache.put(entry.name, head.mtime_ns, head.size, frontmatter, head.title, head.body_offset)
+            return ticket
+        except Exception as e:
+            logger.warning(f"Skipping malformed ticket {file_path.name}: {e}")
+            return None
+
+    def _save_cache(self) -> None:
+        if self._cache is not None:
+            self._cache.save(set(self._files))
 
     def _parse_ticket(self, file_path: Path) -> Optional[Ticket]:
         """Parse a single ticket file.
@@ -207,31 +569,60 @@ class TicketLoader:
         Returns:
             Parsed Ticket or None if parsing fails
         """
-        content = file_path.read_text(encoding="utf-8")
+        frontmatter, head = self._read_metadata(file_path)
+        return self._build_ticket(file_path, frontmatter, head.title, head.body_offset, (head.mtime_ns, head.size))
+
+    def _read_metadata(self, file_path: Path) -> tuple[Optional[dict], TicketHead]:
+        """Read a ticket file's frontmatter (None if missing), title and body offset.
+
+        Only the leading part of the file is read (see read_ticket_head).
+        """
+        head = read_ticket_head(file_path)
+        if head.frontmatter is None:
+            return None, head
+        return self._parse_frontmatter_text(head.frontmatter), head
+
+    def _build_ticket(
+        self,
+        file_path: Path,
+        frontmatter: Optional[dict],
+        title: str,
+        body_offset: Optional[int] = None,
+        file_key: Optional[tuple[int, int]] = None,
+    ) -> Optional[Ticket]:
+        """Build a Ticket from parsed metadata.
 
-        # Parse frontmatter
-        frontmatter = self._parse_frontmatter(content)
+        Args:
+            file_path: Path to the ticket markdown file
+            frontmatter: Parsed frontmatter, or None if the file has none
+            title: Title from the markdown body
+            body_offset: Byte offset of the body, if known
+            file_key: (mtime_ns, size) of the file the offset belongs to
+
+        Returns:
+            Ticket or None if there is no frontmatter
+        """
         if frontmatter is None:
             logger.warning(f"No frontmatter found in {file_path.name}")
             return None
 
-        # Extract title from markdown body
-        title = self._extract_title(content)
-
-        # Build ticket object
-        return Ticket(
+        # CompactTicket freezes lists into tuples, so there is nothing to copy
+        ticket_class, copy = (CompactTicket, _identity) if self.compact else (Ticket, _copy)
+        return ticket_class(
             id=frontmatter.get("id", file_path.stem),
             status=frontmatter.get("status", "unknown"),
             title=title,
             file_path=file_path,
-            deps=frontmatter.get("deps", []),
-            tags=frontmatter.get("tags", []),
+            deps=copy(frontmatter.get("deps", [])),
+            tags=copy(frontmatter.get("tags", [])),
             assignee=frontmatter.get("assignee"),
             external_ref=frontmatter.get("external-ref"),
             priority=frontmatter.get("priority"),
             ticket_type=frontmatter.get("type"),
             created=frontmatter.get("created"),
-            links=frontmatter.get("links", []),
+            links=copy(frontmatter.get("links", [])),
+            _body_offset=body_offset,
+            _file_key=file_key,
         )
 
     def _parse_frontmatter(self, content: str) -> Optional[dict]:
@@ -246,12 +637,25 @@ class TicketLoader:
         match = FRONTMATTER_PATTERN.match(content)
         if not match:
             return None
+        return self._parse_frontmatter_text(match.group(1))
+
+    def _parse_frontmatter_text(self, frontmatter_text: str) -> dict:
+        """Parse frontmatter text (without delimiters).
 
-        frontmatter_text = match.group(1)
+        The `tk` grammar is parsed by hand; other frontmatter goes through YAML.
+
+        Args:
+            frontmatter_text: The frontmatter between the `---` lines
 
+        Returns:
+            Dictionary of frontmatter fields
+        """
         if HAS_YAML:
+            fields = parse_tk_frontmatter(frontmatter_text)
+            if fields is not None:
+                return fields
             try:
-                return yaml.safe_load(frontmatter_text) or {}
+                return yaml.load(frontmatter_text, Loader=_YAML_LOADER) or {}
             except yaml.YAMLError as e:
                 logger.warning(f"YAML parsing failed, trying basic parser: {e}")
                 # Fallback to basic parser on YAML failure
@@ -443,6 +847,23 @@ class TicketLoader:
             raise TicketLoadError("Tickets not loaded. Call load_all() first.")
         return self._tickets.copy()
 
+    @property
+    def by_id(self) -> Mapping[str, Ticket]:
+        """Get a read-only view of the loaded tickets by ID.
+
+        The view reflects later `refresh()` calls without copying the
+        tickets; `load_all()` replaces it.
+
+        Returns:
+            Mapping from ticket ID to ticket
+
+        Raises:
+            TicketLoadError: If tickets haven't been loaded
+        """
+        if not self._loaded:
+            raise TicketLoadError("Tickets not loaded. Call load_all() first.")
+        return MappingProxyType(self._by_id)
+
     @property
     def count_by_status(self) -> dict[str, int]:
         """Get count of tickets by status.
@@ -459,6 +880,118 @@ class TicketLoader:
         return counts
 
 
+def _resolve_pool(pool: Optional[str]) -> str:
+    pool = pool or os.environ.get("TF_TICKET_POOL", "").strip().lower() or "thread"
+    if pool not in LOAD_POOLS:
+        logger.warning(f"Unknown ticket load pool {pool!r}, using threads")
+        return "thread"
+    return pool
+
+
+def _resolve_workers(workers: Optional[int], pool: str) -> int:
+    if workers is None:
+        raw = os.environ.get("TF_TICKET_WORKERS", "").strip()
+        try:
+            workers = int(raw) if raw else None
+        except ValueError:
+            logger.warning(f"Ignoring invalid TF_TICKET_WORKERS={raw!r}")
+    if workers is None:
+        workers = (os.cpu_count() or 1) if pool == "process" else DEFAULT_LOAD_WORKERS
+    return max(1, workers)
+
+
+def _stat_chunk(entries: list[os.DirEntry]) -> list[Optional[os.stat_result]]:
+    stats: list[Optional[os.stat_result]] = []
+    for entry in entries:
+        try:
+            stats.append(entry.stat())
+        except OSError:
+            stats.append(None)
+    return stats
+
+
+def _read_chunk(loader: TicketLoader, paths: list[str]) -> list[Any]:
+    """Pool task: _read_metadata() for each path, with exceptions returned in place."""
+    results: list[Any] = []
+    for path in paths:
+        try:
+            results.append(loader._read_metadata(Path(path)))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+def _copy(value: Any) -> Any:
+    """Copy list fields so tickets never share lists with cached metadata."""
+    return list(value) if isinstance(value, list) else value
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if type(value) is str else value
+
+
+def _freeze(value: Any) -> Any:
+    """Tuple of interned items for list fields (other values are kept as parsed)."""
+    if isinstance(value, (list, tuple)):
+        return tuple(_intern(item) for item in value)
+    return value
+
+
+# One Path object per tickets directory, shared by all CompactTickets in it
+_SHARED_DIRS: dict[str, Path] = {}
+
+
+def _shared_dir(directory: Path) -> Path:
+    return _SHARED_DIRS.setdefault(str(directory), directory)
+
+
+def _read_body(file_path: Path, body_offset: Optional[int], file_key: Optional[tuple[int, int]]) -> str:
+    """Read a ticket body without its frontmatter and title line.
+
+    Raises:
+        OSError: If the file cannot be read.
+    """
+    body_content = _read_body_at_offset(file_path, body_offset, file_key)
+    if body_content is None:
+        content = file_path.read_text(encoding="utf-8")
+        # Extract body after frontmatter
+        match = FRONTMATTER_PATTERN.match(content)
+        if match:
+            body_content = match.group(2)
+        else:
+            body_content = content
+
+    # Remove title line if present
+    lines = body_content.split("\n")
+    if lines and lines[0].startswith("# "):
+        body_content = "\n".join(lines[1:]).lstrip("\n")
+    return body_content
+
+
+def _read_body_at_offset(
+    file_path: Path, body_offset: Optional[int], file_key: Optional[tuple[int, int]]
+) -> Optional[str]:
+    """Read the body by seeking past the frontmatter.
+
+    Returns:
+        The body with newlines normalized like read_text(), or None if
+        the offset is unknown or the file changed since it was read.
+    """
+    if body_offset is None or file_key is None:
+        return None
+    with open(file_path, "rb") as handle:
+        stat = os.fstat(handle.fileno())
+        if (stat.st_mtime_ns, stat.st_size) != file_key:
+            return None
+        handle.seek(body_offset)
+        data = handle.read()
+    return data.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+
+
 def format_ticket_list(tickets: list[Ticket], show_tags: bool = False) -> str:
     """Format a list of tickets for display.
 
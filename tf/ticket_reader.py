@@ -0,0 +1,184 @@
+"""Fast reader for `tk` ticket files.
+
+TicketLoader used to read each ticket file completely, match the DOTALL
+frontmatter pattern over the whole content, parse the frontmatter with
+PyYAML's pure-Python loader and match the pattern again to find the title.
+This module does the same work with less of it:
+
+- read_ticket_head() reads only the leading bytes of the file, up to the
+  closing `---` and the first `#` heading, and records the byte offset of
+  the body so Ticket.body can seek straight to it.
+- parse_tk_frontmatter() parses the restricted grammar `tk` writes
+  (`key: scalar` lines and flat `[a, b]` lists of plain words) by hand and
+  returns None for anything else, in which case the caller falls back to
+  YAML. Values it accepts parse to exactly what yaml.safe_load returns
+  (ints, `null`-free plain strings, dates and UTC timestamps); everything
+  ambiguous (quotes, comments, booleans, floats, octal-looking numbers,
+  nested structures) is left to YAML.
+
+Run `python scripts/bench_ticket_reader.py` to compare both paths.
+"""
+
+from __future__ import annotations
+
+import codecs
+import os
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any, Optional
+
+# Same delimiters as ticket_loader.FRONTMATTER_PATTERN, without the trailing body group
+HEAD_PATTERN = re.compile(r"^---\s*\r?\n(.*?)\r?\n---\s*\r?\n", re.DOTALL)
+
+# Same as ticket_loader.TITLE_PATTERN
+TITLE_PATTERN = re.compile(r"^#\s*(.+)$", re.MULTILINE)
+
+# First read size; doubled while the frontmatter or title is not complete
+READ_CHUNK = 4096
+
+_LINE = re.compile(r"([A-Za-z_][A-Za-z0-9_-]*):(?: +(.*))?")
+# Plain words YAML reads as strings (':' only between characters, so no flow mappings)
+_WORD = re.compile(r"[A-Za-z_][A-Za-z0-9_./@+-]*(?::[A-Za-z0-9_./@+-]+)*")
+# Block values may also contain single spaces ("John Smith")
+_PHRASE = re.compile(r"[A-Za-z_][A-Za-z0-9_./@+()-]*(?: [A-Za-z0-9_./@+()-]+)*")
+_INT = re.compile(r"0|-?[1-9][0-9]*")
+_DATE = re.compile(r"(\d{4})-(\d\d)-(\d\d)")
+_UTC_TIMESTAMP = re.compile(r"(\d{4})-(\d\d)-(\d\d)T(\d\d):(\d\d):(\d\d)Z")
+
+# Plain words that YAML 1.1 resolves to booleans or null (any case, to be safe)
+_YAML_WORDS = frozenset({"true", "false", "yes", "no", "on", "off", "null"})
+
+# parse_tk_frontmatter() result for values it does not handle
+_FALLBACK = object()
+
+
+@dataclass
+class TicketHead:
+    """The parts of a ticket file needed for its metadata.
+
+    Attributes:
+        frontmatter: Raw frontmatter text, or None if the file has none
+        title: First `#` heading after the frontmatter ("" if none)
+        body_offset: Byte offset where the body (after the frontmatter) starts
+        mtime_ns: Modification time of the file that was read
+        size: Size of the file that was read
+    """
+
+    frontmatter: Optional[str]
+    title: str
+    body_offset: int
+    mtime_ns: int
+    size: int
+
+
+def read_ticket_head(path: Path, chunk_size: int = READ_CHUNK) -> TicketHead:
+    """Read the frontmatter and title of a ticket file without reading the body.
+
+    Matches ticket_loader.FRONTMATTER_PATTERN and TITLE_PATTERN applied to
+    the whole file; reading stops once neither match can change.
+
+    Raises:
+        OSError: If the file cannot be read.
+        UnicodeDecodeError: If the part read is not valid UTF-8.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    text = ""
+    frontmatter: Optional[str] = None
+    body_start: Optional[int] = None
+    title: Optional[str] = None
+
+    with open(path, "rb") as handle:
+        stat = os.fstat(handle.fileno())
+        eof = False
+        while not eof:
+            chunk = handle.read(chunk_size)
+            chunk_size *= 2
+            eof = not chunk
+            text += decoder.decode(chunk, final=eof)
+
+            if body_start is None:
+                if not text.startswith("---"):
+                    if len(text) < 3 and not eof:
+                        continue
+                    body_start = 0
+                else:
+                    match = HEAD_PATTERN.match(text)
+                    # The closing delimiter's trailing whitespace may continue in the next chunk
+                    if match and (match.end() < len(text) or eof):
+                        frontmatter, body_start = match.group(1), match.end()
+                    elif eof:
+                        body_start = 0
+                    else:
+                        continue
+
+            # body_start is 0 or follows a newline, so `^` still anchors correctly
+            match = TITLE_PATTERN.search(text, body_start)
+            if match and (match.end() < len(text) or eof):
+                title = match.group(1).strip()
+                break
+
+    body_offset = len(text[:body_start].encode("utf-8")) if body_start else 0
+    return TicketHead(frontmatter, title or "", body_offset, stat.st_mtime_ns, stat.st_size)
+
+
+def parse_tk_frontmatter(text: str) -> Optional[dict[str, Any]]:
+    """Parse frontmatter in the restricted `tk` grammar.
+
+    Returns:
+        The parsed fields (equal to yaml.safe_load's result), or None if
+        the text uses anything outside the grammar and needs YAML.
+    """
+    result: dict[str, Any] = {}
+    for line in text.split("\n"):
+        line = line.rstrip()
+        if not line or line.startswith("#"):
+            continue
+        match = _LINE.fullmatch(line)
+        if match is None or match.group(1).lower() in _YAML_WORDS:
+            return None
+        value = _parse_value(match.group(2) or "")
+        if value is _FALLBACK:
+            return None
+        result[match.group(1)] = value
+    return result
+
+
+def _parse_value(value: str) -> Any:
+    if not value:
+        return None
+    if value[0] == "[":
+        if value[-1] != "]":
+            return _FALLBACK
+        inner = value[1:-1].strip()
+        if not inner:
+            return []
+        items = []
+        for item in inner.split(","):
+            parsed = _parse_scalar(item.strip(), _WORD)
+            if parsed is _FALLBACK or parsed is None:
+                return _FALLBACK
+            items.append(parsed)
+        return items
+    return _parse_scalar(value, _PHRASE)
+
+
+def _parse_scalar(value: str, words: re.Pattern) -> Any:
+    if not value:
+        return None
+    if words.fullmatch(value):
+        return _FALLBACK if value.lower() in _YAML_WORDS else value
+    if _INT.fullmatch(value):
+        return int(value)
+    try:
+        match = _UTC_TIMESTAMP.fullmatch(value)
+        if match:
+            return datetime(*(int(part) for part in match.groups()), tzinfo=timezone.utc)
+        match = _DATE.fullmatch(value)
+        if match:
+            return date(*(int(part) for part in match.groups()))
+    except ValueError:
+        # Out-of-range dates: let YAML report them as before
+        return _FALLBACK
+    return _FALLBACK
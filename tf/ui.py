@@ -720,6 +720,9 @@ def main(argv: Optional[list[str]] = None) -> int:
         show_full_description: reactive[bool] = reactive(False)
         DESCRIPTION_LIMIT: int = 2500
         
+        # Kept across refreshes so only changed ticket files are re-parsed
+        classifier: Optional[BoardClassifier] = None
+        
         def compose(self) -> ComposeResult:
             """Compose the ticket board layout."""
             with Horizontal():
@@ -764,10 +767,11 @@ def main(argv: Optional[list[str]] = None) -> int:
             self.load_tickets()
         
         def load_tickets(self) -> None:
-            """Load and classify tickets from disk."""
+            """Load and classify tickets from disk (re-parsing only changed files on refresh)."""
             try:
-                classifier = BoardClassifier()
-                self.board_view = classifier.classify_all()
+                if self.classifier is None:
+                    self.classifier = BoardClassifier()
+                self.board_view = self.classifier.refresh()
                 self.update_board()
                 self.update_detail_counts()
             except Exception as e:
@@ -1,4 +1,4 @@
-"""Shared CLI utility module for root resolution and JSON helpers.
+"""Shared CLI utility module for root resolution, JSON and file helpers.
 
 This module provides common utility functions used across multiple CLI modules
 to avoid code duplication.
@@ -7,8 +7,19 @@ to avoid code duplication.
 from __future__ import annotations
 
 import json
+import logging
+import os
+import tempfile
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterator, Optional, Union
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
 
 
 def read_json(path: Path) -> Dict[str, Any]:
@@ -68,3 +79,104 @@ def merge(a: Dict[str, Any], b: Dict[str, Any]) -> Dict[str, Any]:
         else:
             out[k] = v
     return out
+
+
+def _file_mode() -> int:
+    """Mode open() gives new files: 0666 minus the umask (which can only be read by setting it)."""
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+# Read once at import: toggling the umask on every write would race with
+# threads creating files in between (the parallel loop writes from workers).
+_FILE_MODE = _file_mode()
+
+
+def atomic_write_text(path: Union[str, Path], text: str, *, fsync: bool = False) -> Path:
+    """Replace a file's content atomically using temp file + rename.
+
+    Readers see either the old or the new content, never a partial file.
+    The file gets the permissions open() would give it under the umask the
+    process started with (not mkstemp's 0600), since progress files, metrics
+    and state are read by other users and tools.
+
+    Args:
+        path: File to write. Its parent directory is created if missing.
+        text: Content to write (UTF-8).
+        fsync: Flush the data to disk before the rename, so the new content
+            also survives a power loss or reboot.
+
+    Returns:
+        The path written.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Use a temp file in the same directory to ensure rename is atomic
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        if hasattr(os, "fchmod"):
+            os.fchmod(fd, _FILE_MODE)
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            handle.write(text)
+            if fsync:
+                handle.flush()
+                os.fsync(handle.fileno())
+        os.replace(temp_path, path)
+    except Exception:
+        # Clean up temp file on failure
+        try:
+            os.unlink(temp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    return path
+
+
+@contextmanager
+def locked_file(
+    path: Union[str, Path], *, record_lock: bool = False, required: bool = True
+) -> Iterator[Optional[int]]:
+    """Hold an exclusive advisory lock on a file or directory.
+
+    Serialises writers across threads and processes. A missing lock file is
+    created; a directory is locked itself, so no lock file is left behind.
+    Where fcntl is not available (Windows) the path is opened but not locked.
+
+    Args:
+        path: Lock file or directory to lock.
+        record_lock: Take a POSIX record lock (lockf), which NFS supports via
+            lockd, instead of flock. Only valid for files.
+        required: If False, failing to open or lock the path is logged and
+            the block runs without the lock instead of raising.
+
+    Yields:
+        The open descriptor (files are opened for appending), or None if the
+        path could not be opened and `required` is False.
+    """
+    path = Path(path)
+    try:
+        if path.is_dir():
+            fd = os.open(path, os.O_RDONLY)
+        else:
+            fd = os.open(path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o666)
+    except OSError as e:
+        if required:
+            raise
+        logger.debug(f"Cannot open {path} for locking: {e}. Continuing without a lock.")
+        yield None
+        return
+    try:
+        try:
+            if fcntl is not None:
+                lock = fcntl.lockf if record_lock else fcntl.flock
+                lock(fd, fcntl.LOCK_EX)
+        except OSError as e:
+            if required:
+                raise
+            logger.debug(f"Cannot lock {path}: {e}. Continuing without a lock.")
+        yield fd
+    finally:
+        # Closing the descriptor releases the lock
+        os.close(fd)
+
@@ -99,7 +99,7 @@ def get_board_data():
         Note: An empty BoardView (0 tickets) is valid and truthy.
     """
     try:
-        classifier = BoardClassifier()
+        classifier = BoardClassifier(loader=TicketLoader(compact=True))
         board_view = classifier.classify_all()
         return board_view
     except Exception as e:
@@ -235,7 +235,7 @@ async def index(request):
 async def ticket_detail(request, ticket_id: str):
     """Individual ticket detail page."""
     try:
-        loader = TicketLoader()
+        loader = TicketLoader(compact=True)
         tickets = loader.load_all()
         
         ticket_map = {t.id: t for t in tickets}